@@ -0,0 +1,109 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.utilities import utils_bvh_reader
+from src.math.animation_baking import bake_bvh_frames, compress_clip
+from src.math.quaternion import slerp_quats
+
+"""
+Memory and decode throughput of compressed skeletal clips (src/math/animation_baking.py) against the raw float32
+arrays. Each BVH file is baked to 30 fps translations, quaternions and scales, then compressed with the default
+tolerances. "raw" decoding interpolates between the two baked frames around each time (lerp and slerp in numpy);
+"compressed" decodes the reduced, quantized tracks with numba, for one character or for many at once. "ratio" is
+the size of the baked float32 arrays divided by the size of each representation.
+
+Usage:
+    python benchmarks/bench_animation_baking.py [bvh filenames]
+
+BVH filenames are relative to resources/bvh (default: walk.bvh)
+"""
+
+BVH_DIR = os.path.join(path, "resources", "bvh")
+DEFAULT_FILENAMES = ["walk.bvh"]
+NUM_DECODED_FRAMES = 1_000
+NUM_CHARACTERS = 1_000
+
+
+def decode_raw(baked: dict, frame_rate: float, time_value: float, outputs: dict):
+
+    num_frames = baked["rotation"].shape[0]
+    frame_position = min(max(time_value * frame_rate, 0.0), num_frames - 1)
+    key = min(int(frame_position), num_frames - 2)
+    alpha = frame_position - key
+    for channel_path, output in outputs.items():
+        if channel_path == "rotation":
+            output[:] = slerp_quats(baked[channel_path][key], baked[channel_path][key + 1], alpha)
+        else:
+            output[:] = baked[channel_path][key] * (1.0 - alpha) + baked[channel_path][key + 1] * alpha
+
+
+def main():
+
+    filenames = sys.argv[1:] if len(sys.argv) > 1 else DEFAULT_FILENAMES
+
+    for filename in filenames:
+
+        header, positions, euler_rotations = utils_bvh_reader.load_bvh(fpath=os.path.join(BVH_DIR, filename))
+        baked = bake_bvh_frames(positions=positions,
+                                euler_rotations=euler_rotations,
+                                offsets=header[utils_bvh_reader.BVH_HEADER_KEY_OFFSETS],
+                                position_columns=header[utils_bvh_reader.BVH_HEADER_KEY_POSITION_COLUMNS],
+                                rotation_orders=header[utils_bvh_reader.BVH_HEADER_KEY_ROTATION_ORDERS],
+                                frame_period=header[utils_bvh_reader.BVH_HEADER_KEY_FRAME_PERIOD])
+
+        t0 = time.perf_counter()
+        clip = compress_clip(translations=baked["translation"], rotations=baked["rotation"], scales=baked["scale"])
+        compress_time = time.perf_counter() - t0
+        num_frames, num_bones = baked["rotation"].shape[:2]
+
+        print(f"\n{filename}: {num_frames} frames at {clip.frame_rate:g} fps, {num_bones} bones "
+              f"(compression took {compress_time * 1000:.1f} ms, including numba compilation if not cached)")
+        print(f"  {'data':<36}{'size [KB]':>10}{'ratio':>8}")
+        baked_nbytes = sum(array.nbytes for array in baked.values())
+        for label, nbytes in [("BVH euler + positions (float32)", positions.nbytes + euler_rotations.nbytes),
+                              ("baked TRS (float32)", baked_nbytes),
+                              ("compressed", clip.nbytes)]:
+            print(f"  {label:<36}{nbytes / 1024:>10.1f}{baked_nbytes / nbytes:>8.1f}")
+        print(f"  kept keys: translation {clip.num_keys('translation')}, rotation {clip.num_keys('rotation')}, "
+              f"scale {clip.num_keys('scale')} out of {num_frames * num_bones} each")
+
+        times = np.random.default_rng(0).uniform(0.0, clip.duration, NUM_DECODED_FRAMES)
+        single = {channel_path: np.empty_like(array[0]) for channel_path, array in baked.items()}
+        batched = {channel_path: np.empty((NUM_CHARACTERS,) + array.shape[1:], dtype=np.float32)
+                   for channel_path, array in baked.items()}
+
+        # Compile numba kernels before timing
+        clip.decode(times=times[0], translations_out=single["translation"], rotations_out=single["rotation"],
+                    scales_out=single["scale"])
+
+        t0 = time.perf_counter()
+        for time_value in times:
+            decode_raw(baked=baked, frame_rate=clip.frame_rate, time_value=time_value, outputs=single)
+        raw_time = (time.perf_counter() - t0) / times.size
+
+        t0 = time.perf_counter()
+        for time_value in times:
+            clip.decode(times=time_value, translations_out=single["translation"], rotations_out=single["rotation"],
+                        scales_out=single["scale"])
+        compressed_time = (time.perf_counter() - t0) / times.size
+
+        t0 = time.perf_counter()
+        clip.decode(times=times[:NUM_CHARACTERS], translations_out=batched["translation"],
+                    rotations_out=batched["rotation"], scales_out=batched["scale"])
+        batched_time = (time.perf_counter() - t0) / NUM_CHARACTERS
+
+        print(f"  {'decode':<36}{'per pose [us]':>14}{'Mbones/s':>10}")
+        for label, elapsed in [("raw, one pose at a time", raw_time),
+                               ("compressed, one pose at a time", compressed_time),
+                               (f"compressed, {NUM_CHARACTERS} poses at once", batched_time)]:
+            print(f"  {label:<36}{elapsed * 1e6:>14.1f}{num_bones / elapsed / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core import constants
+from src.core.file_loaders.file_loader_gltf import FileLoaderGLTF
+from src.math.animation_sampler import AnimationSampler
+from src.math.quaternion import slerp_quat
+
+"""
+Time to sample every channel of a GLTF animation, for one frame (playback) and for many frames at once (baking).
+Compares a per-channel python loop (one searchsorted and one interpolation per channel, as a straightforward
+implementation would do) against AnimationSampler, which samples all channels of a kind in one vectorized pass.
+
+Usage:
+    python benchmarks/bench_animation_sampler.py
+"""
+
+MESHES_DIR = os.path.join(path, "resources", "meshes")
+MESH_FILENAMES = ["BrainStem.glb", "situp_to_iddle.gltf"]
+NUM_BAKED_FRAMES = 1_000
+NUM_REPEATS = 20
+
+
+def sample_per_channel(sampler: AnimationSampler, sample_time: float, output: np.ndarray):
+
+    for channel_index in range(sampler.interpolations.size):
+        first_key = sampler.first_keys[channel_index]
+        timestamps = sampler.timestamps[first_key:sampler.last_keys[channel_index] + 1]
+        values = sampler.values[first_key:sampler.last_keys[channel_index] + 1]
+
+        channel_time = min(max(sample_time, timestamps[0]), timestamps[-1])
+        key = min(max(np.searchsorted(timestamps, channel_time, side="right") - 1, 0), max(timestamps.size - 2, 0))
+        next_key = min(key + 1, timestamps.size - 1)
+        delta_time = timestamps[next_key] - timestamps[key]
+        alpha = (channel_time - timestamps[key]) / delta_time if delta_time > 0 else 0.0
+        if sampler.interpolations[channel_index] == constants.ANIMATION_INTERPOLATION_STEP:
+            alpha = float(alpha >= 1.0)
+
+        if sampler.is_rotation:
+            output[channel_index] = slerp_quat(values[key], values[next_key], np.float32(alpha))
+        else:
+            output[channel_index] = values[key] + alpha * (values[next_key] - values[key])
+
+
+def main():
+
+    print(f"{'mesh':>22}{'channels':>10}{'loop [ms]':>11}{'vectorized [ms]':>17}"
+          f"{f'bake {NUM_BAKED_FRAMES} loop [ms]':>22}{f'bake {NUM_BAKED_FRAMES} vectorized [ms]':>28}")
+    for mesh_filename in MESH_FILENAMES:
+
+        all_resources = {}
+        FileLoaderGLTF(all_resources=all_resources).load(resource_uid="mesh",
+                                                         fpath=os.path.join(MESHES_DIR, mesh_filename))
+        data_blocks = all_resources["mesh/animation_0"].data_blocks
+        samplers = [AnimationSampler.from_data_blocks(data_blocks=data_blocks, path=channel_path)
+                    for channel_path in constants.RESOURCE_ANIMATION_GLTF_CHANNELS]
+        num_channels = sum(sampler.interpolations.size for sampler in samplers)
+        outputs = [np.empty_like(sampler.values[:sampler.interpolations.size]) for sampler in samplers]
+        start_time = min(sampler.start_time for sampler in samplers)
+        end_time = max(sampler.end_time for sampler in samplers)
+        sample_time = 0.5 * (start_time + end_time)
+        baked_times = np.linspace(start_time, end_time, NUM_BAKED_FRAMES)
+
+        # Compile numba kernels before timing
+        for sampler, output in zip(samplers, outputs):
+            sample_per_channel(sampler=sampler, sample_time=sample_time, output=output)
+
+        t0 = time.perf_counter()
+        for _ in range(NUM_REPEATS):
+            for sampler, output in zip(samplers, outputs):
+                sample_per_channel(sampler=sampler, sample_time=sample_time, output=output)
+        loop_time = (time.perf_counter() - t0) / NUM_REPEATS
+
+        t0 = time.perf_counter()
+        for _ in range(NUM_REPEATS):
+            for sampler in samplers:
+                sampler.sample(times=sample_time)
+        vectorized_time = (time.perf_counter() - t0) / NUM_REPEATS
+
+        t0 = time.perf_counter()
+        for baked_time in baked_times:
+            for sampler, output in zip(samplers, outputs):
+                sample_per_channel(sampler=sampler, sample_time=baked_time, output=output)
+        bake_loop_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        for sampler in samplers:
+            sampler.sample(times=baked_times)
+        bake_vectorized_time = time.perf_counter() - t0
+
+        print(f"{mesh_filename:>22}{num_channels:>10}{loop_time * 1000:>11.3f}{vectorized_time * 1000:>17.3f}"
+              f"{bake_loop_time * 1000:>22.1f}{bake_vectorized_time * 1000:>28.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import warnings
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.utilities import utils_bvh_reader
+from src.core.file_loaders.file_loader_bvh import FileLoaderBVH
+
+"""
+Compares the pandas-based BVHReader (plus the per-bone column matching FileLoaderBVH used to do) against the
+streaming BVH parser used by FileLoaderBVH now.
+
+Usage:
+    python benchmarks/bench_bvh_loader.py
+"""
+
+BVH_DIR = os.path.join(path, "resources", "bvh")
+NUM_REPETITIONS = 10
+
+
+def legacy_load(fpath: str) -> tuple:
+
+    skeleton_df, animation_df, frame_period = utils_bvh_reader.BVHReader().load(fpath=fpath)
+    bone_names = skeleton_df["name"].tolist()
+    animation_columns = animation_df.columns.tolist()
+
+    shape = (animation_df.index.size, len(bone_names), 3)
+    positions = np.zeros(shape, dtype=np.float32)
+    rotations = np.zeros(shape, dtype=np.float32)
+    for bone_index, bone_name in enumerate(bone_names):
+        for column_name in [name for name in animation_columns if bone_name in name]:
+            for axis_index, axis in enumerate("xyz"):
+                if column_name.endswith(f"pos_{axis}"):
+                    positions[:, bone_index, axis_index] = animation_df[column_name]
+                if column_name.endswith(f"rot_{axis}"):
+                    rotations[:, bone_index, axis_index] = animation_df[column_name]
+
+    return positions, rotations
+
+
+def new_load(fpath: str) -> tuple:
+    all_resources = {}
+    FileLoaderBVH(all_resources=all_resources).load(resource_uid="benchmark", fpath=fpath)
+    animation = all_resources["benchmark/animation_0"]
+    return animation.data_blocks["animation_position"].data, animation.data_blocks["animation_rotation"].data
+
+
+def time_function(function, fpath: str) -> float:
+    function(fpath)  # Warm-up
+    timings = []
+    for _ in range(NUM_REPETITIONS):
+        t0 = time.perf_counter()
+        function(fpath)
+        timings.append(time.perf_counter() - t0)
+    return min(timings)
+
+
+def main():
+
+    warnings.simplefilter("ignore")
+
+    print(f"{'file':<40}{'frames':>8}{'bones':>7}{'pandas [ms]':>14}{'streaming [ms]':>16}{'speed-up':>10}")
+    for fname in sorted(os.listdir(BVH_DIR)):
+        fpath = os.path.join(BVH_DIR, fname)
+        positions, _ = new_load(fpath)
+        legacy_time = time_function(legacy_load, fpath)
+        new_time = time_function(new_load, fpath)
+        print(f"{fname:<40}{positions.shape[0]:>8}{positions.shape[1]:>7}{legacy_time * 1000:>14.2f}"
+              f"{new_time * 1000:>16.2f}{legacy_time / new_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import sys
+import os
+import time
+import logging
+import tempfile
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core.data_manager import DataManager, FILE_LOADER_CLASSES
+
+"""
+Measures cold vs warm start scene loading with the DataManager's on-disk resource cache. Every supported file in
+resources/meshes and resources/bvh is loaded three times:
+    - without cache
+    - cold: cache enabled but empty, so it is also written
+    - warm: everything comes from the memory-mapped cache
+
+Usage:
+    python benchmarks/bench_data_manager_cache.py
+"""
+
+RESOURCE_DIRS = [os.path.join(path, "resources", "meshes"),
+                 os.path.join(path, "resources", "bvh")]
+
+
+def load_all(resources: dict, cache_dir) -> tuple:
+    logger = logging.getLogger("benchmark")
+    logger.propagate = False
+
+    data_manager = DataManager(logger=logger, cache_dir=cache_dir)
+    timings = {}
+    for data_group_id, fpath in resources.items():
+        t0 = time.perf_counter()
+        try:
+            data_manager.load_file(data_group_id=data_group_id, fpath=fpath)
+        except Exception:
+            continue
+        timings[data_group_id] = time.perf_counter() - t0
+
+    return timings
+
+
+def main():
+
+    resources = {}
+    for resource_dir in RESOURCE_DIRS:
+        for fname in sorted(os.listdir(resource_dir)):
+            _, extension = os.path.splitext(fname)
+            if extension in FILE_LOADER_CLASSES:
+                resources[fname] = os.path.join(resource_dir, fname)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        no_cache_timings = load_all(resources=resources, cache_dir=None)
+        cold_timings = load_all(resources=resources, cache_dir=cache_dir)
+        warm_timings = load_all(resources=resources, cache_dir=cache_dir)
+
+    print(f"{'file':<40}{'no cache [ms]':>16}{'cold [ms]':>12}{'warm [ms]':>12}{'speed-up':>10}")
+    for data_group_id in warm_timings:
+        print(f"{data_group_id:<40}{no_cache_timings[data_group_id] * 1000:>16.2f}"
+              f"{cold_timings[data_group_id] * 1000:>12.2f}{warm_timings[data_group_id] * 1000:>12.2f}"
+              f"{no_cache_timings[data_group_id] / warm_timings[data_group_id]:>9.1f}x")
+
+    total_no_cache = sum(no_cache_timings[key] for key in warm_timings)
+    total_warm = sum(warm_timings.values())
+    print(f"{'total':<40}{total_no_cache * 1000:>16.2f}{sum(cold_timings.values()) * 1000:>12.2f}"
+          f"{total_warm * 1000:>12.2f}{total_no_cache / total_warm:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import sys
+import os
+import time
+import logging
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core.data_manager import DataManager, FILE_LOADER_CLASSES
+
+"""
+Loads every supported file inside resources/meshes, first one by one with DataManager.load_file() and then in
+batch with DataManager.load_files() using an increasing number of worker processes.
+
+Usage:
+    python benchmarks/bench_data_manager_load_files.py
+"""
+
+MESHES_DIR = os.path.join(path, "resources", "meshes")
+
+
+def main():
+
+    logger = logging.getLogger("benchmark")
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+
+    resources = {}
+    for fname in sorted(os.listdir(MESHES_DIR)):
+        _, extension = os.path.splitext(fname)
+        if extension in FILE_LOADER_CLASSES:
+            resources[fname] = os.path.join(MESHES_DIR, fname)
+
+    # Sequential baseline
+    data_manager = DataManager(logger=logger)
+    t0 = time.perf_counter()
+    num_loaded = 0
+    for data_group_id, fpath in resources.items():
+        try:
+            num_loaded += int(data_manager.load_file(data_group_id=data_group_id, fpath=fpath))
+        except Exception:
+            pass
+    sequential_time = time.perf_counter() - t0
+    print(f"{len(resources)} files, {os.cpu_count()} cores")
+    print(f"  sequential load_file()      : {sequential_time * 1000:10.1f} ms ({num_loaded} loaded)")
+
+    num_workers = 2
+    while True:
+        num_workers = min(num_workers, os.cpu_count())
+        data_manager = DataManager(logger=logger)
+        t0 = time.perf_counter()
+        results = data_manager.load_files(resources=resources, max_workers=num_workers)
+        elapsed_time = time.perf_counter() - t0
+        print(f"  load_files() {num_workers:>3} workers    : {elapsed_time * 1000:10.1f} ms "
+              f"({sum(results.values())} loaded, {sequential_time / elapsed_time:.2f}x)")
+        if num_workers == os.cpu_count():
+            break
+        num_workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+import sys
+import os
+import time
+import logging
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core import constants
+from src.core.scene import Scene
+from src.math.frustum import frustum_planes
+from src.systems.render_system.frustum_culler import FrustumCuller
+from src.utilities import utils_camera
+
+"""
+CPU cost per frame of culling every mesh in the scene before the render passes submit them (FrustumCuller):
+updating the world AABBs of all meshes from their world matrices, testing them against a camera's frustum, and
+selecting the shadow casters of a directional light for that camera. Meshes are boxes of random sizes and
+orientations scattered over a square field, seen by a perspective camera from one of its corners.
+
+Rows are added directly to the scene's component arrays, so no component objects (or GPU resources) are created.
+
+Usage:
+    python benchmarks/bench_frustum_culling.py [num_objects]
+
+"num_objects" can be given more than once (default: 10000, 100000)
+"""
+
+DEFAULT_NUM_OBJECTS = [10_000, 100_000]
+FIELD_SIZE = 1000.0
+NUM_FRAMES = 20
+
+
+def create_scene(num_objects: int) -> Scene:
+
+    rng = np.random.default_rng(0)
+    scene = Scene(logger=logging.getLogger("benchmark"))
+    entity_uids = np.arange(num_objects, dtype=np.int64)
+
+    transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    transform_arrays.add_rows(entity_uids=entity_uids)
+    world_matrices = transform_arrays.get("world_matrix")
+    rotations, _ = np.linalg.qr(rng.normal(size=(num_objects, 3, 3)))
+    world_matrices[:, :3, :3] = rotations
+    world_matrices[:, 0, 3] = rng.uniform(0.0, FIELD_SIZE, num_objects)
+    world_matrices[:, 2, 3] = -rng.uniform(0.0, FIELD_SIZE, num_objects)
+
+    mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+    mesh_arrays.add_rows(entity_uids=entity_uids[rng.permutation(num_objects)])
+    half_sizes = rng.uniform(0.5, 5.0, (num_objects, 3))
+    mesh_arrays.get("aabb_min")[:] = -half_sizes
+    mesh_arrays.get("aabb_max")[:] = half_sizes
+
+    return scene
+
+
+def time_frames(function) -> float:
+
+    function()
+    t0 = time.perf_counter()
+    for _ in range(NUM_FRAMES):
+        function()
+    return (time.perf_counter() - t0) / NUM_FRAMES
+
+
+def main():
+
+    all_num_objects = [int(value) for value in sys.argv[1:]] if len(sys.argv) > 1 else DEFAULT_NUM_OBJECTS
+
+    projection_matrix = utils_camera.perspective_projection(fov_rad=np.deg2rad(constants.CAMERA_FOV_DEG),
+                                                            aspect_ratio=16.0 / 9.0, z_near=0.1, z_far=500.0)
+    camera_matrix = np.eye(4, dtype=np.float32)
+    yaw = np.deg2rad(-45.0)
+    camera_matrix[:3, :3] = [[np.cos(yaw), 0.0, np.sin(yaw)], [0.0, 1.0, 0.0], [-np.sin(yaw), 0.0, np.cos(yaw)]]
+    camera_matrix[:3, 3] = [-5.0, 10.0, 5.0]
+    planes = frustum_planes(view_projection_matrix=projection_matrix @ np.linalg.inv(camera_matrix))
+    light_direction = np.array([0.6, -0.8, 0.0])
+
+    for num_objects in all_num_objects:
+
+        scene = create_scene(num_objects=num_objects)
+        frustum_culler = FrustumCuller()
+
+        t0 = time.perf_counter()
+        frustum_culler.update(scene=scene)
+        first_update = time.perf_counter() - t0
+
+        num_submitted = int(np.count_nonzero(frustum_culler.cull(scene=scene, planes=planes)))
+        num_casters = int(np.count_nonzero(frustum_culler.cull_shadow_casters(scene=scene, planes=planes,
+                                                                              light_direction=light_direction)))
+        print(f"\n{num_objects} objects: {num_submitted} submitted, {num_objects - num_submitted} culled, "
+              f"{num_casters} shadow casters, {NUM_FRAMES} frames")
+        print(f"  {'per frame':<50}{'[ms]':>10}")
+
+        results = [
+            ("first update (includes mesh to transform rows)", first_update),
+            ("world AABBs of all meshes", time_frames(lambda: frustum_culler.update(scene=scene))),
+            ("camera frustum test", time_frames(lambda: frustum_culler.cull(scene=scene, planes=planes))),
+            ("shadow caster test", time_frames(lambda: frustum_culler.cull_shadow_casters(
+                scene=scene, planes=planes, light_direction=light_direction))),
+            ("selecting the submitted rows", time_frames(lambda: np.flatnonzero(
+                frustum_culler.cull(scene=scene, planes=planes))))]
+
+        for label, elapsed in results:
+            print(f"  {label:<50}{elapsed * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
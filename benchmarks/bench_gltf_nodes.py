@@ -0,0 +1,72 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.utilities import utils_gltf_reader
+from src3.io.gltf_reader import GLTFReader
+
+"""
+Node hierarchy extraction on synthetic "crowd" scenes: a number of characters with a 50-bone skeleton each,
+parented to a single root. Compares the per-node GLTFReader.get_nodes() with quadratic parent search (still used
+by src/utilities/utils_gltf_reader.py) against src3's GLTFReader.get_node_arrays().
+
+Usage:
+    python benchmarks/bench_gltf_nodes.py
+"""
+
+NUM_BONES_PER_CHARACTER = 50
+NUM_NODES_LIST = [1_000, 5_000, 10_000, 100_000]
+MAX_LEGACY_NUM_NODES = 5_000  # Legacy version is O(N^2)
+
+
+def create_crowd_gltf_header(num_nodes: int) -> dict:
+
+    rng = np.random.default_rng(0)
+    nodes = [{"name": "root", "children": []}]
+    while len(nodes) < num_nodes:
+        character_root = len(nodes)
+        nodes[0]["children"].append(character_root)
+        num_bones = min(NUM_BONES_PER_CHARACTER, num_nodes - len(nodes))
+        for bone_index in range(num_bones):
+            node = {"name": f"bone_{len(nodes)}",
+                    "translation": rng.normal(size=3).tolist(),
+                    "rotation": [0.0, 0.0, 0.0, 1.0]}
+            if bone_index > 0:
+                parent = character_root + int(rng.integers(0, bone_index))
+                nodes[parent].setdefault("children", []).append(len(nodes))
+            nodes.append(node)
+
+    return {"scenes": [{"nodes": [0]}], "nodes": nodes}
+
+
+def main():
+
+    print(f"{'nodes':>8}{'get_nodes() [ms]':>20}{'get_node_arrays() [ms]':>25}{'speed-up':>10}")
+    for num_nodes in NUM_NODES_LIST:
+        gltf_header = create_crowd_gltf_header(num_nodes=num_nodes)
+
+        reader = GLTFReader()
+        reader.gltf_header = gltf_header
+        reader.get_node_arrays()  # Warm-up
+        t0 = time.perf_counter()
+        reader.get_node_arrays()
+        new_time = time.perf_counter() - t0
+
+        legacy_time = np.nan
+        if num_nodes <= MAX_LEGACY_NUM_NODES:
+            legacy_reader = utils_gltf_reader.GLTFReader()
+            legacy_reader.gltf_header = gltf_header
+            t0 = time.perf_counter()
+            legacy_reader.get_nodes()
+            legacy_time = time.perf_counter() - t0
+
+        print(f"{num_nodes:>8}{legacy_time * 1000:>20.2f}{new_time * 1000:>25.2f}{legacy_time / new_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import sys
+import os
+import time
+import subprocess
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+try:
+    import resource  # Not available on Windows
+except ImportError:
+    resource = None
+
+from src3.io.gltf_reader import GLTFReader
+
+"""
+Compares the default GLTFReader loading against the memory-mapped mode over every .gltf/.glb file inside
+resources/meshes. Each (file, mode) combination runs in its own process so that the peak RSS reported by
+the OS belongs to that load alone.
+
+Usage:
+    python benchmarks/bench_gltf_reader_mmap.py
+"""
+
+MESHES_DIR = os.path.join(path, "resources", "meshes")
+MODES = {"read": False, "mmap": True}
+
+
+def peak_rss_mb() -> float:
+    if resource is None:
+        return float("nan")
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return max_rss / (1024.0 * 1024.0) if sys.platform == "darwin" else max_rss / 1024.0
+
+
+def run_single(fpath: str, use_mmap: bool) -> None:
+    """
+    Worker entry point: loads a single file and prints "<time_to_first_mesh> <total_time> <peak_rss_before>
+    <peak_rss_after>" on stdout
+    """
+    rss_before = peak_rss_mb()
+
+    t0 = time.perf_counter()
+    reader = GLTFReader()
+    reader.load(gltf_fpath=fpath, use_mmap=use_mmap)
+    first_mesh = reader.get_mesh(index=0)
+    t1 = time.perf_counter()
+    _ = reader.get_meshes()
+    t2 = time.perf_counter()
+
+    # Touch the data so the mapped pages are really paged in and count towards the peak RSS
+    checksum = float(first_mesh["attributes"]["POSITION"].sum())
+
+    print(f"{t1 - t0:.6f} {t2 - t0:.6f} {rss_before:.2f} {peak_rss_mb():.2f} {checksum:.1f}")
+
+
+def main():
+
+    fpaths = sorted([os.path.join(MESHES_DIR, fname) for fname in os.listdir(MESHES_DIR)
+                     if fname.endswith((".gltf", ".glb"))])
+
+    print(f"{'file':<40}{'mode':<8}{'first mesh [ms]':>18}{'all meshes [ms]':>18}{'peak RSS delta [MB]':>22}")
+    for fpath in fpaths:
+        for mode_name, use_mmap in MODES.items():
+            result = subprocess.run([sys.executable, __file__, "--worker", fpath, mode_name],
+                                    capture_output=True,
+                                    text=True)
+            if result.returncode != 0:
+                error_message = result.stderr.strip().splitlines()[-1][:60]
+                print(f"{os.path.basename(fpath):<40}{mode_name:<8}  failed: {error_message}")
+                continue
+
+            first_mesh_time, total_time, rss_before, rss_after, _ = [float(value) for value in result.stdout.split()]
+            print(f"{os.path.basename(fpath):<40}{mode_name:<8}{first_mesh_time * 1000:>18.2f}"
+                  f"{total_time * 1000:>18.2f}{rss_after - rss_before:>22.2f}")
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) == 4 and sys.argv[1] == "--worker":
+        run_single(fpath=sys.argv[2], use_mmap=MODES[sys.argv[3]])
+    else:
+        main()
@@ -0,0 +1,78 @@
+import sys
+import os
+import time
+import tempfile
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src3.io.gltf_reader import GLTFReader
+from src3.io.gltf_writer import write_interleaved_glb
+
+"""
+Before/after benchmark of decoding accessors that live inside an interleaved (strided) buffer view. A synthetic GLB
+with POSITION, NORMAL and TEXCOORD_0 packed in a single 32-byte stride is generated on the fly.
+
+"before" reproduces the previous approach: b''.join() one slice per element, then np.frombuffer
+"after" is GLTFReader.decode_accessor(), which decodes the view with explicit strides
+
+Usage:
+    python benchmarks/bench_gltf_reader_strided.py [num_vertices]
+"""
+
+
+def decode_with_bytes_join(binary_data: np.ndarray, buffer_view: dict, accessor: dict) -> np.ndarray:
+    byte_offset = buffer_view.get("byteOffset", 0)
+    byte_stride = buffer_view["byteStride"]
+    num_elements = buffer_view["byteLength"] // byte_stride
+    joined = b''.join(binary_data[byte_offset + i * byte_stride: byte_offset + (i + 1) * byte_stride]
+                      for i in range(num_elements))
+
+    # The old code then assumed tightly packed data, which was wrong. Here we at least pick the right bytes
+    num_floats = byte_stride // 4
+    floats = np.frombuffer(joined, dtype=np.float32).reshape(-1, num_floats)
+    first_float = accessor.get("byteOffset", 0) // 4
+    return np.ascontiguousarray(floats[:, first_float:first_float + 3])
+
+
+def main(num_vertices: int):
+
+    rng = np.random.default_rng(0)
+    positions = rng.standard_normal((num_vertices, 3)).astype(np.float32)
+    normals = rng.standard_normal((num_vertices, 3)).astype(np.float32)
+    uvs = rng.random((num_vertices, 2)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        fpath = os.path.join(temp_dir, "interleaved.glb")
+        write_interleaved_glb(fpath=fpath, positions=positions, normals=normals, uvs=uvs)
+
+        reader = GLTFReader()
+        reader.load(gltf_fpath=fpath)
+        binary_data = reader.gltf_buffer_view_data[0]
+        buffer_view = dict(reader.gltf_header["bufferViews"][0], byteOffset=0)
+        accessor = reader.get_accessor(1)
+
+        t0 = time.perf_counter()
+        normals_before = decode_with_bytes_join(binary_data=binary_data, buffer_view=buffer_view, accessor=accessor)
+        t1 = time.perf_counter()
+        normals_after = reader.decode_accessor(accessor=accessor)
+        t2 = time.perf_counter()
+        normals_view = reader.decode_accessor(accessor=accessor, contiguous=False)
+        t3 = time.perf_counter()
+
+        np.testing.assert_array_equal(normals_before, normals)
+        np.testing.assert_array_equal(normals_after, normals)
+        np.testing.assert_array_equal(normals_view, normals)
+        reader.close()
+
+    print(f"Decoding NORMAL from an interleaved buffer view with {num_vertices} vertices")
+    print(f"  before (bytes join)         : {(t1 - t0) * 1000:10.3f} ms")
+    print(f"  after  (strided, contiguous): {(t2 - t1) * 1000:10.3f} ms")
+    print(f"  after  (strided view only)  : {(t3 - t2) * 1000:10.3f} ms")
+    print(f"  speed-up                    : {(t1 - t0) / (t2 - t1):10.1f}x")
+
+
+if __name__ == "__main__":
+    main(num_vertices=int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
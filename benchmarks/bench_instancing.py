@@ -0,0 +1,160 @@
+import sys
+import os
+import time
+import logging
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core import constants
+from src.core.scene import Scene
+from src.math.frustum import bounding_sphere, cull_instances, frustum_planes
+from src.systems.transform_system.transform_system import TransformSystem
+from src.utilities import utils_camera
+
+"""
+CPU cost per frame of drawing a crowd of instanced meshes (MultiTransform3D + InstanceBuffer): recomputing world
+matrices in the TransformSystem, uploading the dirty ones, and frustum culling them with the compacted indices
+upload. The crowd is a square grid of unit cubes seen by a perspective camera from one of its corners, so the
+larger the crowd, the smaller the fraction of it that is visible.
+
+Uploads are only measured if a headless OpenGL 4.3 context (EGL) can be created, and include waiting for the GPU
+to finish (ctx.finish()) after writing the matrices.
+
+Usage:
+    python benchmarks/bench_instancing.py [num_instances]
+
+"num_instances" can be given more than once (default: 10000, 100000)
+"""
+
+DEFAULT_NUM_INSTANCES = [10_000, 100_000]
+NUM_MOVED_INSTANCES = [100, 1_000]
+NUM_FRAMES = 20
+
+
+def create_crowd(num_instances: int) -> tuple:
+
+    scene = Scene(logger=logging.getLogger("benchmark"))
+    blueprint = {"name": "crowd",
+                 "components": [{"name": "transform_3d", "parameters": {}},
+                                {"name": "multi_transform_3d", "parameters": {"num_instances": str(num_instances)}}]}
+    entity_uid = scene.add_entity(entity_blueprint=blueprint)
+    multi_transform = scene.get_pool(component_type=constants.COMPONENT_TYPE_MULTI_TRANSFORM_3D)[entity_uid]
+    multi_transform.initialise()
+
+    side = int(np.ceil(np.sqrt(num_instances)))
+    grid = np.stack(np.unravel_index(np.arange(num_instances), (side, side)), axis=-1) * 3.0
+    local_matrices = np.tile(np.eye(4, dtype=np.float32), (num_instances, 1, 1))
+    local_matrices[:, 0, 3] = grid[:, 0]
+    local_matrices[:, 2, 3] = -grid[:, 1]
+    multi_transform.set_local_matrices(local_matrices=local_matrices)
+
+    transform_system = TransformSystem(logger=logging.getLogger("benchmark"), scene=scene, event_publisher=None,
+                                       action_publisher=None, data_manager=None, parameters={})
+    transform_system.update(elapsed_time=0.0, context=None)
+    return scene, entity_uid, multi_transform, transform_system
+
+
+def create_context():
+    try:
+        import moderngl
+        return moderngl.create_standalone_context(backend="egl", require=430)
+    except Exception:
+        return None
+
+
+def time_frames(function) -> float:
+
+    function()
+    t0 = time.perf_counter()
+    for _ in range(NUM_FRAMES):
+        function()
+    return (time.perf_counter() - t0) / NUM_FRAMES
+
+
+def main():
+
+    all_num_instances = [int(value) for value in sys.argv[1:]] if len(sys.argv) > 1 else DEFAULT_NUM_INSTANCES
+
+    ctx = create_context()
+    if ctx is None:
+        print("No headless OpenGL 4.3 context, uploads will not be measured")
+    else:
+        from src.systems.render_system.instance_buffer import InstanceBuffer
+
+    # A unit cube and a camera above the grid's corner, looking along the grid's diagonal
+    cube_vertices = np.array(np.meshgrid([-0.5, 0.5], [-0.5, 0.5], [-0.5, 0.5])).reshape((3, -1)).T
+    center, radius = bounding_sphere(vertices=cube_vertices)
+    projection_matrix = utils_camera.perspective_projection(fov_rad=np.deg2rad(constants.CAMERA_FOV_DEG),
+                                                            aspect_ratio=16.0 / 9.0, z_near=0.1, z_far=500.0)
+    camera_matrix = np.eye(4, dtype=np.float32)
+    yaw, pitch = np.deg2rad(-45.0), np.deg2rad(-20.0)
+    camera_matrix[:3, :3] = np.array([[np.cos(yaw), 0.0, np.sin(yaw)],
+                                      [0.0, 1.0, 0.0],
+                                      [-np.sin(yaw), 0.0, np.cos(yaw)]]) @ \
+        np.array([[1.0, 0.0, 0.0],
+                  [0.0, np.cos(pitch), -np.sin(pitch)],
+                  [0.0, np.sin(pitch), np.cos(pitch)]])
+    camera_matrix[:3, 3] = [-5.0, 20.0, 5.0]
+    planes = frustum_planes(view_projection_matrix=projection_matrix @ np.linalg.inv(camera_matrix))
+
+    for num_instances in all_num_instances:
+
+        scene, entity_uid, multi_transform, transform_system = create_crowd(num_instances=num_instances)
+        transform_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        multi_transform_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_MULTI_TRANSFORM_3D)
+        local_matrices = multi_transform.local_matrices.copy()
+        visible_indices = np.empty((num_instances,), dtype=np.int32)
+        num_visible = cull_instances(planes, multi_transform.world_matrices, center, radius, visible_indices)
+
+        print(f"\n{num_instances} instances, {num_visible} visible ({100.0 * num_visible / num_instances:.1f}%), "
+              f"{NUM_FRAMES} frames")
+        print(f"  {'per frame':<50}{'[ms]':>10}")
+
+        def move_entity():
+            transform_pool[entity_uid].position = (float(np.random.rand()), 0.0, 0.0)
+            transform_pool[entity_uid].input_values_updated = True
+            transform_system.update(elapsed_time=0.0, context=None)
+
+        results = [("world matrices, whole crowd moved", time_frames(move_entity))]
+        for num_moved in NUM_MOVED_INSTANCES:
+            def move_instances():
+                start = np.random.randint(0, num_instances - num_moved)
+                multi_transform.set_local_matrices(local_matrices=local_matrices[start:start + num_moved],
+                                                   start=start)
+                transform_system.update(elapsed_time=0.0, context=None)
+                multi_transform.clear_dirty()  # As if uploaded
+            results.append((f"world matrices, {num_moved} consecutive instances moved", time_frames(move_instances)))
+        results.append(("frustum culling and compaction",
+                        time_frames(lambda: cull_instances(planes, multi_transform.world_matrices, center, radius,
+                                                           visible_indices))))
+
+        if ctx is not None:
+            instance_buffer = InstanceBuffer(ctx=ctx)
+            instance_buffer.update(multi_transform_pool=multi_transform_pool)
+
+            def upload(start: int, stop: int):
+                multi_transform.mark_dirty(start=start, stop=stop)
+                instance_buffer.update(multi_transform_pool=multi_transform_pool)
+                ctx.finish()
+
+            results.append(("upload, all matrices", time_frames(lambda: upload(start=0, stop=num_instances))))
+            for num_moved in NUM_MOVED_INSTANCES:
+                results.append((f"upload, {num_moved} dirty matrices",
+                                time_frames(lambda: upload(start=0, stop=num_moved))))
+            results.append(("cull and upload visible indices",
+                            time_frames(lambda: instance_buffer.cull(multi_transform=multi_transform, planes=planes,
+                                                                     center=center, radius=radius))))
+            instance_buffer.release()
+
+        for label, elapsed in results:
+            print(f"  {label:<50}{elapsed * 1000:>10.3f}")
+
+    if ctx is not None:
+        ctx.release()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import sys
+import os
+import time
+
+import numpy as np
+import trimesh
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.utilities import utils_obj
+
+"""
+Compares utils_obj.load_obj() against the per-line Python loader it replaced and against trimesh.load(), which
+FileLoaderOBJ used before.
+
+Usage:
+    python benchmarks/bench_obj_loader.py [obj filepath]
+"""
+
+DEFAULT_OBJ_FPATH = os.path.join(path, "resources", "meshes", "dragon.obj")
+NUM_REPETITIONS = 5
+
+
+def legacy_load_obj(fpath: str):
+    """
+    Previous utils_obj.load_obj(). Only supports "v//vn" faces and expands every face corner into a new vertex
+    """
+    raw_vertices = []
+    raw_normals = []
+    raw_uvs = []
+    faces = []
+
+    with open(fpath, 'r') as file:
+        for line in file:
+            parts = [valid_part for valid_part in line.strip().split(' ') if len(valid_part) > 0]
+            if parts[0] == 'v':
+                raw_vertices.append([float(parts[1]), float(parts[2]), float(parts[3])])
+            elif parts[0] == 'vn':
+                raw_normals.append([float(parts[1]), float(parts[2]), float(parts[3])])
+            elif parts[0] == 'vt':
+                raw_uvs.append([float(parts[1]), float(parts[2])])
+            elif parts[0] == 'f':
+                faces.append([tuple(map(int, p.split('//'))) for p in parts[1:] if len(p) > 0])
+
+    indexed_vertices = []
+    indexed_normals = []
+    indices = []
+    for face in faces:
+        for v_idx, vn_idx in face:
+            indexed_vertices.append(raw_vertices[v_idx - 1])
+            indexed_normals.append(raw_normals[vn_idx - 1] if vn_idx else [0, 0, 0])
+            indices.append(len(indexed_vertices) - 1)
+
+    vertices = np.array(indexed_vertices, dtype=np.float32)
+    normals = np.array(indexed_normals, dtype=np.float32)
+    indices = np.array(indices, dtype=np.int32).reshape(-1, 3)
+    return vertices, normals, None, indices
+
+
+def load_trimesh(fpath: str):
+    mesh = trimesh.load(fpath)
+    return mesh.vertices, mesh.vertex_normals, None, mesh.faces
+
+
+def time_function(function, fpath: str) -> tuple:
+    result = function(fpath)  # Warm-up (and numba compilation)
+    timings = []
+    for _ in range(NUM_REPETITIONS):
+        t0 = time.perf_counter()
+        function(fpath)
+        timings.append(time.perf_counter() - t0)
+    return min(timings), result
+
+
+def main():
+
+    fpath = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_OBJ_FPATH
+    print(f"{os.path.basename(fpath)} ({os.path.getsize(fpath) / 1e6:.1f} MB)")
+    print(f"{'loader':<24}{'time [ms]':>12}{'vertices':>10}{'triangles':>11}{'speed-up':>10}")
+
+    new_time, _ = time_function(utils_obj.load_obj, fpath)
+    for name, function in [("legacy utils_obj", legacy_load_obj),
+                           ("trimesh", load_trimesh),
+                           ("utils_obj", utils_obj.load_obj)]:
+        try:
+            elapsed_time, (vertices, _, _, indices) = time_function(function, fpath)
+        except Exception as error:
+            print(f"{name:<24}  failed: {str(error)[:60]}")
+            continue
+        print(f"{name:<24}{elapsed_time * 1000:>12.2f}{vertices.shape[0]:>10}{indices.shape[0]:>11}"
+              f"{elapsed_time / new_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+import sys
+import os
+import time
+import logging
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core import constants
+from src.core.scene import Scene
+from src.math.frustum import frustum_planes
+from src.systems.render_system.frustum_culler import FrustumCuller
+from src.systems.render_system.scene_bvh import SceneBVH
+from src.utilities import utils_camera
+
+"""
+CPU cost of the scene BVH (SceneBVH) over the world AABBs of all meshes: building it, refitting it after 1% of the
+meshes moved, and answering ray casts (as used for picking and hovering), frustum queries and box queries, compared
+to testing every mesh. Meshes are boxes of random sizes scattered over a square field, without colliders.
+
+Rows are added directly to the scene's component arrays, so no component objects (or GPU resources) are created.
+
+Usage:
+    python benchmarks/bench_scene_bvh.py [num_objects]
+
+"num_objects" can be given more than once (default: 10000, 100000)
+"""
+
+DEFAULT_NUM_OBJECTS = [10_000, 100_000]
+FIELD_SIZE = 1000.0
+MOVED_RATIO = 0.01
+NUM_RAYS = 200
+NUM_FRAMES = 20
+
+
+def create_scene(num_objects: int) -> Scene:
+
+    rng = np.random.default_rng(0)
+    scene = Scene(logger=logging.getLogger("benchmark"))
+    entity_uids = np.arange(num_objects, dtype=np.int64)
+
+    transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    transform_arrays.add_rows(entity_uids=entity_uids)
+    world_matrices = transform_arrays.get("world_matrix")
+    world_matrices[:, 0, 3] = rng.uniform(0.0, FIELD_SIZE, num_objects)
+    world_matrices[:, 1, 3] = rng.uniform(0.0, 20.0, num_objects)
+    world_matrices[:, 2, 3] = -rng.uniform(0.0, FIELD_SIZE, num_objects)
+
+    mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+    mesh_arrays.add_rows(entity_uids=entity_uids)
+    half_sizes = rng.uniform(0.5, 5.0, (num_objects, 3))
+    mesh_arrays.get("aabb_min")[:] = -half_sizes
+    mesh_arrays.get("aabb_max")[:] = half_sizes
+
+    return scene
+
+
+def brute_force_ray_cast(ray_origin: np.ndarray, ray_direction: np.ndarray, aabb_min: np.ndarray,
+                         aabb_max: np.ndarray) -> int:
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_0 = (aabb_min - ray_origin) / ray_direction
+        t_1 = (aabb_max - ray_origin) / ray_direction
+    t_near = np.maximum(np.minimum(t_0, t_1).max(axis=1), 0.0)
+    t_far = np.maximum(t_0, t_1).min(axis=1)
+    return int(np.argmin(np.where(t_near <= t_far, t_near, np.inf)))
+
+
+def time_frames(function) -> float:
+
+    function()
+    t0 = time.perf_counter()
+    for _ in range(NUM_FRAMES):
+        function()
+    return (time.perf_counter() - t0) / NUM_FRAMES
+
+
+def main():
+
+    all_num_objects = [int(value) for value in sys.argv[1:]] if len(sys.argv) > 1 else DEFAULT_NUM_OBJECTS
+
+    projection_matrix = utils_camera.perspective_projection(fov_rad=np.deg2rad(constants.CAMERA_FOV_DEG),
+                                                            aspect_ratio=16.0 / 9.0, z_near=0.1, z_far=500.0)
+    camera_matrix = np.eye(4, dtype=np.float32)
+    camera_matrix[:3, 3] = [FIELD_SIZE / 2, 10.0, 0.0]
+    planes = frustum_planes(view_projection_matrix=projection_matrix @ np.linalg.inv(camera_matrix))
+    box_min = np.array([400.0, -10.0, -600.0], dtype=np.float32)
+    box_max = np.array([450.0, 30.0, -550.0], dtype=np.float32)
+
+    rng = np.random.default_rng(1)
+    ray_origin = camera_matrix[:3, 3].astype(np.float64)
+    ray_directions = rng.normal(size=(NUM_RAYS, 3)) * [0.3, 0.05, 0.0] + [0.0, 0.0, -1.0]
+    ray_directions /= np.linalg.norm(ray_directions, axis=1, keepdims=True)
+
+    for num_objects in all_num_objects:
+
+        scene = create_scene(num_objects=num_objects)
+        transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        frustum_culler = FrustumCuller()
+        frustum_culler.update(scene=scene)
+        scene_bvh = SceneBVH()
+        scene_bvh.update(scene=scene, transform_rows=frustum_culler.transform_rows)
+
+        world_matrices = transform_arrays.get("world_matrix")
+        dirty = transform_arrays.get("dirty")
+        moved_rows = rng.choice(num_objects, int(num_objects * MOVED_RATIO), replace=False)
+
+        def move_and_refit():
+            world_matrices[moved_rows, 1, 3] += rng.uniform(-0.5, 0.5, moved_rows.size)
+            dirty[:] = False
+            dirty[moved_rows] = True
+            frustum_culler.update(scene=scene)
+            scene_bvh.update(scene=scene, transform_rows=frustum_culler.transform_rows)
+
+        def ray_casts():
+            return [scene_bvh.ray_cast(scene=scene, ray_origin=ray_origin, ray_direction=ray_direction)[0]
+                    for ray_direction in ray_directions]
+
+        def brute_force_ray_casts():
+            return [int(mesh_arrays.get_entity_uids()[brute_force_ray_cast(
+                ray_origin, ray_direction, mesh_arrays.get("world_aabb_min"), mesh_arrays.get("world_aabb_max"))])
+                for ray_direction in ray_directions]
+
+        def brute_force_box():
+            return np.flatnonzero(np.all((mesh_arrays.get("world_aabb_max") >= box_min) &
+                                         (mesh_arrays.get("world_aabb_min") <= box_max), axis=1))
+
+        move_and_refit()
+        picked = ray_casts()
+        assert picked == brute_force_ray_casts() or -1 in picked
+        num_in_frustum = scene_bvh.query_frustum(scene=scene, planes=planes).size
+        assert num_in_frustum == np.count_nonzero(frustum_culler.cull(scene=scene, planes=planes))
+
+        print(f"\n{num_objects} objects: {len(scene_bvh.node_right)} nodes, {num_in_frustum} in the frustum, "
+              f"{moved_rows.size} moved per frame, {NUM_FRAMES} frames")
+        print(f"  {'':<40}{'[ms]':>10}")
+
+        results = [
+            ("build", time_frames(lambda: scene_bvh.build(aabb_min=mesh_arrays.get("world_aabb_min"),
+                                                          aabb_max=mesh_arrays.get("world_aabb_max")))),
+            ("move, world AABBs and refit", time_frames(move_and_refit)),
+            (f"refit only ({scene_bvh.num_nodes_refit} nodes)", time_frames(lambda: scene_bvh.update(
+                scene=scene, transform_rows=frustum_culler.transform_rows))),
+            ("ray cast", time_frames(ray_casts) / NUM_RAYS),
+            ("ray cast, testing all meshes", time_frames(brute_force_ray_casts) / NUM_RAYS),
+            ("frustum query", time_frames(lambda: scene_bvh.query_frustum(scene=scene, planes=planes))),
+            ("frustum test of all meshes", time_frames(lambda: frustum_culler.cull(scene=scene, planes=planes))),
+            ("box query", time_frames(lambda: scene_bvh.query_box(scene=scene, box_min=box_min, box_max=box_max))),
+            ("box test of all meshes", time_frames(brute_force_box))]
+
+        for label, elapsed in results:
+            print(f"  {label:<40}{elapsed * 1000:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core import constants
+from src.core.component_arrays import ComponentArrays
+from src.components.transform_3d import Transform3D
+from src.components.mesh import Mesh
+from src.systems.transform_system.transform_system import update_world_matrices
+from src.math.hierarchy import build_levels
+from src.math import mat4
+
+"""
+Compares the per-frame time of the transform update and the forward pass mesh filtering when components are
+stored as dicts of per-entity objects (how the Scene used to store them) vs the Scene's struct-of-arrays storage.
+Every entity has a transform and a mesh, entities are grouped into small hierarchies of one root with
+NUM_CHILDREN_PER_ROOT children, and all of them move every frame.
+
+Usage:
+    python benchmarks/bench_scene_soa.py [num_entities ...]
+"""
+
+NUM_CHILDREN_PER_ROOT = 9
+DEFAULT_NUM_ENTITIES = [10_000, 100_000, 1_000_000]
+
+
+class DictTransform:
+
+    """
+    Transform3D as it was before its data moved into the Scene's ComponentArrays
+    """
+
+    __slots__ = [
+        "local_matrix",
+        "world_matrix",
+        "inverse_world_matrix",
+        "position",
+        "rotation",
+        "scale",
+        "input_values_updated"]
+
+    def __init__(self, position: tuple, rotation: tuple):
+        self.position = position
+        self.rotation = rotation
+        self.scale = (1.0, 1.0, 1.0)
+        self.local_matrix = np.eye(4, dtype=np.float32)
+        self.world_matrix = np.eye(4, dtype=np.float32)
+        self.inverse_world_matrix = np.eye(4, dtype=np.float32)
+        self.input_values_updated = True
+
+    def update(self) -> bool:
+        if self.input_values_updated:
+            self.local_matrix = mat4.create_transform_euler_xyz(
+                np.array(self.position, dtype=np.float32),
+                np.array(self.rotation, dtype=np.float32),
+                np.array(self.scale, dtype=np.float32),)
+            self.input_values_updated = False
+            return True
+        return False
+
+
+class DictMesh:
+
+    __slots__ = [
+        "visible",
+        "layer"]
+
+    def __init__(self, visible: bool):
+        self.visible = visible
+        self.layer = constants.RENDER_SYSTEM_LAYER_DEFAULT
+
+
+def create_scene_data(num_entities: int) -> tuple:
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(-100, 100, (num_entities, 3))
+    rotations = rng.uniform(-np.pi, np.pi, (num_entities, 3))
+    visible = rng.random(num_entities) > 0.1
+    parent_indices = np.arange(num_entities) - (np.arange(num_entities) % (NUM_CHILDREN_PER_ROOT + 1))
+    parent_indices[parent_indices == np.arange(num_entities)] = -1
+    return positions, rotations, visible, parent_indices
+
+
+def run_dict_pools(num_entities: int, num_frames: int) -> float:
+
+    positions, rotations, visible, parent_indices = create_scene_data(num_entities=num_entities)
+    entity_uids = list(range(num_entities))
+    parent_uids = {entity_uid: (int(parent_index) if parent_index >= 0 else None)
+                   for entity_uid, parent_index in zip(entity_uids, parent_indices)}
+    transform_pool = {entity_uid: DictTransform(position=tuple(positions[entity_uid]),
+                                                rotation=tuple(rotations[entity_uid]))
+                      for entity_uid in entity_uids}
+    mesh_pool = {entity_uid: DictMesh(visible=bool(visible[entity_uid])) for entity_uid in entity_uids}
+
+    # Compile numba kernels before timing
+    mat4.even_faster_inverse(in_mat4=np.eye(4, dtype=np.float32), out_mat4=np.eye(4, dtype=np.float32))
+
+    t0 = time.perf_counter()
+    for _ in range(num_frames):
+
+        # Transform system
+        for entity_uid in entity_uids:
+            transform = transform_pool[entity_uid]
+            transform.input_values_updated = True
+            transform.update()
+
+            parent_uid = parent_uids[entity_uid]
+            if parent_uid is not None:
+                transform.world_matrix = transform_pool[parent_uid].world_matrix @ transform.local_matrix
+            else:
+                transform.world_matrix = transform.local_matrix
+
+            mat4.even_faster_inverse(in_mat4=transform.world_matrix, out_mat4=transform.inverse_world_matrix)
+
+        # Forward pass mesh filtering
+        drawn = []
+        for mesh_entity_uid, mesh_component in mesh_pool.items():
+            if not mesh_component.visible or mesh_component.layer == constants.RENDER_SYSTEM_LAYER_OVERLAY:
+                continue
+            drawn.append(transform_pool[mesh_entity_uid].world_matrix)
+
+    return (time.perf_counter() - t0) / num_frames
+
+
+def run_component_arrays(num_entities: int, num_frames: int) -> float:
+
+    positions, rotations, visible, parent_indices = create_scene_data(num_entities=num_entities)
+    entity_uids = np.arange(num_entities, dtype=np.int64)
+
+    transform_arrays = ComponentArrays(fields=Transform3D._array_fields)
+    transform_arrays.add_rows(entity_uids=entity_uids)
+    transform_arrays.get("position")[:] = positions
+    transform_arrays.get("rotation")[:] = rotations
+
+    mesh_arrays = ComponentArrays(fields=Mesh._array_fields)
+    mesh_arrays.add_rows(entity_uids=entity_uids)
+    mesh_arrays.get("visible")[:] = visible
+
+    # Same as TransformSystem.update_transform_tree() produces for this scene
+    level_offsets, level_rows, level_parent_rows = build_levels(parent_rows=parent_indices.astype(np.int64))
+
+    t0 = time.perf_counter()
+    for _ in range(num_frames):
+
+        # Transform system
+        transform_arrays.get("input_values_updated")[:] = True
+        local_matrix_updated = Transform3D.update_arrays(component_arrays=transform_arrays)
+        update_world_matrices(level_offsets=level_offsets,
+                              level_rows=level_rows,
+                              level_parent_rows=level_parent_rows,
+                              local_matrices=transform_arrays.get("local_matrix"),
+                              local_matrix_updated=local_matrix_updated,
+                              world_matrices=transform_arrays.get("world_matrix"),
+                              inverse_world_matrices=transform_arrays.get("inverse_world_matrix"),
+                              dirty=transform_arrays.get("dirty"),
+                              update_all=False)
+
+        # Forward pass mesh filtering
+        drawable = mesh_arrays.get("visible") & (mesh_arrays.get("layer") != constants.RENDER_SYSTEM_LAYER_OVERLAY)
+        drawn_rows = transform_arrays.get_rows(entity_uids=mesh_arrays.get_entity_uids()[drawable].tolist())
+
+    return (time.perf_counter() - t0) / num_frames
+
+
+def main():
+
+    all_num_entities = [int(value) for value in sys.argv[1:]] if len(sys.argv) > 1 else DEFAULT_NUM_ENTITIES
+
+    print(f"{'entities':>10}{'dict pools [ms]':>18}{'arrays [ms]':>14}{'speed-up':>10}")
+    for num_entities in all_num_entities:
+        num_frames = max(1, 100_000 // num_entities)
+        dict_time = run_dict_pools(num_entities=num_entities, num_frames=num_frames)
+        arrays_time = run_component_arrays(num_entities=num_entities, num_frames=num_frames)
+        print(f"{num_entities:>10}{dict_time * 1000:>18.2f}{arrays_time * 1000:>14.2f}"
+              f"{dict_time / arrays_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
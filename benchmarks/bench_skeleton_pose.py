@@ -0,0 +1,126 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core.file_loaders.file_loader_gltf import FileLoaderGLTF
+from src.math import mat4
+from src.math.skeleton_pose import SkeletonPose
+
+"""
+Per-frame cost of posing a crowd of animated characters that share the same skeleton. Compares the original
+Skeleton.update_world_matrices() (depth-first traversal in python, one 4x4 matmul per bone) against SkeletonPose,
+called once per character and once for the whole crowd. SkeletonPose also produces the skinning matrices
+(world @ inverse bind), which the original code did not compute.
+
+Usage:
+    python benchmarks/bench_skeleton_pose.py
+"""
+
+MESHES_DIR = os.path.join(path, "resources", "meshes")
+MESH_FILENAMES = ["BrainStem.glb", "situp_to_iddle.gltf"]
+NUM_CHARACTERS_LIST = [1, 100, 500]
+NUM_FRAMES = 10
+
+
+def legacy_world_matrices(parent_indices, children_indices, num_children, local_matrices, world_matrices,
+                          external_world_matrix):
+    """
+    Skeleton.update_world_matrices() as it was before SkeletonPose
+    """
+
+    root_nodes = [node_index for node_index, parent_index in enumerate(parent_indices) if parent_index == -1]
+    next_node_indices = root_nodes
+    while len(next_node_indices) > 0:
+        current_node_index = next_node_indices.pop()
+        parent_index = parent_indices[current_node_index]
+        node_children_indices = [children_indices[current_node_index, sub_index]
+                                 for sub_index in range(num_children[current_node_index])]
+        if parent_index == -1:
+            parent_matrix = external_world_matrix
+        else:
+            parent_matrix = world_matrices[parent_index, :, :]
+        world_matrices[current_node_index, :, :] = parent_matrix @ local_matrices[current_node_index, :, :]
+        next_node_indices.extend(node_children_indices)
+
+
+def main():
+
+    rng = np.random.default_rng(0)
+
+    print(f"{'mesh':>22}{'bones':>7}{'characters':>12}{'legacy [ms]':>13}{'per character [ms]':>20}"
+          f"{'batched [ms]':>14}{'speed-up':>10}")
+    for mesh_filename in MESH_FILENAMES:
+
+        all_resources = {}
+        FileLoaderGLTF(all_resources=all_resources).load(resource_uid="mesh",
+                                                         fpath=os.path.join(MESHES_DIR, mesh_filename))
+        data_blocks = all_resources["mesh/skeleton_0"].data_blocks
+        parent_indices = data_blocks["parent_index"].data
+        children_indices = data_blocks["children_indices"].data
+        num_children = data_blocks["num_children"].data
+
+        pose = SkeletonPose(parent_indices=parent_indices,
+                            inverse_bind_matrices=data_blocks["inverse_bind_matrices"].data)
+        num_bones = pose.num_bones
+
+        for num_characters in NUM_CHARACTERS_LIST:
+
+            # Every character has its own animated pose and its own position in the world
+            shape = (num_characters, num_bones)
+            translations = np.broadcast_to(data_blocks["translation"].data, (*shape, 3)).astype(np.float32)
+            scales = np.broadcast_to(data_blocks["scale"].data, (*shape, 3)).astype(np.float32)
+            rotations = (data_blocks["rotation"].data + rng.normal(scale=0.1, size=(*shape, 4))).astype(np.float32)
+            rotations /= np.linalg.norm(rotations, axis=-1, keepdims=True)
+            root_matrices = np.tile(np.eye(4, dtype=np.float32), (num_characters, 1, 1))
+            root_matrices[:, :3, 3] = rng.uniform(-50, 50, (num_characters, 3))
+
+            world_matrices = np.empty((*shape, 4, 4), dtype=np.float32)
+            skinning_matrices = np.empty_like(world_matrices)
+            legacy_matrices = np.empty_like(world_matrices)
+            local_matrices = np.empty((num_bones, 4, 4), dtype=np.float32)
+
+            # Compile numba kernels before timing
+            pose.evaluate(translations[:1], rotations[:1], scales[:1], world_matrices[:1],
+                          root_matrices=root_matrices[:1], skinning_matrices_out=skinning_matrices[:1])
+            pose.evaluate(translations[0], rotations[0], scales[0], world_matrices[0],
+                          root_matrices=root_matrices[0], skinning_matrices_out=skinning_matrices[0])
+            mat4.matrix_compositions(translations[0], rotations[0], scales[0], local_matrices)
+
+            t0 = time.perf_counter()
+            for _ in range(NUM_FRAMES):
+                for character in range(num_characters):
+                    mat4.matrix_compositions(translations[character], rotations[character], scales[character],
+                                             local_matrices)
+                    legacy_world_matrices(parent_indices, children_indices, num_children, local_matrices,
+                                          legacy_matrices[character], root_matrices[character])
+            legacy_time = (time.perf_counter() - t0) / NUM_FRAMES
+
+            t0 = time.perf_counter()
+            for _ in range(NUM_FRAMES):
+                for character in range(num_characters):
+                    pose.evaluate(translations[character], rotations[character], scales[character],
+                                  world_matrices[character],
+                                  root_matrices=root_matrices[character],
+                                  skinning_matrices_out=skinning_matrices[character])
+            per_character_time = (time.perf_counter() - t0) / NUM_FRAMES
+
+            t0 = time.perf_counter()
+            for _ in range(NUM_FRAMES):
+                pose.evaluate(translations, rotations, scales, world_matrices,
+                              root_matrices=root_matrices,
+                              skinning_matrices_out=skinning_matrices)
+            batched_time = (time.perf_counter() - t0) / NUM_FRAMES
+
+            np.testing.assert_allclose(world_matrices, legacy_matrices, atol=1e-3)
+            print(f"{mesh_filename:>22}{num_bones:>7}{num_characters:>12}{legacy_time * 1000:>13.3f}"
+                  f"{per_character_time * 1000:>20.3f}{batched_time * 1000:>14.3f}"
+                  f"{legacy_time / batched_time:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
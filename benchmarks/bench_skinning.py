@@ -0,0 +1,102 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core.file_loaders.file_loader_gltf import FileLoaderGLTF
+from src.math.skeleton_pose import SkeletonPose
+from src.math.skinning import skin_mesh
+
+"""
+Vertices skinned per second by the CPU linear blend skinner (src/math/skinning.py) on all meshes of
+star_rail_fu_xuan.gltf (508 bones), posed with a random perturbation of its rest pose. Compares it against a
+plain numpy implementation that gathers the 4 matrices of every vertex first, which needs a (N, 4, 4, 4)
+intermediate array, and reports the memory that intermediate takes.
+
+Usage:
+    python benchmarks/bench_skinning.py [num_copies]
+
+"num_copies" repeats the meshes to skin larger vertex counts (default: 1, 10)
+"""
+
+MESH_FPATH = os.path.join(path, "resources", "meshes", "star_rail_fu_xuan.gltf")
+DEFAULT_NUM_COPIES = [1, 10]
+CHUNK_SIZES = [1024, 4096, 16384]
+NUM_REPEATS = 10
+
+
+def skin_numpy(vertices, normals, joints, weights, skinning_matrices):
+    blended_matrices = np.einsum("nk,nkij->nij", weights, skinning_matrices[joints])
+    skinned_vertices = np.einsum("nij,nj->ni", blended_matrices[:, :3, :3], vertices) + blended_matrices[:, :3, 3]
+    skinned_normals = np.einsum("nij,nj->ni", blended_matrices[:, :3, :3], normals)
+    skinned_normals /= np.linalg.norm(skinned_normals, axis=-1, keepdims=True)
+    return skinned_vertices, skinned_normals
+
+
+def main():
+
+    all_num_copies = [int(value) for value in sys.argv[1:]] if len(sys.argv) > 1 else DEFAULT_NUM_COPIES
+
+    all_resources = {}
+    FileLoaderGLTF(all_resources=all_resources).load(resource_uid="fu_xuan", fpath=MESH_FPATH)
+    skeleton_blocks = all_resources["fu_xuan/skeleton_0"].data_blocks
+    mesh_blocks = [data_group.data_blocks for resource_uid, data_group in all_resources.items()
+                   if "/mesh_" in resource_uid and "joints" in data_group.data_blocks]
+
+    # Animated-looking pose
+    rng = np.random.default_rng(0)
+    pose = SkeletonPose(parent_indices=skeleton_blocks["parent_index"].data,
+                        inverse_bind_matrices=skeleton_blocks["inverse_bind_matrices"].data)
+    rotations = skeleton_blocks["rotation"].data + rng.normal(scale=0.05, size=(pose.num_bones, 4))
+    rotations = (rotations / np.linalg.norm(rotations, axis=-1, keepdims=True)).astype(np.float32)
+    world_matrices = np.empty((pose.num_bones, 4, 4), dtype=np.float32)
+    skinning_matrices = np.empty_like(world_matrices)
+    pose.evaluate(translations=skeleton_blocks["translation"].data,
+                  rotations=rotations,
+                  scales=skeleton_blocks["scale"].data,
+                  world_matrices_out=world_matrices,
+                  skinning_matrices_out=skinning_matrices)
+
+    print(f"{'vertices':>10}{'method':>22}{'time [ms]':>11}{'Mvertices/s':>13}{'extra memory [MB]':>19}")
+    for num_copies in all_num_copies:
+
+        vertices = np.tile(np.concatenate([blocks["vertices"].data for blocks in mesh_blocks]), (num_copies, 1))
+        normals = np.tile(np.concatenate([blocks["normals"].data for blocks in mesh_blocks]), (num_copies, 1))
+        joints = np.tile(np.concatenate([blocks["joints"].data for blocks in mesh_blocks]), (num_copies, 1))
+        weights = np.tile(np.concatenate([blocks["weights"].data for blocks in mesh_blocks]), (num_copies, 1))
+        num_vertices = vertices.shape[0]
+        vertices_out = np.empty_like(vertices)
+        normals_out = np.empty_like(normals)
+
+        def report(method: str, elapsed: float, extra_bytes: int):
+            print(f"{num_vertices:>10}{method:>22}{elapsed * 1000:>11.2f}{num_vertices / elapsed / 1e6:>13.1f}"
+                  f"{extra_bytes / 1e6:>19.1f}")
+
+        t0 = time.perf_counter()
+        for _ in range(NUM_REPEATS):
+            target_vertices, _ = skin_numpy(vertices, normals, joints, weights, skinning_matrices)
+        report(method="numpy (gather)", elapsed=(time.perf_counter() - t0) / NUM_REPEATS,
+               extra_bytes=num_vertices * 4 * 16 * 4)
+
+        for chunk_size in CHUNK_SIZES:
+
+            # Compile numba kernels before timing
+            skin_mesh(vertices=vertices, joints=joints, weights=weights, skinning_matrices=skinning_matrices,
+                      normals=normals, vertices_out=vertices_out, normals_out=normals_out, chunk_size=chunk_size)
+
+            t0 = time.perf_counter()
+            for _ in range(NUM_REPEATS):
+                skin_mesh(vertices=vertices, joints=joints, weights=weights, skinning_matrices=skinning_matrices,
+                          normals=normals, vertices_out=vertices_out, normals_out=normals_out, chunk_size=chunk_size)
+            report(method=f"numba (chunk {chunk_size})", elapsed=(time.perf_counter() - t0) / NUM_REPEATS,
+                   extra_bytes=0)
+
+        np.testing.assert_allclose(vertices_out, target_vertices, atol=1e-3)
+
+
+if __name__ == "__main__":
+    main()
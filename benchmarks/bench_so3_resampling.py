@@ -0,0 +1,77 @@
+import sys
+import os
+import time
+
+import numpy as np
+from scipy.spatial.transform import Rotation, RotationSpline
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.math import so3
+from src.math.quaternion import rotvecs_to_quats
+from src.math.so3_interpolation import interpolate_slerp, interpolate_spline, interpolate_squad
+
+"""
+Time to resample every joint of a long mocap take (random smooth motion) from 60 to 30 fps. Compares the previous
+so3.interpolate_rotations(), which built one scipy RotationSpline per joint in a python loop, against the same
+spline solved for all joints at once, and against the cheaper batched slerp and squad.
+
+Usage:
+    python benchmarks/bench_so3_resampling.py [num_joints] [num_frames]
+"""
+
+DEFAULT_NUM_JOINTS = 65
+DEFAULT_NUM_FRAMES = 10_000
+FPS_IN = 60.0
+FPS_OUT = 30.0
+
+
+def interpolate_rotations_per_joint(rotations, ts_in, ts_out):
+
+    out = []
+    for joint in range(rotations.shape[1]):
+        spline = RotationSpline(ts_in, Rotation.from_rotvec(rotations[:, joint]))
+        out.append(spline(ts_out).as_rotvec()[:, np.newaxis])
+    return np.concatenate(out, axis=1)
+
+
+def main():
+
+    num_joints = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUM_JOINTS
+    num_frames = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_NUM_FRAMES
+
+    rng = np.random.default_rng(0)
+    rotvecs = np.cumsum(rng.normal(scale=0.02, size=(num_frames, num_joints, 3)), axis=0)
+    quats = rotvecs_to_quats(rotvecs)
+    ts_in = np.arange(num_frames) / FPS_IN
+    ts_out = np.arange(0.0, ts_in[-1], 1.0 / FPS_OUT)
+
+    # Compile numba kernels before timing
+    so3.interpolate_rotations(rotations=rotvecs[:3, :2], ts_in=ts_in[:3], ts_out=ts_out[:2])
+
+    print(f"{num_joints} joints, {num_frames} frames at {FPS_IN:g} fps -> {ts_out.size} frames at {FPS_OUT:g} fps")
+    print(f"{'method':>40}{'time [ms]':>12}{'speedup':>10}")
+
+    t0 = time.perf_counter()
+    target = interpolate_rotations_per_joint(rotations=rotvecs, ts_in=ts_in, ts_out=ts_out)
+    legacy_time = time.perf_counter() - t0
+    print(f"{'RotationSpline per joint (previous)':>40}{legacy_time * 1000:>12.1f}{1.0:>10.1f}")
+
+    t0 = time.perf_counter()
+    resampled = so3.interpolate_rotations(rotations=rotvecs, ts_in=ts_in, ts_out=ts_out)
+    elapsed = time.perf_counter() - t0
+    print(f"{'so3.interpolate_rotations (batched)':>40}{elapsed * 1000:>12.1f}{legacy_time / elapsed:>10.1f}")
+    np.testing.assert_allclose(resampled, target, atol=1e-5)
+
+    for label, function in [("batched spline (quaternions)", interpolate_spline),
+                            ("batched squad", interpolate_squad),
+                            ("batched slerp", interpolate_slerp)]:
+        t0 = time.perf_counter()
+        function(quats=quats, ts_in=ts_in, ts_out=ts_out)
+        elapsed = time.perf_counter() - t0
+        print(f"{label:>40}{elapsed * 1000:>12.1f}{legacy_time / elapsed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
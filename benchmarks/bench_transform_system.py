@@ -0,0 +1,77 @@
+import sys
+import os
+import time
+import logging
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core import constants
+from src.core.scene import Scene
+from src.systems.transform_system.transform_system import TransformSystem
+
+"""
+Measures TransformSystem.update() when only a few entities move per frame. The scene has NUM_HIERARCHIES
+hierarchies, each a root with NUM_CHILDREN_PER_ROOT children. Moving a root also moves its children, so the
+number of world matrices recomputed (reported by the system's counters) is larger than the number of moved entities.
+
+Usage:
+    python benchmarks/bench_transform_system.py
+"""
+
+NUM_HIERARCHIES = 10_000
+NUM_CHILDREN_PER_ROOT = 9
+NUM_MOVED_ENTITIES = [0, 10, 100, 1_000, 10_000, 100_000]
+NUM_FRAMES = 10
+
+
+def create_scene() -> Scene:
+
+    scene = Scene(logger=logging.getLogger("benchmark"))
+    child_blueprint = {"name": "child", "components": [{"name": "transform_3d", "parameters": {}}]}
+    root_blueprint = {"name": "root",
+                      "components": [{"name": "transform_3d", "parameters": {}}],
+                      "entity": [child_blueprint] * NUM_CHILDREN_PER_ROOT}
+
+    for _ in range(NUM_HIERARCHIES):
+        scene.add_entity(entity_blueprint=root_blueprint)
+
+    return scene
+
+
+def main():
+
+    scene = create_scene()
+    transform_system = TransformSystem(logger=logging.getLogger("benchmark"),
+                                       scene=scene,
+                                       event_publisher=None,
+                                       action_publisher=None,
+                                       data_manager=None,
+                                       parameters={})
+
+    # First update computes everything (and compiles the numba kernels)
+    transform_system.update(elapsed_time=0.0, context=None)
+
+    transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    rng = np.random.default_rng(0)
+
+    print(f"{'entities':>10}{'moved':>10}{'world matrices':>16}{'update [ms]':>14}")
+    for num_moved in NUM_MOVED_ENTITIES:
+        elapsed = 0.0
+        for _ in range(NUM_FRAMES):
+            moved_rows = rng.choice(len(transform_arrays), size=num_moved, replace=False)
+            transform_arrays.get("position")[moved_rows] += 0.1
+            transform_arrays.get("input_values_updated")[moved_rows] = True
+
+            t0 = time.perf_counter()
+            transform_system.update(elapsed_time=0.0, context=None)
+            elapsed += time.perf_counter() - t0
+
+        print(f"{len(transform_arrays):>10}{num_moved:>10}{transform_system.num_world_matrices_updated:>16}"
+              f"{elapsed / NUM_FRAMES * 1000:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import sys
+import os
+import time
+
+import numpy as np
+
+path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(path)
+
+from src.core import constants
+from src.geometry_3d.mesh_factory_3d import MeshFactory3D
+from src.geometry_3d.triangle_bvh import TriangleBVH
+from src.utilities import utils_obj
+
+"""
+Throughput of the triangle BVH (TriangleBVH) of a mesh: building it, and casting batches of rays at it for the
+nearest hit, in millions of rays per second. Two kinds of rays are cast:
+    - primary: one ray per pixel of a 512x512 camera looking at the mesh, as for CPU picking. Coherent, so
+      neighbouring rays visit the same nodes
+    - ambient occlusion: 16 rays in random directions from the surface points hit by the primary rays, limited to
+      a tenth of the mesh's size, as for baking. Incoherent, and many start right next to a triangle
+
+Usage:
+    python benchmarks/bench_triangle_bvh.py [mesh]
+
+"mesh" is "dragon" (resources/meshes/dragon.obj) or "icosphere_<subdivisions>" and can be given more than once
+(default: dragon, icosphere_6)
+"""
+
+DEFAULT_MESHES = ["dragon", "icosphere_6"]
+IMAGE_SIZE = 512
+AO_RAYS_PER_HIT = 16
+AO_DISTANCE_RATIO = 0.1
+NUM_REPEATS = 5
+
+
+def load_mesh(name: str) -> tuple:
+
+    if name == "dragon":
+        vertices, _, _, triangles = utils_obj.load_obj(fpath=os.path.join(constants.RESOURCES_DIR, "meshes",
+                                                                         "dragon.obj"))
+        return vertices, triangles
+
+    subdivisions = int(name.split("_")[-1])
+    vertices = MeshFactory3D().create_icosphere(radius=1.0, subdivisions=subdivisions)[0]
+    return vertices, None
+
+
+def primary_rays(vertices: np.ndarray) -> tuple:
+
+    center = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    size = float(np.linalg.norm(vertices.max(axis=0) - vertices.min(axis=0)))
+    pixels = (np.arange(IMAGE_SIZE) + 0.5) / IMAGE_SIZE * 2.0 - 1.0
+    x, y = np.meshgrid(pixels * 0.4, pixels * 0.4)
+    ray_directions = np.stack([x.ravel(), y.ravel(), -np.ones(x.size)], axis=1)
+    ray_directions /= np.linalg.norm(ray_directions, axis=1)[:, None]
+    ray_origins = np.tile(center + [0.0, 0.0, 1.5 * size], (ray_directions.shape[0], 1))
+    return ray_origins.astype(np.float32), ray_directions.astype(np.float32), size
+
+
+def ambient_occlusion_rays(hit_points: np.ndarray) -> tuple:
+
+    rng = np.random.default_rng(0)
+    ray_origins = np.repeat(hit_points, AO_RAYS_PER_HIT, axis=0)
+    ray_directions = rng.normal(size=ray_origins.shape)
+    ray_directions /= np.linalg.norm(ray_directions, axis=1)[:, None]
+    return ray_origins.astype(np.float32), ray_directions.astype(np.float32)
+
+
+def time_repeats(function) -> float:
+
+    function()
+    t0 = time.perf_counter()
+    for _ in range(NUM_REPEATS):
+        function()
+    return (time.perf_counter() - t0) / NUM_REPEATS
+
+
+def main():
+
+    mesh_names = sys.argv[1:] if len(sys.argv) > 1 else DEFAULT_MESHES
+
+    for mesh_name in mesh_names:
+
+        vertices, triangles = load_mesh(name=mesh_name)
+        triangle_bvh = TriangleBVH(vertices=vertices, indices=triangles)
+        TriangleBVH(vertices=vertices[:30]).build()  # Compiles the kernels
+
+        t0 = time.perf_counter()
+        triangle_bvh.build()
+        build_time = time.perf_counter() - t0
+
+        ray_origins, ray_directions, size = primary_rays(vertices=vertices)
+        distances, triangle_ids, _ = triangle_bvh.intersect(ray_origins=ray_origins, ray_directions=ray_directions)
+        hits = triangle_ids >= 0
+        hit_points = ray_origins[hits] + distances[hits, None] * ray_directions[hits]
+        ao_origins, ao_directions = ambient_occlusion_rays(hit_points=hit_points)
+        ao_distance = AO_DISTANCE_RATIO * size
+
+        primary_time = time_repeats(lambda: triangle_bvh.intersect(ray_origins=ray_origins,
+                                                                   ray_directions=ray_directions))
+        ao_time = time_repeats(lambda: triangle_bvh.intersect(ray_origins=ao_origins, ray_directions=ao_directions,
+                                                              max_distance=ao_distance))
+
+        print(f"\n{mesh_name}: {triangle_bvh.num_triangles} triangles, {triangle_bvh.node_right.size} nodes, "
+              f"built in {build_time * 1000:.1f} ms")
+        print(f"  {'rays':<30}{'count':>10}{'hit [%]':>10}{'[ms]':>10}{'Mrays/s':>10}")
+        ao_hits = np.count_nonzero(triangle_bvh.intersect(ray_origins=ao_origins, ray_directions=ao_directions,
+                                                          max_distance=ao_distance)[1] >= 0)
+        for label, num_rays, num_hits, elapsed in [("primary", ray_origins.shape[0], np.count_nonzero(hits),
+                                                    primary_time),
+                                                   ("ambient occlusion", ao_origins.shape[0], ao_hits, ao_time)]:
+            print(f"  {label:<30}{num_rays:>10}{100.0 * num_hits / num_rays:>10.1f}{elapsed * 1000:>10.1f}"
+                  f"{num_rays / elapsed / 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,16 @@
 import numpy as np
 
+from src.core import constants
 from src.core.component import Component
+from src.math import ray_intersection
 
 
 class Collider(Component):
 
     """
-    Colliders are components that will allow collision tobe detected between
+    Colliders are components that will allow collision tobe detected between entities. Their shape is defined in
+    their entity's local space, centred at its origin: capsules go along the local Y axis and planes have the local
+    Y axis as their normal
     """
 
     _type = "collider"
@@ -14,19 +18,52 @@ class Collider(Component):
     __slots__ = [
         "shape",
         "collision_layer",
-        "radius"
+        "radius",
+        "height"
     ]
 
     def __init__(self, parameters, system_owned=False):
         super().__init__(parameters=parameters, system_owned=system_owned)
 
-        self.shape = Component.dict2string(input_dict=parameters, key="shape", default_value="sphere")
+        self.shape = Component.dict2string(input_dict=parameters, key="shape",
+                                           default_value=constants.COLLIDER_SHAPE_SPHERE)
 
         # All shapes parameters
-        self.radius = Component.dict2float(input_dict=parameters, key="roughness_factor", default_value=0.5)
+        self.radius = Component.dict2float(input_dict=parameters, key="radius", default_value=0.5)
+        self.height = Component.dict2float(input_dict=parameters, key="height", default_value=1.0)
 
         self.collision_layer = 0
 
-    def ray_intersection(self, ray_origin: np.array, ray_direction: np.array) -> float:
+    def ray_intersection(self, ray_origin: np.array, ray_direction: np.array, world_matrix: np.ndarray) -> float:
+        """
+        :param ray_origin: numpy array (3,), in world space
+        :param ray_direction: numpy array (3,), normalised, in world space
+        :param world_matrix: numpy array (4, 4), world matrix of the collider's entity. Radii are scaled by its
+                             largest scale
+        :return: float, distance along the ray to the first intersection in front of its origin, or -1 if it
+                 misses the collider
+        """
 
-        pass
+        ray_origin = np.ascontiguousarray(ray_origin, dtype=np.float32)
+        ray_direction = np.ascontiguousarray(ray_direction, dtype=np.float32)
+        center = np.ascontiguousarray(world_matrix[:3, 3], dtype=np.float32)
+        scale = float(np.linalg.norm(world_matrix[:3, :3], axis=0).max())
+
+        if self.shape == constants.COLLIDER_SHAPE_SPHERE:
+            distance = ray_intersection.intersect_distance_ray_sphere(ray_origin, ray_direction, center,
+                                                                      self.radius * scale)
+
+        elif self.shape == constants.COLLIDER_SHAPE_CAPSULE:
+            half_axis = np.ascontiguousarray(world_matrix[:3, 1] * (0.5 * self.height), dtype=np.float32)
+            distance = ray_intersection.intersect_ray_capsule(ray_origin, ray_direction, center - half_axis,
+                                                              center + half_axis, np.float32(self.radius * scale))
+
+        elif self.shape == constants.COLLIDER_SHAPE_PLANE:
+            normal = np.ascontiguousarray(world_matrix[:3, 1], dtype=np.float32)
+            plane = ray_intersection.plane_from_point_and_normal(center, normal)
+            distance = ray_intersection.intersect_ray_plane(ray_origin, ray_direction, plane)
+
+        else:
+            raise ValueError(f"[ERROR] Collider shape '{self.shape}' not supported")
+
+        return float(distance) if distance >= 0.0 else -1.0
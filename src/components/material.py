@@ -3,6 +3,7 @@ import moderngl
 
 from src.core import constants
 from src.core.component import Component
+from src.core.component_arrays import ComponentArrayField
 
 
 class Material(Component):
@@ -19,11 +20,18 @@ class Material(Component):
         ('shininess_factor', 'f4'),
         ('metalic_factor', 'f4'),
         ('roughness_factor', 'f4'),
-        ('padding_1', 'f4')
+        ('alpha', 'f4')
     ], align=True)
 
+    _array_fields = {
+        "ubo_index": (np.int32, (), 0),
+        "alpha": (np.float32, (), 1.0)
+    }
+
+    ubo_index = ComponentArrayField()
+    alpha = ComponentArrayField()
+
     __slots__ = [
-        "ubo_index",
         "ubo_data",
         "diffuse",
         "diffuse_highlight",
@@ -34,7 +42,6 @@ class Material(Component):
         "roughness_factor",
         "color_source",
         "lighting_mode",
-        "alpha",
         "state_highlighted",
         "dirty"
     ]
@@ -83,11 +90,12 @@ class Material(Component):
             return
 
         # Write the data to the UBO
+        self.ubo_data['alpha'] = self.alpha
         ubo.write(self.ubo_data.tobytes(), offset=self.ubo_index * constants.SCENE_MATERIAL_STRUCT_SIZE_BYTES)
         self.dirty = False
 
     def is_transparent(self) -> bool:
-        return self.alpha == 1.0
+        return self.alpha < 1.0
 
     def draw_imgui_properties(self, imgui):
         imgui.text(f"Material")
@@ -2,13 +2,37 @@ import numpy as np
 
 from src.core import constants
 from src.core.component import Component
+from src.core.component_arrays import ComponentArrayField
 from src.geometry_3d.mesh_factory_3d import MeshFactory3D
+from src.geometry_3d.triangle_bvh import TriangleBVH
+from src.math.frustum import aabb, bounding_sphere
 
 
 class Mesh(Component):
     
     _type = constants.COMPONENT_TYPE_MESH
 
+    # Local bounds are computed once, when the vertices are known, and world ones by the render system every frame
+    _array_fields = {
+        "visible": (np.bool_, (), True),
+        "layer": (np.int32, (), constants.RENDER_SYSTEM_LAYER_DEFAULT),
+        "aabb_min": (np.float32, (3,), 0.0),
+        "aabb_max": (np.float32, (3,), 0.0),
+        "bounding_sphere_center": (np.float32, (3,), 0.0),
+        "bounding_sphere_radius": (np.float32, (), 0.0),
+        "world_aabb_min": (np.float32, (3,), 0.0),
+        "world_aabb_max": (np.float32, (3,), 0.0)
+    }
+
+    visible = ComponentArrayField()
+    layer = ComponentArrayField()
+    aabb_min = ComponentArrayField()
+    aabb_max = ComponentArrayField()
+    bounding_sphere_center = ComponentArrayField()
+    bounding_sphere_radius = ComponentArrayField()
+    world_aabb_min = ComponentArrayField()
+    world_aabb_max = ComponentArrayField()
+
     __slots__ = [
         "vertices",
         "normals",
@@ -26,9 +50,8 @@ class Mesh(Component):
         "vbo_uvs",
         "ibo_indices",
         "render_mode",
-        "layer",
-        "visible",
-        "exclusive_to_camera_uid"]
+        "exclusive_to_camera_uid",
+        "triangle_bvh"]
 
     def __init__(self, parameters, system_owned=False):
         super().__init__(parameters=parameters, system_owned=system_owned)
@@ -63,12 +86,17 @@ class Mesh(Component):
                                            default_value=True)
         self.exclusive_to_camera_uid = None
 
+        # CPU ray casts. Shared with all meshes of the same resource
+        self.triangle_bvh = None
+
     def initialise(self, **kwargs):
 
         if self.initialised:
             return
 
         self.create_mesh(data_manager=kwargs[constants.MODULE_NAME_DATA_MANAGER])
+        self.update_bounds()
+        self.create_triangle_bvh(data_manager=kwargs[constants.MODULE_NAME_DATA_MANAGER])
 
         ctx = kwargs["ctx"]
         shader_library = kwargs["shader_library"]
@@ -115,6 +143,46 @@ class Mesh(Component):
 
         self.initialised = True
 
+    def update_bounds(self):
+        self.aabb_min, self.aabb_max = aabb(vertices=self.vertices)
+        self.bounding_sphere_center, self.bounding_sphere_radius = bounding_sphere(vertices=self.vertices)
+
+        # The vertices may have changed, so the old triangle BVH can't be trusted anymore
+        self.triangle_bvh = None
+
+    def create_triangle_bvh(self, data_manager) -> None:
+        """
+        Builds the triangle BVH now, rather than on the first ray cast, which would stall that frame. Meshes loaded
+        from a resource share the resource's BVH
+        """
+
+        if self.render_mode != constants.MESH_RENDER_MODE_TRIANGLES or self.vertices is None:
+            return
+
+        resource_id = self.parameters.get(constants.COMPONENT_ARG_RESOURCE_ID, None)
+        if resource_id is not None:
+            self.triangle_bvh = data_manager.get_triangle_bvh(data_group_id=resource_id)
+            return
+
+        self.triangle_bvh = TriangleBVH(vertices=self.vertices, indices=self.indices)
+        self.triangle_bvh.build()
+
+    def get_triangle_bvh(self):
+        """
+        Built by create_triangle_bvh() when the mesh is initialised. If the vertices changed since then (see
+        update_bounds()), a new one is built from them
+
+        :return: TriangleBVH of the mesh's vertices, or None if the mesh isn't made of triangles
+        """
+
+        if self.render_mode != constants.MESH_RENDER_MODE_TRIANGLES or self.vertices is None:
+            return None
+
+        if self.triangle_bvh is None:
+            self.triangle_bvh = TriangleBVH(vertices=self.vertices, indices=self.indices)
+
+        return self.triangle_bvh
+
     def render(self, shader_pass_name: str, num_instances=1):
         self.vaos[shader_pass_name].render(mode=self.render_mode, instances=num_instances)
 
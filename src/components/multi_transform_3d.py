@@ -1,90 +1,129 @@
 import numpy as np
-import moderngl
 
 
-from src.math import mat4
+from src.math.skeleton_pose import SkeletonPose
 from src.core import constants
 from src.core.component import Component
 
 
 class MultiTransform3D(Component):
 
+    """
+    Many transforms for a single entity, one per instance of its mesh (e.g. crowds, forests, or the nodes of a
+    glTF scene). Local matrices are relative to the entity's own transform, and world matrices (both row-major)
+    are recomputed from them by the TransformSystem.
+
+    Instead of a single dirty flag, changes are tracked as a range of instances [dirty_start, dirty_stop), so that
+    moving a few instances only recomputes and uploads those. The range is cleared once uploaded to the GPU.
+    """
+
     _type = "transform"
 
     __slots__ = [
         "local_matrices",
         "world_matrices",
-        "dirty"
+        "dirty_start",
+        "dirty_stop",
+        "instance_offset"
     ]
 
     def __init__(self, parameters, system_owned=False):
         super().__init__(parameters=parameters, system_owned=system_owned)
         self.local_matrices = None
         self.world_matrices = None
-        self.dirty = False
+        self.dirty_start = 0
+        self.dirty_stop = 0
+
+        # Where the world matrices start in the render system's InstanceBuffer, -1 if not uploaded
+        self.instance_offset = -1
 
     def initialise(self, **kwargs):
 
-        data_manager = kwargs[constants.MODULE_NAME_DATA_MANAGER]
         resource_id = self.parameters.get(constants.COMPONENT_ARG_RESOURCE_ID, None)
 
+        # Without a resource, instances are all placed at the entity's origin until their local matrices are set
         if resource_id is None:
+            num_instances = Component.dict2int(input_dict=self.parameters,
+                                               key=constants.COMPONENT_ARG_MULTI_TRANSFORM_NUM_INSTANCES,
+                                               default_value=0)
+            if num_instances > 0:
+                self.allocate(num_instances=num_instances)
             return
 
+        data_manager = kwargs[constants.MODULE_NAME_DATA_MANAGER]
         nodes_data_group = data_manager.data_groups[resource_id]
 
-        # Copy any relevant data from resource
-        num_children = nodes_data_group.data_blocks["num_children"].data.copy()
-        children_indices = nodes_data_group.data_blocks["children_indices"].data.copy()
-        parent_indices = nodes_data_group.data_blocks["parent_index"].data.copy()
-
-        # Allocate memory for bone matrices
-        num_bones = nodes_data_group.data_blocks["parent_index"].data.size
-        matrix_shape = (num_bones, 4, 4)
-        local_matrices = np.empty(matrix_shape, dtype=np.float32)
-        self.local_matrices = np.empty(matrix_shape, dtype=np.float32)
-        self.world_matrices = np.empty(matrix_shape, dtype=np.float32)
-
-        # Calculate local matrices
-        for bone_index in range(num_bones):
-            mat4.matrix_composition(
-                nodes_data_group.data_blocks["translation"].data[bone_index, :],
-                nodes_data_group.data_blocks["rotation"].data[bone_index, :],
-                nodes_data_group.data_blocks["scale"].data[bone_index, :],
-                local_matrices[bone_index, :, :])
-
-        # First find the root node:
-        root_nodes = [node_index for node_index, parent_index in enumerate(parent_indices) if parent_index == -1]
-        if len(root_nodes) == 0:
-            raise Exception("[ERROR] No root node (one with parent_index equals -1) was found")
-
-        next_node_indices = root_nodes
-
-        while len(next_node_indices) > 0:
-
-            current_node_index = next_node_indices.pop()
-            parent_index = parent_indices[current_node_index]
-            updated_children_indices = [children_indices[current_node_index, sub_index]
-                                for sub_index in range(num_children[current_node_index])]
-
-            if parent_index == -1:
-                parent_matrix = np.eye(4, dtype=np.float32)
-            else:
-                parent_matrix = self.local_matrices[parent_index, :, :]
+        # Allocate memory for node matrices
+        self.allocate(num_instances=nodes_data_group.data_blocks["parent_index"].data.size)
+
+        # Local matrices are relative to the multi-transform itself, so they combine the whole node hierarchy
+        pose = SkeletonPose(parent_indices=nodes_data_group.data_blocks["parent_index"].data)
+        pose.evaluate(translations=nodes_data_group.data_blocks["translation"].data.astype(np.float32),
+                      rotations=nodes_data_group.data_blocks["rotation"].data.astype(np.float32),
+                      scales=nodes_data_group.data_blocks["scale"].data.astype(np.float32),
+                      world_matrices_out=self.local_matrices)
+        self.world_matrices[:] = self.local_matrices
+
+    def allocate(self, num_instances: int):
+        """
+        (Re)creates the matrices of all instances as identities
+
+        :param num_instances: int
+        :return: None
+        """
+
+        self.local_matrices = np.tile(np.eye(4, dtype=np.float32), (num_instances, 1, 1))
+        self.world_matrices = self.local_matrices.copy()
+        self.mark_dirty()
+
+    def set_local_matrices(self, local_matrices: np.ndarray, start=0):
+        """
+        Overwrites the local matrices of consecutive instances, starting at "start". Only those are recomputed and
+        uploaded on the next update
+
+        :param local_matrices: numpy array (N, 4, 4), row-major
+        :param start: int, index of the first instance to overwrite
+        :return: None
+        """
+
+        stop = start + local_matrices.shape[0]
+        if start < 0 or stop > self.local_matrices.shape[0]:
+            raise ValueError(f"[ERROR] Instances [{start}, {stop}) out of range for "
+                             f"{self.local_matrices.shape[0]} instances")
+
+        self.local_matrices[start:stop] = local_matrices
+        self.mark_dirty(start=start, stop=stop)
+
+    def mark_dirty(self, start=0, stop=None):
+        """
+        Extends the dirty range to include instances [start, stop). By default, all of them
+
+        :param start: int
+        :param stop: int, or None for the number of instances
+        :return: None
+        """
+
+        num_instances = self.get_num_transforms()
+        if num_instances is None:
+            return
 
-            self.local_matrices[current_node_index, :, :] = parent_matrix @ local_matrices[current_node_index, :, :]
-            next_node_indices.extend(updated_children_indices)
+        stop = num_instances if stop is None else min(stop, num_instances)
+        if start >= stop:
+            return
 
-        self.dirty = True
+        if self.dirty_start >= self.dirty_stop:
+            self.dirty_start, self.dirty_stop = start, stop
+            return
 
-    def upload_world_matrix_to_ubo(self, ubo: moderngl.UniformBlock):
+        self.dirty_start = min(self.dirty_start, start)
+        self.dirty_stop = max(self.dirty_stop, stop)
 
-        if not self.dirty:
-            return
+    def clear_dirty(self):
+        self.dirty_start = 0
+        self.dirty_stop = 0
 
-        # Write the data to the UBO
-        ubo.write(self.world_matrices.tobytes(), offset=0)
-        self.dirty = False
+    def is_dirty(self) -> bool:
+        return self.dirty_start < self.dirty_stop
 
     def get_num_transforms(self) -> int:
         if self.world_matrices is None:
@@ -1,31 +1,52 @@
 import numpy as np
-import glm
 
 from src.core import constants
 from src.core.component import Component
-from src.math import mat4
+from src.math.skeleton_pose import SkeletonPose
+from src.math.animation_sampler import AnimationSampler
 
 
 class Skeleton(Component):
 
     __slots__ = [
+        "pose",
+        "translations",
+        "rotations",
+        "scales",
         "world_matrices",
-        "local_matrices",
+        "skinning_matrices",
         "parent_indices",
-        "children_indices",
-        "num_children"
+        "animation_samplers",
+        "animation_time",
+        "animation_speed",
+        "animation_loop",
+        "palette_offset"
     ]
 
-    _type = constants.COMPONENT_TYPE_ROBOT
+    _type = constants.COMPONENT_TYPE_SKELETON
 
     def __init__(self, parameters, system_owned=False):
         super().__init__(parameters=parameters, system_owned=system_owned)
 
-        self.local_matrices = None
+        self.pose = None
+        self.translations = None
+        self.rotations = None
+        self.scales = None
         self.world_matrices = None
+        self.skinning_matrices = None
         self.parent_indices = None
-        self.children_indices = None
-        self.num_children = None
+
+        # Where this skeleton's skinning matrices start in the render system's bone palette (-1 if not there)
+        self.palette_offset = -1
+
+        self.animation_samplers = {}
+        self.animation_time = 0.0
+        self.animation_speed = Component.dict2float(input_dict=self.parameters,
+                                                    key=constants.COMPONENT_ARG_SKELETON_ANIMATION_SPEED,
+                                                    default_value=1.0)
+        self.animation_loop = Component.dict2bool(input_dict=self.parameters,
+                                                  key=constants.COMPONENT_ARG_SKELETON_ANIMATION_LOOP,
+                                                  default_value=True)
 
     def initialise(self, **kwargs):
 
@@ -33,64 +54,86 @@ class Skeleton(Component):
         if resource_id is None:
             raise Exception(f"[ERROR] Skeleton component has no 'resource_id' argument defined")
 
-        resource = kwargs[constants.MODULE_NAME_DATA_MANAGER].data_groups.get(resource_id, None)
+        data_manager = kwargs[constants.MODULE_NAME_DATA_MANAGER]
+        resource = data_manager.data_groups.get(resource_id, None)
         if resource is None:
             raise Exception(f"[ERROR] No resource '{resource_id}' found in the resource manager")
 
-        # Copy any relevant data from resource
-        self.num_children = resource.data_blocks["num_children"].data.copy()
-        self.children_indices = resource.data_blocks["children_indices"].data.copy()
+        # Copy any relevant data from resource. The local TRS of each bone is what animations write into
         self.parent_indices = resource.data_blocks["parent_index"].data.copy()
+        self.translations = resource.data_blocks["translation"].data.astype(np.float32)
+        self.rotations = resource.data_blocks["rotation"].data.astype(np.float32)
+        self.scales = resource.data_blocks["scale"].data.astype(np.float32)
 
-        # Allocate memory for bone matrices
-        num_bones = resource.data_blocks["parent_index"].data.size
-        matrix_shape = (num_bones, 4, 4)
-        self.local_matrices = np.empty(matrix_shape, dtype=np.float32)
-        self.world_matrices = np.empty(matrix_shape, dtype=np.float32)
+        inverse_bind_matrices = None
+        if "inverse_bind_matrices" in resource.data_blocks:
+            inverse_bind_matrices = resource.data_blocks["inverse_bind_matrices"].data
 
-        # Calculate local matrices
-        # TODO: [OPTIMIZE] I tried this in numba but it didn't like 2D slicing from a 3D matrix.
-        for bone_index in range(num_bones):
-            mat4.matrix_composition(
-                resource.data_blocks["translation"].data[bone_index, :],
-                resource.data_blocks["rotation"].data[bone_index, :],
-                resource.data_blocks["scale"].data[bone_index, :],
-                self.local_matrices[bone_index, :, :])
+        # The bone evaluation order is computed here, only once
+        self.pose = SkeletonPose(parent_indices=self.parent_indices, inverse_bind_matrices=inverse_bind_matrices)
 
-        # Calculate world matrices based on local matrices and their hierarchy
+        # Allocate memory for bone matrices
+        matrix_shape = (self.pose.num_bones, 4, 4)
+        self.world_matrices = np.empty(matrix_shape, dtype=np.float32)
+        if inverse_bind_matrices is not None:
+            self.skinning_matrices = np.empty(matrix_shape, dtype=np.float32)
+
+        # Animation channels target GLTF nodes, which are converted to bones here. Nodes outside the skeleton are
+        # ignored
+        animation_resource_id = self.parameters.get(constants.COMPONENT_ARG_SKELETON_ANIMATION, None)
+        if animation_resource_id is not None:
+            animation_resource = data_manager.data_groups.get(animation_resource_id, None)
+            if animation_resource is None:
+                raise Exception(f"[ERROR] No resource '{animation_resource_id}' found in the resource manager")
+
+            node2bone_lookup = resource.data_blocks["nodes2skeleton_lookup"].data
+            self.animation_samplers = {
+                path: AnimationSampler.from_data_blocks(data_blocks=animation_resource.data_blocks,
+                                                        path=path,
+                                                        target_lookup=node2bone_lookup)
+                for path in constants.RESOURCE_ANIMATION_GLTF_CHANNELS
+                if f"{path}/timestamps" in animation_resource.data_blocks}
+
+        # Calculate world matrices based on local TRS and their hierarchy
+        self.update_animation(elapsed_time=0.0)
         self.update_world_matrices()
 
-    def update_world_matrices(self, external_world_matrix=None):
+    def update_animation(self, elapsed_time: float):
         """
-        Re-calculates all world matrices based on their hierarchy and local matrices
-        :param offset_root_matrix: you can offset the entire skeleton
+        Advances the animation (if any) and writes the sampled translations, rotations and scales into the bones
+        :param elapsed_time: float, in seconds
         :return:
         """
 
-        if external_world_matrix is None:
-            external_world_matrix = np.eye(4, dtype=np.float32)
+        if len(self.animation_samplers) == 0:
+            return
 
-        # First find the root node:
-        root_nodes = [node_index for node_index, parent_index in enumerate(self.parent_indices) if parent_index == -1]
-        if len(root_nodes) == 0:
-            raise Exception("[ERROR] No root node (one with parent_index equals -1) was found")
+        self.animation_time += elapsed_time * self.animation_speed
 
-        next_node_indices = root_nodes
+        start_time = min(sampler.start_time for sampler in self.animation_samplers.values())
+        end_time = max(sampler.end_time for sampler in self.animation_samplers.values())
+        duration = end_time - start_time
+        if self.animation_loop and duration > 0.0 and not (start_time <= self.animation_time <= end_time):
+            self.animation_time = start_time + (self.animation_time - start_time) % duration
 
-        while len(next_node_indices) > 0:
+        bone_arrays = {"translation": self.translations, "rotation": self.rotations, "scale": self.scales}
+        for path, sampler in self.animation_samplers.items():
+            sampler.sample_into(times=self.animation_time, output=bone_arrays[path])
 
-            current_node_index = next_node_indices.pop()
-            parent_index = self.parent_indices[current_node_index]
-            children_indices = [self.children_indices[current_node_index, sub_index]
-                                for sub_index in range(self.num_children[current_node_index])]
-
-            #print(f" - Node {current_node_index} : parent {parent_index} : children {children_indices}")
-
-            if parent_index == -1:
-                parent_matrix = external_world_matrix
-            else:
-                parent_matrix = self.world_matrices[parent_index, :, :]
+    def update_world_matrices(self, external_world_matrix=None):
+        """
+        Re-calculates all world matrices (and skinning matrices, if the skeleton has inverse bind matrices) from
+        the bones' current translations, rotations and scales
+        :param external_world_matrix: you can offset the entire skeleton
+        :return:
+        """
 
-            self.world_matrices[current_node_index, :, :] = parent_matrix @ self.local_matrices[current_node_index, :, :]
-            next_node_indices.extend(children_indices)
+        if external_world_matrix is not None:
+            external_world_matrix = np.ascontiguousarray(external_world_matrix, dtype=np.float32)
 
+        self.pose.evaluate(translations=self.translations,
+                           rotations=self.rotations,
+                           scales=self.scales,
+                           world_matrices_out=self.world_matrices,
+                           root_matrices=external_world_matrix,
+                           skinning_matrices_out=self.skinning_matrices)
@@ -3,23 +3,37 @@ from src.core import constants
 
 from src.math import mat4
 from src.core.component import Component
+from src.core.component_arrays import ComponentArrays, ComponentArrayField
 
 
 class Transform3D(Component):
 
     _type = "transform_3d"
 
+    _array_fields = {
+        "position": (np.float64, (3,), 0.0),
+        "rotation": (np.float64, (3,), 0.0),
+        "scale": (np.float64, (3,), 1.0),
+        "local_matrix": (np.float32, (4, 4), np.eye(4, dtype=np.float32)),
+        "world_matrix": (np.float32, (4, 4), np.eye(4, dtype=np.float32)),
+        "inverse_world_matrix": (np.float32, (4, 4), np.eye(4, dtype=np.float32)),
+        "input_values_updated": (np.bool_, (), True),
+        "local_matrix_updated": (np.bool_, (), False),
+        "dirty": (np.bool_, (), True)
+    }
+
+    position = ComponentArrayField(as_tuple=True)
+    rotation = ComponentArrayField(as_tuple=True)
+    scale = ComponentArrayField(as_tuple=True)
+    local_matrix = ComponentArrayField()
+    world_matrix = ComponentArrayField()
+    inverse_world_matrix = ComponentArrayField()
+    input_values_updated = ComponentArrayField()
+    local_matrix_updated = ComponentArrayField()
+    dirty = ComponentArrayField()  # After each TransformSystem update, TRUE only if the world matrix was recomputed
+
     __slots__ = [
-        "local_matrix",
-        "world_matrix",
-        "inverse_world_matrix",
-        "position",
-        "rotation",
-        "scale",
-        "degrees",
-        "input_values_updated",
-        "local_matrix_updated",
-        "dirty"
+        "degrees"
     ]
 
     def __init__(self, parameters, system_owned=False):
@@ -33,17 +47,19 @@ class Transform3D(Component):
                                                    key="rotation",
                                                    default_value=(0.0, 0.0, 0.0))
 
-        self.scale = Component.dict2tuple_float(input_dict=self.parameters,
-                                                key="scale",
-                                                default_value=(1.0, 1.0, 1.0))
+        scale = Component.dict2tuple_float(input_dict=self.parameters,
+                                           key="scale",
+                                           default_value=(1.0, 1.0, 1.0))
 
-        if len(self.scale) == 1:
-            self.scale = (self.scale[0], self.scale[0], self.scale[0])
+        if len(scale) == 1:
+            scale = (scale[0], scale[0], scale[0])
 
-        if len(self.scale) == 2:
+        if len(scale) == 2:
             raise Exception("[ERROR] Input scale from parameters contains 2 values. Please make sure you have"
                             "either 1 or 3")
 
+        self.scale = scale
+
         self.degrees = Component.dict2bool(input_dict=self.parameters,
                                            key="degrees",
                                            default_value=False)
@@ -53,12 +69,7 @@ class Transform3D(Component):
                              np.radians(self.rotation[1]),
                              np.radians(self.rotation[2]))
 
-        self.local_matrix = np.eye(4, dtype=np.float32)
-        self.world_matrix = np.eye(4, dtype=np.float32)
-        self.inverse_world_matrix = np.eye(4, dtype=np.float32)  # Doesn't get update correctly for some reason
-        self.input_values_updated = True
-        self.local_matrix_updated = False
-        self.dirty = True
+        # Matrices start as identity and the update flags with their defaults (see _array_fields)
 
     def update(self) -> bool:
         """
@@ -84,16 +95,58 @@ class Transform3D(Component):
             return True
 
         if self.input_values_updated:
-            self.local_matrix = mat4.create_transform_euler_xyz(
-                np.array(self.position, dtype=np.float32),
-                np.array(self.rotation, dtype=np.float32),
-                np.array(self.scale, dtype=np.float32),)
+            # Single row slices of the arrays avoid creating any temporary arrays
+            arrays = self.component_arrays.arrays
+            rows = slice(self.component_row, self.component_row + 1)
+            mat4.create_transforms_euler_xyz(arrays["position"][rows],
+                                             arrays["rotation"][rows],
+                                             arrays["scale"][rows],
+                                             arrays["local_matrix"][rows])
             self.input_values_updated = False
             self.dirty = True
             return True
 
         return False
 
+    @staticmethod
+    def update_arrays(component_arrays: ComponentArrays) -> np.ndarray:
+        """
+        Vectorized version of update() for all transforms stored in "component_arrays"
+
+        :return: numpy array (num_rows,) <bool>, TRUE for the rows whose local matrix has been updated
+        """
+
+        local_matrix_updated = component_arrays.get("local_matrix_updated")
+        input_values_updated = component_arrays.get("input_values_updated")
+        updated = local_matrix_updated | input_values_updated
+        if not updated.any():
+            return updated
+
+        position = component_arrays.get("position")
+        rotation = component_arrays.get("rotation")
+        local_matrix = component_arrays.get("local_matrix")
+
+        # Local matrices edited directly are rare (e.g. gizmos), so these are handled one by one
+        for row in np.flatnonzero(local_matrix_updated):
+            position[row] = local_matrix[row, :3, 3]
+            rotation[row] = mat4.to_euler_xyz(local_matrix[row])
+
+        input_rows = np.flatnonzero(input_values_updated & ~local_matrix_updated)
+        if input_rows.size == local_matrix.shape[0]:
+            mat4.create_transforms_euler_xyz(position, rotation, component_arrays.get("scale"), local_matrix)
+        elif input_rows.size > 0:
+            input_local_matrices = np.empty((input_rows.size, 4, 4), dtype=np.float32)
+            mat4.create_transforms_euler_xyz(position[input_rows],
+                                             rotation[input_rows],
+                                             component_arrays.get("scale")[input_rows],
+                                             input_local_matrices)
+            local_matrix[input_rows] = input_local_matrices
+
+        local_matrix_updated[:] = False
+        input_values_updated[:] = False
+        component_arrays.get("dirty")[updated] = True
+        return updated
+
     def move(self, delta_position: np.array):
         self.position += delta_position
         self.input_values_updated = True
@@ -1,6 +1,7 @@
 from typing import Any, Union
 
 from src.core import constants
+from src.core.component_arrays import ComponentArrays
 from src.utilities import utils_string
 
 
@@ -8,10 +9,17 @@ class Component:
 
     _type = "base_component"
 
+    # Components that declare array fields {name: (dtype, row_shape, default_value)} keep that data in a row of
+    # a ComponentArrays. They start with their own private single-row arrays, and the Scene moves them into the
+    # shared arrays of their component type when they are added to it
+    _array_fields = None
+
     __slots__ = [
         "parameters",
         "initialised",
-        "system_owned"
+        "system_owned",
+        "component_arrays",
+        "component_row"
     ]
 
     def __init__(self, parameters: dict, system_owned=False):
@@ -20,6 +28,11 @@ class Component:
         self.system_owned = system_owned
         self.initialised = False
 
+        self.component_arrays = None
+        self.component_row = -1
+        if self._array_fields is not None:
+            ComponentArrays(fields=self._array_fields, initial_capacity=1).add(entity_uid=-1, component=self)
+
     def initialise(self, **kwargs):
         pass
 
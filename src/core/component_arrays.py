@@ -0,0 +1,198 @@
+import numpy as np
+
+from src.core import constants
+
+
+class ComponentArrays:
+
+    """
+    Struct-of-arrays storage for the hot data of a single component type. Each field is a contiguous numpy array
+    and row "i" of every field belongs to entity "entity_uids[i]". Rows are always kept dense: removing a component
+    moves the last row into the empty slot (swap-remove), so systems can process the whole pool at once through
+    the views returned by get(field_name), which have "num_rows" rows.
+
+    Components are bound to their row, and their array-backed attributes (see ComponentArrayField) read and write
+    directly into these arrays.
+
+    IMPORTANT: Arrays are re-allocated when they grow, so any view obtained from them is only valid until the
+               next add/remove. The "version" counter is incremented every time rows are added, moved or removed
+    """
+
+    __slots__ = [
+        "fields",
+        "arrays",
+        "entity_uids",
+        "components",
+        "uid2row",
+        "num_rows",
+        "capacity",
+        "version"]
+
+    def __init__(self, fields: dict, initial_capacity=constants.COMPONENT_ARRAYS_INITIAL_CAPACITY):
+        """
+        :param fields: dict, {field_name: (dtype, row_shape, default_value)}
+        :param initial_capacity: int, number of rows allocated upfront
+        """
+
+        self.fields = fields
+        self.capacity = max(1, initial_capacity)
+        self.num_rows = 0
+        self.version = 0
+        self.arrays = {name: np.empty((self.capacity, *row_shape), dtype=dtype)
+                       for name, (dtype, row_shape, _) in fields.items()}
+        self.entity_uids = np.empty((self.capacity,), dtype=np.int64)
+        self.components = []
+        self.uid2row = {}
+
+    def __len__(self):
+        return self.num_rows
+
+    def __contains__(self, entity_uid: int):
+        return entity_uid in self.uid2row
+
+    def get(self, field_name: str) -> np.ndarray:
+        return self.arrays[field_name][:self.num_rows]
+
+    def get_entity_uids(self) -> np.ndarray:
+        return self.entity_uids[:self.num_rows]
+
+    def get_rows(self, entity_uids) -> np.ndarray:
+        """
+        Returns the rows of the provided entities, or -1 for those without a row
+        """
+        return np.fromiter((self.uid2row.get(entity_uid, -1) for entity_uid in entity_uids),
+                           dtype=np.int64,
+                           count=len(entity_uids))
+
+    def reserve(self, capacity: int):
+
+        if capacity <= self.capacity:
+            return
+
+        for name, array in self.arrays.items():
+            new_array = np.empty((capacity, *array.shape[1:]), dtype=array.dtype)
+            new_array[:self.num_rows] = array[:self.num_rows]
+            self.arrays[name] = new_array
+
+        new_entity_uids = np.empty((capacity,), dtype=np.int64)
+        new_entity_uids[:self.num_rows] = self.entity_uids[:self.num_rows]
+        self.entity_uids = new_entity_uids
+        self.capacity = capacity
+
+    def add(self, entity_uid: int, component=None) -> int:
+        """
+        Adds a row for the entity, initialised with default values. If a component is provided, its current values
+        are copied from wherever it was stored before, and it gets bound to the new row.
+
+        :return: int, row of the new entity
+        """
+
+        if entity_uid in self.uid2row:
+            raise KeyError(f"[ERROR] Entity '{entity_uid}' already has a row")
+
+        row = int(self.add_rows(entity_uids=np.array([entity_uid], dtype=np.int64))[0])
+        if component is None:
+            return row
+
+        source = component.component_arrays
+        if source is self:
+            raise ValueError("[ERROR] Component is already bound to these arrays")
+
+        if source is not None:
+            source_row = component.component_row
+            for name, array in self.arrays.items():
+                array[row] = source.arrays[name][source_row]
+
+        component.component_arrays = self
+        component.component_row = row
+        self.components[row] = component
+        return row
+
+    def add_rows(self, entity_uids: np.ndarray) -> np.ndarray:
+        """
+        Adds rows, initialised with default values, for many entities at once. No component objects are bound
+        to these rows, so their data is only accessible through the arrays.
+
+        :param entity_uids: numpy array (N,) of unique entity uids
+        :return: numpy array (N,) <int64> of new rows
+        """
+
+        num_new_rows = entity_uids.size
+        if self.num_rows + num_new_rows > self.capacity:
+            self.reserve(capacity=max(self.capacity * 2, self.num_rows + num_new_rows))
+
+        start = self.num_rows
+        stop = start + num_new_rows
+        for name, (_, _, default_value) in self.fields.items():
+            self.arrays[name][start:stop] = default_value
+        self.entity_uids[start:stop] = entity_uids
+
+        rows = np.arange(start, stop, dtype=np.int64)
+        self.uid2row.update(zip(entity_uids.tolist(), rows.tolist()))
+        self.components.extend([None] * num_new_rows)
+        self.num_rows = stop
+        self.version += 1
+        return rows
+
+    def remove(self, entity_uid: int):
+        """
+        Removes the entity's row by moving the last row into its place. A component bound to the removed row is
+        given a private copy of its data, so it remains usable after being removed.
+        """
+
+        row = self.uid2row.pop(entity_uid)
+        last_row = self.num_rows - 1
+
+        component = self.components[row]
+        if component is not None:
+            private_arrays = ComponentArrays(fields=self.fields, initial_capacity=1)
+            private_arrays.add(entity_uid=entity_uid, component=component)
+
+        if row != last_row:
+            for array in self.arrays.values():
+                array[row] = array[last_row]
+            moved_entity_uid = int(self.entity_uids[last_row])
+            self.entity_uids[row] = moved_entity_uid
+            self.uid2row[moved_entity_uid] = row
+            moved_component = self.components[last_row]
+            self.components[row] = moved_component
+            if moved_component is not None:
+                moved_component.component_row = row
+
+        self.components.pop()
+        self.num_rows = last_row
+        self.version += 1
+
+
+class ComponentArrayField:
+
+    """
+    Component attribute whose value lives in the component's row of a ComponentArrays. Scalars are returned as
+    python values and everything else as a writable view of the row, unless "as_tuple" is set.
+    """
+
+    __slots__ = [
+        "name",
+        "as_tuple"]
+
+    def __init__(self, as_tuple=False):
+        self.name = None
+        self.as_tuple = as_tuple
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, instance, owner=None):
+
+        if instance is None:
+            return self
+
+        value = instance.component_arrays.arrays[self.name][instance.component_row]
+        if value.ndim == 0:
+            return value.item()
+        if self.as_tuple:
+            return tuple(value.tolist())
+        return value
+
+    def __set__(self, instance, value):
+        instance.component_arrays.arrays[self.name][instance.component_row] = value
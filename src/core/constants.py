@@ -11,6 +11,8 @@ RESOURCES_DIR = os.path.join(ROOT_DIR, "resources")
 FONTS_DIR = os.path.join(RESOURCES_DIR, "fonts")
 IMAGES_DIR = os.path.join(RESOURCES_DIR, "images")
 SHADERS_DIR = os.path.join(SRC_DIR, "shaders")
+CACHE_DIR = os.path.join(ROOT_DIR, ".cache")
+DATA_MANAGER_CACHE_DIR = os.path.join(CACHE_DIR, "data_manager")
 
 # =============================================================================
 #                                Editor
@@ -89,6 +91,32 @@ RESOURCE_TYPE_ANIMATION_BVH = "animation_bvh"
 
 RESOURCE_ANIMATION_GLTF_CHANNELS = ["translation", "rotation", "scale"]
 
+# Keyframe interpolation modes, as named in GLTF files
+ANIMATION_INTERPOLATION_STEP = 0
+ANIMATION_INTERPOLATION_LINEAR = 1
+ANIMATION_INTERPOLATION_CUBICSPLINE = 2
+ANIMATION_INTERPOLATION_GLTF_MAP = {
+    "STEP": ANIMATION_INTERPOLATION_STEP,
+    "LINEAR": ANIMATION_INTERPOLATION_LINEAR,
+    "CUBICSPLINE": ANIMATION_INTERPOLATION_CUBICSPLINE}
+
+# Animation baking and compression
+ANIMATION_BAKING_DEFAULT_FRAME_RATE = 30.0  # Frames per second of baked clips
+ANIMATION_COMPRESSION_TRANSLATION_TOLERANCE = 1e-3  # Max error of reduced keyframes, in scene units
+ANIMATION_COMPRESSION_ROTATION_TOLERANCE = 1e-3  # Radians
+ANIMATION_COMPRESSION_SCALE_TOLERANCE = 1e-4
+
+RESOURCE_CACHE_FORMAT_VERSION = 1
+RESOURCE_CACHE_FILE_EXTENSION = ".dgcache"
+RESOURCE_CACHE_ALIGNMENT = 64  # Bytes. Each DataBlock starts at a cache-line aligned offset
+RESOURCE_CACHE_HASH_CHUNK_SIZE = 1 << 20  # Bytes read at a time when hashing source files
+
+HDF5_ROOT_GROUP_DATA_GROUPS = "data_groups"
+HDF5_ATTR_ARCHETYPE = "__archetype__"
+HDF5_JSON_ATTR_PREFIX = "__json__"
+HDF5_DEFAULT_CHUNK_SIZE_BYTES = 1 << 20  # Target chunk size when chunking is enabled
+HDF5_DEFAULT_COMPRESSION = "lzf"
+
 RESOURCE_BVH_ROTATION_ORDER_MAP = {
     "xyz": 0,
     "xzy": 1,
@@ -99,6 +127,12 @@ RESOURCE_BVH_ROTATION_ORDER_MAP = {
 }
 
 
+# =============================================================================
+#                               Import System
+# =============================================================================
+
+IMPORT_SYSTEM_MAX_CONCURRENT_LOADING_TASKS = 4
+
 # =============================================================================
 #                               Imgui System
 # =============================================================================
@@ -167,7 +201,8 @@ EVENT_MOUSE_GIZMO_3D_DEACTIVATED = "mouse_gizmo_3d_deactivated"
 EVENT_EXIT_APPLICATION = "exit_application"
 EVENT_ENTITY_SELECTED = "entity_selected"
 EVENT_ENTITY_DESELECTED = "entity_deselected"
-EVENT_MULTIPLE_ENTITIES_SELECTED = "multiple_entities_selected"
+EVENT_ENTITY_HOVERED = "entity_hovered"  # args: (entity_uid,) <int>, -1 when the mouse leaves all entities
+EVENT_MULTIPLE_ENTITIES_SELECTED = "multiple_entities_selected"  # args: (entity_uid, ...) <int, ...>
 EVENT_PROFILING_SYSTEM_PERIODS = "profiling_system_periods"  # args (("system_a", 0.2), ("system_b" 0.37), ...) <(string, float) ...>
 
 
@@ -252,19 +287,32 @@ UBO_BINDING_CAMERA_SETTINGS = 0
 UBO_BINDING_MATERIALS = 1
 UBO_BINDING_POINT_LIGHTS = 2
 UBO_BINDING_DIRECTIONAL_LIGHTS = 3
-UBO_BINDING_TRANSFORMS = 4
-UBO_BINDING_JOINTS = 5
-UBO_BINDING_INVERSE_BINDING_MATRICES = 6
+
+# SSBO definitions
+SSBO_BINDING_BONE_PALETTE = 0
+SSBO_BINDING_INSTANCE_TRANSFORMS = 1
+SSBO_BINDING_INSTANCE_INDICES = 2
 
 SCENE_MAX_NUM_MATERIALS = 32
 SCENE_MAX_NUM_POINT_LIGHTS = 8
 SCENE_MAX_NUM_DIRECTIONAL_LIGHTS = 4
-SCENE_MAX_NUM_TRANSFORMS = 128
 
 SCENE_CAMERA_SETTINGS_STRUCT_SIZE_BYTES = 256
 SCENE_MATERIAL_STRUCT_SIZE_BYTES = 64
 SCENE_POINT_LIGHT_STRUCT_SIZE_BYTES = 64
-SCENE_POINT_TRANSFORM_SIZE_BYTES = 64
+
+# Skinning
+SKINNING_BONE_PALETTE_INITIAL_NUM_BONES = 1024  # Grows as needed
+SKINNING_CPU_CHUNK_SIZE = 4096  # Vertices skinned by each parallel task
+
+# Instancing
+INSTANCING_INITIAL_NUM_INSTANCES = 1024  # Grows as needed
+INSTANCING_TRANSFORM_SIZE_BYTES = 64
+
+# Entity picking
+ENTITY_PICKER_RING_SIZE = 4  # Pixel pack buffers, so a few picks can be in flight at once
+ENTITY_PICKER_LATENCY_FRAMES = 2  # Frames between copying a pick's pixels and reading them back
+ENTITY_PICKER_MARQUEE_MIN_PIXELS = 4  # Smaller drags are treated as clicks
 
 # =============================================================================
 #                                Render System
@@ -292,41 +340,58 @@ SHADER_PASSES_LIST = [
 
 # =============[ Render Commands ]===============
 
-# | layer | transparency | distance | material | mesh |
-#     5           1           16         8        12
+# Commands are 64-bit sort keys. Opaque ones are grouped by program and material first, and drawn front to back
+# within each group. Transparent ones must be drawn back to front, so their (inverted) distance comes first.
+#
+# opaque:      | layer | transparency | program | material | distance           | mesh |
+# transparent: | layer | transparency | distance (inverted) | program | material | mesh |
+#                  4          1           4         8           16                  24
 
-MAX_RENDER_COMMANDS = 4096
+RENDER_COMMANDS_INITIAL_CAPACITY = 4096  # Grows as needed
 
 # Bit allocation
-LAYER_BITS = 5
+LAYER_BITS = 4
 TRANSPARENCY_BITS = 1
-DISTANCE_BITS = 16
+PROGRAM_BITS = 4
 MATERIAL_BITS = 8
-MESH_BITS = 12
-TRANSFORM_BITS = 12
-RENDER_MODE_BITS = 4
+DISTANCE_BITS = 16
+MESH_BITS = 24
 
-TOTAL_USED_BITS = LAYER_BITS + TRANSPARENCY_BITS + DISTANCE_BITS + MATERIAL_BITS + MESH_BITS + TRANSFORM_BITS + RENDER_MODE_BITS
+TOTAL_USED_BITS = LAYER_BITS + TRANSPARENCY_BITS + PROGRAM_BITS + MATERIAL_BITS + DISTANCE_BITS + MESH_BITS
 if TOTAL_USED_BITS > 64:
     raise Exception(f"[ERROR] Total number bits in render command is {TOTAL_USED_BITS} ")
 
 # Shifts
-RENDER_MODE_SHIFT = 0
-TRANSFORM_SHIFT = RENDER_MODE_SHIFT + RENDER_MODE_BITS
-MESH_SHIFT = TRANSFORM_SHIFT + TRANSFORM_BITS
-MATERIAL_SHIFT = MESH_SHIFT + MESH_BITS
-DISTANCE_SHIFT = MATERIAL_SHIFT + MATERIAL_BITS
-TRANSPARENCY_SHIFT = DISTANCE_SHIFT + DISTANCE_BITS
+MESH_SHIFT = 0
+OPAQUE_DISTANCE_SHIFT = MESH_SHIFT + MESH_BITS
+OPAQUE_MATERIAL_SHIFT = OPAQUE_DISTANCE_SHIFT + DISTANCE_BITS
+OPAQUE_PROGRAM_SHIFT = OPAQUE_MATERIAL_SHIFT + MATERIAL_BITS
+TRANSPARENT_MATERIAL_SHIFT = MESH_SHIFT + MESH_BITS
+TRANSPARENT_PROGRAM_SHIFT = TRANSPARENT_MATERIAL_SHIFT + MATERIAL_BITS
+TRANSPARENT_DISTANCE_SHIFT = TRANSPARENT_PROGRAM_SHIFT + PROGRAM_BITS
+TRANSPARENCY_SHIFT = OPAQUE_PROGRAM_SHIFT + PROGRAM_BITS
 LAYER_SHIFT = TRANSPARENCY_SHIFT + TRANSPARENCY_BITS
 
 # Masks
 LAYER_MASK = (1 << LAYER_BITS) - 1
 TRANSPARENCY_MASK = 1  # Only 1 bit
-DISTANCE_MASK = (1 << DISTANCE_BITS) - 1
+PROGRAM_MASK = (1 << PROGRAM_BITS) - 1
 MATERIAL_MASK = (1 << MATERIAL_BITS) - 1
+DISTANCE_MASK = (1 << DISTANCE_BITS) - 1
 MESH_MASK = (1 << MESH_BITS) - 1
-TRANSFORM_MASK = (1 << TRANSFORM_BITS) - 1
-RENDER_MODE_MASK = (1 << RENDER_MODE_BITS) - 1
+
+# Programs (shader variants of a pass), as encoded in render commands. Flags, so a mesh can be both
+RENDER_COMMAND_PROGRAM_DEFAULT = 0
+RENDER_COMMAND_PROGRAM_INSTANCED = 1
+RENDER_COMMAND_PROGRAM_SKINNED = 2
+RENDER_COMMAND_NO_MATERIAL = MATERIAL_MASK  # Meshes without a material are drawn last in their group
+
+# =============[ BVH ]===============
+
+BVH_NUM_BINS = 16  # Split candidates per axis in the SAH build, plus one
+SCENE_BVH_LEAF_SIZE = 4
+TRIANGLE_BVH_LEAF_SIZE = 8
+SCENE_BVH_REBUILD_COST_RATIO = 2.0  # Rebuilt instead of refit once its nodes' surface area grows this much
 
 # Input buffer names
 SHADER_INPUT_VERTEX = "in_vert"
@@ -418,6 +483,7 @@ ENTITY_TYPE_TRANSFORM_GIZMO = 2
 # =============================================================================
 
 COMPONENT_POOL_STARTING_ID_COUNTER = 2
+COMPONENT_ARRAYS_INITIAL_CAPACITY = 64
 
 # Component Types
 COMPONENT_TYPE_TRANSFORM = 0
@@ -455,6 +521,14 @@ COLLIDER_SHAPE_SPHERE = "sphere"
 COLLIDER_SHAPE_CAPSULE = "capsule"
 COLLIDER_SHAPE_PLANE = "plane"
 
+# Skeleton Component Arguments
+COMPONENT_ARG_SKELETON_ANIMATION = "animation_resource_id"
+COMPONENT_ARG_SKELETON_ANIMATION_SPEED = "animation_speed"
+COMPONENT_ARG_SKELETON_ANIMATION_LOOP = "animation_loop"
+
+# Multi-transform Component Arguments
+COMPONENT_ARG_MULTI_TRANSFORM_NUM_INSTANCES = "num_instances"
+
 # =============================================================================
 #                               Materials
 # =============================================================================
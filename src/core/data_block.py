@@ -1,6 +1,10 @@
+import json
+
 import numpy as np
 import h5py
 
+from src.core import constants
+
 
 class DataBlock:
 
@@ -17,24 +21,102 @@ class DataBlock:
         self.metadata = {} if metadata is None else metadata
         self.data = data.copy() if copy_data else data
 
-    def to_hdf5(self, hdf5_group: h5py.Group):
+    def to_hdf5(self, hdf5_group: h5py.Group, name: str, compression=None, compression_opts=None, chunk_size_bytes=None):
+        """
+        Stores the data as a new dataset inside the provided HDF5 group. Chunks always span whole rows (first axis),
+        so that any range of rows (e.g. animation frames) can be read back without touching the rest of the data.
+
+        :param hdf5_group: h5py.Group, where the dataset will be created
+        :param name: str, name of the new dataset
+        :param compression: str, "lzf", "gzip" or None
+        :param compression_opts: int, compression level when using "gzip" (0-9)
+        :param chunk_size_bytes: int, target size of each chunk. If None, chunking is only used if compression is
+                                 enabled, with chunks of about HDF5_DEFAULT_CHUNK_SIZE_BYTES
+        :return: h5py.Dataset
+        """
         if self.data is None:
             raise ValueError("DataBlock data has not been initialized")
 
+        data = np.asarray(self.data)
+        chunks = get_hdf5_chunk_shape(data=data,
+                                      chunk_size_bytes=chunk_size_bytes,
+                                      compression=compression)
+
         # Create a dataset within the provided HDF5 group
-        dataset = hdf5_group.create_dataset(self.data.dtype, data=self.data)
+        dataset = hdf5_group.create_dataset(name,
+                                            data=data,
+                                            chunks=chunks,
+                                            compression=compression if chunks is not None else None,
+                                            compression_opts=compression_opts if chunks is not None else None)
 
         # Add metadata as attributes to the HDF5 dataset
-        for key, value in self.metadata.items():
-            dataset.attrs[key] = value
+        metadata_to_hdf5_attrs(metadata=self.metadata, hdf5_attrs=dataset.attrs)
+
+        return dataset
 
     @classmethod
-    def from_hdf5(cls, hdf5_dataset: h5py.Dataset):
+    def from_hdf5(cls, hdf5_dataset: h5py.Dataset, selection=None):
+        """
+        :param hdf5_dataset: h5py.Dataset
+        :param selection: slice or tuple of slices, if provided, only this part of the dataset is read from the disk
+        :return: DataBlock
+        """
+
         # Load data from the HDF5 dataset
-        data = hdf5_dataset[...]
+        data = hdf5_dataset[...] if selection is None else hdf5_dataset[selection]
 
         # Load metadata from the HDF5 dataset attributes
-        metadata = {key: hdf5_dataset.attrs[key] for key in hdf5_dataset.attrs}
+        metadata = metadata_from_hdf5_attrs(hdf5_attrs=hdf5_dataset.attrs)
 
         # Create a new DataBlock instance with the loaded data and metadata
         return cls(data, metadata, copy_data=False)
+
+
+def get_hdf5_chunk_shape(data: np.ndarray, chunk_size_bytes=None, compression=None):
+    """
+    Returns the chunk shape for an array, spanning as many complete rows as fit into "chunk_size_bytes"
+    """
+
+    if chunk_size_bytes is None and compression is None:
+        return None
+
+    if data.ndim == 0 or data.size == 0:
+        return None
+
+    if chunk_size_bytes is None:
+        chunk_size_bytes = constants.HDF5_DEFAULT_CHUNK_SIZE_BYTES
+
+    row_num_bytes = max(1, data.nbytes // data.shape[0])
+    num_rows = int(np.clip(chunk_size_bytes // row_num_bytes, 1, data.shape[0]))
+    return (num_rows, *data.shape[1:])
+
+
+def metadata_to_hdf5_attrs(metadata: dict, hdf5_attrs: h5py.AttributeManager):
+    """
+    Metadata values are stored as HDF5 attributes. Those that HDF5 can't store (dicts, None, etc) are stored
+    as JSON strings instead
+    """
+    for key, value in metadata.items():
+        try:
+            hdf5_attrs[key] = value
+        except (TypeError, ValueError):
+            hdf5_attrs[f"{constants.HDF5_JSON_ATTR_PREFIX}{key}"] = json.dumps(value)
+
+
+def metadata_from_hdf5_attrs(hdf5_attrs: h5py.AttributeManager) -> dict:
+
+    metadata = {}
+    for key, value in hdf5_attrs.items():
+        if key.startswith(constants.HDF5_JSON_ATTR_PREFIX):
+            metadata[key[len(constants.HDF5_JSON_ATTR_PREFIX):]] = json.loads(value)
+            continue
+
+        # Convert HDF5 types back into what they were originally
+        if isinstance(value, np.ndarray) and value.dtype == object:
+            value = value.tolist()
+        elif isinstance(value, np.generic):
+            value = value.item()
+
+        metadata[key] = value
+
+    return metadata
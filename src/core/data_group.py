@@ -1,3 +1,9 @@
+import h5py
+
+from src.core import constants
+from src.core.data_block import DataBlock, metadata_to_hdf5_attrs, metadata_from_hdf5_attrs
+
+
 class DataGroup:
 
     __slots__ = [
@@ -10,3 +16,38 @@ class DataGroup:
         self.archetype = archetype
         self.data_blocks = {}
         self.metadata = {} if metadata is None else metadata
+
+    def to_hdf5(self, hdf5_group: h5py.Group, compression=None, compression_opts=None, chunk_size_bytes=None):
+        """
+        Stores all DataBlocks as datasets inside "hdf5_group". DataBlock keys containing "/" become nested groups.
+        See DataBlock.to_hdf5() for the compression and chunking parameters
+        """
+
+        hdf5_group.attrs[constants.HDF5_ATTR_ARCHETYPE] = self.archetype
+        metadata_to_hdf5_attrs(metadata=self.metadata, hdf5_attrs=hdf5_group.attrs)
+
+        for block_key, data_block in self.data_blocks.items():
+            data_block.to_hdf5(hdf5_group=hdf5_group,
+                               name=block_key,
+                               compression=compression,
+                               compression_opts=compression_opts,
+                               chunk_size_bytes=chunk_size_bytes)
+
+    @classmethod
+    def from_hdf5(cls, hdf5_group: h5py.Group):
+
+        metadata = metadata_from_hdf5_attrs(hdf5_attrs=hdf5_group.attrs)
+        archetype = metadata.pop(constants.HDF5_ATTR_ARCHETYPE)
+        data_group = cls(archetype=archetype, metadata=metadata)
+
+        def load_dataset(name: str, hdf5_object):
+            if isinstance(hdf5_object, h5py.Dataset):
+                data_group.data_blocks[name] = DataBlock.from_hdf5(hdf5_dataset=hdf5_object)
+
+        hdf5_group.visititems(load_dataset)
+
+        return data_group
+
+    @staticmethod
+    def is_hdf5_data_group(hdf5_group: h5py.Group) -> bool:
+        return constants.HDF5_ATTR_ARCHETYPE in hdf5_group.attrs
@@ -1,47 +1,181 @@
 import os
+import mmap
+import struct
+import pickle
+import hashlib
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory, resource_tracker
 
+import numpy as np
+import h5py
+
+from src.core import constants
+from src.core.data_block import DataBlock
+from src.core.data_group import DataGroup
 from src.core.file_loaders.file_loader_obj import FileLoaderOBJ
 from src.core.file_loaders.file_loader_bvh import FileLoaderBVH
 from src.core.file_loaders.file_loader_gltf import FileLoaderGLTF
 from src.core.file_loaders.file_loader_mesh_blueprint import FileLoaderMeshBlueprint
+from src.geometry_3d.triangle_bvh import TriangleBVH
+
+FILE_LOADER_CLASSES = {
+    ".obj": FileLoaderOBJ,
+    ".bvh": FileLoaderBVH,
+    ".gltf": FileLoaderGLTF,
+    ".glb": FileLoaderGLTF,
+    ".mesh_blueprint": FileLoaderMeshBlueprint
+}
+
+CACHE_FILE_MAGIC = b"DGCACHE\0"
+CACHE_FILE_PREAMBLE = struct.Struct("<8sQ")  # Magic + header length
 
 
 class DataManager:
 
     """
     A simple class designed to manage blocks of data utilised by any system that or plugins.
-    Any data that needs to be manipulated and saved to the disk should use this manager
+    Any data that needs to be manipulated and saved to the disk should use this manager.
+
+    Loaded resources are cached on disk as binary blobs (one per source file) which are memory-mapped on the next
+    load. A cached blob is only used if both the content hash of the source file and the version of the loader that
+    created it still match.
     """
 
     __slots__ = [
         "logger",
         "data_groups",
-        "file_loaders"
+        "cache_dir",
+        "triangle_bvhs"
     ]
 
-    def __init__(self, logger: logging.Logger):
+    def __init__(self, logger: logging.Logger, cache_dir=constants.DATA_MANAGER_CACHE_DIR):
+        """
+        :param logger: logging.Logger
+        :param cache_dir: str, directory where preprocessed resources are cached. Set to None to disable caching
+        """
 
         self.logger = logger
         self.data_groups = {}
-        self.file_loaders = {
-            ".obj": FileLoaderOBJ(all_resources=self.data_groups),
-            ".bvh": FileLoaderBVH(all_resources=self.data_groups),
-            ".gltf": FileLoaderGLTF(all_resources=self.data_groups),
-            ".glb": FileLoaderGLTF(all_resources=self.data_groups),
-            ".mesh_blueprint": FileLoaderMeshBlueprint(all_resources=self.data_groups)
-        }
+        self.cache_dir = cache_dir
+        self.triangle_bvhs = {}
 
-    def load_file(self, data_group_id: str, fpath: str) -> bool:
+    def load_file(self, data_group_id: str, fpath: str, use_cache=True) -> bool:
 
         _, extension = os.path.splitext(fpath)
 
-        loader = self.file_loaders.get(extension, None)
-        if loader is None:
+        loader_class = FILE_LOADER_CLASSES.get(extension, None)
+        if loader_class is None:
             raise Exception(f"Extension '{extension}' not currently supported")
 
+        use_cache = use_cache and self.cache_dir is not None
+        if use_cache:
+            source_hash = get_file_hash(fpath=fpath)
+            cached_data_groups = self.read_cache(fpath=fpath, source_hash=source_hash)
+            if cached_data_groups is not None:
+                self.__add_resource_data_groups(data_group_id=data_group_id, relative_data_groups=cached_data_groups)
+                return True
+
         # Execute main loading operation here
-        return loader.load(resource_uid=data_group_id, fpath=fpath)
+        new_data_groups = {}
+        if not loader_class(all_resources=new_data_groups).load(resource_uid=data_group_id, fpath=fpath):
+            return False
+
+        self.__update_data_groups(new_data_groups=new_data_groups)
+
+        if use_cache:
+            self.write_cache(fpath=fpath,
+                             source_hash=source_hash,
+                             relative_data_groups=_strip_resource_uid(data_group_id, new_data_groups))
+
+        return True
+
+    def load_files(self, resources: dict, max_workers=None, use_cache=True) -> dict:
+        """
+        Loads several files at once on a bounded pool of worker processes. File parsing and numpy decoding happen
+        inside the workers, and the resulting DataBlocks are handed back through shared memory, so large arrays are
+        never pickled. Files that fail to load are logged and reported as False instead of stopping the batch.
+        Files that are already cached are loaded directly from the cache instead.
+
+        :param resources: dict, {data_group_id: fpath}
+        :param max_workers: int, maximum number of worker processes. Defaults to the number of CPU cores. If only one
+                            worker is needed, files are loaded on the calling thread instead
+        :param use_cache: bool, if True, the on-disk cache is used (and updated) for each file
+        :return: dict, {data_group_id: bool} TRUE if the file was successfully loaded
+        """
+
+        for fpath in resources.values():
+            _, extension = os.path.splitext(fpath)
+            if extension not in FILE_LOADER_CLASSES:
+                raise Exception(f"Extension '{extension}' not currently supported")
+
+        results = {}
+
+        # Resolve cached resources first, so only the remaining ones are sent to the workers
+        use_cache = use_cache and self.cache_dir is not None
+        source_hashes = {}
+        if use_cache:
+            for data_group_id, fpath in resources.items():
+                try:
+                    source_hashes[data_group_id] = get_file_hash(fpath=fpath)
+                except OSError as error:
+                    self.logger.error(f"Failed to load '{fpath}': {error}")
+                    results[data_group_id] = False
+                    continue
+
+                cached_data_groups = self.read_cache(fpath=fpath, source_hash=source_hashes[data_group_id])
+                if cached_data_groups is not None:
+                    self.__add_resource_data_groups(data_group_id=data_group_id,
+                                                    relative_data_groups=cached_data_groups)
+                    results[data_group_id] = True
+
+            resources = {data_group_id: fpath for data_group_id, fpath in resources.items()
+                         if data_group_id not in results}
+
+        if len(resources) == 0:
+            return results
+
+        if max_workers is None:
+            max_workers = os.cpu_count()
+        max_workers = max(1, min(max_workers, len(resources)))
+
+        # Spawning processes is not worth it for a single file
+        if max_workers == 1:
+            for data_group_id, fpath in resources.items():
+                try:
+                    results[data_group_id] = self.load_file(data_group_id=data_group_id,
+                                                            fpath=fpath,
+                                                            use_cache=use_cache)
+                except Exception as error:
+                    self.logger.error(f"Failed to load '{fpath}': {error}")
+                    results[data_group_id] = False
+            return results
+
+        with ProcessPoolExecutor(max_workers=max_workers, mp_context=_get_worker_mp_context()) as executor:
+
+            futures = {executor.submit(_load_file_worker, data_group_id, fpath): data_group_id
+                       for data_group_id, fpath in resources.items()}
+
+            for future in as_completed(futures):
+                data_group_id = futures[future]
+                try:
+                    packed_data_groups = future.result()
+                except Exception as error:
+                    self.logger.error(f"Failed to load '{resources[data_group_id]}': {error}")
+                    results[data_group_id] = False
+                    continue
+
+                new_data_groups = _unpack_data_groups(packed_data_groups=packed_data_groups)
+                self.__update_data_groups(new_data_groups=new_data_groups)
+                results[data_group_id] = True
+
+                if use_cache:
+                    self.write_cache(fpath=resources[data_group_id],
+                                     source_hash=source_hashes[data_group_id],
+                                     relative_data_groups=_strip_resource_uid(data_group_id, new_data_groups))
+
+        return results
 
     def add_data_group(self, data_group_id: str, data_group: dict, overwrite=True):
 
@@ -49,5 +183,421 @@ class DataManager:
             raise ValueError(f"[ERROR] DataGroup ID {data_group_id} already exists")
 
         self.data_groups[data_group_id] = data_group
+        self.triangle_bvhs.pop(data_group_id, None)
+
+    def get_triangle_bvh(self, data_group_id: str) -> TriangleBVH:
+        """
+        Triangle BVH of a mesh resource, shared by all meshes that use it. It is built the first time it is requested,
+        when the first mesh using the resource is created, so ray casts never have to build it mid-frame
+
+        :param data_group_id: str, ID of a data group with "vertices" and, optionally, "indices"
+        :return: TriangleBVH
+        """
+
+        triangle_bvh = self.triangle_bvhs.get(data_group_id, None)
+        if triangle_bvh is None:
+            data_blocks = self.data_groups[data_group_id].data_blocks
+            indices = data_blocks["indices"].data if "indices" in data_blocks else None
+            triangle_bvh = TriangleBVH(vertices=data_blocks["vertices"].data, indices=indices)
+            triangle_bvh.build()
+            self.triangle_bvhs[data_group_id] = triangle_bvh
+
+        return triangle_bvh
+
+    # =========================================================================
+    #                                  HDF5
+    # =========================================================================
+
+    def save_hdf5(self,
+                  fpath: str,
+                  data_group_ids=None,
+                  compression=constants.HDF5_DEFAULT_COMPRESSION,
+                  compression_opts=None,
+                  chunk_size_bytes=None) -> None:
+        """
+        Saves DataGroups to an HDF5 file. Each DataGroup becomes an HDF5 group with the same ID, and each of its
+        DataBlocks a dataset. Datasets are chunked by rows (first axis), so slices of them can be read back later
+        without loading the whole dataset (see read_hdf5_data_block()).
+
+        :param fpath: str, output HDF5 filepath
+        :param data_group_ids: list, IDs of the DataGroups to save. If None, all DataGroups are saved
+        :param compression: str, "lzf" (fast), "gzip" (small) or None
+        :param compression_opts: int, compression level when using "gzip" (0-9)
+        :param chunk_size_bytes: int, target chunk size. Defaults to constants.HDF5_DEFAULT_CHUNK_SIZE_BYTES
+        """
+
+        if data_group_ids is None:
+            data_group_ids = list(self.data_groups.keys())
+
+        with h5py.File(fpath, "w") as file:
+            root_group = file.create_group(constants.HDF5_ROOT_GROUP_DATA_GROUPS)
+            for data_group_id in data_group_ids:
+                self.data_groups[data_group_id].to_hdf5(hdf5_group=root_group.create_group(data_group_id),
+                                                        compression=compression,
+                                                        compression_opts=compression_opts,
+                                                        chunk_size_bytes=chunk_size_bytes)
+
+    def load_hdf5(self, fpath: str, data_group_ids=None) -> list:
+        """
+        Loads DataGroups saved with save_hdf5()
+
+        :param fpath: str, input HDF5 filepath
+        :param data_group_ids: list, IDs of the DataGroups to load. If None, all DataGroups in the file are loaded
+        :return: list, IDs of the loaded DataGroups
+        """
+
+        loaded_ids = []
+        with h5py.File(fpath, "r") as file:
+            root_group = file[constants.HDF5_ROOT_GROUP_DATA_GROUPS]
+
+            if data_group_ids is None:
+                data_group_ids = _find_hdf5_data_group_ids(hdf5_group=root_group)
+
+            for data_group_id in data_group_ids:
+                self.data_groups[data_group_id] = DataGroup.from_hdf5(hdf5_group=root_group[data_group_id])
+                self.triangle_bvhs.pop(data_group_id, None)
+                loaded_ids.append(data_group_id)
+
+        return loaded_ids
+
+    @staticmethod
+    def read_hdf5_data_block(fpath: str, data_group_id: str, data_block_key: str, start=None, stop=None) -> DataBlock:
+        """
+        Reads rows [start, stop) of a single DataBlock from an HDF5 file, without loading the rest of it.
+        For example, frames 1000-2000 of a long animation.
+        """
+
+        with h5py.File(fpath, "r") as file:
+            dataset = file[constants.HDF5_ROOT_GROUP_DATA_GROUPS][data_group_id][data_block_key]
+            return DataBlock.from_hdf5(hdf5_dataset=dataset, selection=slice(start, stop))
+
+    @staticmethod
+    def stream_hdf5_data_block(fpath: str, data_group_id: str, data_block_key: str, num_rows: int, start=0, stop=None):
+        """
+        Generator that reads a DataBlock from an HDF5 file in consecutive slabs of "num_rows" rows, so that the whole
+        dataset never needs to be in memory at once.
+        """
+
+        with h5py.File(fpath, "r") as file:
+            dataset = file[constants.HDF5_ROOT_GROUP_DATA_GROUPS][data_group_id][data_block_key]
+            stop = dataset.shape[0] if stop is None else min(stop, dataset.shape[0])
+            for slab_start in range(start, stop, num_rows):
+                yield DataBlock.from_hdf5(hdf5_dataset=dataset,
+                                          selection=slice(slab_start, min(slab_start + num_rows, stop)))
+
+    def __add_resource_data_groups(self, data_group_id: str, relative_data_groups: dict):
+        self.__update_data_groups(new_data_groups={f"{data_group_id}/{relative_id}": data_group
+                                                   for relative_id, data_group in relative_data_groups.items()})
+
+    def __update_data_groups(self, new_data_groups: dict):
+
+        # Triangle BVHs of replaced data groups would still describe the old vertices
+        self.data_groups.update(new_data_groups)
+        for data_group_id in new_data_groups:
+            self.triangle_bvhs.pop(data_group_id, None)
+
+    # =========================================================================
+    #                              Resource Cache
+    # =========================================================================
+
+    def get_cache_fpath(self, fpath: str) -> str:
+        """
+        Each source file has a single cache file, named after the hash of its absolute path. This way, a new version of
+        the cache file replaces the old one instead of leaving stale files behind
+        """
+        path_hash = hashlib.blake2b(os.path.abspath(fpath).encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(self.cache_dir, f"{path_hash}{constants.RESOURCE_CACHE_FILE_EXTENSION}")
+
+    def read_cache(self, fpath: str, source_hash: str):
+        """
+        Loads the resource's DataGroups from the cache. All DataBlocks are copy-on-write views of the memory-mapped
+        cache file, so nothing is read from the disk until it is used.
+
+        :param fpath: str, source filepath of the resource
+        :param source_hash: str, current content hash of the source file
+        :return: dict, {relative_data_group_id: DataGroup} or None if there is no valid cache for this file
+        """
+
+        cache_fpath = self.get_cache_fpath(fpath=fpath)
+        if not os.path.isfile(cache_fpath):
+            return None
+
+        try:
+            with open(cache_fpath, "rb") as file:
+                magic, header_length = CACHE_FILE_PREAMBLE.unpack(file.read(CACHE_FILE_PREAMBLE.size))
+                if magic != CACHE_FILE_MAGIC:
+                    return None
+
+                header = pickle.loads(file.read(header_length))
+                if header["cache_key"] != _get_cache_key(fpath=fpath, source_hash=source_hash):
+                    self.logger.debug(f"Cache for '{fpath}' is out of date")
+                    return None
+
+                if header["data_size"] == 0:
+                    return _rebuild_data_groups(packed_groups=header["data_groups"], buffer=None)
+
+                file_memory_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+            # A truncated or corrupt file can still have a valid header, so the arrays are only checked here
+            return _rebuild_data_groups(packed_groups=header["data_groups"],
+                                        buffer=file_memory_map,
+                                        base_offset=header["data_offset"])
+
+        except (OSError, EOFError, KeyError, ValueError, TypeError, pickle.UnpicklingError, struct.error) as error:
+            self.logger.warning(f"Failed to read cache for '{fpath}': {error}")
+            return None
+
+    def write_cache(self, fpath: str, source_hash: str, relative_data_groups: dict) -> bool:
+        """
+        Writes the resource's DataGroups to its cache file. The file has a small pickled header with the description
+        of all DataGroups, followed by the raw data of every DataBlock at aligned offsets.
+
+        :param fpath: str, source filepath of the resource
+        :param source_hash: str, content hash of the source file
+        :param relative_data_groups: dict, {relative_data_group_id: DataGroup}
+        :return: bool, TRUE if the cache file was written
+        """
+
+        packed_groups, arrays_to_copy, data_size = _layout_data_groups(data_groups=relative_data_groups)
+
+        header = {
+            "cache_key": _get_cache_key(fpath=fpath, source_hash=source_hash),
+            "data_groups": packed_groups,
+            "data_size": data_size,
+            "data_offset": 0}
+
+        # The data offset is stored in the header itself, so it is resolved from the length of a first dummy pass.
+        # The extra bytes leave room for the offset's own encoding to grow
+        header_length = len(pickle.dumps(header))
+        header["data_offset"] = _align(CACHE_FILE_PREAMBLE.size + header_length + 16)
+        header_bytes = pickle.dumps(header)
+
+        cache_fpath = self.get_cache_fpath(fpath=fpath)
+        temp_fpath = f"{cache_fpath}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(temp_fpath, "wb") as file:
+                file.write(CACHE_FILE_PREAMBLE.pack(CACHE_FILE_MAGIC, len(header_bytes)))
+                file.write(header_bytes)
+                for offset, data in arrays_to_copy:
+                    file.seek(header["data_offset"] + offset)
+                    file.write(np.ascontiguousarray(data).tobytes())
+                file.truncate(header["data_offset"] + data_size)
+            os.replace(temp_fpath, cache_fpath)
+
+        except OSError as error:
+            self.logger.warning(f"Failed to write cache for '{fpath}': {error}")
+            if os.path.isfile(temp_fpath):
+                os.remove(temp_fpath)
+            return False
+
+        return True
+
+
+# =============================================================================
+#                            HDF5 helper functions
+# =============================================================================
+
+def _find_hdf5_data_group_ids(hdf5_group: h5py.Group, prefix="") -> list:
+    """
+    DataGroup IDs may contain "/", so they can be nested inside plain HDF5 groups. Any group flagged with an
+    archetype is a DataGroup, and its content belongs to its DataBlocks
+    """
+
+    data_group_ids = []
+    for name, hdf5_object in hdf5_group.items():
+        if not isinstance(hdf5_object, h5py.Group):
+            continue
+
+        if DataGroup.is_hdf5_data_group(hdf5_group=hdf5_object):
+            data_group_ids.append(f"{prefix}{name}")
+            continue
+
+        data_group_ids.extend(_find_hdf5_data_group_ids(hdf5_group=hdf5_object, prefix=f"{prefix}{name}/"))
+
+    return data_group_ids
+
+
+# =============================================================================
+#                            Cache helper functions
+# =============================================================================
+
+def get_file_hash(fpath: str) -> str:
+    """
+    Returns the content hash of a resource file, including any other files its loader depends on
+    """
+
+    _, extension = os.path.splitext(fpath)
+    dependencies = FILE_LOADER_CLASSES[extension].get_dependencies(fpath=fpath)
+
+    file_hash = hashlib.blake2b(digest_size=32)
+    for current_fpath in [fpath] + dependencies:
+        with open(current_fpath, "rb") as file:
+            for chunk in iter(lambda: file.read(constants.RESOURCE_CACHE_HASH_CHUNK_SIZE), b""):
+                file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def _get_cache_key(fpath: str, source_hash: str) -> tuple:
+    _, extension = os.path.splitext(fpath)
+    loader_class = FILE_LOADER_CLASSES[extension]
+    return constants.RESOURCE_CACHE_FORMAT_VERSION, loader_class.__name__, loader_class.VERSION, source_hash
+
+
+def _strip_resource_uid(resource_uid: str, data_groups: dict) -> dict:
+    """
+    Loaders store DataGroups as "<resource_uid>/<name>". The cache stores them by name only so that the same file
+    can be loaded again under any other resource uid
+    """
+    prefix = f"{resource_uid}/"
+    return {data_group_id[len(prefix):] if data_group_id.startswith(prefix) else data_group_id: data_group
+            for data_group_id, data_group in data_groups.items()}
+
+
+def _align(num_bytes: int) -> int:
+    return num_bytes + (-num_bytes % constants.RESOURCE_CACHE_ALIGNMENT)
+
+
+def _layout_data_groups(data_groups: dict) -> tuple:
+    """
+    Assigns an aligned offset to every numeric DataBlock array, as if they were all packed in a single buffer.
+    Non-numeric arrays (e.g. strings or objects) are kept inside the description, as they are.
+
+    :return: tuple, (list of packed DataGroups, list of (offset, array) to copy, total size in bytes)
+    """
+
+    packed_groups = []
+    arrays_to_copy = []
+    total_num_bytes = 0
+
+    for data_group_id, data_group in data_groups.items():
+        packed_blocks = {}
+        for block_key, data_block in data_group.data_blocks.items():
+            data = np.asarray(data_block.data)
+
+            if data.dtype.hasobject:
+                packed_blocks[block_key] = (None, data, data_block.metadata)
+                continue
+
+            offset = _align(total_num_bytes)
+            total_num_bytes = offset + data.nbytes
+            arrays_to_copy.append((offset, data))
+            packed_blocks[block_key] = (offset, (data.shape, data.dtype.str), data_block.metadata)
+
+        packed_groups.append((data_group_id, data_group.archetype, data_group.metadata, packed_blocks))
+
+    return packed_groups, arrays_to_copy, total_num_bytes
+
+
+def _rebuild_data_groups(packed_groups: list, buffer, base_offset=0, copy_data=False) -> dict:
+    """
+    Rebuilds the DataGroups described by _layout_data_groups(), with their arrays pointing into "buffer"
+    """
+
+    data_groups = {}
+    for data_group_id, archetype, metadata, packed_blocks in packed_groups:
+        data_group = DataGroup(archetype=archetype, metadata=metadata)
+        for block_key, (offset, data_description, block_metadata) in packed_blocks.items():
+            if offset is None:
+                data = data_description
+            else:
+                shape, dtype_str = data_description
+                data = np.ndarray(shape, dtype=np.dtype(dtype_str), buffer=buffer, offset=base_offset + offset)
+                data = data.copy() if copy_data else data
+            data_group.data_blocks[block_key] = DataBlock(data=data, metadata=block_metadata)
+        data_groups[data_group_id] = data_group
+
+    return data_groups
+
+
+# =============================================================================
+#                       Worker process helper functions
+# =============================================================================
+
+def _get_worker_mp_context():
+    """
+    Numba's thread pool (used by prange kernels) does not survive a fork, so workers are forked from a clean server
+    process instead, which already has this module imported. Where there is no forkserver (Windows), workers are
+    spawned, which starts them clean as well, only slower
+    """
+
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        mp_context = multiprocessing.get_context("forkserver")
+        mp_context.set_forkserver_preload([__name__])
+        return mp_context
+
+    return multiprocessing.get_context("spawn")
+
+
+def _load_file_worker(data_group_id: str, fpath: str) -> tuple:
+    """
+    Runs inside a worker process. Loads a single file and packs all its DataGroups into one shared memory block
+    """
+
+    _, extension = os.path.splitext(fpath)
+    data_groups = {}
+    loader = FILE_LOADER_CLASSES[extension](all_resources=data_groups)
+
+    # Whatever a failed loader left behind is discarded. The exception is logged by load_files()
+    if not loader.load(resource_uid=data_group_id, fpath=fpath):
+        raise RuntimeError(f"{type(loader).__name__} could not load the file")
+
+    return _pack_data_groups(data_groups=data_groups)
+
+
+def _pack_data_groups(data_groups: dict) -> tuple:
+    """
+    Copies all numeric DataBlock arrays into a single shared memory block and returns a picklable description of
+    the DataGroups.
+
+    :return: tuple, (shared_memory_name or None, list of packed DataGroups)
+    """
+
+    packed_groups, arrays_to_copy, total_num_bytes = _layout_data_groups(data_groups=data_groups)
+
+    if total_num_bytes == 0:
+        return None, packed_groups
+
+    shm = _create_untracked_shared_memory(size=total_num_bytes)
+    for offset, data in arrays_to_copy:
+        np.ndarray(data.shape, dtype=data.dtype, buffer=shm.buf, offset=offset)[...] = data
+    shm_name = shm.name
+    shm.close()
+
+    return shm_name, packed_groups
+
+
+def _create_untracked_shared_memory(size: int) -> shared_memory.SharedMemory:
+    """
+    Ownership of the block is handed over to the main process, which unlinks it once it has been unpacked. It must
+    not be tracked by this worker, or the worker's resource tracker would clean it up as well when the worker shuts
+    down
+    """
+
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    except TypeError:
+        pass
+
+    # Before Python 3.13, every block is tracked. On POSIX, the tracker knows it by its name with a leading slash
+    shm = shared_memory.SharedMemory(create=True, size=size)
+    if os.name == "posix":
+        resource_tracker.unregister(f"/{shm.name}", "shared_memory")
+    return shm
+
+
+def _unpack_data_groups(packed_data_groups: tuple) -> dict:
+    """
+    Rebuilds the DataGroups described by _pack_data_groups() and releases the shared memory block
+    """
 
+    shm_name, packed_groups = packed_data_groups
+    if shm_name is None:
+        return _rebuild_data_groups(packed_groups=packed_groups, buffer=None)
 
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return _rebuild_data_groups(packed_groups=packed_groups, buffer=shm.buf, copy_data=True)
+    finally:
+        shm.close()
+        shm.unlink()
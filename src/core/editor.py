@@ -356,9 +356,9 @@ class Editor:
         scene_blueprint, scene_resources = utils_xml2scene.load_scene_from_xml(xml_fpath=fpath)
 
         # Load scene resource, if any
-        for resource_uid, resource_fpath in scene_resources.items():
-            resource_fpath = utils_io.validate_resource_filepath(fpath=resource_fpath)
-            self.data_manager.load_file(data_group_id=resource_uid, fpath=resource_fpath)
+        resources = {resource_uid: utils_io.validate_resource_filepath(fpath=resource_fpath)
+                     for resource_uid, resource_fpath in scene_resources.items()}
+        self.data_manager.load_files(resources=resources)
 
         # Add entities to current scene
         for entity_blueprint in scene_blueprint["scene"]["entity"]:
@@ -30,6 +30,8 @@ class EventPublisher:
             constants.EVENT_WINDOW_DROP_FILES: [],
             constants.EVENT_ENTITY_SELECTED: [],
             constants.EVENT_ENTITY_DESELECTED: [],
+            constants.EVENT_MULTIPLE_ENTITIES_SELECTED: [],
+            constants.EVENT_ENTITY_HOVERED: [],
             constants.EVENT_MOUSE_ENTER_GIZMO_3D: [],
             constants.EVENT_MOUSE_LEAVE_GIZMO_3D: [],
             constants.EVENT_MOUSE_GIZMO_3D_ACTIVATED: [],
@@ -3,6 +3,9 @@ from abc import ABC, abstractmethod
 
 class FileLoader(ABC):
 
+    # Increment this whenever a loader's output changes, so that any cached resources created by it are rebuilt
+    VERSION = 1
+
     __slots__ = [
         "external_data_groups"]
 
@@ -11,4 +14,12 @@ class FileLoader(ABC):
 
     @abstractmethod
     def load(self, resource_uid: str, fpath: str) -> bool:
-        return True
\ No newline at end of file
+        return True
+
+    @classmethod
+    def get_dependencies(cls, fpath: str) -> list:
+        """
+        Returns the filepaths of any other files that are read when loading "fpath" (e.g. external binary buffers).
+        These are hashed together with the main file to decide if a cached resource is still valid
+        """
+        return []
\ No newline at end of file
@@ -9,78 +9,82 @@ from src.core.file_loaders.file_loader import FileLoader
 
 class FileLoaderBVH(FileLoader):
 
+    VERSION = 2
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
-    def load(self, resource_uid: str, fpath: str) -> bool:
+    def load(self, resource_uid: str, fpath: str, start_frame=0, end_frame=None) -> bool:
+        """
+        Loads the skeleton and the animation frames [start_frame, end_frame). For very long captures, see
+        iter_animation_chunks() to go through the animation in bounded memory instead
+        """
 
-        bvh_reader = utils_bvh_reader.BVHReader()
-        skeleton_df, animation_df, frame_period = bvh_reader.load(fpath=fpath)
-        num_bones = skeleton_df.index.size
-        bone_names = skeleton_df["name"].tolist()
-        animation_columns = animation_df.columns.tolist()
+        header, positions, rotations = utils_bvh_reader.load_bvh(fpath=fpath,
+                                                                 start_frame=start_frame,
+                                                                 end_frame=end_frame)
 
         # =========================[ Skeleton ]=========================
 
-        skeleton_resource = DataGroup(archetype=constants.RESOURCE_TYPE_SKELETON_BVH)
-
-        skeleton_resource.data_blocks["parent_index"] = DataBlock(data=skeleton_df["parent"].values.astype(np.int32),
-                                                                  metadata={"bone_names": bone_names})
-
-        pos_offset = skeleton_df[["position_x", "position_y", "position_z"]].values
-        skeleton_resource.data_blocks["position_offset"] = DataBlock(data=pos_offset)
+        self.external_data_groups[f"{resource_uid}/skeleton_0"] = create_skeleton_data_group(header=header)
 
-        rot_offset = skeleton_df[["angle_offset_x", "angle_offset_y", "angle_offset_z"]].values.astype(np.float32)
-        skeleton_resource.data_blocks["rotation_offset"] = DataBlock(data=rot_offset)
-
-        skeleton_resource.data_blocks["length"] = DataBlock(data=skeleton_df["length"].values)
+        # =========================[ Animation ]=========================
 
-        vectorized_conversion = np.vectorize(constants.RESOURCE_BVH_ROTATION_ORDER_MAP.get)
-        rotation_order_integers = vectorized_conversion(skeleton_df["rotation_order"].values)
-        skeleton_resource.data_blocks["rotation_order"] = DataBlock(data=rotation_order_integers)
+        animation_resource = DataGroup(archetype=constants.RESOURCE_TYPE_ANIMATION_BVH)
 
-        complete_id = f"{resource_uid}/skeleton_0"
+        metadata = {"frame_period": header[utils_bvh_reader.BVH_HEADER_KEY_FRAME_PERIOD],
+                    "start_frame": start_frame}
+        animation_resource.data_blocks["animation_position"] = DataBlock(data=positions, metadata=metadata)
+        animation_resource.data_blocks["animation_rotation"] = DataBlock(data=rotations, metadata=metadata.copy())
 
-        self.external_data_groups[complete_id] = skeleton_resource
+        self.external_data_groups[f"{resource_uid}/animation_0"] = animation_resource
+        return True
 
-        # =========================[ Animation ]=========================
+    def iter_animation_chunks(self, resource_uid: str, fpath: str, num_frames_per_chunk: int, start_frame=0,
+                              end_frame=None):
+        """
+        Generator that loads the skeleton once and then yields the animation as consecutive chunks of (up to)
+        "num_frames_per_chunk" frames. Only one chunk is kept in memory at any time. Each chunk's metadata contains
+        its "start_frame" within the whole animation.
 
-        animation_resource = DataGroup(archetype=constants.RESOURCE_TYPE_ANIMATION_BVH)
+        :return: yields tuples (position DataBlock, rotation DataBlock), each with shape (num_frames, num_bones, 3)
+        """
 
-        num_frames = animation_df.index.size
+        chunks = utils_bvh_reader.iter_bvh_frames(fpath=fpath,
+                                                  num_frames_per_chunk=num_frames_per_chunk,
+                                                  start_frame=start_frame,
+                                                  end_frame=end_frame)
 
-        # Position Animation (if any)
-        metadata = {"frame_period": frame_period}
-        new_shape = (num_frames, num_bones, 3)
-        new_position_datablock = DataBlock(data=np.zeros(new_shape, dtype=np.float32), metadata=metadata)
-        new_rotation_datablock = DataBlock(data=np.zeros(new_shape, dtype=np.float32), metadata=metadata)
+        for header, chunk_start_frame, positions, rotations in chunks:
+            skeleton_id = f"{resource_uid}/skeleton_0"
+            if skeleton_id not in self.external_data_groups:
+                self.external_data_groups[skeleton_id] = create_skeleton_data_group(header=header)
 
-        # Sort all position-related animation data according to the order of the bones in the skeleton
-        for current_bone_index, current_bone_name in enumerate(bone_names):
+            metadata = {"frame_period": header[utils_bvh_reader.BVH_HEADER_KEY_FRAME_PERIOD],
+                        "start_frame": chunk_start_frame}
+            yield DataBlock(data=positions, metadata=metadata), DataBlock(data=rotations, metadata=metadata.copy())
 
-            related_columns = [name for name in animation_columns if current_bone_name in name]
-            for column_name in related_columns:
 
-                if column_name.endswith("pos_x"):
-                    new_position_datablock.data[:, current_bone_index, 0] = animation_df[column_name]
+def create_skeleton_data_group(header: dict) -> DataGroup:
 
-                if column_name.endswith("pos_y"):
-                    new_position_datablock.data[:, current_bone_index, 1] = animation_df[column_name]
+    skeleton_resource = DataGroup(archetype=constants.RESOURCE_TYPE_SKELETON_BVH)
 
-                if column_name.endswith("pos_z"):
-                    new_position_datablock.data[:, current_bone_index, 2] = animation_df[column_name]
+    bone_names = header[utils_bvh_reader.BVH_HEADER_KEY_BONE_NAMES]
+    parent_index = header[utils_bvh_reader.BVH_HEADER_KEY_PARENT_INDEX]
+    skeleton_resource.data_blocks["parent_index"] = DataBlock(data=parent_index.astype(np.int32),
+                                                              metadata={"bone_names": bone_names})
 
-                if column_name.endswith("rot_x"):
-                    new_rotation_datablock.data[:, current_bone_index, 0] = animation_df[column_name]
+    pos_offset = header[utils_bvh_reader.BVH_HEADER_KEY_OFFSETS]
+    skeleton_resource.data_blocks["position_offset"] = DataBlock(data=pos_offset)
 
-                if column_name.endswith("rot_y"):
-                    new_rotation_datablock.data[:, current_bone_index, 1] = animation_df[column_name]
+    rot_offset = np.zeros((len(bone_names), 3), dtype=np.float32)
+    skeleton_resource.data_blocks["rotation_offset"] = DataBlock(data=rot_offset)
 
-                if column_name.endswith("rot_z"):
-                    new_rotation_datablock.data[:, current_bone_index, 2] = animation_df[column_name]
+    skeleton_resource.data_blocks["length"] = DataBlock(data=header[utils_bvh_reader.BVH_HEADER_KEY_LENGTHS])
 
-        animation_resource.data_blocks["animation_position"] = new_position_datablock
-        animation_resource.data_blocks["animation_rotation"] = new_rotation_datablock
+    rotation_order_integers = np.array([constants.RESOURCE_BVH_ROTATION_ORDER_MAP.get(rotation_order, -1)
+                                        for rotation_order in header[utils_bvh_reader.BVH_HEADER_KEY_ROTATION_ORDERS]],
+                                       dtype=np.int32)
+    skeleton_resource.data_blocks["rotation_order"] = DataBlock(data=rotation_order_integers)
 
-        self.external_data_groups[f"{resource_uid}/animation_0"] = animation_resource
-        return True
+    return skeleton_resource
@@ -1,3 +1,6 @@
+import os
+import json
+
 import numpy as np
 
 from src.core import constants
@@ -5,6 +8,7 @@ from src.core.data_block import DataBlock
 from src.core.data_group import DataGroup
 from src.core.file_loaders.file_loader import FileLoader
 from src.utilities import utils_gltf_reader
+from src.math import animation_sampler
 
 
 class FileLoaderGLTF(FileLoader):
@@ -20,11 +24,28 @@ class FileLoaderGLTF(FileLoader):
 
     """
 
+    VERSION = 3
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
         self.gltf_reader = None
 
+    @classmethod
+    def get_dependencies(cls, fpath: str) -> list:
+
+        _, extension = os.path.splitext(fpath)
+        if extension != ".gltf":
+            return []
+
+        with open(fpath, "r", encoding="utf-8") as file:
+            gltf_header = json.load(file)
+
+        # Embedded buffers (data URIs) are already part of the .gltf file itself
+        gltf_dir = os.path.dirname(fpath)
+        return [os.path.join(gltf_dir, buffer["uri"]) for buffer in gltf_header.get("buffers", [])
+                if "uri" in buffer and not buffer["uri"].startswith("data:")]
+
     def load(self, resource_uid: str, fpath: str) -> bool:
         self.gltf_reader = utils_gltf_reader.GLTFReader()
         self.gltf_reader.load(gltf_fpath=fpath)
@@ -117,9 +138,10 @@ class FileLoaderGLTF(FileLoader):
 
             # Build inverse reference maps to convert node indices to skeleton indices
             selected_node_indices = np.array(skin["joints"])
-            node2skeleton_lookup = np.zeros((num_nodes,), dtype=np.int32)
-            for skeleton_index, node_index in enumerate(selected_node_indices):
-                node2skeleton_lookup[node_index] = skeleton_index
+            # Nodes outside the skeleton map to -1, so the parents of the skeleton's root bones become -1 too. The
+            # extra last entry maps -1 (no parent / no child) to -1 as well
+            node2skeleton_lookup = np.full((num_nodes + 1,), -1, dtype=np.int32)
+            node2skeleton_lookup[selected_node_indices] = np.arange(selected_node_indices.size, dtype=np.int32)
 
             skeleton_resource = DataGroup(archetype=constants.RESOURCE_TYPE_SKELETON,
                                           metadata={"node_indices": selected_node_indices})
@@ -153,6 +175,10 @@ class FileLoaderGLTF(FileLoader):
                 data=nodes_resource.data_blocks["scale"].data[selected_node_indices, :],
                 metadata={"order": ["x", "y", "z"]})
 
+            skeleton_resource.data_blocks["inverse_bind_matrices"] = DataBlock(
+                data=skin["inverse_bind_matrices"].astype(np.float32),
+                metadata={"layout": "row-major"})
+
             self.external_data_groups[f"{resource_uid}/skeleton_{skin_index}"] = skeleton_resource
 
     def __load_mesh_resources(self, resource_uid: str):
@@ -187,31 +213,27 @@ class FileLoaderGLTF(FileLoader):
 
     def __load_animation_resources(self, resource_uid: str):
 
-        new_resource = DataGroup(archetype=constants.RESOURCE_TYPE_MESH)
+        # Channels of the same kind are packed together, so that an AnimationSampler can sample them all at once
+        for animation_index, animation in enumerate(self.gltf_reader.get_animations()):
 
-        animations = self.gltf_reader.get_animations()
-        for animation_index, (channel_name, nodes) in enumerate(animations.items()):
-            for node in nodes:
+            new_resource = DataGroup(archetype=constants.RESOURCE_TYPE_ANIMATION,
+                                     metadata={"name": animation["name"]})
 
-                # Combine timestamps with values
-                combined_data = np.hstack((node['timestamps'][:, np.newaxis], node['values']))
+            for channel_name in constants.RESOURCE_ANIMATION_GLTF_CHANNELS:
+                channels = animation["channels"][channel_name]
+                if len(channels) == 0:
+                    continue
 
-                # Create a new DataBlock for each channel of each node
-                # Set metadata based on the type of channel
-                if channel_name == "rotation":
-                    metadata = {"order": ["timestamp", "x", "y", "z", "w"], "type": "quaternion"}
-                elif channel_name == "translation":
-                    metadata = {"order": ["timestamp", "x", "y", "z"], "type": "vector3"}
-                elif channel_name == "scale":
-                    metadata = {"order": ["timestamp", "x", "y", "z"], "type": "vector3"}
-                else:
-                    raise ValueError(f"Unknown animation channel type: {channel_name}")
+                packed_channels = animation_sampler.pack_channels(
+                    channels=[{"target_index": channel["node_index"],
+                               "interpolation": channel["interpolation"],
+                               "timestamps": channel["timestamps"],
+                               "values": channel["values"]} for channel in channels])
 
-                data_block_key = f"node_{node['node_index']}/{channel_name}"
-                new_resource.data_blocks[data_block_key] = DataBlock(data=combined_data, metadata=metadata)
+                for array_name, array in packed_channels.items():
+                    new_resource.data_blocks[f"{channel_name}/{array_name}"] = DataBlock(data=array)
 
-        resource_key = f"{resource_uid}/animation_{animation_index}"
-        self.external_data_groups[resource_key] = new_resource
+            self.external_data_groups[f"{resource_uid}/animation_{animation_index}"] = new_resource
 
     def __load_skinning_resources(self, resource_uid: str):
 
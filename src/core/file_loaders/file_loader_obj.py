@@ -1,27 +1,30 @@
-import trimesh
-
 from src.core import constants
 from src.core.data_block import DataBlock
 from src.core.data_group import DataGroup
 from src.core.file_loaders.file_loader import FileLoader
+from src.utilities import utils_obj
 
 
 class FileLoaderOBJ(FileLoader):
-    
+
+    VERSION = 2
+
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
     
     def load(self, resource_uid: str, fpath: str) -> bool:
-    
-        mesh = trimesh.load(fpath)
+
+        vertices, normals, uvs, indices = utils_obj.load_obj(fpath=fpath)
+        if normals is None:
+            normals = utils_obj.compute_vertex_normals(vertices=vertices, indices=indices)
 
         new_resource = DataGroup(archetype=constants.RESOURCE_TYPE_MESH)
-        new_resource.data_blocks["vertices"] = DataBlock(data=mesh.vertices)
-        new_resource.data_blocks["normals"] = DataBlock(data=mesh.vertex_normals)
-        new_resource.data_blocks["indices"] = DataBlock(data=mesh.faces)
+        new_resource.data_blocks["vertices"] = DataBlock(data=vertices)
+        new_resource.data_blocks["normals"] = DataBlock(data=normals)
+        new_resource.data_blocks["indices"] = DataBlock(data=indices)
     
-        if "uv" in mesh.visual.__dict__:
-            new_resource.data_blocks["uv"] = DataBlock(data=mesh.visual.uv)
+        if uvs is not None:
+            new_resource.data_blocks["uv"] = DataBlock(data=uvs)
 
         self.external_data_groups[f"{resource_uid}/mesh_0"] = new_resource
 
@@ -5,6 +5,7 @@ from typing import Union
 from src.core import constants
 from src.core.entity import Entity
 from src.core.component import Component
+from src.core.component_arrays import ComponentArrays
 from src.components.transform_3d import Transform3D
 from src.components.collider import Collider
 from src.components.mesh import Mesh
@@ -78,6 +79,7 @@ class Scene:
         "skeleton",
         "multi_transform_3d",
         "component_master_pool",
+        "component_arrays",
         "available_point_light_indices",
         "available_directional_light_indices",
         "available_material_indices",
@@ -126,6 +128,14 @@ class Scene:
             constants.COMPONENT_TYPE_MULTI_TRANSFORM_3D: self.multi_transform_3d
         }
 
+        # Contiguous storage of the hot data of the component types that support it. Each component in the pools
+        # above is bound to its row, so both views always agree
+        self.component_arrays = {
+            component_type: ComponentArrays(fields=component_class._array_fields)
+            for component_type, component_class in Scene.COMPONENT_CLASS_MAP.items()
+            if component_class._array_fields is not None
+        }
+
         self.available_material_indices = [i for i in reversed(range(constants.SCENE_MAX_NUM_MATERIALS))]
         self.available_point_light_indices = [i for i in reversed(range(constants.SCENE_MAX_NUM_POINT_LIGHTS))]
         self.available_directional_light_indices = [i for i in reversed(range(constants.SCENE_MAX_NUM_DIRECTIONAL_LIGHTS))]
@@ -181,9 +191,13 @@ class Scene:
         if entity_uid in component_pool:
             raise KeyError(f"[ERROR] Component type '{component_type}' already exists in component pool")
 
-        component_pool[entity_uid] = Scene.COMPONENT_CLASS_MAP[component_type](parameters=parameters,
-                                                                               system_owned=system_owned)
-        return component_pool[entity_uid]
+        component = Scene.COMPONENT_CLASS_MAP[component_type](parameters=parameters, system_owned=system_owned)
+        component_arrays = self.component_arrays.get(component_type, None)
+        if component_arrays is not None:
+            component_arrays.add(entity_uid=entity_uid, component=component)
+
+        component_pool[entity_uid] = component
+        return component
 
     def remove_component(self, entity_uid: int, component_type: int) -> bool:
 
@@ -204,6 +218,11 @@ class Scene:
 
         component_pool[entity_uid].release()
         component_pool.pop(entity_uid)
+
+        component_arrays = self.component_arrays.get(component_type, None)
+        if component_arrays is not None:
+            component_arrays.remove(entity_uid=entity_uid)
+
         return True
 
     def get_entity(self, entity_uid: int) -> Union[Entity, None]:
@@ -259,6 +278,9 @@ class Scene:
     def get_pool(self, component_type: int) -> dict:
         return self.component_master_pool.get(component_type, None)
 
+    def get_component_arrays(self, component_type: int) -> Union[ComponentArrays, None]:
+        return self.component_arrays.get(component_type, None)
+
     def get_all_entity_uids(self, component_type: int) -> list:
         return list(self.component_master_pool[component_type].keys())
 
@@ -8,6 +8,8 @@ SUBSCRIBED_EVENTS_RENDER_SYSTEM = [
     constants.EVENT_MOUSE_ENTER_GIZMO_3D,
     constants.EVENT_MOUSE_LEAVE_GIZMO_3D,
     constants.EVENT_MOUSE_BUTTON_PRESS,
+    constants.EVENT_MOUSE_BUTTON_RELEASE,
+    constants.EVENT_MOUSE_MOVE,
     constants.EVENT_KEYBOARD_PRESS,
     constants.EVENT_WINDOW_FRAMEBUFFER_SIZE]
 
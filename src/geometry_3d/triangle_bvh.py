@@ -0,0 +1,107 @@
+import numpy as np
+
+from src.core import constants
+from src.math import bvh
+
+
+class TriangleBVH:
+
+    """
+    Bounding volume hierarchy (SAH) over the triangles of a mesh, in the mesh's local space, for exact ray
+    intersections on the CPU. Meshes are static, so the tree is never refit. Owners call build() when the mesh is
+    loaded, as building takes far longer than a frame on large meshes. intersect() builds it otherwise.
+
+    Meshes loaded from the same resource share the same TriangleBVH, see DataManager.get_triangle_bvh().
+    """
+
+    __slots__ = [
+        "vertices",
+        "triangles",
+        "leaf_size",
+        "node_min",
+        "node_max",
+        "node_right",
+        "node_start",
+        "node_count",
+        "primitives",
+        "triangle_vertex_0",
+        "triangle_edge_1",
+        "triangle_edge_2",
+        "built"]
+
+    def __init__(self, vertices: np.ndarray, indices=None, leaf_size=constants.TRIANGLE_BVH_LEAF_SIZE):
+        """
+        :param vertices: numpy array (V, 3)
+        :param indices: numpy array (T, 3) or (T * 3,) <int>, vertex indices of each triangle. If None, every 3
+                        consecutive vertices are a triangle
+        :param leaf_size: int, maximum number of triangles per leaf
+        """
+
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        if indices is None:
+            indices = np.arange(self.vertices.shape[0] - self.vertices.shape[0] % 3)
+        self.triangles = np.ascontiguousarray(np.reshape(indices, (-1, 3)), dtype=np.int32)
+        self.leaf_size = leaf_size
+
+        self.node_min = None
+        self.node_max = None
+        self.node_right = None
+        self.node_start = None
+        self.node_count = None
+        self.primitives = None
+        self.triangle_vertex_0 = None
+        self.triangle_edge_1 = None
+        self.triangle_edge_2 = None
+        self.built = False
+
+    @property
+    def num_triangles(self) -> int:
+        return self.triangles.shape[0]
+
+    def build(self):
+
+        if self.built:
+            return
+
+        aabb_min, aabb_max = bvh.triangle_aabbs(self.vertices, self.triangles)
+        (self.node_min, self.node_max, self.node_right, self.node_start, self.node_count, _, self.primitives,
+         _) = bvh.build_bvh(aabb_min, aabb_max, self.leaf_size, constants.BVH_NUM_BINS)
+
+        # Triangles in tree order, so each leaf is a contiguous block
+        corners = self.vertices[self.triangles[self.primitives]]
+        self.triangle_vertex_0 = np.ascontiguousarray(corners[:, 0, :])
+        self.triangle_edge_1 = np.ascontiguousarray(corners[:, 1, :] - corners[:, 0, :])
+        self.triangle_edge_2 = np.ascontiguousarray(corners[:, 2, :] - corners[:, 0, :])
+        self.built = True
+
+    def intersect(self, ray_origins: np.ndarray, ray_directions: np.ndarray, max_distance=np.inf) -> tuple:
+        """
+        Nearest triangle hit by each ray
+
+        :param ray_origins: numpy array (R, 3) or (3,), in the mesh's local space
+        :param ray_directions: numpy array (R, 3) or (3,), in the mesh's local space. Distances are in units of
+                               their length
+        :param max_distance: float
+        :return: tuple (distances, triangle_ids, barycentrics), numpy arrays (R,) <float32>, (R,) <int32> and
+                 (R, 2) <float32>. Rays that hit nothing have an infinite distance and triangle ID -1. Barycentrics
+                 are the weights (u, v) of the triangle's second and third vertices
+        """
+
+        self.build()
+
+        ray_origins = np.ascontiguousarray(np.reshape(ray_origins, (-1, 3)), dtype=np.float32)
+        ray_directions = np.ascontiguousarray(np.reshape(ray_directions, (-1, 3)), dtype=np.float32)
+        if ray_origins.shape != ray_directions.shape:
+            raise ValueError(f"[ERROR] Ray origins {ray_origins.shape} and directions {ray_directions.shape} "
+                             f"don't match")
+
+        num_rays = ray_origins.shape[0]
+        distances = np.empty((num_rays,), dtype=np.float32)
+        triangle_ids = np.empty((num_rays,), dtype=np.int32)
+        barycentrics = np.empty((num_rays, 2), dtype=np.float32)
+        bvh.intersect_rays_triangle_bvh(ray_origins, ray_directions, max_distance, self.node_min, self.node_max,
+                                        self.node_right, self.node_start, self.node_count, self.primitives,
+                                        self.triangle_vertex_0, self.triangle_edge_1, self.triangle_edge_2,
+                                        distances, triangle_ids, barycentrics)
+
+        return distances, triangle_ids, barycentrics
@@ -0,0 +1,447 @@
+import numpy as np
+from numba import njit, prange
+
+from src.core import constants
+from src.math.quaternion import euler_to_quats, slerp_quats
+
+# Smallest-three quaternions: the 3 smallest components fit in [-1/sqrt(2), 1/sqrt(2)] and are stored with 15
+# bits each. The index of the largest component (2 bits) goes in the top bits of the first two words
+SMALLEST_THREE_RANGE = np.float32(1.0 / np.sqrt(2.0))
+SMALLEST_THREE_MAX_VALUE = 0x7FFF
+SMALLEST_THREE_OTHER_AXES = np.array([[1, 2, 3], [0, 2, 3], [0, 1, 3], [0, 1, 2]], dtype=np.int64)
+VECTOR_QUANTIZATION_MAX_VALUE = 0xFFFF
+TRACK_PATHS = ["translation", "rotation", "scale"]
+
+
+def resample_frames(frames: np.ndarray, frame_period: float, frame_rate: float, is_rotation=False) -> np.ndarray:
+    """
+    Resamples uniformly spaced frames (e.g. a BVH animation) to another frame rate, covering the same duration.
+    Vectors are interpolated linearly and quaternions with slerp
+
+    :param frames: numpy array (num_frames, ..., D)
+    :param frame_period: float, seconds between consecutive input frames
+    :param frame_rate: float, frames per second of the output
+    :param is_rotation: bool, if True, frames are quaternions
+    :return: numpy array (new_num_frames, ..., D) <float32>
+    """
+
+    num_frames = frames.shape[0]
+    if num_frames < 2:
+        return frames.astype(np.float32)
+
+    duration = (num_frames - 1) * frame_period
+    new_num_frames = int(round(duration * frame_rate)) + 1
+    frame_positions = np.clip(np.arange(new_num_frames) / (frame_rate * frame_period), 0.0, num_frames - 1)
+    keys = np.minimum(frame_positions.astype(np.int64), num_frames - 2)
+    alphas = (frame_positions - keys).reshape((-1,) + (1,) * (frames.ndim - 2))
+
+    if is_rotation:
+        return slerp_quats(frames[keys], frames[keys + 1], alphas).astype(np.float32)
+
+    weights = alphas[..., np.newaxis]
+    return (frames[keys] * (1.0 - weights) + frames[keys + 1] * weights).astype(np.float32)
+
+
+def bake_bvh_frames(positions: np.ndarray,
+                    euler_rotations: np.ndarray,
+                    offsets: np.ndarray,
+                    position_columns: np.ndarray,
+                    rotation_orders: list,
+                    frame_period: float,
+                    frame_rate=constants.ANIMATION_BAKING_DEFAULT_FRAME_RATE) -> dict:
+    """
+    Converts a BVH animation (see utils_bvh_reader.load_bvh()) to the per-bone translations, rotations and
+    scales used by SkeletonPose, resampled to "frame_rate". Bones with position channels use them as their
+    translation, the others use their offset.
+
+    :param positions: numpy array (num_frames, num_bones, 3)
+    :param euler_rotations: numpy array (num_frames, num_bones, 3), in radians
+    :param offsets: numpy array (num_bones, 3)
+    :param position_columns: numpy array (num_bones, 3), motion column of each position channel, -1 if missing
+    :param rotation_orders: list of str, one per bone
+    :param frame_period: float, seconds between BVH frames
+    :param frame_rate: float, frames per second of the baked animation
+    :return: dict {"translation": (F, B, 3), "rotation": (F, B, 4), "scale": (F, B, 3)} <float32>
+    """
+
+    translations = np.where(position_columns >= 0, positions, offsets).astype(np.float32)
+    rotations = euler_to_quats(euler_angles=euler_rotations, rotation_orders=rotation_orders)
+
+    translations = resample_frames(frames=translations, frame_period=frame_period, frame_rate=frame_rate)
+    rotations = resample_frames(frames=rotations, frame_period=frame_period, frame_rate=frame_rate,
+                                is_rotation=True)
+    scales = np.ones_like(translations)
+
+    return {"translation": translations, "rotation": rotations, "scale": scales}
+
+
+def bake_samplers(samplers: dict,
+                  translations: np.ndarray,
+                  rotations: np.ndarray,
+                  scales: np.ndarray,
+                  frame_rate=constants.ANIMATION_BAKING_DEFAULT_FRAME_RATE) -> dict:
+    """
+    Samples GLTF animation channels (see AnimationSampler) at a fixed frame rate. Bones without a channel keep
+    their rest pose.
+
+    :param samplers: dict {path: AnimationSampler}, with targets converted to bone indices
+    :param translations: numpy array (num_bones, 3), rest pose
+    :param rotations: numpy array (num_bones, 4), rest pose
+    :param scales: numpy array (num_bones, 3), rest pose
+    :param frame_rate: float, frames per second of the baked animation
+    :return: dict {"translation": (F, B, 3), "rotation": (F, B, 4), "scale": (F, B, 3)} <float32>
+    """
+
+    start_time = min(sampler.start_time for sampler in samplers.values())
+    end_time = max(sampler.end_time for sampler in samplers.values())
+    num_frames = int(round((end_time - start_time) * frame_rate)) + 1
+    times = start_time + np.arange(num_frames) / frame_rate
+
+    baked = {}
+    for path, rest_values in zip(TRACK_PATHS, [translations, rotations, scales]):
+        baked[path] = np.repeat(rest_values[np.newaxis].astype(np.float32), num_frames, axis=0)
+        if path in samplers:
+            samplers[path].sample_into(times=times, output=baked[path])
+
+    return baked
+
+
+def compress_clip(translations: np.ndarray,
+                  rotations: np.ndarray,
+                  scales: np.ndarray,
+                  frame_rate=constants.ANIMATION_BAKING_DEFAULT_FRAME_RATE,
+                  translation_tolerance=constants.ANIMATION_COMPRESSION_TRANSLATION_TOLERANCE,
+                  rotation_tolerance=constants.ANIMATION_COMPRESSION_ROTATION_TOLERANCE,
+                  scale_tolerance=constants.ANIMATION_COMPRESSION_SCALE_TOLERANCE):
+    """
+    Compresses a baked clip. Each bone's track only keeps the keyframes needed to stay within the tolerance when
+    interpolating linearly between them, then the kept values are quantized to 16 bits: rotations as
+    smallest-three quaternions (6 bytes) and vectors relative to the range of their track. Quantization adds up to
+    about 1e-4 radians, or 1/131070 of a track's range, on top of the tolerances.
+
+    :param translations: numpy array (num_frames, num_bones, 3)
+    :param rotations: numpy array (num_frames, num_bones, 4), quaternions as x, y, z, w
+    :param scales: numpy array (num_frames, num_bones, 3)
+    :param frame_rate: float, frames per second of the baked clip
+    :param translation_tolerance: float, max distance between the original and reduced tracks
+    :param rotation_tolerance: float, max angle (radians) between the original and reduced tracks
+    :param scale_tolerance: float, max difference between the original and reduced tracks
+    :return: CompressedClip
+    """
+
+    # Consecutive quaternions in the same hemisphere, so that interpolating between kept keys takes the short way
+    rotations = rotations / np.linalg.norm(rotations, axis=-1, keepdims=True)
+    flips = np.sum(rotations[1:] * rotations[:-1], axis=-1) < 0.0
+    signs = np.ones(rotations.shape[:-1], dtype=np.float32)
+    signs[1:] = np.where(np.cumsum(flips, axis=0) % 2 == 1, -1.0, 1.0)
+    rotations = (rotations * signs[..., np.newaxis]).astype(np.float32)
+
+    key_frame_dtype = np.uint16 if translations.shape[0] <= 0x10000 else np.uint32
+
+    arrays = {}
+    for path, frames, tolerance in zip(TRACK_PATHS,
+                                       [translations, rotations, scales],
+                                       [translation_tolerance, rotation_tolerance, scale_tolerance]):
+
+        frames = np.ascontiguousarray(frames, dtype=np.float32)
+        keep = np.empty(frames.shape[:2], dtype=np.bool_)
+        reduce_keyframes(frames, tolerance, path == "rotation", keep)
+
+        # Tracks are stored one after the other, bone by bone
+        keep = keep.T
+        key_offsets = np.zeros((keep.shape[0] + 1,), dtype=np.int32)
+        np.cumsum(np.sum(keep, axis=1), out=key_offsets[1:])
+        key_bones, key_frames = np.nonzero(keep)
+        values = frames.transpose((1, 0, 2))[keep]
+
+        arrays[f"{path}/key_offsets"] = key_offsets
+        arrays[f"{path}/key_frames"] = key_frames.astype(key_frame_dtype)
+        if path == "rotation":
+            arrays[f"{path}/values"] = encode_smallest_three(quats=values)
+            continue
+
+        mins = np.min(frames, axis=0)
+        steps = (np.max(frames, axis=0) - mins) / VECTOR_QUANTIZATION_MAX_VALUE
+        safe_steps = np.where(steps > 0.0, steps, 1.0)
+        quantized = np.rint((values - mins[key_bones]) / safe_steps[key_bones])
+        arrays[f"{path}/values"] = np.clip(quantized, 0, VECTOR_QUANTIZATION_MAX_VALUE).astype(np.uint16)
+        arrays[f"{path}/mins"] = mins.astype(np.float32)
+        arrays[f"{path}/steps"] = steps.astype(np.float32)
+
+    return CompressedClip(arrays=arrays, frame_rate=frame_rate, num_frames=translations.shape[0])
+
+
+def encode_smallest_three(quats: np.ndarray) -> np.ndarray:
+    """
+    :param quats: numpy array (N, 4), quaternions as x, y, z, w
+    :return: numpy array (N, 3) <uint16>
+    """
+
+    quats = quats / np.linalg.norm(quats, axis=-1, keepdims=True)
+    rows = np.arange(quats.shape[0])
+    largest_axes = np.argmax(np.abs(quats), axis=-1)
+
+    # q and -q are the same rotation, so the largest component is made positive and doesn't need a sign bit
+    quats = quats * np.where(quats[rows, largest_axes] < 0.0, -1.0, 1.0)[:, np.newaxis]
+    others = quats[rows[:, np.newaxis], SMALLEST_THREE_OTHER_AXES[largest_axes]]
+
+    encoded = np.rint((others / SMALLEST_THREE_RANGE * 0.5 + 0.5) * SMALLEST_THREE_MAX_VALUE)
+    encoded = np.clip(encoded, 0, SMALLEST_THREE_MAX_VALUE).astype(np.uint16)
+    encoded[:, 0] |= ((largest_axes & 1) << 15).astype(np.uint16)
+    encoded[:, 1] |= ((largest_axes >> 1) << 15).astype(np.uint16)
+    return encoded
+
+
+class CompressedClip:
+
+    """
+    Skeletal animation compressed by compress_clip(). Decoding only touches the two kept keyframes around the
+    requested time on each track and writes straight into the translation, rotation and scale arrays that
+    SkeletonPose.evaluate() takes, for one or many characters (times) at once.
+
+    The arrays are stored as "<path>/<array name>", like the GLTF loader's animation resources, so a clip can be
+    kept in a DataGroup and cached to the disk.
+    """
+
+    __slots__ = [
+        "arrays",
+        "frame_rate",
+        "num_frames",
+        "num_bones",
+        "duration"]
+
+    def __init__(self, arrays: dict, frame_rate: float, num_frames: int):
+
+        self.arrays = arrays
+        self.frame_rate = frame_rate
+        self.num_frames = num_frames
+        self.num_bones = arrays["rotation/key_offsets"].size - 1
+        self.duration = (num_frames - 1) / frame_rate
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    def num_keys(self, path: str) -> int:
+        return self.arrays[f"{path}/key_frames"].size
+
+    def decode(self, times, translations_out=None, rotations_out=None, scales_out=None):
+        """
+        Writes the pose at "times" into the provided arrays. Times are clamped to the clip's duration; looping is
+        up to the caller. Any output left as None is skipped
+
+        :param times: float, or numpy array (I,) with one time per character
+        :param translations_out: numpy array (num_bones, 3), or (I, num_bones, 3) if "times" is an array
+        :param rotations_out: numpy array (num_bones, 4), or (I, num_bones, 4) if "times" is an array
+        :param scales_out: numpy array (num_bones, 3), or (I, num_bones, 3) if "times" is an array
+        """
+
+        frame_positions = np.clip(np.atleast_1d(np.asarray(times, dtype=np.float64)) * self.frame_rate,
+                                  0.0, self.num_frames - 1)
+
+        for path, output in zip(TRACK_PATHS, [translations_out, rotations_out, scales_out]):
+            if output is None:
+                continue
+
+            # Reshaping contiguous arrays gives views, so this still writes into the caller's arrays
+            output_3d = output.reshape((frame_positions.size, self.num_bones, output.shape[-1]))
+            if path == "rotation":
+                decode_rotation_tracks(frame_positions,
+                                       self.arrays["rotation/key_offsets"],
+                                       self.arrays["rotation/key_frames"],
+                                       self.arrays["rotation/values"],
+                                       output_3d)
+            else:
+                decode_vector_tracks(frame_positions,
+                                     self.arrays[f"{path}/key_offsets"],
+                                     self.arrays[f"{path}/key_frames"],
+                                     self.arrays[f"{path}/values"],
+                                     self.arrays[f"{path}/mins"],
+                                     self.arrays[f"{path}/steps"],
+                                     output_3d)
+
+
+# =============================================================================
+#                               Numba kernels
+# =============================================================================
+
+
+@njit(parallel=True, cache=True)
+def reduce_keyframes(frames, tolerance, is_rotation, keep_out):
+    """
+    Greedy keyframe reduction. Starting from a kept key, each track's segment is extended one frame at a time for
+    as long as interpolating between its two ends reproduces every frame in between within "tolerance". First and
+    last frames are always kept
+
+    :param frames: numpy array (num_frames, num_bones, D)
+    :param tolerance: float, distance for vectors, angle in radians for quaternions
+    :param is_rotation: bool, if True, frames are quaternions and segments are interpolated with nlerp
+    :param keep_out: numpy array (num_frames, num_bones) <bool>
+    :return: None
+    """
+
+    num_frames = frames.shape[0]
+    for bone in prange(frames.shape[1]):
+        keep_out[:, bone] = False
+        keep_out[0, bone] = True
+        keep_out[num_frames - 1, bone] = True
+
+        start = 0
+        end = 1
+        while end < num_frames - 1:
+            if segment_error(frames, bone, start, end + 1, is_rotation) <= tolerance:
+                end += 1
+            else:
+                keep_out[end, bone] = True
+                start = end
+                end = start + 1
+
+
+@njit(cache=True)
+def segment_error(frames, bone, start, end, is_rotation):
+
+    max_error = 0.0
+    num_dims = frames.shape[2]
+    for frame in range(start + 1, end):
+        alpha = (frame - start) / (end - start)
+        error = 0.0
+        if is_rotation:
+            # Angle from the chord between the two unit quaternions, which unlike arccos(dot) stays accurate for
+            # the tiny angles that tolerances are about
+            interpolated_norm = 0.0
+            frame_norm = 0.0
+            for dim in range(num_dims):
+                value = frames[start, bone, dim] * (1.0 - alpha) + frames[end, bone, dim] * alpha
+                interpolated_norm += value * value
+                frame_norm += frames[frame, bone, dim] * frames[frame, bone, dim]
+            interpolated_norm = np.sqrt(interpolated_norm)
+            frame_norm = np.sqrt(frame_norm)
+            for dim in range(num_dims):
+                value = frames[start, bone, dim] * (1.0 - alpha) + frames[end, bone, dim] * alpha
+                delta = value / interpolated_norm - frames[frame, bone, dim] / frame_norm
+                error += delta * delta
+            error = 4.0 * np.arcsin(min(1.0, 0.5 * np.sqrt(error)))
+        else:
+            for dim in range(num_dims):
+                delta = frames[start, bone, dim] * (1.0 - alpha) + frames[end, bone, dim] * alpha \
+                        - frames[frame, bone, dim]
+                error += delta * delta
+            error = np.sqrt(error)
+        max_error = max(max_error, error)
+
+    return max_error
+
+
+@njit(cache=True)
+def find_key(key_frames, first_key, last_key, frame_position):
+
+    # Last key at or before "frame_position", never the track's last key unless it is also the first one
+    low = first_key
+    high = max(first_key, last_key - 1)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if key_frames[middle] <= frame_position:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+@njit(cache=True)
+def decode_smallest_three(encoded: np.ndarray) -> np.ndarray:
+    """
+    :param encoded: numpy array (N, 3) <uint16>, output of encode_smallest_three()
+    :return: numpy array (N, 4) <float32>, quaternions as x, y, z, w
+    """
+
+    quats = np.empty((encoded.shape[0], 4), dtype=np.float32)
+    for index in range(encoded.shape[0]):
+        x, y, z, w = decode_quat(encoded, index)
+        quats[index, 0] = x
+        quats[index, 1] = y
+        quats[index, 2] = z
+        quats[index, 3] = w
+    return quats
+
+
+@njit(cache=True)
+def decode_quat(encoded, index):
+
+    word_0 = np.int64(encoded[index, 0])
+    word_1 = np.int64(encoded[index, 1])
+    word_2 = np.int64(encoded[index, 2])
+    largest_axis = (word_0 >> 15) | ((word_1 >> 15) << 1)
+
+    scale = 2.0 * SMALLEST_THREE_RANGE / SMALLEST_THREE_MAX_VALUE
+    a = (word_0 & SMALLEST_THREE_MAX_VALUE) * scale - SMALLEST_THREE_RANGE
+    b = (word_1 & SMALLEST_THREE_MAX_VALUE) * scale - SMALLEST_THREE_RANGE
+    c = word_2 * scale - SMALLEST_THREE_RANGE
+    largest = np.sqrt(max(0.0, 1.0 - a * a - b * b - c * c))
+
+    if largest_axis == 0:
+        return largest, a, b, c
+    if largest_axis == 1:
+        return a, largest, b, c
+    if largest_axis == 2:
+        return a, b, largest, c
+    return a, b, c, largest
+
+
+@njit(parallel=True, cache=True)
+def decode_rotation_tracks(frame_positions, key_offsets, key_frames, encoded, output):
+
+    num_bones = key_offsets.size - 1
+    for instance in prange(frame_positions.size):
+        frame_position = frame_positions[instance]
+        for bone in range(num_bones):
+            first_key = key_offsets[bone]
+            last_key = key_offsets[bone + 1] - 1
+            key = find_key(key_frames, first_key, last_key, frame_position)
+            next_key = min(key + 1, last_key)
+
+            ax, ay, az, aw = decode_quat(encoded, key)
+            if next_key == key:
+                output[instance, bone, 0] = ax
+                output[instance, bone, 1] = ay
+                output[instance, bone, 2] = az
+                output[instance, bone, 3] = aw
+                continue
+
+            bx, by, bz, bw = decode_quat(encoded, next_key)
+            alpha = (frame_position - key_frames[key]) / (key_frames[next_key] - key_frames[key])
+            alpha = min(max(alpha, 0.0), 1.0)
+
+            # Encoding may have flipped either quaternion, so the sign of "b" is chosen again here
+            weight_b = alpha if ax * bx + ay * by + az * bz + aw * bw >= 0.0 else -alpha
+            weight_a = 1.0 - alpha
+            x = weight_a * ax + weight_b * bx
+            y = weight_a * ay + weight_b * by
+            z = weight_a * az + weight_b * bz
+            w = weight_a * aw + weight_b * bw
+            norm = np.sqrt(x * x + y * y + z * z + w * w)
+            output[instance, bone, 0] = x / norm
+            output[instance, bone, 1] = y / norm
+            output[instance, bone, 2] = z / norm
+            output[instance, bone, 3] = w / norm
+
+
+@njit(parallel=True, cache=True)
+def decode_vector_tracks(frame_positions, key_offsets, key_frames, quantized, mins, steps, output):
+
+    num_bones = key_offsets.size - 1
+    for instance in prange(frame_positions.size):
+        frame_position = frame_positions[instance]
+        for bone in range(num_bones):
+            first_key = key_offsets[bone]
+            last_key = key_offsets[bone + 1] - 1
+            key = find_key(key_frames, first_key, last_key, frame_position)
+            next_key = min(key + 1, last_key)
+
+            alpha = 0.0
+            if next_key != key:
+                alpha = (frame_position - key_frames[key]) / (key_frames[next_key] - key_frames[key])
+                alpha = min(max(alpha, 0.0), 1.0)
+
+            for dim in range(output.shape[2]):
+                value = quantized[key, dim] * (1.0 - alpha) + quantized[next_key, dim] * alpha
+                output[instance, bone, dim] = mins[bone, dim] + value * steps[bone, dim]
@@ -0,0 +1,211 @@
+import numpy as np
+
+from src.core import constants
+from src.math.quaternion import slerp_quats
+
+
+def pack_channels(channels: list) -> dict:
+    """
+    Packs the keyframes of many animation channels of the same kind (all translations, all rotations or all
+    scales) into flat arrays, so they can all be sampled at once by an AnimationSampler. The keyframes of channel
+    "i" are rows key_offsets[i]:key_offsets[i + 1] of the packed arrays.
+
+    :param channels: list of dict {"target_index": int, "interpolation": str (GLTF name), "timestamps": (K,),
+                     "values": (K, D), or (3 * K, D) for CUBICSPLINE with in-tangent, value and out-tangent
+                     per keyframe}
+    :return: dict of numpy arrays, with the same keys as AnimationSampler's arguments
+    """
+
+    num_channels = len(channels)
+    num_dims = channels[0]["values"].shape[-1] if num_channels > 0 else 0
+    num_keys = np.array([channel["timestamps"].size for channel in channels], dtype=np.int64)
+    key_offsets = np.zeros((num_channels + 1,), dtype=np.int64)
+    np.cumsum(num_keys, out=key_offsets[1:])
+
+    timestamps = np.empty((key_offsets[-1],), dtype=np.float32)
+    values = np.empty((key_offsets[-1], num_dims), dtype=np.float32)
+    in_tangents = np.zeros((key_offsets[-1], num_dims), dtype=np.float32)
+    out_tangents = np.zeros((key_offsets[-1], num_dims), dtype=np.float32)
+    interpolations = np.empty((num_channels,), dtype=np.int8)
+    target_indices = np.empty((num_channels,), dtype=np.int32)
+
+    for channel_index, channel in enumerate(channels):
+        keys = slice(key_offsets[channel_index], key_offsets[channel_index + 1])
+        interpolation = constants.ANIMATION_INTERPOLATION_GLTF_MAP[channel["interpolation"]]
+        timestamps[keys] = channel["timestamps"]
+        if interpolation == constants.ANIMATION_INTERPOLATION_CUBICSPLINE:
+            cubic_values = np.reshape(channel["values"], (-1, 3, num_dims))
+            in_tangents[keys] = cubic_values[:, 0, :]
+            values[keys] = cubic_values[:, 1, :]
+            out_tangents[keys] = cubic_values[:, 2, :]
+        else:
+            values[keys] = np.reshape(channel["values"], (-1, num_dims))
+        interpolations[channel_index] = interpolation
+        target_indices[channel_index] = channel["target_index"]
+
+    return {"timestamps": timestamps,
+            "key_offsets": key_offsets,
+            "values": values,
+            "in_tangents": in_tangents,
+            "out_tangents": out_tangents,
+            "interpolations": interpolations,
+            "target_indices": target_indices}
+
+
+class AnimationSampler:
+
+    """
+    Samples all channels of one kind (translation, rotation or scale) of an animation at once. Keyframes of all
+    channels are packed together (see pack_channels()) and a single np.searchsorted() call finds the keyframes of
+    every channel, for one or many time values: each channel's timestamps are shifted so that they occupy their
+    own range, and the queries are shifted by the same amount.
+
+    Times outside a channel's keyframes are clamped to its first or last keyframe. Rotations are interpolated with
+    slerp (LINEAR) or a normalised cubic hermite spline (CUBICSPLINE).
+    """
+
+    __slots__ = [
+        "timestamps",
+        "key_offsets",
+        "values",
+        "in_tangents",
+        "out_tangents",
+        "interpolations",
+        "target_indices",
+        "is_rotation",
+        "shifted_timestamps",
+        "channel_shifts",
+        "first_keys",
+        "last_segment_keys",
+        "last_keys",
+        "step_channels",
+        "cubic_channels",
+        "valid_channels",
+        "start_time",
+        "end_time"]
+
+    def __init__(self,
+                 timestamps: np.ndarray,
+                 key_offsets: np.ndarray,
+                 values: np.ndarray,
+                 in_tangents: np.ndarray,
+                 out_tangents: np.ndarray,
+                 interpolations: np.ndarray,
+                 target_indices: np.ndarray,
+                 is_rotation=False):
+
+        self.timestamps = timestamps
+        self.key_offsets = key_offsets
+        self.values = values
+        self.in_tangents = in_tangents
+        self.out_tangents = out_tangents
+        self.interpolations = interpolations
+        self.target_indices = target_indices
+        self.is_rotation = is_rotation
+
+        num_channels = interpolations.size
+        num_keys = np.diff(key_offsets)
+        if np.any(num_keys == 0):
+            raise ValueError("[ERROR] All animation channels need at least one keyframe")
+
+        self.first_keys = key_offsets[:-1]
+        self.last_keys = key_offsets[1:] - 1
+        self.last_segment_keys = np.maximum(self.first_keys, self.last_keys - 1)
+
+        if num_channels > 0:
+            self.start_time = float(timestamps[self.first_keys].min())
+            self.end_time = float(timestamps[self.last_keys].max())
+        else:
+            self.start_time = 0.0
+            self.end_time = 0.0
+
+        # Channel "i" is shifted by "i * span", so no two channels overlap in the packed (shifted) timestamps
+        span = (self.end_time - self.start_time) + 1.0
+        self.channel_shifts = np.arange(num_channels, dtype=np.float64) * span
+        self.shifted_timestamps = timestamps.astype(np.float64) + np.repeat(self.channel_shifts, num_keys)
+
+        self.step_channels = interpolations == constants.ANIMATION_INTERPOLATION_STEP
+        self.cubic_channels = np.flatnonzero(interpolations == constants.ANIMATION_INTERPOLATION_CUBICSPLINE)
+        self.valid_channels = np.flatnonzero(target_indices >= 0)
+
+    @classmethod
+    def from_data_blocks(cls, data_blocks: dict, path: str, target_lookup=None):
+        """
+        Creates a sampler from the packed channels stored by the GLTF loader under "<path>/<array name>"
+
+        :param data_blocks: dict, the data blocks of an animation resource
+        :param path: str, "translation", "rotation" or "scale"
+        :param target_lookup: numpy array mapping the channels' target nodes to other indices (e.g. skeleton
+                              bones), with -1 for nodes that should be ignored. If None, targets are node indices
+        """
+
+        target_indices = data_blocks[f"{path}/target_indices"].data
+        if target_lookup is not None:
+            target_indices = target_lookup[target_indices].astype(np.int32)
+
+        return cls(timestamps=data_blocks[f"{path}/timestamps"].data,
+                   key_offsets=data_blocks[f"{path}/key_offsets"].data,
+                   values=data_blocks[f"{path}/values"].data,
+                   in_tangents=data_blocks[f"{path}/in_tangents"].data,
+                   out_tangents=data_blocks[f"{path}/out_tangents"].data,
+                   interpolations=data_blocks[f"{path}/interpolations"].data,
+                   target_indices=target_indices,
+                   is_rotation=path == "rotation")
+
+    def sample(self, times) -> np.ndarray:
+        """
+        :param times: float, or numpy array (T,) of time values
+        :return: numpy array (num_channels, D), or (T, num_channels, D) if "times" is an array <float32>
+        """
+
+        times = np.asarray(times, dtype=np.float64)
+        single = times.ndim == 0
+        times = np.atleast_1d(times)[:, np.newaxis]
+
+        # Find the segment [key, next_key] of every channel for every time
+        times = np.clip(times, self.timestamps[self.first_keys], self.timestamps[self.last_keys])
+        keys = np.searchsorted(self.shifted_timestamps, times + self.channel_shifts, side="right") - 1
+        keys = np.clip(keys, self.first_keys, self.last_segment_keys)
+        next_keys = np.minimum(keys + 1, self.last_keys)
+
+        key_times = self.timestamps[keys]
+        delta_times = self.timestamps[next_keys] - key_times
+        alphas = np.divide(times - key_times, delta_times, out=np.zeros(keys.shape), where=delta_times > 0)
+        alphas = np.where(self.step_channels, np.floor(alphas), alphas)
+
+        values_a = self.values[keys]
+        values_b = self.values[next_keys]
+        if self.is_rotation:
+            output = slerp_quats(values_a, values_b, alphas).astype(np.float32)
+        else:
+            # Written this way (rather than a + t * (b - a)) so keyframes are reproduced exactly at t = 0 and 1
+            weights = alphas[..., np.newaxis]
+            output = (values_a * (1.0 - weights) + values_b * weights).astype(np.float32)
+
+        if self.cubic_channels.size > 0:
+            cubic = self.cubic_channels
+            a = alphas[:, cubic, np.newaxis]
+            a2 = a * a
+            a3 = a2 * a
+            dt = delta_times[:, cubic, np.newaxis]
+            cubic_values = ((2 * a3 - 3 * a2 + 1) * values_a[:, cubic]
+                            + (a3 - 2 * a2 + a) * dt * self.out_tangents[keys[:, cubic]]
+                            + (-2 * a3 + 3 * a2) * values_b[:, cubic]
+                            + (a3 - a2) * dt * self.in_tangents[next_keys[:, cubic]])
+            if self.is_rotation:
+                cubic_values /= np.linalg.norm(cubic_values, axis=-1, keepdims=True)
+            output[:, cubic] = cubic_values
+
+        return output[0] if single else output
+
+    def sample_into(self, times, output: np.ndarray):
+        """
+        Samples the animation and writes each channel into the row of its target, e.g. a skeleton's rotations.
+        Rows not targeted by any channel are left untouched
+
+        :param times: float, or numpy array (T,) of time values
+        :param output: numpy array (num_targets, D), or (T, num_targets, D) if "times" is an array
+        """
+
+        sampled = self.sample(times=times)
+        output[..., self.target_indices[self.valid_channels], :] = sampled[..., self.valid_channels, :]
@@ -0,0 +1,662 @@
+import numpy as np
+from numba import njit, prange
+
+# Nodes are stored depth-first (pre-order): the left child of an internal node is always the next node, its right
+# child is in "node_right" (-1 for leaves) and every node covers the contiguous range of "primitives" given by
+# "node_start" and "node_count". Children always come after their parents, so iterating over the nodes in reverse
+# visits the children before their parents.
+
+BVH_STACK_SIZE = 64
+BVH_MAX_SAH_DEPTH = 32  # Deeper nodes are split in half, so no tree is deeper than the stacks used to traverse it
+
+
+@njit(cache=True)
+def build_bvh(aabb_min: np.ndarray, aabb_max: np.ndarray, leaf_size: int, num_bins: int) -> tuple:
+    """
+    Top-down build with a binned surface area heuristic (SAH): the centroids of each node are binned along each
+    axis and the node is split at the bin boundary that minimises the expected cost of a ray query. Nodes become
+    leaves when that is cheaper than any split, as long as they hold at most "leaf_size" primitives
+
+    :param aabb_min: numpy array (N, 3) <float32>
+    :param aabb_max: numpy array (N, 3) <float32>
+    :param leaf_size: int, maximum number of primitives per leaf, unless they all share the same centroid
+    :param num_bins: int, number of candidate splits tested per axis is one less than this
+    :return: tuple (node_min, node_max, node_right, node_start, node_count, node_parent, primitives, primitive_leaf)
+             with one element per node, except for "primitives" (primitive indices in tree order) and
+             "primitive_leaf" (leaf of each primitive)
+    """
+
+    num_primitives = aabb_min.shape[0]
+    max_num_nodes = max(1, 2 * num_primitives - 1)
+
+    node_min = np.zeros((max_num_nodes, 3), dtype=np.float32)
+    node_max = np.zeros((max_num_nodes, 3), dtype=np.float32)
+    node_right = np.full((max_num_nodes,), -1, dtype=np.int32)
+    node_start = np.zeros((max_num_nodes,), dtype=np.int32)
+    node_count = np.zeros((max_num_nodes,), dtype=np.int32)
+    node_parent = np.full((max_num_nodes,), -1, dtype=np.int32)
+    primitives = np.arange(num_primitives).astype(np.int32)
+    primitive_leaf = np.zeros((num_primitives,), dtype=np.int32)
+    centroids = (aabb_min + aabb_max) * np.float32(0.5)
+
+    bin_count = np.zeros((num_bins,), dtype=np.int32)
+    bin_min = np.zeros((num_bins, 3), dtype=np.float32)
+    bin_max = np.zeros((num_bins, 3), dtype=np.float32)
+    right_area = np.zeros((num_bins,), dtype=np.float64)
+    centroid_min = np.zeros((3,), dtype=np.float32)
+    centroid_max = np.zeros((3,), dtype=np.float32)
+
+    # Pending right children, as (parent, start, count, depth)
+    stack = np.empty((BVH_STACK_SIZE, 4), dtype=np.int32)
+    stack_size = 0
+
+    node = 0
+    depth = 0
+    num_nodes = 1
+    node_count[0] = num_primitives
+    while True:
+
+        start = node_start[node]
+        count = node_count[node]
+        for axis in range(3):
+            node_min[node, axis] = np.inf
+            node_max[node, axis] = -np.inf
+            centroid_min[axis] = np.inf
+            centroid_max[axis] = -np.inf
+        for index in range(start, start + count):
+            primitive = primitives[index]
+            for axis in range(3):
+                node_min[node, axis] = min(node_min[node, axis], aabb_min[primitive, axis])
+                node_max[node, axis] = max(node_max[node, axis], aabb_max[primitive, axis])
+                centroid_min[axis] = min(centroid_min[axis], centroids[primitive, axis])
+                centroid_max[axis] = max(centroid_max[axis], centroids[primitive, axis])
+
+        # Costs are relative to intersecting one primitive, with traversing a node costing as much
+        best_cost = np.inf
+        best_axis = -1
+        best_bin = 0
+        if count > 1 and depth < BVH_MAX_SAH_DEPTH:
+            for axis in range(3):
+                extent = centroid_max[axis] - centroid_min[axis]
+                if extent <= 0.0:
+                    continue
+
+                bin_count[:] = 0
+                bin_min[:] = np.inf
+                bin_max[:] = -np.inf
+                scale = num_bins / extent
+                for index in range(start, start + count):
+                    primitive = primitives[index]
+                    bin_index = min(int((centroids[primitive, axis] - centroid_min[axis]) * scale), num_bins - 1)
+                    bin_count[bin_index] += 1
+                    for other_axis in range(3):
+                        bin_min[bin_index, other_axis] = min(bin_min[bin_index, other_axis],
+                                                             aabb_min[primitive, other_axis])
+                        bin_max[bin_index, other_axis] = max(bin_max[bin_index, other_axis],
+                                                             aabb_max[primitive, other_axis])
+
+                # Right side sweep first, then the left one evaluates each split
+                low = np.full((3,), np.inf, dtype=np.float32)
+                high = np.full((3,), -np.inf, dtype=np.float32)
+                for bin_index in range(num_bins - 1, 0, -1):
+                    low = np.minimum(low, bin_min[bin_index])
+                    high = np.maximum(high, bin_max[bin_index])
+                    right_area[bin_index] = _half_area(low, high)
+
+                low[:] = np.inf
+                high[:] = -np.inf
+                left_count = 0
+                for bin_index in range(num_bins - 1):
+                    low = np.minimum(low, bin_min[bin_index])
+                    high = np.maximum(high, bin_max[bin_index])
+                    left_count += bin_count[bin_index]
+                    if left_count == 0 or left_count == count:
+                        continue
+                    cost = _half_area(low, high) * left_count + right_area[bin_index + 1] * (count - left_count)
+                    if cost < best_cost:
+                        best_cost = cost
+                        best_axis = axis
+                        best_bin = bin_index
+
+        node_area = _half_area(node_min[node], node_max[node])
+        split_cost = 1.0 + best_cost / node_area if node_area > 0.0 else np.inf
+        split_in_half = depth >= BVH_MAX_SAH_DEPTH and count > leaf_size
+        if not split_in_half and (best_axis < 0 or (count <= leaf_size and split_cost >= count)):
+            for index in range(start, start + count):
+                primitive_leaf[primitives[index]] = node
+            if stack_size == 0:
+                break
+
+            # Next node is the right child of the deepest node still waiting for one
+            stack_size -= 1
+            parent = stack[stack_size, 0]
+            node = num_nodes
+            num_nodes += 1
+            node_right[parent] = node
+            node_parent[node] = parent
+            node_start[node] = stack[stack_size, 1]
+            node_count[node] = stack[stack_size, 2]
+            depth = stack[stack_size, 3]
+            continue
+
+        # Primitives in the bins left of the split go first
+        first = start + count // 2
+        if not split_in_half:
+            scale = num_bins / (centroid_max[best_axis] - centroid_min[best_axis])
+            first = start
+            last = start + count - 1
+            while first <= last:
+                primitive = primitives[first]
+                bin_index = min(int((centroids[primitive, best_axis] - centroid_min[best_axis]) * scale),
+                                num_bins - 1)
+                if bin_index <= best_bin:
+                    first += 1
+                else:
+                    primitives[first] = primitives[last]
+                    primitives[last] = primitive
+                    last -= 1
+
+        half = first - start
+        depth += 1
+        stack[stack_size, 0] = node
+        stack[stack_size, 1] = start + half
+        stack[stack_size, 2] = count - half
+        stack[stack_size, 3] = depth
+        stack_size += 1
+
+        left = num_nodes
+        num_nodes += 1
+        node_parent[left] = node
+        node_start[left] = start
+        node_count[left] = half
+        node = left
+
+    return (node_min[:num_nodes], node_max[:num_nodes], node_right[:num_nodes], node_start[:num_nodes],
+            node_count[:num_nodes], node_parent[:num_nodes], primitives, primitive_leaf)
+
+
+@njit(cache=True)
+def refit_bvh(node_min: np.ndarray,
+              node_max: np.ndarray,
+              node_right: np.ndarray,
+              node_start: np.ndarray,
+              node_count: np.ndarray,
+              node_parent: np.ndarray,
+              primitives: np.ndarray,
+              primitive_leaf: np.ndarray,
+              aabb_min: np.ndarray,
+              aabb_max: np.ndarray,
+              dirty: np.ndarray,
+              node_dirty_out: np.ndarray) -> int:
+    """
+    Recomputes the bounds of the leaves holding dirty primitives and of all their ancestors, leaving the topology
+    of the tree untouched
+
+    :param dirty: numpy array (N,) <bool>, TRUE for the primitives whose AABB changed
+    :param node_dirty_out: numpy array (num_nodes,) <bool>, TRUE for the nodes that were refit
+    :return: int, number of nodes refit
+    """
+
+    node_dirty_out[:] = False
+    for primitive in range(dirty.shape[0]):
+        if not dirty[primitive]:
+            continue
+        node = primitive_leaf[primitive]
+        while node >= 0 and not node_dirty_out[node]:
+            node_dirty_out[node] = True
+            node = node_parent[node]
+
+    num_refit = 0
+    for node in range(node_right.shape[0] - 1, -1, -1):
+        if not node_dirty_out[node]:
+            continue
+        num_refit += 1
+
+        right = node_right[node]
+        if right >= 0:
+            for axis in range(3):
+                node_min[node, axis] = min(node_min[node + 1, axis], node_min[right, axis])
+                node_max[node, axis] = max(node_max[node + 1, axis], node_max[right, axis])
+            continue
+
+        for axis in range(3):
+            node_min[node, axis] = np.inf
+            node_max[node, axis] = -np.inf
+        for index in range(node_start[node], node_start[node] + node_count[node]):
+            primitive = primitives[index]
+            for axis in range(3):
+                node_min[node, axis] = min(node_min[node, axis], aabb_min[primitive, axis])
+                node_max[node, axis] = max(node_max[node, axis], aabb_max[primitive, axis])
+
+    return num_refit
+
+
+@njit(cache=True)
+def bvh_cost(node_min: np.ndarray, node_max: np.ndarray) -> float:
+    """
+    Sum of the surface areas of all nodes, which is what a ray query pays for in the surface area heuristic. It
+    only grows as refits stretch the nodes of a tree built for other positions
+
+    :return: float
+    """
+
+    cost = 0.0
+    for node in range(node_min.shape[0]):
+        cost += _half_area(node_min[node], node_max[node])
+    return cost
+
+
+@njit(cache=True)
+def intersect_ray_aabb(ray_origin: np.ndarray,
+                       ray_inverse_direction: np.ndarray,
+                       box_min: np.ndarray,
+                       box_max: np.ndarray,
+                       max_distance: float) -> float:
+    """
+    Slab test
+
+    :param ray_origin: numpy array (3,)
+    :param ray_inverse_direction: numpy array (3,), 1 / ray direction
+    :param box_min: numpy array (3,)
+    :param box_max: numpy array (3,)
+    :param max_distance: float, boxes entered beyond this distance are missed
+    :return: float, distance along the ray where it enters the box (0 if it starts inside), or inf if it misses it
+    """
+
+    t_near = 0.0
+    t_far = max_distance
+    for axis in range(3):
+        t_0 = (box_min[axis] - ray_origin[axis]) * ray_inverse_direction[axis]
+        t_1 = (box_max[axis] - ray_origin[axis]) * ray_inverse_direction[axis]
+        t_near = max(t_near, min(t_0, t_1))
+        t_far = min(t_far, max(t_0, t_1))
+
+    return t_near if t_near <= t_far else np.inf
+
+
+@njit(cache=True)
+def intersect_ray_bvh(ray_origin: np.ndarray,
+                      ray_direction: np.ndarray,
+                      max_distance: float,
+                      node_min: np.ndarray,
+                      node_max: np.ndarray,
+                      node_right: np.ndarray,
+                      node_start: np.ndarray,
+                      node_count: np.ndarray,
+                      primitives: np.ndarray,
+                      aabb_min: np.ndarray,
+                      aabb_max: np.ndarray,
+                      hits_out: np.ndarray,
+                      distances_out: np.ndarray) -> int:
+    """
+    All primitives whose AABB the ray hits, sorted by the distance where the ray enters them. Exact tests can then
+    stop at the first candidate that starts beyond the closest exact hit found so far
+
+    :param ray_origin: numpy array (3,)
+    :param ray_direction: numpy array (3,)
+    :param max_distance: float
+    :param hits_out: numpy array (N,) <int32>
+    :param distances_out: numpy array (N,) <float32>
+    :return: int, number of hits
+    """
+
+    inverse_direction = np.empty((3,), dtype=np.float64)
+    for axis in range(3):
+        inverse_direction[axis] = 1.0 / ray_direction[axis] if ray_direction[axis] != 0.0 else 1e30
+
+    if node_right.shape[0] == 0 or node_count[0] == 0:
+        return 0
+
+    stack = np.empty((BVH_STACK_SIZE,), dtype=np.int32)
+    stack[0] = 0
+    stack_size = 1
+    num_hits = 0
+    while stack_size > 0:
+        stack_size -= 1
+        node = stack[stack_size]
+        if intersect_ray_aabb(ray_origin, inverse_direction, node_min[node], node_max[node], max_distance) == np.inf:
+            continue
+
+        if node_right[node] >= 0:
+            stack[stack_size] = node_right[node]
+            stack[stack_size + 1] = node + 1
+            stack_size += 2
+            continue
+
+        for index in range(node_start[node], node_start[node] + node_count[node]):
+            primitive = primitives[index]
+            distance = intersect_ray_aabb(ray_origin, inverse_direction, aabb_min[primitive], aabb_max[primitive],
+                                          max_distance)
+            if distance == np.inf:
+                continue
+            hits_out[num_hits] = primitive
+            distances_out[num_hits] = distance
+            num_hits += 1
+
+    order = np.argsort(distances_out[:num_hits])
+    hits_out[:num_hits] = hits_out[:num_hits][order]
+    distances_out[:num_hits] = distances_out[:num_hits][order]
+
+    return num_hits
+
+
+@njit(cache=True)
+def query_frustum_bvh(planes: np.ndarray,
+                      node_min: np.ndarray,
+                      node_max: np.ndarray,
+                      node_right: np.ndarray,
+                      node_start: np.ndarray,
+                      node_count: np.ndarray,
+                      primitives: np.ndarray,
+                      aabb_min: np.ndarray,
+                      aabb_max: np.ndarray,
+                      primitives_out: np.ndarray) -> int:
+    """
+    Primitives whose AABB is not culled by the planes, with the same test as cull_aabbs(). Nodes entirely inside
+    the frustum have all their primitives added without testing them
+
+    :param planes: numpy array (6, 4) <float32>, see frustum_planes()
+    :param primitives_out: numpy array (N,) <int32>
+    :return: int, number of primitives
+    """
+
+    if node_right.shape[0] == 0 or node_count[0] == 0:
+        return 0
+
+    stack = np.empty((BVH_STACK_SIZE,), dtype=np.int32)
+    stack[0] = 0
+    stack_size = 1
+    num_primitives = 0
+    while stack_size > 0:
+        stack_size -= 1
+        node = stack[stack_size]
+
+        # Furthest corner along each plane's normal decides if it is outside, the nearest if it is inside
+        min_furthest = np.inf
+        min_nearest = np.inf
+        for plane in range(6):
+            furthest = planes[plane, 3]
+            nearest = planes[plane, 3]
+            for axis in range(3):
+                a = planes[plane, axis] * node_min[node, axis]
+                b = planes[plane, axis] * node_max[node, axis]
+                furthest += max(a, b)
+                nearest += min(a, b)
+            min_furthest = min(min_furthest, furthest)
+            min_nearest = min(min_nearest, nearest)
+
+        if min_furthest < 0.0:
+            continue
+
+        if min_nearest >= 0.0 or node_right[node] < 0:
+            inside = min_nearest >= 0.0
+            for index in range(node_start[node], node_start[node] + node_count[node]):
+                primitive = primitives[index]
+                if not inside and not _aabb_inside_planes(planes, aabb_min[primitive], aabb_max[primitive]):
+                    continue
+                primitives_out[num_primitives] = primitive
+                num_primitives += 1
+            continue
+
+        stack[stack_size] = node_right[node]
+        stack[stack_size + 1] = node + 1
+        stack_size += 2
+
+    return num_primitives
+
+
+@njit(cache=True)
+def query_box_bvh(box_min: np.ndarray,
+                  box_max: np.ndarray,
+                  node_min: np.ndarray,
+                  node_max: np.ndarray,
+                  node_right: np.ndarray,
+                  node_start: np.ndarray,
+                  node_count: np.ndarray,
+                  primitives: np.ndarray,
+                  aabb_min: np.ndarray,
+                  aabb_max: np.ndarray,
+                  primitives_out: np.ndarray) -> int:
+    """
+    Primitives whose AABB overlaps the box (touching counts as overlapping)
+
+    :param box_min: numpy array (3,)
+    :param box_max: numpy array (3,)
+    :param primitives_out: numpy array (N,) <int32>
+    :return: int, number of primitives
+    """
+
+    if node_right.shape[0] == 0 or node_count[0] == 0:
+        return 0
+
+    stack = np.empty((BVH_STACK_SIZE,), dtype=np.int32)
+    stack[0] = 0
+    stack_size = 1
+    num_primitives = 0
+    while stack_size > 0:
+        stack_size -= 1
+        node = stack[stack_size]
+        if not _aabbs_overlap(box_min, box_max, node_min[node], node_max[node]):
+            continue
+
+        contained = True
+        for axis in range(3):
+            contained &= box_min[axis] <= node_min[node, axis] and node_max[node, axis] <= box_max[axis]
+
+        if contained or node_right[node] < 0:
+            for index in range(node_start[node], node_start[node] + node_count[node]):
+                primitive = primitives[index]
+                if not contained and not _aabbs_overlap(box_min, box_max, aabb_min[primitive], aabb_max[primitive]):
+                    continue
+                primitives_out[num_primitives] = primitive
+                num_primitives += 1
+            continue
+
+        stack[stack_size] = node_right[node]
+        stack[stack_size + 1] = node + 1
+        stack_size += 2
+
+    return num_primitives
+
+
+@njit(cache=True)
+def triangle_aabbs(vertices: np.ndarray, triangles: np.ndarray) -> tuple:
+    """
+    :param vertices: numpy array (V, 3) <float32>
+    :param triangles: numpy array (T, 3) <int>, vertex indices of each triangle
+    :return: tuple (aabb_min, aabb_max), numpy arrays (T, 3) <float32>
+    """
+
+    aabb_min = np.empty((triangles.shape[0], 3), dtype=np.float32)
+    aabb_max = np.empty((triangles.shape[0], 3), dtype=np.float32)
+    for triangle in range(triangles.shape[0]):
+        for axis in range(3):
+            a = vertices[triangles[triangle, 0], axis]
+            b = vertices[triangles[triangle, 1], axis]
+            c = vertices[triangles[triangle, 2], axis]
+            aabb_min[triangle, axis] = min(a, b, c)
+            aabb_max[triangle, axis] = max(a, b, c)
+    return aabb_min, aabb_max
+
+
+@njit(parallel=True, cache=True)
+def intersect_rays_triangle_bvh(ray_origins: np.ndarray,
+                                ray_directions: np.ndarray,
+                                max_distance: float,
+                                node_min: np.ndarray,
+                                node_max: np.ndarray,
+                                node_right: np.ndarray,
+                                node_start: np.ndarray,
+                                node_count: np.ndarray,
+                                primitives: np.ndarray,
+                                triangle_vertex_0: np.ndarray,
+                                triangle_edge_1: np.ndarray,
+                                triangle_edge_2: np.ndarray,
+                                distances_out: np.ndarray,
+                                triangle_ids_out: np.ndarray,
+                                barycentrics_out: np.ndarray) -> int:
+    """
+    Nearest triangle hit by each ray (Moller-Trumbore, both sides of the triangles). Nodes are visited front to
+    back, and skipped once they start beyond the nearest hit found so far. Triangles are stored in tree order, as
+    their first vertex and the edges to the other two, so each leaf reads a contiguous block of memory
+
+    :param ray_origins: numpy array (R, 3)
+    :param ray_directions: numpy array (R, 3), not necessarily normalised. Distances are in units of their length
+    :param max_distance: float
+    :param triangle_vertex_0: numpy array (T, 3) <float32>, in tree order (see "primitives")
+    :param triangle_edge_1: numpy array (T, 3) <float32>, vertex 1 - vertex 0, in tree order
+    :param triangle_edge_2: numpy array (T, 3) <float32>, vertex 2 - vertex 0, in tree order
+    :param distances_out: numpy array (R,) <float32>, inf for rays that hit nothing
+    :param triangle_ids_out: numpy array (R,) <int32>, -1 for rays that hit nothing
+    :param barycentrics_out: numpy array (R, 2) <float32>, weights (u, v) of vertices 1 and 2 at the hit point.
+                             Vertex 0 weighs 1 - u - v
+    :return: int, number of rays that hit a triangle
+    """
+
+    num_rays = ray_origins.shape[0]
+    empty = node_right.shape[0] == 0 or node_count[0] == 0
+    for ray in prange(num_rays):
+
+        distances_out[ray] = np.inf
+        triangle_ids_out[ray] = -1
+        barycentrics_out[ray, 0] = 0.0
+        barycentrics_out[ray, 1] = 0.0
+        if empty:
+            continue
+
+        ox = ray_origins[ray, 0]
+        oy = ray_origins[ray, 1]
+        oz = ray_origins[ray, 2]
+        dx = ray_directions[ray, 0]
+        dy = ray_directions[ray, 1]
+        dz = ray_directions[ray, 2]
+        ix = 1.0 / dx if dx != 0.0 else 1e30
+        iy = 1.0 / dy if dy != 0.0 else 1e30
+        iz = 1.0 / dz if dz != 0.0 else 1e30
+
+        best_distance = max_distance
+        best_index = -1
+        best_u = 0.0
+        best_v = 0.0
+
+        # Each stack entry keeps the distance where the ray enters the node, tested when it was pushed
+        stack = np.empty((BVH_STACK_SIZE,), dtype=np.int32)
+        stack_distances = np.empty((BVH_STACK_SIZE,), dtype=np.float64)
+        stack[0] = 0
+        stack_distances[0] = _ray_node_distance(ox, oy, oz, ix, iy, iz, node_min, node_max, 0, best_distance)
+        stack_size = 1
+        while stack_size > 0:
+            stack_size -= 1
+            node = stack[stack_size]
+            if stack_distances[stack_size] >= best_distance:
+                continue
+
+            right = node_right[node]
+            if right >= 0:
+                left = node + 1
+                left_distance = _ray_node_distance(ox, oy, oz, ix, iy, iz, node_min, node_max, left, best_distance)
+                right_distance = _ray_node_distance(ox, oy, oz, ix, iy, iz, node_min, node_max, right, best_distance)
+
+                # Nearest child goes on top of the stack
+                if left_distance > right_distance:
+                    left, right = right, left
+                    left_distance, right_distance = right_distance, left_distance
+                if right_distance < best_distance:
+                    stack[stack_size] = right
+                    stack_distances[stack_size] = right_distance
+                    stack_size += 1
+                if left_distance < best_distance:
+                    stack[stack_size] = left
+                    stack_distances[stack_size] = left_distance
+                    stack_size += 1
+                continue
+
+            for index in range(node_start[node], node_start[node] + node_count[node]):
+                e1x = triangle_edge_1[index, 0]
+                e1y = triangle_edge_1[index, 1]
+                e1z = triangle_edge_1[index, 2]
+                e2x = triangle_edge_2[index, 0]
+                e2y = triangle_edge_2[index, 1]
+                e2z = triangle_edge_2[index, 2]
+
+                px = dy * e2z - dz * e2y
+                py = dz * e2x - dx * e2z
+                pz = dx * e2y - dy * e2x
+                determinant = e1x * px + e1y * py + e1z * pz
+                if abs(determinant) < 1e-12:
+                    continue
+                inverse_determinant = 1.0 / determinant
+
+                sx = ox - triangle_vertex_0[index, 0]
+                sy = oy - triangle_vertex_0[index, 1]
+                sz = oz - triangle_vertex_0[index, 2]
+                u = (sx * px + sy * py + sz * pz) * inverse_determinant
+                if u < 0.0 or u > 1.0:
+                    continue
+
+                qx = sy * e1z - sz * e1y
+                qy = sz * e1x - sx * e1z
+                qz = sx * e1y - sy * e1x
+                v = (dx * qx + dy * qy + dz * qz) * inverse_determinant
+                if v < 0.0 or u + v > 1.0:
+                    continue
+
+                distance = (e2x * qx + e2y * qy + e2z * qz) * inverse_determinant
+                if 0.0 <= distance < best_distance:
+                    best_distance = distance
+                    best_index = index
+                    best_u = u
+                    best_v = v
+
+        if best_index >= 0:
+            distances_out[ray] = best_distance
+            triangle_ids_out[ray] = primitives[best_index]
+            barycentrics_out[ray, 0] = best_u
+            barycentrics_out[ray, 1] = best_v
+
+    return np.count_nonzero(triangle_ids_out[:num_rays] >= 0)
+
+
+@njit(cache=True)
+def _ray_node_distance(ox: float, oy: float, oz: float, ix: float, iy: float, iz: float, node_min: np.ndarray,
+                       node_max: np.ndarray, node: int, max_distance: float) -> float:
+    t_0 = (node_min[node, 0] - ox) * ix
+    t_1 = (node_max[node, 0] - ox) * ix
+    t_near = min(t_0, t_1)
+    t_far = max(t_0, t_1)
+    t_0 = (node_min[node, 1] - oy) * iy
+    t_1 = (node_max[node, 1] - oy) * iy
+    t_near = max(t_near, min(t_0, t_1))
+    t_far = min(t_far, max(t_0, t_1))
+    t_0 = (node_min[node, 2] - oz) * iz
+    t_1 = (node_max[node, 2] - oz) * iz
+    t_near = max(t_near, min(t_0, t_1), 0.0)
+    t_far = min(t_far, max(t_0, t_1), max_distance)
+    return t_near if t_near <= t_far else np.inf
+
+
+@njit(cache=True)
+def _half_area(box_min: np.ndarray, box_max: np.ndarray) -> float:
+    dx = max(box_max[0] - box_min[0], 0.0)
+    dy = max(box_max[1] - box_min[1], 0.0)
+    dz = max(box_max[2] - box_min[2], 0.0)
+    return dx * dy + dy * dz + dz * dx
+
+
+@njit(cache=True)
+def _aabb_inside_planes(planes: np.ndarray, box_min: np.ndarray, box_max: np.ndarray) -> bool:
+    for plane in range(6):
+        distance = planes[plane, 3]
+        for axis in range(3):
+            distance += max(planes[plane, axis] * box_min[axis], planes[plane, axis] * box_max[axis])
+        if distance < 0.0:
+            return False
+    return True
+
+
+@njit(cache=True)
+def _aabbs_overlap(a_min: np.ndarray, a_max: np.ndarray, b_min: np.ndarray, b_max: np.ndarray) -> bool:
+    for axis in range(3):
+        if a_max[axis] < b_min[axis] or b_max[axis] < a_min[axis]:
+            return False
+    return True
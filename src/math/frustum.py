@@ -0,0 +1,195 @@
+import numpy as np
+from numba import njit, prange
+
+
+def frustum_planes(view_projection_matrix: np.ndarray) -> np.ndarray:
+    """
+    Extracts the 6 planes of a camera frustum from its (row-major) projection @ view matrix (Gribb & Hartmann).
+    Planes point inwards and are normalised, so "dot(plane[:3], point) + plane[3]" is the signed distance from the
+    plane to the point, positive inside the frustum
+
+    :param view_projection_matrix: numpy array (4, 4), projection_matrix @ view_matrix
+    :return: numpy array (6, 4) <float32>, planes (nx, ny, nz, d) in order left, right, bottom, top, near, far
+    """
+
+    rows = view_projection_matrix.astype(np.float64)
+    planes = np.stack([rows[3] + rows[0],
+                       rows[3] - rows[0],
+                       rows[3] + rows[1],
+                       rows[3] - rows[1],
+                       rows[3] + rows[2],
+                       rows[3] - rows[2]])
+    planes /= np.linalg.norm(planes[:, :3], axis=-1, keepdims=True)
+    return planes.astype(np.float32)
+
+
+def bounding_sphere(vertices: np.ndarray) -> tuple:
+    """
+    Sphere centred on the axis-aligned bounding box of the vertices that contains all of them. Not the smallest
+    one, but cheap to compute and never more than sqrt(3) times bigger than it
+
+    :param vertices: numpy array (N, 3)
+    :return: tuple (center, radius), numpy array (3,) <float32> and float
+    """
+
+    if vertices is None or vertices.shape[0] == 0:
+        return np.zeros((3,), dtype=np.float32), 0.0
+
+    center = 0.5 * (vertices.min(axis=0) + vertices.max(axis=0))
+    radius = float(np.sqrt(np.max(np.sum((vertices - center) ** 2, axis=-1))))
+    return center.astype(np.float32), radius
+
+
+@njit(parallel=True, cache=True)
+def cull_instances(planes: np.ndarray,
+                   world_matrices: np.ndarray,
+                   center: np.ndarray,
+                   radius: float,
+                   visible_indices_out: np.ndarray) -> int:
+    """
+    Frustum culling of all instances of a mesh, using the mesh's bounding sphere moved by each instance's world
+    matrix and grown by its largest scale. The indices of the instances that survive are packed at the start of
+    "visible_indices_out", in increasing order, so they can be uploaded as they are
+
+    :param planes: numpy array (6, 4) <float32>, see frustum_planes()
+    :param world_matrices: numpy array (N, 4, 4) <float32>, row-major, one per instance
+    :param center: numpy array (3,) <float32>, bounding sphere center in mesh coordinates
+    :param radius: float, bounding sphere radius in mesh coordinates
+    :param visible_indices_out: numpy array (N,) <int32>
+    :return: int, number of visible instances
+    """
+
+    num_instances = world_matrices.shape[0]
+    matrices = world_matrices
+
+    # Instances are tested in parallel, marking the culled ones with -1. There are always 6 planes and no early
+    # exit, so the loop below is unrolled and vectorised, which is several times faster than breaking on the
+    # first plane that culls the instance
+    for instance in prange(num_instances):
+        x = (matrices[instance, 0, 0] * center[0] + matrices[instance, 0, 1] * center[1] +
+             matrices[instance, 0, 2] * center[2] + matrices[instance, 0, 3])
+        y = (matrices[instance, 1, 0] * center[0] + matrices[instance, 1, 1] * center[1] +
+             matrices[instance, 1, 2] * center[2] + matrices[instance, 1, 3])
+        z = (matrices[instance, 2, 0] * center[0] + matrices[instance, 2, 1] * center[1] +
+             matrices[instance, 2, 2] * center[2] + matrices[instance, 2, 3])
+
+        scale_x = matrices[instance, 0, 0] ** 2 + matrices[instance, 1, 0] ** 2 + matrices[instance, 2, 0] ** 2
+        scale_y = matrices[instance, 0, 1] ** 2 + matrices[instance, 1, 1] ** 2 + matrices[instance, 2, 1] ** 2
+        scale_z = matrices[instance, 0, 2] ** 2 + matrices[instance, 1, 2] ** 2 + matrices[instance, 2, 2] ** 2
+        world_radius = radius * np.sqrt(max(scale_x, scale_y, scale_z))
+
+        min_distance = np.inf
+        for plane in range(6):
+            distance = planes[plane, 0] * x + planes[plane, 1] * y + planes[plane, 2] * z + planes[plane, 3]
+            min_distance = min(min_distance, distance)
+        visible_indices_out[instance] = instance if min_distance >= -world_radius else -1
+
+    # ... and the visible ones are then packed at the front. In place, since num_visible never exceeds instance
+    num_visible = 0
+    for instance in range(num_instances):
+        visible = visible_indices_out[instance] >= 0
+        visible_indices_out[num_visible] = instance
+        num_visible += visible
+
+    return num_visible
+
+
+def aabb(vertices: np.ndarray) -> tuple:
+    """
+    Axis-aligned bounding box of the vertices
+
+    :param vertices: numpy array (N, 3)
+    :return: tuple (aabb_min, aabb_max), numpy arrays (3,) <float32>
+    """
+
+    if vertices is None or vertices.shape[0] == 0:
+        return np.zeros((3,), dtype=np.float32), np.zeros((3,), dtype=np.float32)
+
+    return vertices.min(axis=0).astype(np.float32), vertices.max(axis=0).astype(np.float32)
+
+
+def shadow_caster_planes(planes: np.ndarray, light_direction: np.ndarray) -> np.ndarray:
+    """
+    Planes that cull the shadow casters of a directional light for a camera's frustum. An object outside the
+    frustum can still cast a shadow into it, unless moving it along the direction the light travels never brings
+    it inside. So only the planes that face away from the light are kept, and the others are replaced by planes
+    that never cull anything
+
+    :param planes: numpy array (6, 4) <float32>, see frustum_planes()
+    :param light_direction: numpy array (3,), direction the light travels in
+    :return: numpy array (6, 4) <float32>
+    """
+
+    caster_planes = planes.copy()
+    caster_planes[(planes[:, :3] @ light_direction) > 0.0] = (0.0, 0.0, 0.0, np.inf)
+    return caster_planes
+
+
+@njit(parallel=True, cache=True)
+def transform_aabbs(world_matrices: np.ndarray,
+                    rows: np.ndarray,
+                    aabb_min: np.ndarray,
+                    aabb_max: np.ndarray,
+                    world_aabb_min_out: np.ndarray,
+                    world_aabb_max_out: np.ndarray):
+    """
+    World-space AABBs that contain the local AABBs moved by their world matrices (Arvo's method). Objects with
+    no world matrix (row -1) keep their local AABB
+
+    :param world_matrices: numpy array (M, 4, 4) <float32>, row-major
+    :param rows: numpy array (N,) <int>, row in "world_matrices" of each object, or -1
+    :param aabb_min: numpy array (N, 3) <float32>
+    :param aabb_max: numpy array (N, 3) <float32>
+    :param world_aabb_min_out: numpy array (N, 3) <float32>
+    :param world_aabb_max_out: numpy array (N, 3) <float32>
+    :return: None
+    """
+
+    for index in prange(rows.shape[0]):
+        row = rows[index]
+        for axis in range(3):
+            if row < 0:
+                world_aabb_min_out[index, axis] = aabb_min[index, axis]
+                world_aabb_max_out[index, axis] = aabb_max[index, axis]
+                continue
+
+            low = world_matrices[row, axis, 3]
+            high = world_matrices[row, axis, 3]
+            for column in range(3):
+                a = world_matrices[row, axis, column] * aabb_min[index, column]
+                b = world_matrices[row, axis, column] * aabb_max[index, column]
+                low += min(a, b)
+                high += max(a, b)
+            world_aabb_min_out[index, axis] = low
+            world_aabb_max_out[index, axis] = high
+
+
+@njit(parallel=True, cache=True)
+def cull_aabbs(planes: np.ndarray,
+               aabb_min: np.ndarray,
+               aabb_max: np.ndarray,
+               visible_out: np.ndarray) -> int:
+    """
+    Frustum culling of world-space AABBs: a box is culled when its corner furthest along a plane's normal is
+    still outside that plane. Conservative, so boxes near the frustum's edges may be kept
+
+    :param planes: numpy array (6, 4) <float32>, see frustum_planes()
+    :param aabb_min: numpy array (N, 3) <float32>
+    :param aabb_max: numpy array (N, 3) <float32>
+    :param visible_out: numpy array (N,) <bool>
+    :return: int, number of visible boxes
+    """
+
+    # Same as cull_instances(): always 6 planes and no early exit, so the loop is unrolled. The minimum starts as a
+    # float32 too, so the whole test stays in single precision
+    for index in prange(aabb_min.shape[0]):
+        min_distance = np.float32(np.inf)
+        for plane in range(6):
+            x = aabb_max[index, 0] if planes[plane, 0] >= 0.0 else aabb_min[index, 0]
+            y = aabb_max[index, 1] if planes[plane, 1] >= 0.0 else aabb_min[index, 1]
+            z = aabb_max[index, 2] if planes[plane, 2] >= 0.0 else aabb_min[index, 2]
+            distance = planes[plane, 0] * x + planes[plane, 1] * y + planes[plane, 2] * z + planes[plane, 3]
+            min_distance = min(min_distance, distance)
+        visible_out[index] = min_distance >= 0.0
+
+    return np.count_nonzero(visible_out)
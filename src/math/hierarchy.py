@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def build_levels(parent_rows: np.ndarray) -> tuple:
+    """
+    Sorts the nodes of a forest by depth, so that no child comes before its parent and all nodes of the same
+    depth are contiguous
+
+    :param parent_rows: numpy array (N,) with the index of each node's parent, or -1 for roots
+    :return: tuple (level_offsets, level_rows, level_parent_rows), where the nodes at depth "i" are
+             level_rows[level_offsets[i]:level_offsets[i + 1]]
+    """
+
+    depths = compute_depths(parent_rows=parent_rows)
+    level_rows = np.argsort(depths, kind="stable")
+    level_offsets = np.zeros((depths.max(initial=-1) + 2,), dtype=np.int64)
+    np.cumsum(np.bincount(depths), out=level_offsets[1:])
+    return level_offsets, level_rows, parent_rows[level_rows]
+
+
+def compute_depths(parent_rows: np.ndarray) -> np.ndarray:
+    """
+    Computes the depth of every node of a forest using pointer jumping, so only log2(max depth) vectorized
+    passes are needed, however deep the hierarchy is
+
+    :param parent_rows: numpy array (N,) with the index of each node's parent, or -1 for roots
+    :return: numpy array (N,) <int64>, 0 for roots
+    """
+
+    num_nodes = parent_rows.size
+    ancestors = parent_rows.astype(np.int64)
+    depths = (ancestors >= 0).astype(np.int64)
+
+    # Each pass doubles the distance between every node and the ancestor it points to. Once a node points
+    # past its root (-1), its depth is final
+    for _ in range(max(1, num_nodes).bit_length() + 1):
+        has_ancestor = np.flatnonzero(ancestors >= 0)
+        if has_ancestor.size == 0:
+            return depths
+        jumped_ancestors = ancestors[has_ancestor]
+        depths[has_ancestor] += depths[jumped_ancestors]
+        ancestors[has_ancestor] = ancestors[jumped_ancestors]
+
+    raise ValueError("[ERROR] Hierarchy contains a loop")
@@ -1,5 +1,5 @@
 import numpy as np
-from numba import njit, float32
+from numba import njit, float32, prange
 from src.math import mat3
 
 DEG2RAD = np.pi / 180.0
@@ -93,6 +93,49 @@ def create_transform_euler_xyz(position: np.array, rotation: np.array, scale: np
     return transform
 
 
+@njit(parallel=True, cache=True)
+def create_transforms_euler_xyz(positions: np.ndarray, rotations: np.ndarray, scales: np.ndarray,
+                                transforms_out: np.ndarray):
+    """
+    Batched version of create_transform_euler_xyz()
+
+    :param positions: np.ndarray, (N, 3)
+    :param rotations: np.ndarray, (N, 3), euler XYZ angles in radians
+    :param scales: np.ndarray, (N, 3)
+    :param transforms_out: np.ndarray, (N, 4, 4) <float32>
+    :return: None
+    """
+
+    for i in prange(positions.shape[0]):
+
+        cx = np.cos(rotations[i, 0])
+        sx = np.sin(rotations[i, 0])
+        cy = np.cos(rotations[i, 1])
+        sy = np.sin(rotations[i, 1])
+        cz = np.cos(rotations[i, 2])
+        sz = np.sin(rotations[i, 2])
+
+        transforms_out[i, 0, 0] = cy * cz * scales[i, 0]
+        transforms_out[i, 0, 1] = (sx * sy * cz - cx * sz) * scales[i, 1]
+        transforms_out[i, 0, 2] = (cx * sy * cz + sx * sz) * scales[i, 2]
+        transforms_out[i, 0, 3] = positions[i, 0]
+
+        transforms_out[i, 1, 0] = cy * sz * scales[i, 0]
+        transforms_out[i, 1, 1] = (sx * sy * sz + cx * cz) * scales[i, 1]
+        transforms_out[i, 1, 2] = (cx * sy * sz - sx * cz) * scales[i, 2]
+        transforms_out[i, 1, 3] = positions[i, 1]
+
+        transforms_out[i, 2, 0] = -sy * scales[i, 0]
+        transforms_out[i, 2, 1] = sx * cy * scales[i, 1]
+        transforms_out[i, 2, 2] = cx * cy * scales[i, 2]
+        transforms_out[i, 2, 3] = positions[i, 2]
+
+        transforms_out[i, 3, 0] = 0.0
+        transforms_out[i, 3, 1] = 0.0
+        transforms_out[i, 3, 2] = 0.0
+        transforms_out[i, 3, 3] = 1.0
+
+
 @njit(float32[:](float32[:, :]), cache=True)
 def to_euler_xyz(rotation_matrix) -> np.array:
 
@@ -138,6 +181,27 @@ def mul_vectors3(in_mat4: np.ndarray, in_vec3_array: np.ndarray, out_vec3_array:
         #                            in_mat4[j, 2] * in_vec3_array[i, 2] +
         #                            in_mat4[j, 3])
 
+
+@njit(parallel=True, cache=True)
+def mul_mat4s(in_mat4: np.ndarray, in_mat4s: np.ndarray, out_mat4s: np.ndarray):
+    """
+    Same as np.matmul(in_mat4, in_mat4s, out=out_mat4s), but without broadcasting overhead. Each product is written
+    as soon as it is computed, so out_mat4s must not be the same memory as in_mat4s
+
+    :param in_mat4: numpy array (4, 4), left-hand matrix, shared by all products
+    :param in_mat4s: numpy array (N, 4, 4)
+    :param out_mat4s: numpy array (N, 4, 4)
+    :return: None
+    """
+    for k in prange(in_mat4s.shape[0]):
+        for i in range(4):
+            for j in range(4):
+                out_mat4s[k, i, j] = (in_mat4[i, 0] * in_mat4s[k, 0, j] +
+                                      in_mat4[i, 1] * in_mat4s[k, 1, j] +
+                                      in_mat4[i, 2] * in_mat4s[k, 2, j] +
+                                      in_mat4[i, 3] * in_mat4s[k, 3, j])
+
+
 @njit(cache=True)
 def mul_vectors3_rotation_only(in_mat4: np.ndarray, in_vec3_array: np.ndarray, out_vec3_array: np.ndarray):
     for i in range(in_vec3_array.shape[0]):
@@ -157,6 +221,18 @@ def even_faster_inverse(in_mat4: np.ndarray, out_mat4: np.ndarray):
     out_mat4[:3, 3] = -out_mat4[:3, :3] @ in_mat4[:3, 3]
 
 
+def even_faster_inverses(in_mat4s: np.ndarray, out_mat4s: np.ndarray):
+    """
+    Vectorized version of even_faster_inverse for arrays of shape (N, 4, 4). Unlike the single matrix version,
+    the bottom row of every output matrix is also written
+    """
+    rotations_transposed = in_mat4s[:, :3, :3].transpose((0, 2, 1))
+    out_mat4s[:, :3, :3] = rotations_transposed
+    out_mat4s[:, :3, 3] = -np.matmul(rotations_transposed, in_mat4s[:, :3, 3:4])[:, :, 0]
+    out_mat4s[:, 3, :3] = 0.0
+    out_mat4s[:, 3, 3] = 1.0
+
+
 @njit(cache=True)
 def compute_transform_not_so_useful(pos: tuple, rot: tuple, scale: float):
     # TODO: refactor this to simplify scale!
@@ -206,6 +282,49 @@ def matrix_composition(translation_in, rotation_quat_in, scale_in, matrix_out):
     matrix_out[3, :] = np.array([0, 0, 0, 1], dtype=np.float32)
 
 
+@njit(parallel=True, cache=True)
+def matrix_compositions(translations_in, rotation_quats_in, scales_in, matrices_out):
+    """
+    Batched version of matrix_composition()
+
+    :param translations_in: np.ndarray, (N, 3)
+    :param rotation_quats_in: np.ndarray, (N, 4), quaternions as x, y, z, w
+    :param scales_in: np.ndarray, (N, 3)
+    :param matrices_out: np.ndarray, (N, 4, 4) <float32>
+    :return: None
+    """
+
+    for i in prange(translations_in.shape[0]):
+
+        x = rotation_quats_in[i, 0]
+        y = rotation_quats_in[i, 1]
+        z = rotation_quats_in[i, 2]
+        w = rotation_quats_in[i, 3]
+        sx = scales_in[i, 0]
+        sy = scales_in[i, 1]
+        sz = scales_in[i, 2]
+
+        matrices_out[i, 0, 0] = (1 - 2 * (y * y + z * z)) * sx
+        matrices_out[i, 0, 1] = 2 * (x * y - z * w) * sy
+        matrices_out[i, 0, 2] = 2 * (x * z + y * w) * sz
+        matrices_out[i, 0, 3] = translations_in[i, 0]
+
+        matrices_out[i, 1, 0] = 2 * (x * y + z * w) * sx
+        matrices_out[i, 1, 1] = (1 - 2 * (x * x + z * z)) * sy
+        matrices_out[i, 1, 2] = 2 * (y * z - x * w) * sz
+        matrices_out[i, 1, 3] = translations_in[i, 1]
+
+        matrices_out[i, 2, 0] = 2 * (x * z - y * w) * sx
+        matrices_out[i, 2, 1] = 2 * (y * z + x * w) * sy
+        matrices_out[i, 2, 2] = (1 - 2 * (x * x + y * y)) * sz
+        matrices_out[i, 2, 3] = translations_in[i, 2]
+
+        matrices_out[i, 3, 0] = 0.0
+        matrices_out[i, 3, 1] = 0.0
+        matrices_out[i, 3, 2] = 0.0
+        matrices_out[i, 3, 3] = 1.0
+
+
 @njit((float32[:], float32[:], float32[:, :]), cache=True)
 def matrix_composition_no_scale(translation_in, rotation_quat_in, matrix_out):
     """
@@ -263,6 +382,38 @@ def matrix_decomposition(matrix_in, translation_out, rotation_quat_out, scale_ou
     rotation_quat_out[:] = np.array([qx, qy, qz, qw])
 
 
+@njit(parallel=True, cache=True)
+def matrix_decompositions(matrices_in, translations_out, rotation_quats_out, scales_out) -> None:
+    """
+    Batched version of matrix_decomposition()
+
+    :param matrices_in: np.ndarray, (N, 4, 4)
+    :param translations_out: np.ndarray, (N, 3)
+    :param rotation_quats_out: np.ndarray, (N, 4), quaternions as x, y, z, w
+    :param scales_out: np.ndarray, (N, 3)
+    :return: None
+    """
+
+    for i in prange(matrices_in.shape[0]):
+
+        translations_out[i, 0] = matrices_in[i, 0, 3]
+        translations_out[i, 1] = matrices_in[i, 1, 3]
+        translations_out[i, 2] = matrices_in[i, 2, 3]
+
+        sx = np.sqrt(matrices_in[i, 0, 0] ** 2 + matrices_in[i, 1, 0] ** 2 + matrices_in[i, 2, 0] ** 2)
+        sy = np.sqrt(matrices_in[i, 0, 1] ** 2 + matrices_in[i, 1, 1] ** 2 + matrices_in[i, 2, 1] ** 2)
+        sz = np.sqrt(matrices_in[i, 0, 2] ** 2 + matrices_in[i, 1, 2] ** 2 + matrices_in[i, 2, 2] ** 2)
+        scales_out[i, 0] = sx
+        scales_out[i, 1] = sy
+        scales_out[i, 2] = sz
+
+        qw = np.sqrt(1 + matrices_in[i, 0, 0] / sx + matrices_in[i, 1, 1] / sy + matrices_in[i, 2, 2] / sz) / 2
+        rotation_quats_out[i, 0] = (matrices_in[i, 2, 1] / sy - matrices_in[i, 1, 2] / sz) / (4 * qw)
+        rotation_quats_out[i, 1] = (matrices_in[i, 0, 2] / sz - matrices_in[i, 2, 0] / sx) / (4 * qw)
+        rotation_quats_out[i, 2] = (matrices_in[i, 1, 0] / sx - matrices_in[i, 0, 1] / sy) / (4 * qw)
+        rotation_quats_out[i, 3] = qw
+
+
 def create(position: np.array, rotation: mat3):
 
     mat = np.eye(4, dtype=np.float32)
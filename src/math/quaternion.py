@@ -133,3 +133,128 @@ def slerp_quat(quat_a, quat_b, t_value):
         output_quat = (s0 * quat_a) + (s1 * quat_b)
 
     return output_quat
+
+
+def slerp_quats(quats_a: np.ndarray, quats_b: np.ndarray, t_values: np.ndarray) -> np.ndarray:
+
+    """
+    Vectorized version of slerp_quat(), for any number of quaternion pairs at once. Always interpolates along
+    the shortest path
+
+    :param quats_a: numpy array (..., 4)
+    :param quats_b: numpy array (..., 4)
+    :param t_values: numpy array (...,), broadcastable against the quaternions without their last axis
+    :return: numpy array (..., 4) of normalised quaternions
+    """
+
+    dot = np.sum(quats_a * quats_b, axis=-1)
+    quats_b = np.where((dot < 0.0)[..., np.newaxis], -quats_b, quats_b)
+    dot = np.abs(dot)
+
+    # Pairs too close to singularity are linearly interpolated, so their weights are the same as in lerp
+    theta_0 = np.arccos(np.minimum(dot, 1.0))
+    sin_theta_0 = np.sin(theta_0)
+    use_slerp = dot <= SLERP_DOT_THRESHOLD
+    safe_sin_theta_0 = np.where(use_slerp, sin_theta_0, 1.0)
+    theta = theta_0 * t_values
+    s0 = np.where(use_slerp, np.sin(theta_0 - theta) / safe_sin_theta_0, 1.0 - t_values)
+    s1 = np.where(use_slerp, np.sin(theta) / safe_sin_theta_0, t_values)
+
+    output_quats = s0[..., np.newaxis] * quats_a + s1[..., np.newaxis] * quats_b
+    output_quats /= np.linalg.norm(output_quats, axis=-1, keepdims=True)
+    return output_quats
+
+
+def multiply_quats(quats_a: np.ndarray, quats_b: np.ndarray) -> np.ndarray:
+
+    """
+    Vectorized hamilton product "quats_a * quats_b" of quaternions stored as x, y, z, w (same as GLTF)
+
+    :param quats_a: numpy array (..., 4)
+    :param quats_b: numpy array (..., 4), broadcastable against quats_a
+    :return: numpy array (..., 4)
+    """
+
+    ax, ay, az, aw = np.moveaxis(quats_a, -1, 0)
+    bx, by, bz, bw = np.moveaxis(quats_b, -1, 0)
+    return np.stack([aw * bx + ax * bw + ay * bz - az * by,
+                     aw * by - ax * bz + ay * bw + az * bx,
+                     aw * bz + ax * by - ay * bx + az * bw,
+                     aw * bw - ax * bx - ay * by - az * bz], axis=-1)
+
+
+def euler_to_quats(euler_angles: np.ndarray, rotation_orders: list) -> np.ndarray:
+
+    """
+    Converts the euler angles of many bones, each with its own rotation order, to quaternions (x, y, z, w) in one
+    go. Orders are intrinsic, as in BVH files: "zxy" means the rotation Rz @ Rx @ Ry.
+
+    :param euler_angles: numpy array (..., num_bones, 3), angles around X, Y and Z in radians, whatever the order
+    :param rotation_orders: list of str, one per bone (e.g. "zxy"). Anything else (e.g. End Sites) is read as "xyz"
+    :return: numpy array (..., num_bones, 4) <float32>
+    """
+
+    axis_indices = np.array([[ord(axis) - ord("x") for axis in order] if sorted(order) == ["x", "y", "z"]
+                             else [0, 1, 2] for order in rotation_orders], dtype=np.int64)
+    bones = np.arange(axis_indices.shape[0])
+
+    quats = None
+    for step in range(3):
+        half_angles = 0.5 * euler_angles[..., bones, axis_indices[:, step]].astype(np.float64)
+        axis_quats = np.zeros(half_angles.shape + (4,), dtype=np.float64)
+        axis_quats[..., bones, axis_indices[:, step]] = np.sin(half_angles)
+        axis_quats[..., 3] = np.cos(half_angles)
+        quats = axis_quats if quats is None else multiply_quats(quats, axis_quats)
+
+    return quats.astype(np.float32)
+
+
+def conjugate_quats(quats: np.ndarray) -> np.ndarray:
+
+    """
+    Vectorized conjugate (the inverse, for unit quaternions) of quaternions stored as x, y, z, w
+
+    :param quats: numpy array (..., 4)
+    :return: numpy array (..., 4)
+    """
+
+    return quats * np.array([-1.0, -1.0, -1.0, 1.0], dtype=quats.dtype)
+
+
+def quats_to_rotvecs(quats: np.ndarray) -> np.ndarray:
+
+    """
+    Vectorized conversion of unit quaternions (x, y, z, w) to rotation vectors (axis * angle), with angles in
+    [0, pi], as scipy's Rotation.as_rotvec()
+
+    :param quats: numpy array (..., 4)
+    :return: numpy array (..., 3)
+    """
+
+    quats = np.where(quats[..., 3:] < 0.0, -quats, quats)
+    sin_half_angles = np.linalg.norm(quats[..., :3], axis=-1)
+    angles = 2.0 * np.arctan2(sin_half_angles, quats[..., 3])
+
+    # Taylor expansion of angle / sin(angle / 2) around 0
+    small = angles <= 1e-3
+    safe_sin_half_angles = np.where(small, 1.0, sin_half_angles)
+    scales = np.where(small, 2.0 + angles ** 2 / 12.0 + 7.0 * angles ** 4 / 2880.0, angles / safe_sin_half_angles)
+    return quats[..., :3] * scales[..., np.newaxis]
+
+
+def rotvecs_to_quats(rotvecs: np.ndarray) -> np.ndarray:
+
+    """
+    Vectorized conversion of rotation vectors (axis * angle) to unit quaternions (x, y, z, w)
+
+    :param rotvecs: numpy array (..., 3)
+    :return: numpy array (..., 4)
+    """
+
+    angles = np.linalg.norm(rotvecs, axis=-1)
+
+    # Taylor expansion of sin(angle / 2) / angle around 0
+    small = angles <= 1e-3
+    safe_angles = np.where(small, 1.0, angles)
+    scales = np.where(small, 0.5 - angles ** 2 / 48.0 + angles ** 4 / 3840.0, np.sin(0.5 * angles) / safe_angles)
+    return np.concatenate([rotvecs * scales[..., np.newaxis], np.cos(0.5 * angles)[..., np.newaxis]], axis=-1)
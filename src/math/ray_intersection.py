@@ -208,6 +208,54 @@ def ray_cylinder_intersection(ray_origin: np.array,
 
     return False
 
+# ======================================================================================================================
+#                                                Ray / Triangle
+# ======================================================================================================================
+
+
+@njit(cache=True)
+def intersect_ray_triangle(ray_origin: np.array,
+                           ray_direction: np.array,
+                           vertex_0: np.array,
+                           vertex_1: np.array,
+                           vertex_2: np.array) -> tuple:
+    """
+    Moller-Trumbore intersection, for both sides of the triangle. See bvh.intersect_rays_triangle_bvh() to test
+    many rays against a whole mesh
+
+    :param ray_origin: Numpy array (3,)
+    :param ray_direction: Numpy array (3,)
+    :param vertex_0: Numpy array (3,)
+    :param vertex_1: Numpy array (3,)
+    :param vertex_2: Numpy array (3,)
+    :return: tuple (distance, u, v), where (u, v) are the barycentric weights of vertices 1 and 2. Distance is
+             -1 if the ray misses the triangle
+    """
+
+    edge_1 = vertex_1 - vertex_0
+    edge_2 = vertex_2 - vertex_0
+    p = np.cross(ray_direction, edge_2)
+    determinant = np.dot(edge_1, p)
+    if abs(determinant) < 1e-12:
+        return -1.0, 0.0, 0.0
+
+    s = ray_origin - vertex_0
+    u = np.dot(s, p) / determinant
+    if u < 0.0 or u > 1.0:
+        return -1.0, 0.0, 0.0
+
+    q = np.cross(s, edge_1)
+    v = np.dot(ray_direction, q) / determinant
+    if v < 0.0 or u + v > 1.0:
+        return -1.0, 0.0, 0.0
+
+    distance = np.dot(edge_2, q) / determinant
+    if distance < 0.0:
+        return -1.0, 0.0, 0.0
+
+    return distance, u, v
+
+
 # ======================================================================================================================
 #                                                Ray / Plane
 # ======================================================================================================================
@@ -0,0 +1,183 @@
+import numpy as np
+from numba import njit, prange
+
+from src.math.hierarchy import build_levels
+
+# Placeholder for the skinning arrays when skinning matrices are not needed
+_NO_MATRICES = np.empty((0, 4, 4), dtype=np.float32)
+
+# Root matrix shared by all instances when none are given
+_IDENTITY_ROOT_MATRICES = np.eye(4, dtype=np.float32)[np.newaxis]
+
+
+class SkeletonPose:
+
+    """
+    Evaluates the world matrices of a skeleton (and its skinning matrices, world @ inverse_bind) from the local
+    translation, rotation and scale of each bone. The parent-before-child bone order is computed only once, when the
+    pose is created, so evaluating a pose is a single numba call that composes and chains all matrices without any
+    python in the loop. Many instances of the same skeleton (e.g. a crowd of characters) can be evaluated in the
+    same call, in parallel.
+
+    Bone arrays are always indexed by bone, never by evaluation order, so they can be passed as they come from
+    the resource (or the animation sampler).
+    """
+
+    __slots__ = [
+        "parent_indices",
+        "bone_order",
+        "inverse_bind_matrices",
+        "num_bones"]
+
+    def __init__(self, parent_indices: np.ndarray, inverse_bind_matrices=None):
+        """
+        :param parent_indices: numpy array (num_bones,) with the index of each bone's parent, or -1 for roots
+        :param inverse_bind_matrices: numpy array (num_bones, 4, 4), row-major. If None, skinning matrices can't
+                                      be evaluated
+        """
+
+        self.parent_indices = np.ascontiguousarray(parent_indices, dtype=np.int32)
+        self.num_bones = self.parent_indices.size
+
+        _, level_rows, _ = build_levels(parent_rows=self.parent_indices)
+        self.bone_order = level_rows.astype(np.int32)
+
+        self.inverse_bind_matrices = None
+        if inverse_bind_matrices is not None:
+            self.inverse_bind_matrices = np.ascontiguousarray(inverse_bind_matrices, dtype=np.float32)
+
+    def evaluate(self,
+                 translations: np.ndarray,
+                 rotations: np.ndarray,
+                 scales: np.ndarray,
+                 world_matrices_out: np.ndarray,
+                 root_matrices=None,
+                 skinning_matrices_out=None):
+        """
+        Evaluates one instance, with inputs of shape (num_bones, ...), or many, with inputs of shape
+        (num_instances, num_bones, ...). All arrays must be float32.
+
+        :param translations: numpy array ([num_instances,] num_bones, 3)
+        :param rotations: numpy array ([num_instances,] num_bones, 4), quaternions as x, y, z, w
+        :param scales: numpy array ([num_instances,] num_bones, 3)
+        :param world_matrices_out: numpy array ([num_instances,] num_bones, 4, 4)
+        :param root_matrices: numpy array ([num_instances,] 4, 4), parent of all root bones. Identity if None
+        :param skinning_matrices_out: numpy array ([num_instances,] num_bones, 4, 4), optional
+        :return: None
+        """
+
+        single = translations.ndim == 2
+        if single:
+            translations = translations[np.newaxis]
+            rotations = rotations[np.newaxis]
+            scales = scales[np.newaxis]
+            world_matrices_out = world_matrices_out[np.newaxis]
+            if root_matrices is not None:
+                root_matrices = root_matrices[np.newaxis]
+            if skinning_matrices_out is not None:
+                skinning_matrices_out = skinning_matrices_out[np.newaxis]
+
+        if root_matrices is None:
+            root_matrices = _IDENTITY_ROOT_MATRICES
+
+        compute_skinning = skinning_matrices_out is not None
+        if compute_skinning and self.inverse_bind_matrices is None:
+            raise ValueError("[ERROR] Skinning matrices requested, but no inverse bind matrices were provided")
+
+        evaluate_poses(self.bone_order,
+                       self.parent_indices,
+                       translations,
+                       rotations,
+                       scales,
+                       root_matrices,
+                       self.inverse_bind_matrices if compute_skinning else _NO_MATRICES,
+                       world_matrices_out,
+                       skinning_matrices_out if compute_skinning else _NO_MATRICES[np.newaxis],
+                       compute_skinning)
+
+
+@njit(parallel=True, cache=True)
+def evaluate_poses(bone_order, parent_indices, translations, rotations, scales, root_matrices,
+                   inverse_bind_matrices, world_matrices_out, skinning_matrices_out, compute_skinning):
+    """
+    For every instance, composes each bone's local matrix from its TRS and multiplies it by its parent's world
+    matrix (or the instance's root matrix), following "bone_order" so parents are always ready before their
+    children. Instances are processed in parallel. All matrices are assumed to be affine (last row 0, 0, 0, 1)
+
+    :param bone_order: numpy array (num_bones,) <int32>, parents before children
+    :param parent_indices: numpy array (num_bones,) <int32>, -1 for roots
+    :param translations: numpy array (num_instances, num_bones, 3)
+    :param rotations: numpy array (num_instances, num_bones, 4), quaternions as x, y, z, w
+    :param scales: numpy array (num_instances, num_bones, 3)
+    :param root_matrices: numpy array (num_instances, 4, 4), or (1, 4, 4) to share one root among all instances
+    :param inverse_bind_matrices: numpy array (num_bones, 4, 4), ignored unless compute_skinning is TRUE
+    :param world_matrices_out: numpy array (num_instances, num_bones, 4, 4)
+    :param skinning_matrices_out: numpy array (num_instances, num_bones, 4, 4), ignored unless compute_skinning is
+                                  TRUE
+    :param compute_skinning: bool
+    :return: None
+    """
+
+    shared_root = root_matrices.shape[0] == 1
+    for instance in prange(translations.shape[0]):
+
+        local = np.empty((3, 4), dtype=np.float32)
+        world = world_matrices_out[instance]
+        root = root_matrices[0] if shared_root else root_matrices[instance]
+
+        for bone in bone_order:
+
+            # Local matrix (rotation * scale, translation)
+            x = rotations[instance, bone, 0]
+            y = rotations[instance, bone, 1]
+            z = rotations[instance, bone, 2]
+            w = rotations[instance, bone, 3]
+            sx = scales[instance, bone, 0]
+            sy = scales[instance, bone, 1]
+            sz = scales[instance, bone, 2]
+
+            local[0, 0] = (1 - 2 * (y * y + z * z)) * sx
+            local[0, 1] = 2 * (x * y - z * w) * sy
+            local[0, 2] = 2 * (x * z + y * w) * sz
+            local[0, 3] = translations[instance, bone, 0]
+            local[1, 0] = 2 * (x * y + z * w) * sx
+            local[1, 1] = (1 - 2 * (x * x + z * z)) * sy
+            local[1, 2] = 2 * (y * z - x * w) * sz
+            local[1, 3] = translations[instance, bone, 1]
+            local[2, 0] = 2 * (x * z - y * w) * sx
+            local[2, 1] = 2 * (y * z + x * w) * sy
+            local[2, 2] = (1 - 2 * (x * x + y * y)) * sz
+            local[2, 3] = translations[instance, bone, 2]
+
+            # World matrix
+            parent_index = parent_indices[bone]
+            parent = root if parent_index < 0 else world[parent_index]
+            for i in range(3):
+                p0 = parent[i, 0]
+                p1 = parent[i, 1]
+                p2 = parent[i, 2]
+                for j in range(4):
+                    world[bone, i, j] = p0 * local[0, j] + p1 * local[1, j] + p2 * local[2, j]
+                world[bone, i, 3] += parent[i, 3]
+            world[bone, 3, 0] = 0.0
+            world[bone, 3, 1] = 0.0
+            world[bone, 3, 2] = 0.0
+            world[bone, 3, 3] = 1.0
+
+            if not compute_skinning:
+                continue
+
+            # Skinning matrix
+            inverse_bind = inverse_bind_matrices[bone]
+            skinning = skinning_matrices_out[instance, bone]
+            for i in range(3):
+                w0 = world[bone, i, 0]
+                w1 = world[bone, i, 1]
+                w2 = world[bone, i, 2]
+                for j in range(4):
+                    skinning[i, j] = w0 * inverse_bind[0, j] + w1 * inverse_bind[1, j] + w2 * inverse_bind[2, j]
+                skinning[i, 3] += world[bone, i, 3]
+            skinning[3, 0] = 0.0
+            skinning[3, 1] = 0.0
+            skinning[3, 2] = 0.0
+            skinning[3, 3] = 1.0
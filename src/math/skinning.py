@@ -0,0 +1,111 @@
+import numpy as np
+from numba import njit, prange
+
+from src.core import constants
+
+# Placeholder for the normals when only vertices are skinned
+_NO_NORMALS = np.empty((0, 3), dtype=np.float32)
+
+
+def skin_mesh(vertices: np.ndarray,
+              joints: np.ndarray,
+              weights: np.ndarray,
+              skinning_matrices: np.ndarray,
+              normals=None,
+              vertices_out=None,
+              normals_out=None,
+              chunk_size=constants.SKINNING_CPU_CHUNK_SIZE) -> tuple:
+    """
+    Linear blend skinning on the CPU. Produces the same vertices as the forward pass shader does on the GPU, so
+    it can be used for headless baking, CPU-side queries (e.g. picking against the animated mesh) and tests.
+
+    :param vertices: numpy array (N, 3) <float32>
+    :param joints: numpy array (N, 4), indices into skinning_matrices
+    :param weights: numpy array (N, 4) <float32>
+    :param skinning_matrices: numpy array (num_bones, 4, 4) <float32>, world @ inverse_bind of every bone
+    :param normals: numpy array (N, 3) <float32>, optional
+    :param vertices_out: numpy array (N, 3) <float32>, allocated if None
+    :param normals_out: numpy array (N, 3) <float32>, allocated if None and normals are provided
+    :param chunk_size: int, number of vertices processed by each parallel task
+    :return: tuple (vertices_out, normals_out), where normals_out is None if no normals were provided
+    """
+
+    if vertices_out is None:
+        vertices_out = np.empty_like(vertices, dtype=np.float32)
+
+    if normals is None:
+        skin_vertices(vertices, _NO_NORMALS, joints, weights, skinning_matrices, vertices_out, _NO_NORMALS,
+                      chunk_size)
+        return vertices_out, None
+
+    if normals_out is None:
+        normals_out = np.empty_like(normals, dtype=np.float32)
+    skin_vertices(vertices, normals, joints, weights, skinning_matrices, vertices_out, normals_out, chunk_size)
+    return vertices_out, normals_out
+
+
+@njit(parallel=True, cache=True)
+def skin_vertices(vertices, normals, joints, weights, skinning_matrices, vertices_out, normals_out, chunk_size):
+    """
+    Blends the (affine) skinning matrices of the up-to-4 joints of each vertex and applies the result to the
+    vertex and, if "normals" is not empty, to its normal. Vertices are split into chunks processed in parallel and
+    each blended matrix only lives in local variables, so no memory is used beyond the outputs, whatever the
+    size of the mesh
+
+    :return: None
+    """
+
+    num_vertices = vertices.shape[0]
+    skin_normals = normals.shape[0] > 0
+    num_chunks = (num_vertices + chunk_size - 1) // chunk_size
+
+    for chunk in prange(num_chunks):
+        for vertex in range(chunk * chunk_size, min((chunk + 1) * chunk_size, num_vertices)):
+
+            m00 = m01 = m02 = m03 = 0.0
+            m10 = m11 = m12 = m13 = 0.0
+            m20 = m21 = m22 = m23 = 0.0
+            for influence in range(4):
+                weight = weights[vertex, influence]
+                if weight == 0.0:
+                    continue
+                matrix = skinning_matrices[joints[vertex, influence]]
+                m00 += weight * matrix[0, 0]
+                m01 += weight * matrix[0, 1]
+                m02 += weight * matrix[0, 2]
+                m03 += weight * matrix[0, 3]
+                m10 += weight * matrix[1, 0]
+                m11 += weight * matrix[1, 1]
+                m12 += weight * matrix[1, 2]
+                m13 += weight * matrix[1, 3]
+                m20 += weight * matrix[2, 0]
+                m21 += weight * matrix[2, 1]
+                m22 += weight * matrix[2, 2]
+                m23 += weight * matrix[2, 3]
+
+            x = vertices[vertex, 0]
+            y = vertices[vertex, 1]
+            z = vertices[vertex, 2]
+            vertices_out[vertex, 0] = m00 * x + m01 * y + m02 * z + m03
+            vertices_out[vertex, 1] = m10 * x + m11 * y + m12 * z + m13
+            vertices_out[vertex, 2] = m20 * x + m21 * y + m22 * z + m23
+
+            if not skin_normals:
+                continue
+
+            # Blended rotation/scale part, re-normalised. Matches the shader's inverse-transpose for rotations and
+            # uniform scales
+            x = normals[vertex, 0]
+            y = normals[vertex, 1]
+            z = normals[vertex, 2]
+            nx = m00 * x + m01 * y + m02 * z
+            ny = m10 * x + m11 * y + m12 * z
+            nz = m20 * x + m21 * y + m22 * z
+            norm = np.sqrt(nx * nx + ny * ny + nz * nz)
+            if norm > 0.0:
+                nx /= norm
+                ny /= norm
+                nz /= norm
+            normals_out[vertex, 0] = nx
+            normals_out[vertex, 1] = ny
+            normals_out[vertex, 2] = nz
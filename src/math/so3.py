@@ -1,7 +1,9 @@
 
 import numpy as np
 from scipy.spatial.transform import Rotation as R
-from scipy.spatial.transform import RotationSpline
+
+from src.math.quaternion import quats_to_rotvecs, rotvecs_to_quats
+from src.math.so3_interpolation import interpolate_spline
 
 
 def rot2aa_numpy(rotation_matrices):
@@ -95,19 +97,18 @@ def rot2euler_numpy(rotation_matrices, degrees=False):
 def interpolate_rotations(rotations, ts_in, ts_out):
     """
     Interpolate rotations given at timestamps `ts_in` to timestamps given at `ts_out`. This performs the equivalent
-    of cubic interpolation in SO(3).
+    of cubic interpolation in SO(3), the same as scipy's RotationSpline, for all joints at once
+    (see so3_interpolation.interpolate_spline()).
     :param rotations: A numpy array of rotations of shape (F, N, 3), i.e. rotation vectors.
     :param ts_in: Timestamps corresponding to the given rotations, len(ts_in) == F
     :param ts_out: The desired output timestamps.
     :return: A numpy array of shape (len(ts_out), N, 3).
     """
-    out = []
-    for j in range(rotations.shape[1]):
-        rs = R.from_rotvec(rotations[:, j])
-        spline = RotationSpline(ts_in, rs)
-        rs_interp = spline(ts_out).as_rotvec()
-        out.append(rs_interp[:, np.newaxis])
-    return np.concatenate(out, axis=1)
+    quats = interpolate_spline(quats=rotvecs_to_quats(np.asarray(rotations, dtype=np.float64)),
+                               ts_in=ts_in,
+                               ts_out=ts_out,
+                               dtype=np.float64)
+    return quats_to_rotvecs(quats)
 
 
 def resample_rotations(rotations, fps_in, fps_out):
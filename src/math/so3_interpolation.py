@@ -0,0 +1,346 @@
+import numpy as np
+from numba import njit, prange
+
+from src.math.quaternion import (conjugate_quats, multiply_quats, quats_to_rotvecs, rotvecs_to_quats,
+                                 slerp_quats)
+
+# Fixed-point iterations used to solve for the spline's angular rates, as in scipy's RotationSpline
+SPLINE_MAX_ITERATIONS = 10
+SPLINE_TOLERANCE = 1e-9
+SMALL_ANGLE = 1e-4  # Below this, the series expansions of the spline's coefficients are used
+
+
+def interpolate_slerp(quats: np.ndarray, ts_in: np.ndarray, ts_out: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    :param quats: numpy array (F, N, 4), rotations of N tracks at the F times in "ts_in"
+    :param ts_in: numpy array (F,), strictly increasing
+    :param ts_out: numpy array (T,), clamped to [ts_in[0], ts_in[-1]]
+    :param dtype: numpy dtype of the output
+    :return: numpy array (T, N, 4)
+    """
+
+    quats, ts_in = check_input(quats=quats, ts_in=ts_in)
+    segments, alphas = find_segments(ts_in=ts_in, ts_out=ts_out)
+    return slerp_quats(quats[segments], quats[segments + 1], alphas[:, np.newaxis]).astype(dtype)
+
+
+def interpolate_squad(quats: np.ndarray, ts_in: np.ndarray, ts_out: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    Spherical quadrangle interpolation (Shoemake). Each keyframe gets an inner control quaternion computed from its
+    neighbours, so the curve's tangent is continuous at keyframes (exactly so for uniform timestamps)
+
+    :param quats: numpy array (F, N, 4), rotations of N tracks at the F times in "ts_in"
+    :param ts_in: numpy array (F,), strictly increasing
+    :param ts_out: numpy array (T,), clamped to [ts_in[0], ts_in[-1]]
+    :param dtype: numpy dtype of the output
+    :return: numpy array (T, N, 4)
+    """
+
+    quats, ts_in = check_input(quats=quats, ts_in=ts_in)
+    quats = make_continuous(quats=quats)
+
+    # s_i = q_i * exp(-(log(q_i^-1 q_i+1) + log(q_i^-1 q_i-1)) / 4), where log(q) is half of q's rotation vector
+    inverses = conjugate_quats(quats[1:-1])
+    next_rotvecs = quats_to_rotvecs(multiply_quats(inverses, quats[2:]))
+    previous_rotvecs = quats_to_rotvecs(multiply_quats(inverses, quats[:-2]))
+    controls = quats.copy()
+    controls[1:-1] = multiply_quats(quats[1:-1], rotvecs_to_quats(-0.5 * (next_rotvecs + previous_rotvecs)))
+
+    segments, alphas = find_segments(ts_in=ts_in, ts_out=ts_out)
+    alphas = alphas[:, np.newaxis]
+    outer = slerp_quats(quats[segments], quats[segments + 1], alphas)
+    inner = slerp_quats(controls[segments], controls[segments + 1], alphas)
+    return slerp_quats(outer, inner, 2.0 * alphas * (1.0 - alphas)).astype(dtype)
+
+
+def interpolate_spline(quats: np.ndarray, ts_in: np.ndarray, ts_out: np.ndarray, dtype=np.float32) -> np.ndarray:
+    """
+    Cubic spline in SO(3) with continuous angular rate and acceleration, the same as scipy's RotationSpline
+    builds for a single track. Each segment is "q_i * exp(p_i(t - t_i))", where p_i is a cubic polynomial in
+    rotation vector space. Times outside [ts_in[0], ts_in[-1]] extrapolate the first or last segment, as scipy does
+
+    :param quats: numpy array (F, N, 4), rotations of N tracks at the F times in "ts_in"
+    :param ts_in: numpy array (F,), strictly increasing
+    :param ts_out: numpy array (T,)
+    :param dtype: numpy dtype of the output
+    :return: numpy array (T, N, 4)
+    """
+
+    quats, ts_in = check_input(quats=quats, ts_in=ts_in)
+    durations = np.diff(ts_in)
+
+    rotvecs = quats_to_rotvecs(multiply_quats(conjugate_quats(quats[:-1]), quats[1:]))
+    angular_rates = np.empty_like(rotvecs)
+    rotvecs_dot = np.empty_like(rotvecs)
+    solve_spline_rates(durations, rotvecs, angular_rates, rotvecs_dot)
+
+    # Polynomial coefficients of each segment, highest degree first (the constant term is always 0)
+    dt = durations[:, np.newaxis, np.newaxis]
+    coefficients_3 = (-2.0 * rotvecs + dt * angular_rates + dt * rotvecs_dot) / dt ** 3
+    coefficients_2 = (3.0 * rotvecs - 2.0 * dt * angular_rates - dt * rotvecs_dot) / dt ** 2
+
+    ts_out = np.asarray(ts_out, dtype=np.float64)
+    segments = np.clip(np.searchsorted(ts_in, ts_out, side="right") - 1, 0, durations.size - 1)
+    taus = (ts_out - ts_in[segments])[:, np.newaxis, np.newaxis]
+    segment_rotvecs = ((coefficients_3[segments] * taus + coefficients_2[segments]) * taus
+                       + angular_rates[segments]) * taus
+
+    return multiply_quats(quats[segments], rotvecs_to_quats(segment_rotvecs)).astype(dtype)
+
+
+def check_input(quats: np.ndarray, ts_in: np.ndarray) -> tuple:
+
+    quats = np.asarray(quats, dtype=np.float64)
+    ts_in = np.asarray(ts_in, dtype=np.float64)
+    if quats.ndim != 3 or quats.shape[-1] != 4:
+        raise ValueError(f"[ERROR] Rotations must be an (F, N, 4) array of quaternions, got shape {quats.shape}")
+    if ts_in.shape != (quats.shape[0],):
+        raise ValueError(f"[ERROR] Expected {quats.shape[0]} input timestamps, got {ts_in.size}")
+    if quats.shape[0] < 2:
+        raise ValueError("[ERROR] At least 2 rotations are needed to interpolate")
+    if np.any(np.diff(ts_in) <= 0.0):
+        raise ValueError("[ERROR] Input timestamps must be strictly increasing")
+
+    return quats / np.linalg.norm(quats, axis=-1, keepdims=True), ts_in
+
+
+def find_segments(ts_in: np.ndarray, ts_out: np.ndarray) -> tuple:
+    """
+    :return: tuple (segments, alphas), the index of the segment [ts_in[i], ts_in[i + 1]] of each output time, and
+             the time's position in it, in [0, 1]
+    """
+
+    ts_out = np.clip(np.asarray(ts_out, dtype=np.float64), ts_in[0], ts_in[-1])
+    segments = np.clip(np.searchsorted(ts_in, ts_out, side="right") - 1, 0, ts_in.size - 2)
+    alphas = (ts_out - ts_in[segments]) / (ts_in[segments + 1] - ts_in[segments])
+    return segments, alphas
+
+
+def make_continuous(quats: np.ndarray) -> np.ndarray:
+
+    # Flips quaternions so that consecutive ones are in the same hemisphere
+    flips = np.sum(quats[1:] * quats[:-1], axis=-1) < 0.0
+    signs = np.ones(quats.shape[:-1], dtype=quats.dtype)
+    signs[1:] = np.where(np.cumsum(flips, axis=0) % 2 == 1, -1.0, 1.0)
+    return quats * signs[..., np.newaxis]
+
+
+# =============================================================================
+#                               Numba kernels
+# =============================================================================
+
+
+@njit(parallel=True, cache=True)
+def solve_spline_rates(durations, rotvecs, angular_rates_out, rotvecs_dot_out):
+    """
+    Solves, for every track in parallel, the angular rates at the keyframes that make the spline's angular
+    acceleration continuous. The system is block-tridiagonal (3x3 blocks) and slightly non-linear, so it is solved
+    with a few fixed-point iterations of the block Thomas algorithm. The elimination of the blocks doesn't change
+    between iterations and is only done once
+
+    :param durations: numpy array (S,), duration of each segment
+    :param rotvecs: numpy array (S, N, 3), rotation vector from the start to the end of each segment
+    :param angular_rates_out: numpy array (S, N, 3), angular rate at the start of each segment
+    :param rotvecs_dot_out: numpy array (S, N, 3), derivative of the rotation vector at the end of each segment
+    :return: None
+    """
+
+    num_segments = rotvecs.shape[0]
+    num_unknowns = num_segments - 1  # Angular rates at the inner keyframes
+
+    for track in prange(rotvecs.shape[1]):
+
+        # Per-track buffers, so the inner loops below don't allocate anything
+        track_rotvecs = np.ascontiguousarray(rotvecs[:, track, :])
+        rates = np.empty((num_segments, 3))
+        rate_matrices = np.empty((num_segments, 3, 3))
+        inverse_rate_matrices = np.empty((num_segments, 3, 3))
+        nonlinear_coefficients = np.empty((num_segments, 3))
+        eliminated = np.empty((num_unknowns, 3, 3))
+        upper = np.empty((num_unknowns, 3, 3))
+        constants = np.empty((num_unknowns, 3))
+        solution = np.empty((num_unknowns, 3))
+        diagonal = np.empty((3, 3))
+        rotvec_dot = np.empty(3)
+        right_hand_side = np.empty(3)
+        product = np.empty(3)
+
+        for segment in range(num_segments):
+            for axis in range(3):
+                rates[segment, axis] = track_rotvecs[segment, axis] / durations[segment]
+            rate_to_rotvec_dot_matrix(track_rotvecs[segment], rate_matrices[segment])
+            rotvec_dot_to_rate_matrix(track_rotvecs[segment], inverse_rate_matrices[segment])
+            nonlinear_term_coefficients(track_rotvecs[segment], nonlinear_coefficients[segment])
+
+        # Row "i" of the system has the blocks L_i = 2 * inverse_rate_matrices[i] / durations[i] (left of the
+        # diagonal), d_i * I (diagonal) and U_i = 2 * rate_matrices[i + 1] / durations[i + 1] (right of it).
+        # Forward elimination: "eliminated" holds the inverse of each modified diagonal block, and "upper" the
+        # modified upper blocks
+        for row in range(num_unknowns):
+            diagonal[:] = 0.0
+            if row > 0:
+                mat3_mul_mat3(inverse_rate_matrices[row], upper[row - 1], diagonal)
+                diagonal *= -2.0 / durations[row]
+            for axis in range(3):
+                diagonal[axis, axis] += 4.0 * (1.0 / durations[row] + 1.0 / durations[row + 1])
+            invert_3x3(diagonal, eliminated[row])
+            if row < num_unknowns - 1:
+                mat3_mul_mat3(eliminated[row], rate_matrices[row + 1], upper[row])
+                upper[row] *= 2.0 / durations[row + 1]
+
+        for row in range(num_unknowns):
+            for axis in range(3):
+                constants[row, axis] = 6.0 * (track_rotvecs[row, axis] / durations[row] ** 2
+                                              + track_rotvecs[row + 1, axis] / durations[row + 1] ** 2)
+        if num_unknowns > 0:
+            mat3_mul_vec3(inverse_rate_matrices[0], rates[0], product)
+            constants[0] -= 2.0 / durations[0] * product
+            last = num_segments - 1
+            mat3_mul_vec3(rate_matrices[last], rates[last], product)
+            constants[num_unknowns - 1] -= 2.0 / durations[last] * product
+
+        first_rate = rates[0].copy()
+        for iteration in range(SPLINE_MAX_ITERATIONS if num_unknowns > 0 else 0):
+
+            for row in range(num_unknowns):
+                mat3_mul_vec3(rate_matrices[row], rates[row], rotvec_dot)
+                angular_acceleration_nonlinear_term(track_rotvecs[row], rotvec_dot, nonlinear_coefficients[row],
+                                                    product)
+                for axis in range(3):
+                    right_hand_side[axis] = constants[row, axis] - product[axis]
+                if row > 0:
+                    mat3_mul_vec3(inverse_rate_matrices[row], solution[row - 1], product)
+                    for axis in range(3):
+                        right_hand_side[axis] -= 2.0 / durations[row] * product[axis]
+                mat3_mul_vec3(eliminated[row], right_hand_side, solution[row])
+            for row in range(num_unknowns - 2, -1, -1):
+                mat3_mul_vec3(upper[row], solution[row + 1], product)
+                for axis in range(3):
+                    solution[row, axis] -= product[axis]
+
+            converged = True
+            for row in range(num_unknowns):
+                for axis in range(3):
+                    if abs(solution[row, axis] - rates[row, axis]) >= \
+                            SPLINE_TOLERANCE * (1.0 + abs(solution[row, axis])):
+                        converged = False
+                    rates[row, axis] = solution[row, axis]
+            if converged:
+                break
+
+        for segment in range(num_segments):
+            mat3_mul_vec3(rate_matrices[segment], rates[segment], product)
+            for axis in range(3):
+                rotvecs_dot_out[segment, track, axis] = product[axis]
+                angular_rates_out[segment, track, axis] = first_rate[axis] if segment == 0 \
+                    else rates[segment - 1, axis]
+
+
+@njit(cache=True)
+def cross_product_terms(rotvec, matrix_out, skew_weight, skew_squared_weight):
+
+    # matrix_out = I + skew_weight * [r]x + skew_squared_weight * [r]x^2
+    x, y, z = rotvec[0], rotvec[1], rotvec[2]
+    matrix_out[0, 0] = 1.0 - skew_squared_weight * (y * y + z * z)
+    matrix_out[1, 1] = 1.0 - skew_squared_weight * (x * x + z * z)
+    matrix_out[2, 2] = 1.0 - skew_squared_weight * (x * x + y * y)
+    matrix_out[0, 1] = -skew_weight * z + skew_squared_weight * x * y
+    matrix_out[1, 0] = skew_weight * z + skew_squared_weight * x * y
+    matrix_out[0, 2] = skew_weight * y + skew_squared_weight * x * z
+    matrix_out[2, 0] = -skew_weight * y + skew_squared_weight * x * z
+    matrix_out[1, 2] = -skew_weight * x + skew_squared_weight * y * z
+    matrix_out[2, 1] = skew_weight * x + skew_squared_weight * y * z
+
+
+@njit(cache=True)
+def rate_to_rotvec_dot_matrix(rotvec, matrix_out):
+
+    angle = np.sqrt(rotvec[0] ** 2 + rotvec[1] ** 2 + rotvec[2] ** 2)
+    if angle > SMALL_ANGLE:
+        k = (1.0 - 0.5 * angle / np.tan(0.5 * angle)) / angle ** 2
+    else:
+        k = 1.0 / 12.0 + angle ** 2 / 720.0
+    cross_product_terms(rotvec, matrix_out, 0.5, k)
+
+
+@njit(cache=True)
+def rotvec_dot_to_rate_matrix(rotvec, matrix_out):
+
+    angle = np.sqrt(rotvec[0] ** 2 + rotvec[1] ** 2 + rotvec[2] ** 2)
+    if angle > SMALL_ANGLE:
+        k1 = (1.0 - np.cos(angle)) / angle ** 2
+        k2 = (angle - np.sin(angle)) / angle ** 3
+    else:
+        k1 = 0.5 - angle ** 2 / 24.0
+        k2 = 1.0 / 6.0 - angle ** 2 / 120.0
+    cross_product_terms(rotvec, matrix_out, -k1, k2)
+
+
+@njit(cache=True)
+def nonlinear_term_coefficients(rotvec, coefficients_out):
+
+    angle = np.sqrt(rotvec[0] ** 2 + rotvec[1] ** 2 + rotvec[2] ** 2)
+    if angle > SMALL_ANGLE:
+        coefficients_out[0] = (-angle * np.sin(angle) - 2.0 * (np.cos(angle) - 1.0)) / angle ** 4
+        coefficients_out[1] = (-2.0 * angle + 3.0 * np.sin(angle) - angle * np.cos(angle)) / angle ** 5
+        coefficients_out[2] = (angle - np.sin(angle)) / angle ** 3
+    else:
+        coefficients_out[0] = 1.0 / 12.0 - angle ** 2 / 180.0
+        coefficients_out[1] = -1.0 / 60.0 + angle ** 2 / 12604.0
+        coefficients_out[2] = 1.0 / 6.0 - angle ** 2 / 120.0
+
+
+@njit(cache=True)
+def angular_acceleration_nonlinear_term(rotvec, rotvec_dot, coefficients, term_out):
+
+    # Coefficients only depend on the rotation vector, see nonlinear_term_coefficients()
+    k1, k2, k3 = coefficients[0], coefficients[1], coefficients[2]
+    x, y, z = rotvec[0], rotvec[1], rotvec[2]
+    dx, dy, dz = rotvec_dot[0], rotvec_dot[1], rotvec_dot[2]
+    dot_product = x * dx + y * dy + z * dz
+
+    # c = r x r_dot, then r x c and r_dot x c
+    cx = y * dz - z * dy
+    cy = z * dx - x * dz
+    cz = x * dy - y * dx
+    term_out[0] = dot_product * (k1 * cx + k2 * (y * cz - z * cy)) + k3 * (dy * cz - dz * cy)
+    term_out[1] = dot_product * (k1 * cy + k2 * (z * cx - x * cz)) + k3 * (dz * cx - dx * cz)
+    term_out[2] = dot_product * (k1 * cz + k2 * (x * cy - y * cx)) + k3 * (dx * cy - dy * cx)
+
+
+@njit(cache=True)
+def mat3_mul_vec3(matrix, vector, vector_out):
+
+    x, y, z = vector[0], vector[1], vector[2]
+    for row in range(3):
+        vector_out[row] = matrix[row, 0] * x + matrix[row, 1] * y + matrix[row, 2] * z
+
+
+@njit(cache=True)
+def mat3_mul_mat3(matrix_a, matrix_b, matrix_out):
+
+    for row in range(3):
+        for column in range(3):
+            matrix_out[row, column] = matrix_a[row, 0] * matrix_b[0, column] + \
+                                      matrix_a[row, 1] * matrix_b[1, column] + \
+                                      matrix_a[row, 2] * matrix_b[2, column]
+
+
+@njit(cache=True)
+def invert_3x3(matrix, matrix_out):
+
+    cofactor_00 = matrix[1, 1] * matrix[2, 2] - matrix[1, 2] * matrix[2, 1]
+    cofactor_01 = matrix[1, 2] * matrix[2, 0] - matrix[1, 0] * matrix[2, 2]
+    cofactor_02 = matrix[1, 0] * matrix[2, 1] - matrix[1, 1] * matrix[2, 0]
+    inverse_determinant = 1.0 / (matrix[0, 0] * cofactor_00 + matrix[0, 1] * cofactor_01
+                                 + matrix[0, 2] * cofactor_02)
+
+    matrix_out[0, 0] = cofactor_00 * inverse_determinant
+    matrix_out[1, 0] = cofactor_01 * inverse_determinant
+    matrix_out[2, 0] = cofactor_02 * inverse_determinant
+    matrix_out[0, 1] = (matrix[0, 2] * matrix[2, 1] - matrix[0, 1] * matrix[2, 2]) * inverse_determinant
+    matrix_out[1, 1] = (matrix[0, 0] * matrix[2, 2] - matrix[0, 2] * matrix[2, 0]) * inverse_determinant
+    matrix_out[2, 1] = (matrix[0, 1] * matrix[2, 0] - matrix[0, 0] * matrix[2, 1]) * inverse_determinant
+    matrix_out[0, 2] = (matrix[0, 1] * matrix[1, 2] - matrix[0, 2] * matrix[1, 1]) * inverse_determinant
+    matrix_out[1, 2] = (matrix[0, 2] * matrix[1, 0] - matrix[0, 0] * matrix[1, 2]) * inverse_determinant
+    matrix_out[2, 2] = (matrix[0, 0] * matrix[1, 1] - matrix[0, 1] * matrix[1, 0]) * inverse_determinant
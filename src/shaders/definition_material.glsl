@@ -8,7 +8,7 @@ struct Material {
     float shininess_factor;
     float metallic_factor;
     float roughness_factor;
-    float padding_1;
+    float alpha;
 };
 
 layout (std140, binding = 1) uniform MaterialBlock {
@@ -9,7 +9,6 @@
 #define RENDER_MODE_COLOR_SOURCE_UV 2
 #define MAX_DIRECTIONAL_LIGHTS 4
 #define MAX_POINT_LIGHTS 8
-#define MAX_TRANSFORMS 128
 
 #include definition_material.glsl
 #include definition_point_light.glsl
@@ -30,25 +29,30 @@ in vec3 in_color;
 in ivec4 in_joint;
 in vec4 in_weight;
 
-layout (std140, binding = 4) uniform TransformBlock {
-    mat4 transforms[MAX_TRANSFORMS];
-} ubo_transforms;
+// World matrices of all instanced meshes, and the indices of their instances that survived culling. Each
+// instanced mesh starts at its "instance_offset" in both
+layout (std430, binding = 1) readonly buffer InstanceTransformBlock {
+    layout (row_major) mat4 instance_transforms[];
+} ssbo_instance_transforms;
 
-layout (std140, binding = 5) uniform JointsBlock {
-    mat4 joints[MAX_TRANSFORMS];
-} ubo_joints;
+layout (std430, binding = 2) readonly buffer InstanceIndexBlock {
+    int instance_indices[];
+} ssbo_instance_indices;
 
-layout (std140, binding = 6) uniform InverseBindMatrixBlock {
-    mat4 inverse_bind_matrices[MAX_TRANSFORMS];
-} ubo_inverse_bind_matrices;
+// Skinning matrices (world @ inverse bind) of all skeletons. Each skinned mesh starts at its "bone_offset"
+layout (std430, binding = 0) readonly buffer BonePaletteBlock {
+    layout (row_major) mat4 bone_matrices[];
+} ssbo_bone_palette;
 
 // Camera Settings
 uniform mat4 projection_matrix;
 uniform mat4 view_matrix;
 uniform mat4 model_matrix;
 uniform vec3 camera_position;
-uniform bool skinned_mesh = true;
+uniform bool skinned_mesh = false;
+uniform int bone_offset = 0;
 uniform bool instanced = false;
+uniform int instance_offset = 0;
 uniform int material_index = 0;
 
 uniform GlobalAmbient global = GlobalAmbient(
@@ -72,9 +76,21 @@ flat out int v_instance_id;
 void main() {
 
     mat4 final_model_matrix = model_matrix;
-    if (instanced) final_model_matrix = ubo_transforms.transforms[gl_InstanceID];
+    int instance_id = gl_InstanceID;
+    if (instanced) {
+        instance_id = ssbo_instance_indices.instance_indices[instance_offset + gl_InstanceID];
+        final_model_matrix = ssbo_instance_transforms.instance_transforms[instance_offset + instance_id];
+    }
+
+    // Skinning matrices already include the skeleton's world transform
+    if (skinned_mesh) {
+        final_model_matrix = in_weight.x * ssbo_bone_palette.bone_matrices[bone_offset + in_joint.x] +
+                             in_weight.y * ssbo_bone_palette.bone_matrices[bone_offset + in_joint.y] +
+                             in_weight.z * ssbo_bone_palette.bone_matrices[bone_offset + in_joint.z] +
+                             in_weight.w * ssbo_bone_palette.bone_matrices[bone_offset + in_joint.w];
+    }
 
-    v_instance_id = gl_InstanceID;
+    v_instance_id = instance_id;
     v_local_position = in_vert;
     v_world_position = (final_model_matrix * vec4(v_local_position, 1.0)).xyz;
     v_world_normal = mat3(transpose(inverse(final_model_matrix))) * in_normal;  // TODO: Check if this is correct
@@ -219,7 +235,7 @@ void main() {
     if (gamma_correction_enabled && material.lighting_mode == 1)
         color_rgb = pow(color_rgb, vec3(1.0 / gamma));
 
-    out_fragment_color = vec4(color_rgb, 1.0);
+    out_fragment_color = vec4(color_rgb, material.alpha);
     out_fragment_normal = vec4(normal, 1.0);
     out_fragment_world_position = vec4(v_world_position, 1);
     out_fragment_entity_info = vec4(entity_id, v_instance_id, 0, 1);
@@ -1,5 +1,6 @@
 import logging
 import os.path
+from collections import deque
 
 import moderngl
 
@@ -32,6 +33,7 @@ class ImportSystem(System):
         "selected_entity_init_distance_to_cam",
         "loading_functions",
         "loading_tasks",
+        "pending_loading_tasks",
         "file_interfaces"
     ]
 
@@ -42,6 +44,7 @@ class ImportSystem(System):
         self.entity_ray_intersection_list = []
         self.gizmo_entity_uid = None
         self.loading_tasks = []
+        self.pending_loading_tasks = deque()
         self.file_interfaces = {}
 
         # DEBUG
@@ -67,10 +70,9 @@ class ImportSystem(System):
                     self.logger.warning(f"Extension .{extension_no_period} not supported")
                     continue
 
-                # Now you can load the file
+                # Tasks are only started during update, so that no more than a few files load at the same time
                 new_loading_task = ImportSystem.LOADING_TASK_CLASS[extension_no_period](fpath=absolute_fpath)
-                new_loading_task.start()
-                self.loading_tasks.append(new_loading_task)
+                self.pending_loading_tasks.append(new_loading_task)
                 self.logger.debug(f"Loading task created : {new_loading_task.fpath}")
 
     def process_obj_data(self, file_interface: FileDataInterface):
@@ -105,4 +107,12 @@ class ImportSystem(System):
             self.loading_tasks.remove(loading_task)
             self.logger.debug(f"Loading task removed : {loading_task.fpath}")
 
+        # Start pending tasks as soon as there are free slots
+        while len(self.pending_loading_tasks) > 0 and \
+                len(self.loading_tasks) < constants.IMPORT_SYSTEM_MAX_CONCURRENT_LOADING_TASKS:
+            loading_task = self.pending_loading_tasks.popleft()
+            loading_task.start()
+            self.loading_tasks.append(loading_task)
+            self.logger.debug(f"Loading task started : {loading_task.fpath}")
+
         return True
\ No newline at end of file
@@ -1,5 +1,5 @@
 from src.systems.import_system.loading_task import LoadingTask, FileDataInterface
-from src.utilities import utils_mesh_3d
+from src.utilities import utils_obj
 
 
 class LoadingTaskObj(LoadingTask):
@@ -9,7 +9,7 @@ class LoadingTaskObj(LoadingTask):
 
     def load_file(self, fpath: str) -> bool:
 
-        vertices, normals, uvs, indices = utils_mesh_3d.from_obj(fpath=fpath)
+        vertices, normals, uvs, indices = utils_obj.load_obj(fpath=fpath)
 
         mesh_data = dict()
         mesh_data["vertices"] = vertices
@@ -0,0 +1,81 @@
+import moderngl
+import numpy as np
+
+from src.core import constants
+
+
+class BonePalette:
+
+    """
+    Skinning matrices of all skeletons in the scene, packed one after the other in a single SSBO that is uploaded
+    once per frame. Each skeleton is told where its matrices start (Skeleton.palette_offset), which the forward
+    pass hands to the shader so that skinned meshes can fetch "bone_matrices[bone_offset + joint]".
+
+    An SSBO is used rather than a UBO because UBOs are only guaranteed to hold 16KB (256 matrices), and a single
+    character can already have more bones than that.
+    """
+
+    __slots__ = [
+        "ctx",
+        "buffer",
+        "data",
+        "capacity",
+        "num_bones"]
+
+    def __init__(self, ctx: moderngl.Context, initial_num_bones=constants.SKINNING_BONE_PALETTE_INITIAL_NUM_BONES):
+
+        self.ctx = ctx
+        self.capacity = max(1, initial_num_bones)
+        self.num_bones = 0
+
+        # Matrices are stored as they are (row-major), the shader declares them as such
+        self.data = np.zeros((self.capacity, 4, 4), dtype=np.float32)
+        self.buffer = self.ctx.buffer(reserve=self.data.nbytes)
+        self.buffer.bind_to_storage_buffer(binding=constants.SSBO_BINDING_BONE_PALETTE)
+
+    def update(self, skeleton_pool: dict) -> int:
+        """
+        Packs the skinning matrices of all skeletons that have them and uploads them in a single write. Skeletons
+        without skinning matrices get a palette_offset of -1
+
+        :param skeleton_pool: dict, {entity_uid: Skeleton}
+        :return: int, number of bones uploaded
+        """
+
+        num_bones = 0
+        for skeleton in skeleton_pool.values():
+            if skeleton.skinning_matrices is None:
+                skeleton.palette_offset = -1
+                continue
+            skeleton.palette_offset = num_bones
+            num_bones += skeleton.skinning_matrices.shape[0]
+
+        if num_bones > self.capacity:
+            self.reserve(num_bones=max(num_bones, 2 * self.capacity))
+
+        for skeleton in skeleton_pool.values():
+            if skeleton.palette_offset < 0:
+                continue
+            bone_slice = slice(skeleton.palette_offset, skeleton.palette_offset + skeleton.skinning_matrices.shape[0])
+            self.data[bone_slice] = skeleton.skinning_matrices
+
+        self.num_bones = num_bones
+        if num_bones > 0:
+            self.buffer.write(self.data[:num_bones].tobytes())
+
+        return num_bones
+
+    def reserve(self, num_bones: int):
+
+        if num_bones <= self.capacity:
+            return
+
+        self.capacity = num_bones
+        self.data = np.zeros((self.capacity, 4, 4), dtype=np.float32)
+        self.buffer.orphan(size=self.data.nbytes)
+        self.buffer.bind_to_storage_buffer(binding=constants.SSBO_BINDING_BONE_PALETTE)
+
+    def release(self):
+        if self.buffer is not None:
+            self.buffer.release()
+            self.buffer = None
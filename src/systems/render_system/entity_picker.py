@@ -0,0 +1,125 @@
+import moderngl
+import numpy as np
+
+from src.core import constants
+
+
+class EntityPicker:
+
+    """
+    Reads entity IDs back from the entity info texture without stalling the CPU. Picks (a pixel, or a rectangle for
+    marquee selection) are queued with request() and copied, once the frame was rendered, into one of a ring of
+    pixel pack buffers. The copy runs on the GPU in the background, and the buffer is only read
+    ENTITY_PICKER_LATENCY_FRAMES frames later, when the GPU is long done with it. A rectangle costs a single copy and
+    readback, whatever its size.
+
+    If more picks are requested than there are free buffers, the rest wait in the queue for the next frames.
+    """
+
+    __slots__ = [
+        "ctx",
+        "latency_frames",
+        "buffers",
+        "slot_requests",
+        "slot_frames",
+        "queued_requests",
+        "frame_index",
+        "num_bytes_read"]
+
+    def __init__(self,
+                 ctx: moderngl.Context,
+                 ring_size=constants.ENTITY_PICKER_RING_SIZE,
+                 latency_frames=constants.ENTITY_PICKER_LATENCY_FRAMES):
+
+        self.ctx = ctx
+        self.latency_frames = latency_frames
+
+        # One buffer per slot, each holding the red channel (entity ID) of one request's pixels
+        self.buffers = [self.ctx.buffer(reserve=4) for _ in range(ring_size)]
+        self.slot_requests = [None] * ring_size
+        self.slot_frames = [0] * ring_size
+        self.queued_requests = []
+        self.frame_index = 0
+        self.num_bytes_read = 0
+
+    @property
+    def num_pending(self) -> int:
+        return len(self.queued_requests) + sum(request is not None for request in self.slot_requests)
+
+    def request(self, x: int, y: int, width=1, height=1):
+        """
+        Queues a pick. Its result is returned by update() a few frames later
+
+        :param x: int, left of the region, in OpenGL pixel coordinates (zero at the bottom)
+        :param y: int, bottom of the region
+        :param width: int
+        :param height: int
+        :return: None
+        """
+
+        if width < 1 or height < 1:
+            raise ValueError(f"[ERROR] Pick region must be at least one pixel, got {width}x{height}")
+        self.queued_requests.append((int(x), int(y), int(width), int(height)))
+
+    def update(self, framebuffer: moderngl.Framebuffer, attachment: int) -> list:
+        """
+        Call it once per frame, after the entity info was rendered. Collects the picks whose copies are old enough
+        and starts copying the queued ones
+
+        :param framebuffer: moderngl.Framebuffer, with the entity info texture attached
+        :param attachment: int, index of the entity info texture among the framebuffer's color attachments
+        :return: list of tuples (x, y, width, height, entity_uids), one per pick resolved this frame, in the order
+                 they were requested. entity_uids is a sorted numpy array (N,) <int32> of the entities in the region
+        """
+
+        self.frame_index += 1
+
+        results = []
+        for slot, request in sorted(enumerate(self.slot_requests), key=lambda item: self.slot_frames[item[0]]):
+            if request is None or self.frame_index - self.slot_frames[slot] < self.latency_frames:
+                continue
+
+            _, _, width, height = request
+            num_bytes = width * height * 4
+            entity_ids = np.frombuffer(self.buffers[slot].read(size=num_bytes), dtype=np.float32).astype(np.int32)
+            self.num_bytes_read += num_bytes
+            entity_uids = np.unique(entity_ids[entity_ids >= constants.COMPONENT_POOL_STARTING_ID_COUNTER])
+            results.append((*request, entity_uids))
+            self.slot_requests[slot] = None
+
+        framebuffer_width, framebuffer_height = framebuffer.size
+        for slot, request in enumerate(self.slot_requests):
+            if request is not None:
+                continue
+            if len(self.queued_requests) == 0:
+                break
+
+            # Regions are clipped to the framebuffer, and those entirely outside of it still read one pixel
+            x, y, width, height = self.queued_requests.pop(0)
+            x = min(max(x, 0), framebuffer_width - 1)
+            y = min(max(y, 0), framebuffer_height - 1)
+            width = max(min(width, framebuffer_width - x), 1)
+            height = max(min(height, framebuffer_height - y), 1)
+
+            num_bytes = width * height * 4
+            if self.buffers[slot].size < num_bytes:
+                self.buffers[slot].orphan(size=num_bytes)
+
+            # With a buffer as destination, this only queues the copy on the GPU
+            framebuffer.read_into(self.buffers[slot],
+                                  viewport=(x, y, width, height),
+                                  components=1,
+                                  attachment=attachment,
+                                  dtype="f4")
+            self.slot_requests[slot] = (x, y, width, height)
+            self.slot_frames[slot] = self.frame_index
+
+        return results
+
+    def release(self):
+
+        for buffer in self.buffers:
+            buffer.release()
+        self.buffers = []
+        self.slot_requests = []
+        self.queued_requests = []
@@ -0,0 +1,96 @@
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.math.frustum import cull_aabbs, shadow_caster_planes, transform_aabbs
+
+
+class FrustumCuller:
+
+    """
+    Frustum culling of all meshes in the scene at once, before any pass submits them. Once per frame, the world
+    AABBs of all meshes (Mesh.world_aabb_min/max) are computed in a single batch from their local AABBs and their
+    entities' world matrices. Each pass then tests them against its camera's frustum, or, for shadow casters,
+    against the camera's frustum extended along the light's direction.
+
+    Masks returned are indexed by the rows of the scene's mesh arrays.
+    """
+
+    __slots__ = [
+        "transform_rows",
+        "mesh_arrays_version",
+        "transform_arrays_version",
+        "visible"]
+
+    def __init__(self):
+
+        # Row of each mesh's transform, which only changes when rows are added, moved or removed
+        self.transform_rows = np.empty((0,), dtype=np.int64)
+        self.mesh_arrays_version = -1
+        self.transform_arrays_version = -1
+        self.visible = np.empty((0,), dtype=np.bool_)
+
+    def update(self, scene: Scene):
+        """
+        Updates the world AABBs of all meshes from the current world matrices
+
+        :param scene: Scene
+        :return: None
+        """
+
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+
+        transform_aabbs(transform_arrays.get("world_matrix"),
+                        self.get_transform_rows(scene=scene),
+                        mesh_arrays.get("aabb_min"),
+                        mesh_arrays.get("aabb_max"),
+                        mesh_arrays.get("world_aabb_min"),
+                        mesh_arrays.get("world_aabb_max"))
+
+    def get_transform_rows(self, scene: Scene) -> np.ndarray:
+        """
+        Row of each mesh's transform. Passes that don't cull can call this without update()
+
+        :param scene: Scene
+        :return: numpy array (num_meshes,) <int64>, -1 for meshes without a transform
+        """
+
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+
+        if self.mesh_arrays_version != mesh_arrays.version or \
+                self.transform_arrays_version != transform_arrays.version:
+            self.transform_rows = transform_arrays.get_rows(entity_uids=mesh_arrays.get_entity_uids().tolist())
+            self.mesh_arrays_version = mesh_arrays.version
+            self.transform_arrays_version = transform_arrays.version
+
+        return self.transform_rows
+
+    def cull(self, scene: Scene, planes: np.ndarray) -> np.ndarray:
+        """
+        :param scene: Scene
+        :param planes: numpy array (6, 4) <float32>, see frustum_planes()
+        :return: numpy array (num_meshes,) <bool>, TRUE for the meshes inside the frustum. Only valid until the
+                 next call
+        """
+
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        if self.visible.size < len(mesh_arrays):
+            self.visible = np.empty((max(len(mesh_arrays), 2 * self.visible.size),), dtype=np.bool_)
+
+        visible = self.visible[:len(mesh_arrays)]
+        cull_aabbs(planes, mesh_arrays.get("world_aabb_min"), mesh_arrays.get("world_aabb_max"), visible)
+        return visible
+
+    def cull_shadow_casters(self, scene: Scene, planes: np.ndarray, light_direction: np.ndarray) -> np.ndarray:
+        """
+        Same as cull(), but keeps the meshes that may cast a shadow inside the frustum
+
+        :param scene: Scene
+        :param planes: numpy array (6, 4) <float32>, see frustum_planes()
+        :param light_direction: numpy array (3,), direction the light travels in
+        :return: numpy array (num_meshes,) <bool>
+        """
+
+        return self.cull(scene=scene, planes=shadow_caster_planes(planes=planes, light_direction=light_direction))
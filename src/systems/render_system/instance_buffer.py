@@ -0,0 +1,133 @@
+import moderngl
+import numpy as np
+
+from src.core import constants
+from src.math.frustum import cull_instances
+
+
+class InstanceBuffer:
+
+    """
+    World matrices of all multi-transforms in the scene, packed one after the other in a single SSBO, and the
+    indices of the instances that survived frustum culling in a second one. Each multi-transform is told where its
+    matrices start (MultiTransform3D.instance_offset), and the forward pass draws only its visible instances with:
+
+        instance = instance_indices[instance_offset + gl_InstanceID]
+        model_matrix = instance_transforms[instance_offset + instance]
+
+    Matrices stay on the GPU between frames and only the dirty range of each multi-transform is re-uploaded. Per
+    camera, only the compacted list of visible indices (4 bytes per instance rather than 64) has to be written.
+    """
+
+    __slots__ = [
+        "ctx",
+        "transforms_buffer",
+        "indices_buffer",
+        "visible_indices",
+        "capacity",
+        "num_instances",
+        "num_bytes_uploaded"]
+
+    def __init__(self, ctx: moderngl.Context, initial_num_instances=constants.INSTANCING_INITIAL_NUM_INSTANCES):
+
+        self.ctx = ctx
+        self.capacity = max(1, initial_num_instances)
+        self.num_instances = 0
+        self.num_bytes_uploaded = 0
+
+        # Matrices are uploaded as they are (row-major), the shader declares them as such
+        self.visible_indices = np.zeros((self.capacity,), dtype=np.int32)
+        self.transforms_buffer = self.ctx.buffer(reserve=self.capacity * constants.INSTANCING_TRANSFORM_SIZE_BYTES)
+        self.indices_buffer = self.ctx.buffer(reserve=self.visible_indices.nbytes)
+        self.bind()
+
+    def update(self, multi_transform_pool: dict) -> int:
+        """
+        Assigns an instance_offset to every multi-transform that has matrices and uploads the dirty range of each.
+        If any offset changes, or the buffer has to grow, all matrices are uploaded again.
+
+        :param multi_transform_pool: dict, {entity_uid: MultiTransform3D}
+        :return: int, number of bytes uploaded
+        """
+
+        num_instances = 0
+        layout_changed = False
+        for multi_transform in multi_transform_pool.values():
+            num_transforms = multi_transform.get_num_transforms()
+            if num_transforms is None:
+                multi_transform.instance_offset = -1
+                continue
+            layout_changed |= multi_transform.instance_offset != num_instances
+            multi_transform.instance_offset = num_instances
+            num_instances += num_transforms
+
+        if num_instances > self.capacity:
+            self.reserve(num_instances=max(num_instances, 2 * self.capacity))
+            layout_changed = True
+
+        num_bytes_uploaded = 0
+        for multi_transform in multi_transform_pool.values():
+            if multi_transform.instance_offset < 0:
+                continue
+            if layout_changed:
+                multi_transform.mark_dirty()
+            if not multi_transform.is_dirty():
+                continue
+
+            world_matrices = multi_transform.world_matrices[multi_transform.dirty_start:multi_transform.dirty_stop]
+            first_instance = multi_transform.instance_offset + multi_transform.dirty_start
+            self.transforms_buffer.write(np.ascontiguousarray(world_matrices, dtype=np.float32),
+                                         offset=first_instance * constants.INSTANCING_TRANSFORM_SIZE_BYTES)
+            num_bytes_uploaded += world_matrices.nbytes
+            multi_transform.clear_dirty()
+
+        self.num_instances = num_instances
+        self.num_bytes_uploaded = num_bytes_uploaded
+        return num_bytes_uploaded
+
+    def cull(self, multi_transform, planes: np.ndarray, center: np.ndarray, radius: float) -> int:
+        """
+        Uploads the indices of the instances of a multi-transform whose bounding sphere intersects the frustum.
+        Must be called after update(), for every camera that draws it.
+
+        :param multi_transform: MultiTransform3D, with a valid instance_offset
+        :param planes: numpy array (6, 4) <float32>, frustum planes (see src.math.frustum), or None to keep all
+        :param center: numpy array (3,) <float32>, mesh bounding sphere center
+        :param radius: float, mesh bounding sphere radius
+        :return: int, number of instances to draw
+        """
+
+        offset = multi_transform.instance_offset
+        visible_indices = self.visible_indices[offset:offset + multi_transform.get_num_transforms()]
+        if planes is None:
+            visible_indices[:] = np.arange(visible_indices.size, dtype=np.int32)
+            num_visible = visible_indices.size
+        else:
+            num_visible = cull_instances(planes, multi_transform.world_matrices, center, radius, visible_indices)
+
+        if num_visible > 0:
+            self.indices_buffer.write(visible_indices[:num_visible], offset=offset * visible_indices.itemsize)
+
+        return num_visible
+
+    def reserve(self, num_instances: int):
+
+        if num_instances <= self.capacity:
+            return
+
+        self.capacity = num_instances
+        self.visible_indices = np.zeros((self.capacity,), dtype=np.int32)
+        self.transforms_buffer.orphan(size=self.capacity * constants.INSTANCING_TRANSFORM_SIZE_BYTES)
+        self.indices_buffer.orphan(size=self.visible_indices.nbytes)
+        self.bind()
+
+    def bind(self):
+        self.transforms_buffer.bind_to_storage_buffer(binding=constants.SSBO_BINDING_INSTANCE_TRANSFORMS)
+        self.indices_buffer.bind_to_storage_buffer(binding=constants.SSBO_BINDING_INSTANCE_INDICES)
+
+    def release(self):
+        for buffer in [self.transforms_buffer, self.indices_buffer]:
+            if buffer is not None:
+                buffer.release()
+        self.transforms_buffer = None
+        self.indices_buffer = None
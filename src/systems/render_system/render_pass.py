@@ -2,6 +2,8 @@ import moderngl
 from abc import ABC, abstractmethod
 
 from src.core.scene import Scene
+from src.systems.render_system.instance_buffer import InstanceBuffer
+from src.systems.render_system.frustum_culler import FrustumCuller
 
 
 class RenderPass(ABC):
@@ -9,7 +11,8 @@ class RenderPass(ABC):
         "materials_ubo",
         "point_lights_ubo",
         "directional_lights_ubo",
-        "transforms_ubo",
+        "instance_buffer",
+        "frustum_culler",
         "ctx",
         "shader_program_library"
     ]
@@ -27,7 +30,8 @@ class RenderPass(ABC):
                scene: Scene,
                materials_ubo: moderngl.Buffer,
                point_lights_ubo: moderngl.Buffer,
-               transforms_ubo: moderngl.Buffer,
+               instance_buffer: InstanceBuffer,
+               frustum_culler: FrustumCuller,
                selected_entity_uid: int):
         pass
 
@@ -3,7 +3,11 @@ import numpy as np
 
 from src.core import constants
 from src.core.scene import Scene
+from src.math.frustum import frustum_planes
+from src.systems.render_system.instance_buffer import InstanceBuffer
+from src.systems.render_system.frustum_culler import FrustumCuller
 from src.systems.render_system.render_pass import RenderPass
+from src.systems.render_system.render_queue import RenderQueue
 
 
 class RenderPassForward(RenderPass):
@@ -23,6 +27,15 @@ class RenderPassForward(RenderPass):
         "directional_lights_enabled",
         "gamma_correction_enabled",
         "shadows_enabled",
+        "frustum_culling_enabled",
+        "instance_culling_enabled",
+        "render_queue",
+        "num_instances_drawn",
+        "num_draw_calls",
+        "num_program_changes",
+        "num_material_changes",
+        "num_vao_changes",
+        "num_meshes_culled",
     ]
 
     def __init__(self, **kwargs):
@@ -41,6 +54,18 @@ class RenderPassForward(RenderPass):
         self.directional_lights_enabled = False
         self.gamma_correction_enabled = True
         self.shadows_enabled = False
+        self.frustum_culling_enabled = True
+        self.instance_culling_enabled = True
+
+        self.render_queue = RenderQueue()
+
+        # Counters of the last render
+        self.num_instances_drawn = 0
+        self.num_draw_calls = 0
+        self.num_program_changes = 0
+        self.num_material_changes = 0
+        self.num_vao_changes = 0
+        self.num_meshes_culled = 0
 
     def create_framebuffers(self, window_size: tuple):
 
@@ -66,7 +91,8 @@ class RenderPassForward(RenderPass):
                scene: Scene,
                materials_ubo: moderngl.Buffer,
                point_lights_ubo: moderngl.Buffer,
-               transforms_ubo: moderngl.Buffer,
+               instance_buffer: InstanceBuffer,
+               frustum_culler: FrustumCuller,
                selected_entity_uid: int):
 
         # IMPORTANT: You MUST have called scene.make_renderable once before getting here!
@@ -86,8 +112,29 @@ class RenderPassForward(RenderPass):
         camera_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_CAMERA)
         mesh_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_MESH)
         transform_3d_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
         multi_transform_3d_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_MULTI_TRANSFORM_3D)
         material_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_MATERIAL)
+        skeleton_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_SKELETON)
+
+        # Visibility and layer are filtered for all meshes at once, so only the drawn ones are visited. Instanced
+        # meshes are never culled as a whole, since their instances are culled individually, and neither are skinned
+        # ones, which animations can move outside of their bind pose bounds
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        mesh_entity_uids = mesh_arrays.get_entity_uids()
+        drawable = mesh_arrays.get("visible") & (mesh_arrays.get("layer") != constants.RENDER_SYSTEM_LAYER_OVERLAY)
+        never_culled = np.isin(mesh_entity_uids, list(multi_transform_3d_pool.keys())) | \
+            np.isin(mesh_entity_uids, list(skeleton_pool.keys()))
+        num_drawable = int(np.count_nonzero(drawable))
+        world_matrices = transform_arrays.get("world_matrix")
+        material_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MATERIAL)
+
+        self.num_instances_drawn = 0
+        self.num_draw_calls = 0
+        self.num_program_changes = 0
+        self.num_material_changes = 0
+        self.num_vao_changes = 0
+        self.num_meshes_culled = 0
 
         # Every Render pass operates on the OFFSCREEN buffers only
         for camera_uid in camera_entity_uids:
@@ -115,7 +162,8 @@ class RenderPassForward(RenderPass):
                 moderngl.ONE)
 
             # Setup camera
-            program["projection_matrix"].write(camera_component.get_projection_matrix().T.tobytes())
+            projection_matrix = camera_component.get_projection_matrix()
+            program["projection_matrix"].write(projection_matrix.T.tobytes())
             program["view_matrix"].write(camera_transform.inverse_world_matrix.T.tobytes())
             program["camera_position"].value = camera_transform.position
 
@@ -123,34 +171,115 @@ class RenderPassForward(RenderPass):
             self.upload_uniforms_point_lights(scene=scene, point_lights_ubo=point_lights_ubo)
             self.upload_uniforms_directional_lights(scene=scene, program=program)
 
-            for mesh_entity_uid, mesh_component in mesh_pool.items():
-
-                if not mesh_component.visible or mesh_component.layer == constants.RENDER_SYSTEM_LAYER_OVERLAY:
-                    continue
+            # Meshes are culled against the camera's frustum before anything is gathered for them. So are instances,
+            # before their (compacted) indices are uploaded
+            planes = None
+            if self.frustum_culling_enabled or self.instance_culling_enabled:
+                view_projection_matrix = projection_matrix @ camera_transform.inverse_world_matrix
+                planes = frustum_planes(view_projection_matrix=view_projection_matrix)
+
+            candidates = drawable
+            if self.frustum_culling_enabled:
+                candidates = drawable & (frustum_culler.cull(scene=scene, planes=planes) | never_culled)
+            mesh_rows = np.flatnonzero(candidates)
+            self.num_meshes_culled += num_drawable - mesh_rows.size
+
+            # Everything that goes into the render commands, for the meshes that survived
+            entity_uids = mesh_entity_uids[mesh_rows].tolist()
+            transform_rows = frustum_culler.get_transform_rows(scene=scene)[mesh_rows]
+            positions = gather_rows(values=world_matrices[:, :3, 3], rows=transform_rows, default=0.0)
+            material_rows = material_arrays.get_rows(entity_uids=entity_uids)
+            materials = gather_rows(values=material_arrays.get("ubo_index"), rows=material_rows,
+                                    default=constants.RENDER_COMMAND_NO_MATERIAL)
+            transparent = gather_rows(values=material_arrays.get("alpha"), rows=material_rows, default=1.0) < 1.0
+            programs = np.array([self.get_program(mesh_component=mesh_pool[mesh_entity_uid],
+                                                  multi_transform=multi_transform_3d_pool.get(mesh_entity_uid, None),
+                                                  skeleton=skeleton_pool.get(mesh_entity_uid, None))
+                                 for mesh_entity_uid in entity_uids], dtype=np.int32)
+
+            # Opaque meshes grouped by program and material and front to back, then transparent ones back to front
+            distances = np.linalg.norm(positions - camera_transform.world_matrix[:3, 3], axis=-1)
+            draw_order = self.render_queue.build(layers=mesh_arrays.get("layer")[mesh_rows],
+                                                 transparent=transparent,
+                                                 distances=distances,
+                                                 programs=programs,
+                                                 materials=materials,
+                                                 max_distance=camera_component.z_far)
+
+            # Uniforms that depend on the program and material are only set when they change
+            current_program = -1
+            current_material = -1
+            current_vao = None
+            depth_writes = True
+            for index in draw_order.tolist():
+
+                mesh_entity_uid = entity_uids[index]
+                mesh_component = mesh_pool[mesh_entity_uid]
 
                 num_instances = 1
-                transform = transform_3d_pool.get(mesh_entity_uid, None)
-                if transform is not None:
-                    program["model_matrix"].write(transform.world_matrix.T.tobytes())
-
                 multi_transform = multi_transform_3d_pool.get(mesh_entity_uid, None)
-                if multi_transform is not None:
-                    multi_transform.upload_world_matrix_to_ubo(ubo=transforms_ubo)
-                    num_instances = multi_transform.world_matrices.shape[0]
+                if programs[index] & constants.RENDER_COMMAND_PROGRAM_INSTANCED:
+                    num_instances = instance_buffer.cull(multi_transform=multi_transform,
+                                                         planes=planes,
+                                                         center=mesh_component.bounding_sphere_center,
+                                                         radius=mesh_component.bounding_sphere_radius)
+                    if num_instances == 0:
+                        continue
+                    program["instance_offset"] = multi_transform.instance_offset
+
+                if programs[index] != current_program:
+                    current_program = programs[index]
+                    program["instanced"] = bool(current_program & constants.RENDER_COMMAND_PROGRAM_INSTANCED)
+                    program["skinned_mesh"] = bool(current_program & constants.RENDER_COMMAND_PROGRAM_SKINNED)
+                    self.num_program_changes += 1
+
+                if materials[index] != current_material:
+                    current_material = materials[index]
+                    material_component = material_pool.get(mesh_entity_uid, None)
+                    if material_component is not None:
+                        program["material_index"].value = material_component.ubo_index
+                        material_component.update_ubo(ubo=materials_ubo)
+                    self.num_material_changes += 1
+
+                # Transparent meshes come last, and are blended without writing to the depth buffer
+                if transparent[index] == depth_writes:
+                    depth_writes = not depth_writes
+                    self.framebuffer.depth_mask = depth_writes
+
+                # Skinned meshes use their entity's skeleton, whose matrices are already in the bone palette
+                if programs[index] & constants.RENDER_COMMAND_PROGRAM_SKINNED:
+                    program["bone_offset"] = skeleton_pool[mesh_entity_uid].palette_offset
 
                 # Update Mesh uniforms
+                if transform_rows[index] >= 0:
+                    program["model_matrix"].write(world_matrices[transform_rows[index]].T.tobytes())
                 program["entity_id"].value = mesh_entity_uid
 
-                material_component = material_pool[mesh_entity_uid]
-                if material_component is not None:
-                    program["material_index"].value = material_component.ubo_index
-                    material_component.update_ubo(ubo=materials_ubo)
+                vao = mesh_component.vaos[constants.SHADER_PROGRAM_FORWARD_PASS]
+                self.num_vao_changes += vao is not current_vao
+                current_vao = vao
 
-                program["instanced"] = num_instances > 1
                 mesh_component.render(shader_pass_name=constants.SHADER_PROGRAM_FORWARD_PASS,
                                       num_instances=num_instances)
+                self.num_instances_drawn += num_instances
+                self.num_draw_calls += 1
+
+            if not depth_writes:
+                self.framebuffer.depth_mask = True
+
+    def get_program(self, mesh_component, multi_transform, skeleton) -> int:
+        """
+        Shader variant a mesh is drawn with, as encoded in its render command
 
-                # Stage: Draw transparent objects back to front
+        :return: int, combination of RENDER_COMMAND_PROGRAM_* flags
+        """
+
+        program = constants.RENDER_COMMAND_PROGRAM_DEFAULT
+        if multi_transform is not None and multi_transform.instance_offset >= 0:
+            program |= constants.RENDER_COMMAND_PROGRAM_INSTANCED
+        if skeleton is not None and skeleton.palette_offset >= 0 and mesh_component.vbo_joints is not None:
+            program |= constants.RENDER_COMMAND_PROGRAM_SKINNED
+        return program
 
     def upload_uniforms_point_lights(self, scene: Scene, point_lights_ubo: moderngl.Buffer):
 
@@ -184,3 +313,19 @@ class RenderPassForward(RenderPass):
         self.safe_release(self.texture_entity_info)
         self.safe_release(self.texture_depth)
         self.safe_release(self.framebuffer)
+
+
+def gather_rows(values: np.ndarray, rows: np.ndarray, default) -> np.ndarray:
+    """
+    values[rows], where rows of -1 (component missing) get the default value instead
+
+    :param values: numpy array (M, ...)
+    :param rows: numpy array (N,) <int>, as returned by ComponentArrays.get_rows()
+    :param default: value for missing rows
+    :return: numpy array (N, ...)
+    """
+
+    gathered = np.full((rows.size,) + values.shape[1:], default, dtype=values.dtype)
+    found = rows >= 0
+    gathered[found] = values[rows[found]]
+    return gathered
@@ -2,6 +2,8 @@ import moderngl
 
 from src.core import constants
 from src.core.scene import Scene
+from src.systems.render_system.instance_buffer import InstanceBuffer
+from src.systems.render_system.frustum_culler import FrustumCuller
 from src.math import mat4
 from src.systems.render_system.render_pass import RenderPass
 
@@ -41,7 +43,8 @@ class RenderPassSelection(RenderPass):
                scene: Scene,
                materials_ubo: moderngl.Buffer,
                point_lights_ubo: moderngl.Buffer,
-               transforms_ubo: moderngl.Buffer,
+               instance_buffer: InstanceBuffer,
+               frustum_culler: FrustumCuller,
                selected_entity_uid: int):
 
         # IMPORTANT: You MUST have called scene.make_renderable once before getting here!
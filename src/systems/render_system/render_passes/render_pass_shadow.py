@@ -1,8 +1,11 @@
 import moderngl
+import numpy as np
 
 from src.core import constants
 from src.core.scene import Scene
-from src.math import mat4
+from src.systems.render_system.instance_buffer import InstanceBuffer
+from src.systems.render_system.frustum_culler import FrustumCuller
+from src.math.frustum import frustum_planes
 from src.systems.render_system.render_pass import RenderPass
 
 
@@ -13,7 +16,9 @@ class RenderPassShadow(RenderPass):
     __slots__ = [
         "program",
         "depth_texture",
-        "framebuffer"]
+        "framebuffer",
+        "shadow_caster_culling_enabled",
+        "num_casters_culled"]
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
@@ -22,6 +27,9 @@ class RenderPassShadow(RenderPass):
         self.depth_texture = None
         self.framebuffer = None
 
+        self.shadow_caster_culling_enabled = True
+        self.num_casters_culled = 0
+
     def create_framebuffers(self, window_size: tuple):
 
         # Release any existing textures and framebuffers first
@@ -36,19 +44,25 @@ class RenderPassShadow(RenderPass):
                scene: Scene,
                materials_ubo: moderngl.Buffer,
                point_lights_ubo: moderngl.Buffer,
-               transforms_ubo: moderngl.Buffer,
+               instance_buffer: InstanceBuffer,
+               frustum_culler: FrustumCuller,
                selected_entity_uid: int):
 
-        # TODO: This function's code is old and won't probably work!
+        # TODO: The light's projection matrix is still not set, so the shadow map is not usable yet!
 
         self.framebuffer.clear()
         self.framebuffer.use()
 
         program = self.shader_program_library[constants.SHADER_PROGRAM_SHADOW_MAPPING_PASS]
 
+        camera_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_CAMERA)
+        mesh_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_MESH)
+        transform_3d_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        directional_light_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_DIRECTIONAL_LIGHT)
+
         # Find which directional light, if any creates shadows
         directional_light_uid = None
-        for uid, directional_light in scene.directional_light_components.items():
+        for uid, directional_light in directional_light_pool.items():
             if directional_light.shadow_enabled:
                 directional_light_uid = uid
                 break
@@ -56,21 +70,32 @@ class RenderPassShadow(RenderPass):
         if directional_light_uid is None:
             return
 
-        for mesh_entity_uid, mesh_component in scene.mesh_components.items():
-
-            material = scene.material_components[mesh_entity_uid]
-
-            # TODO: IF you forget to declare the material in the xml, you are fucked. Make sure a default material
-            if not mesh_component.visible and not material.is_transparent():
-                continue
-
-            mesh_transform = scene.get_component(entity_uid=mesh_entity_uid,
-                                                 component_type=constants.COMPONENT_TYPE_TRANSFORM)
-            light_transform = scene.get_component(entity_uid=directional_light_uid,
-                                                  component_type=constants.COMPONENT_TYPE_TRANSFORM)
-
-            program["view_matrix"].write(light_transform.inverse_world_matrix.T.tobytes())
-            program["model_matrix"].write(mesh_transform.world_matrix.T.tobytes())
+        # Only meshes that may cast a shadow into the view of at least one camera are drawn
+        light_transform = transform_3d_pool[directional_light_uid]
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        casters = mesh_arrays.get("visible").copy()
+        num_visible = int(np.count_nonzero(casters))
+        if self.shadow_caster_culling_enabled:
+            light_direction = -light_transform.world_matrix[:3, 2]
+            visible_casters = np.zeros_like(casters)
+            for camera_uid, camera_component in camera_pool.items():
+                camera_transform = transform_3d_pool[camera_uid]
+                planes = frustum_planes(view_projection_matrix=camera_component.get_projection_matrix() @
+                                        camera_transform.inverse_world_matrix)
+                visible_casters |= frustum_culler.cull_shadow_casters(scene=scene,
+                                                                      planes=planes,
+                                                                      light_direction=light_direction)
+            casters &= visible_casters
+        caster_entity_uids = mesh_arrays.get_entity_uids()[casters].tolist()
+        self.num_casters_culled = num_visible - len(caster_entity_uids)
+
+        program["view_matrix"].write(light_transform.inverse_world_matrix.T.tobytes())
+        for mesh_entity_uid in caster_entity_uids:
+
+            mesh_component = mesh_pool[mesh_entity_uid]
+            mesh_transform = transform_3d_pool.get(mesh_entity_uid, None)
+            if mesh_transform is not None:
+                program["model_matrix"].write(mesh_transform.world_matrix.T.tobytes())
 
             mesh_component.vaos[constants.SHADER_PROGRAM_SHADOW_MAPPING_PASS].render(mesh_component.render_mode)
 
@@ -0,0 +1,63 @@
+import numpy as np
+
+from src.core import constants
+from src.utilities import utils_render_commands
+
+
+class RenderQueue:
+
+    """
+    One 64-bit sort key per mesh to draw (see the render command layout in constants). Sorting the keys gives the
+    draw order: by layer first, then opaque meshes grouped by program and material and front to back within each
+    group, and finally transparent meshes back to front. The key ends with the index of the mesh in the arrays the
+    queue was built from, so the sorted keys are all that is needed to walk the meshes in order.
+    """
+
+    __slots__ = [
+        "commands",
+        "num_commands"]
+
+    def __init__(self, initial_capacity=constants.RENDER_COMMANDS_INITIAL_CAPACITY):
+
+        self.commands = np.empty((max(1, initial_capacity),), dtype=np.uint64)
+        self.num_commands = 0
+
+    def build(self,
+              layers: np.ndarray,
+              transparent: np.ndarray,
+              distances: np.ndarray,
+              programs: np.ndarray,
+              materials: np.ndarray,
+              max_distance: float) -> np.ndarray:
+        """
+        Encodes and sorts the commands of this frame. All arrays have one element per mesh
+
+        :param layers: numpy array (N,) <int>
+        :param transparent: numpy array (N,) <bool>
+        :param distances: numpy array (N,) <float>, distances to the camera
+        :param programs: numpy array (N,) <int>, see RENDER_COMMAND_PROGRAM_* constants
+        :param materials: numpy array (N,) <int>
+        :param max_distance: float, distances beyond this one are all treated as equal
+        :return: numpy array (N,) <int64>, indices of the meshes in draw order
+        """
+
+        num_commands = layers.shape[0]
+        if num_commands > constants.MESH_MASK + 1:
+            raise ValueError(f"[ERROR] Render queue can't hold {num_commands} commands, the maximum "
+                             f"is {constants.MESH_MASK + 1}")
+
+        if num_commands > self.commands.size:
+            self.commands = np.empty((max(num_commands, 2 * self.commands.size),), dtype=np.uint64)
+        self.num_commands = num_commands
+
+        # Keys are unique, since they end with the mesh index, so a plain sort of the keys does the job of an
+        # argsort. Numpy's vectorised sort beats a radix sort in numba for any realistic number of commands
+        commands = self.commands[:num_commands]
+        utils_render_commands.build_commands(layers, transparent, distances, programs, materials,
+                                             max(max_distance, 1e-6), commands)
+        commands.sort()
+
+        return (commands & np.uint64(constants.MESH_MASK)).astype(np.int64)
+
+    def get_commands(self) -> np.ndarray:
+        return self.commands[:self.num_commands]
@@ -2,17 +2,21 @@ import glfw
 import moderngl
 from PIL import Image
 import numpy as np
-import struct
 
 from src.core import constants
 from src.systems.system import System
 from src.systems.render_system.shader_program_library import ShaderProgramLibrary
 from src.systems.render_system.font_library import FontLibrary
+from src.systems.render_system.bone_palette import BonePalette
+from src.systems.render_system.instance_buffer import InstanceBuffer
+from src.systems.render_system.frustum_culler import FrustumCuller
+from src.systems.render_system.scene_bvh import SceneBVH
+from src.systems.render_system.entity_picker import EntityPicker
 from src.systems.render_system.render_passes.render_pass_forward import RenderPassForward
 from src.systems.render_system.render_passes.render_pass_overlay import RenderPassOverlay
 from src.systems.render_system.render_passes.render_pass_selection import RenderPassSelection
-from src.utilities import utils_render_commands
 from src.geometry_3d import ready_to_render
+from src.utilities import utils_camera
 
 
 class RenderSystem(System):
@@ -34,8 +38,6 @@ class RenderSystem(System):
         "forward_render_pass",
         "overlay_render_pass",
         "selection_render_pass",
-        "render_commands",
-        "num_render_commands",
         "current_render_layer",
         "fullscreen_selected_texture",
         "debug_forward_pass_framebuffer",
@@ -43,17 +45,21 @@ class RenderSystem(System):
         "materials_ubo",
         "point_lights_ubo",
         "directional_lights_ubo",
-        "transforms_ubo",
-        "picker_buffer",
-        "picker_program",
-        "picker_output",
-        "picker_vao",
+        "bone_palette",
+        "instance_buffer",
+        "frustum_culler",
+        "scene_bvh",
+        "entity_picker",
         "outline_program",
         "outline_texture",
         "outline_framebuffer",
         "hovering_ui",
         "hovering_gizmo",
         "selected_entity_id",
+        "hovered_entity_id",
+        "mouse_screen_position",
+        "cpu_picking_enabled",
+        "marquee_start",
         "_sample_entity_location",
         "event_handlers",
     ]
@@ -85,9 +91,6 @@ class RenderSystem(System):
             self.overlay_render_pass,
             self.selection_render_pass]
 
-        # Render Command variables
-        self.render_commands = np.ndarray((constants.MAX_RENDER_COMMANDS,), dtype='u8')
-        self.num_render_commands = 0
         self.current_render_layer = -1
 
         # UBOs
@@ -95,13 +98,19 @@ class RenderSystem(System):
         self.materials_ubo = None
         self.point_lights_ubo = None
         self.directional_lights_ubo = None
-        self.transforms_ubo = None
 
-        # Fragment Picking - altogether for now
-        self.picker_buffer = None
-        self.picker_program = None
-        self.picker_output = None
-        self.picker_vao = None
+        # SSBOs
+        self.bone_palette = None
+        self.instance_buffer = None
+
+        # Frustum culling
+        self.frustum_culler = FrustumCuller()
+
+        # CPU ray casts against the meshes' world bounds, for hovering and, optionally, picking
+        self.scene_bvh = SceneBVH()
+
+        # Entity IDs under the mouse are read back from the GPU asynchronously, a few frames after the click
+        self.entity_picker = None
 
         # Outline drawing
         self.outline_program = None
@@ -112,6 +121,10 @@ class RenderSystem(System):
         self.hovering_ui = False
         self.hovering_gizmo = False
         self.selected_entity_id = -1
+        self.hovered_entity_id = -1
+        self.mouse_screen_position = None
+        self.cpu_picking_enabled = False
+        self.marquee_start = None
 
         self._sample_entity_location = None
 
@@ -122,6 +135,8 @@ class RenderSystem(System):
             constants.EVENT_MOUSE_ENTER_GIZMO_3D: self.handle_event_mouse_enter_gizmo_3d,
             constants.EVENT_MOUSE_LEAVE_GIZMO_3D: self.handle_event_mouse_leave_gizmo_3d,
             constants.EVENT_MOUSE_BUTTON_PRESS: self.handle_event_mouse_button_press,
+            constants.EVENT_MOUSE_BUTTON_RELEASE: self.handle_event_mouse_button_release,
+            constants.EVENT_MOUSE_MOVE: self.handle_event_mouse_move,
             constants.EVENT_KEYBOARD_PRESS: self.handle_event_keyboard_press,
             constants.EVENT_WINDOW_FRAMEBUFFER_SIZE: self.handle_event_window_framebuffer_size,
         }
@@ -133,9 +148,7 @@ class RenderSystem(System):
     def initialise(self):
 
         # Fragment picking
-        self.picker_program = self.shader_program_library["fragment_picking"]
-        self.picker_buffer = self.ctx.buffer(reserve=3 * 4)  # 3 ints
-        self.picker_vao = self.ctx.vertex_array(self.picker_program, [])
+        self.entity_picker = EntityPicker(ctx=self.ctx)
 
         # Fonts
         for font_name, font in self.font_library.fonts.items():
@@ -161,9 +174,9 @@ class RenderSystem(System):
         self.point_lights_ubo = self.ctx.buffer(data=zero_data.tobytes())
         self.point_lights_ubo.bind_to_uniform_block(binding=constants.UBO_BINDING_POINT_LIGHTS)
 
-        total_bytes = constants.SCENE_POINT_TRANSFORM_SIZE_BYTES * constants.SCENE_MAX_NUM_TRANSFORMS
-        self.transforms_ubo = self.ctx.buffer(reserve=total_bytes)
-        self.transforms_ubo.bind_to_uniform_block(binding=constants.UBO_BINDING_TRANSFORMS)
+        # SSBOs
+        self.bone_palette = BonePalette(ctx=self.ctx)
+        self.instance_buffer = InstanceBuffer(ctx=self.ctx)
 
         self.create_framebuffers(window_size=self.buffer_size)
         return True
@@ -195,6 +208,13 @@ class RenderSystem(System):
     def handle_event_mouse_button_press(self, event_data: tuple):
         self.process_entity_selection(event_data=event_data)
 
+    def handle_event_mouse_button_release(self, event_data: tuple):
+        self.process_marquee_selection(event_data=event_data)
+
+    def handle_event_mouse_move(self, event_data: tuple):
+        # On the "mouse_move" event, the event data is already in gl_pixels coordinates
+        self.mouse_screen_position = event_data
+
     def handle_event_keyboard_press(self, event_data: tuple):
         self.process_keyboard_press(event_data=event_data)
 
@@ -213,21 +233,65 @@ class RenderSystem(System):
         if event_data[constants.EVENT_INDEX_MOUSE_BUTTON_BUTTON] != glfw.MOUSE_BUTTON_LEFT:
             return
 
-        # TODO: Move this to its own function!
-        # Pass the coordinate of the pixel you want to sample to the fragment picking shader
         mouse_position = (int(event_data[constants.EVENT_INDEX_MOUSE_BUTTON_X]),
                           int(event_data[constants.EVENT_INDEX_MOUSE_BUTTON_Y_OPENGL]))
-        self.picker_program['texel_pos'].value = mouse_position  # (x, y)
-        self.forward_render_pass.texture_entity_info.use(location=0)
 
-        self.picker_vao.transform(
-            self.picker_buffer,
-            mode=moderngl.POINTS,
-            vertices=1,
-            first=0,
-            instances=1)
+        # Holding shift drags a marquee, whose entities are picked when the button is released
+        if event_data[constants.EVENT_INDEX_MOUSE_BUTTON_MODS] & glfw.MOD_SHIFT:
+            self.marquee_start = mouse_position
+            return
+
+        if self.cpu_picking_enabled:
+            # Nearest collider or world bounds under the mouse, without reading anything back from the GPU
+            entity_uid, _ = self.ray_cast_entity(screen_gl_pixels=mouse_position)
+            self.publish_entity_selection(entity_uid=entity_uid)
+            return
+
+        # The selection is published once the picker has the entity under the mouse, see update()
+        self.entity_picker.request(x=mouse_position[0], y=mouse_position[1])
+
+    def process_marquee_selection(self, event_data: tuple):
+        if self.marquee_start is None:
+            return
+
+        if event_data[constants.EVENT_INDEX_MOUSE_BUTTON_BUTTON] != glfw.MOUSE_BUTTON_LEFT:
+            return
+
+        start_x, start_y = self.marquee_start
+        end_x = int(event_data[constants.EVENT_INDEX_MOUSE_BUTTON_X])
+        end_y = int(event_data[constants.EVENT_INDEX_MOUSE_BUTTON_Y_OPENGL])
+        self.marquee_start = None
+
+        # Short drags are clicks
+        width = abs(end_x - start_x) + 1
+        height = abs(end_y - start_y) + 1
+        if max(width, height) < constants.ENTITY_PICKER_MARQUEE_MIN_PIXELS:
+            self.entity_picker.request(x=end_x, y=end_y)
+            return
+
+        self.entity_picker.request(x=min(start_x, end_x), y=min(start_y, end_y), width=width, height=height)
+
+    def process_entity_picks(self):
+
+        # The entity info texture is the forward pass's fourth color attachment
+        picks = self.entity_picker.update(framebuffer=self.forward_render_pass.framebuffer, attachment=3)
+
+        for _, _, width, height, entity_uids in picks:
+            if width == 1 and height == 1:
+                self.publish_entity_selection(entity_uid=int(entity_uids[0]) if entity_uids.size > 0 else -1)
+                continue
 
-        self.selected_entity_id, instance_id, _ = struct.unpack("3i", self.picker_buffer.read())
+            if entity_uids.size == 0:
+                self.publish_entity_selection(entity_uid=-1)
+                continue
+
+            self.event_publisher.publish(event_type=constants.EVENT_MULTIPLE_ENTITIES_SELECTED,
+                                         event_data=tuple(int(entity_uid) for entity_uid in entity_uids),
+                                         sender=self)
+
+    def publish_entity_selection(self, entity_uid: int):
+
+        self.selected_entity_id = entity_uid
 
         if self.selected_entity_id < constants.COMPONENT_POOL_STARTING_ID_COUNTER:
             self.event_publisher.publish(event_type=constants.EVENT_ENTITY_DESELECTED,
@@ -243,6 +307,46 @@ class RenderSystem(System):
                                      event_data=(self.selected_entity_id,),
                                      sender=self)
 
+    def ray_cast_entity(self, screen_gl_pixels: tuple) -> tuple:
+        """
+        Casts a ray from the camera whose viewport contains the screen position into the scene BVH
+
+        :param screen_gl_pixels: tuple, pixel coordinates where zero is at the lower left corner of the screen
+        :return: tuple (entity_uid, distance) <int, float>, (-1, inf) if no entity is under the position
+        """
+
+        camera_pool = self.scene.get_pool(component_type=constants.COMPONENT_TYPE_CAMERA)
+        transform_pool = self.scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        for camera_entity_id, camera_component in camera_pool.items():
+            if not camera_component.is_inside_viewport(screen_gl_position=screen_gl_pixels):
+                continue
+
+            viewport_position = utils_camera.screen_gl_position_pixels2viewport_position(
+                position_pixels=screen_gl_pixels,
+                viewport_pixels=camera_component.viewport_pixels)
+            if viewport_position is None:
+                continue
+
+            ray_direction, ray_origin = utils_camera.screen_pos2world_ray(
+                viewport_coord_norm=viewport_position,
+                camera_matrix=transform_pool[camera_entity_id].world_matrix,
+                inverse_projection_matrix=camera_component.get_inverse_projection_matrix())
+
+            return self.scene_bvh.ray_cast(scene=self.scene, ray_origin=ray_origin, ray_direction=ray_direction)
+
+        return -1, np.inf
+
+    def update_hovered_entity(self, entity_uid: int):
+
+        # Only changes are published, not the same entity every frame
+        if entity_uid == self.hovered_entity_id:
+            return
+
+        self.hovered_entity_id = entity_uid
+        self.event_publisher.publish(event_type=constants.EVENT_ENTITY_HOVERED,
+                                     event_data=(self.hovered_entity_id,),
+                                     sender=self)
+
     def process_keyboard_press(self, event_data: tuple):
 
         # Texture debugging modes
@@ -264,38 +368,43 @@ class RenderSystem(System):
 
     def update(self, elapsed_time: float, context: moderngl.Context) -> bool:
 
-        # =======================[ Render Method 1 ] =============================
+        # Skinning matrices of all skeletons are uploaded at once, before any pass draws skinned meshes
+        self.bone_palette.update(
+            skeleton_pool=self.scene.get_pool(component_type=constants.COMPONENT_TYPE_SKELETON))
+
+        # Same for the world matrices of instanced meshes, where only the dirty ranges are uploaded
+        self.instance_buffer.update(
+            multi_transform_pool=self.scene.get_pool(component_type=constants.COMPONENT_TYPE_MULTI_TRANSFORM_3D))
+
+        # World bounds of all meshes, so each pass can cull them against its own frustum
+        self.frustum_culler.update(scene=self.scene)
+        self.scene_bvh.update(scene=self.scene, transform_rows=self.frustum_culler.transform_rows)
+
+        # Hovering is tested on the CPU every frame, as even an asynchronous readback would lag behind the mouse
+        if self.mouse_screen_position is not None:
+            hovered_entity_id = -1
+            if not self.hovering_ui:
+                hovered_entity_id, _ = self.ray_cast_entity(screen_gl_pixels=self.mouse_screen_position)
+            self.update_hovered_entity(entity_uid=hovered_entity_id)
+
+        # The forward pass sorts its draws through a render queue. See forward_render_pass for its counters
         for render_pass in self.render_passes:
             render_pass.render(
                 scene=self.scene,
                 materials_ubo=self.materials_ubo,
                 point_lights_ubo=self.point_lights_ubo,
-                transforms_ubo=self.transforms_ubo,
+                instance_buffer=self.instance_buffer,
+                frustum_culler=self.frustum_culler,
                 selected_entity_uid=self.selected_entity_id)
 
-        # =======================[ Render Method 2 ] =============================
-
-        #self.render_method_2()
-
+        # Picks are copied from this frame's entity info and delivered a few frames later
+        self.process_entity_picks()
 
         # Final pass renders everything to a full screen quad from the offscreen textures
         self.render_to_screen()
 
         return True
 
-    def render_method_2(self):
-        for entity_uid, mesh_component in self.scene.mesh.items():
-
-            # TODO: Continue new rendering method WIP
-
-            render_command = utils_render_commands.encode_command(
-                mesh=entity_uid,
-                transform=entity_uid,
-
-            )
-            g = 0
-            pass
-
     def shutdown(self):
 
         for render_pass in self.render_passes:
@@ -311,6 +420,15 @@ class RenderSystem(System):
             if quad["vao"] is not None:
                 quad["vao"].release()
 
+        if self.bone_palette is not None:
+            self.bone_palette.release()
+
+        if self.instance_buffer is not None:
+            self.instance_buffer.release()
+
+        if self.entity_picker is not None:
+            self.entity_picker.release()
+
         self.shader_program_library.shutdown()
         self.font_library.shutdown()
 
@@ -337,17 +455,6 @@ class RenderSystem(System):
         quad_vao.program["selected_texture"] = self.fullscreen_selected_texture
         quad_vao.render(moderngl.TRIANGLES)
 
-    def process_render_commands(self):
-
-        # Sort commands in-place
-        np.sort(self.render_commands[:self.num_render_commands], kind="mergesort")
-
-        # Render all commands
-        for i in range(self.num_render_commands):
-            render_command = self.render_commands[i]
-            (layer, is_transparent, distance,
-             material, mesh, transform, render_mode) = utils_render_commands.decode_command(render_command)
-
     # =========================================================================
     #                         Other Functions
     # =========================================================================
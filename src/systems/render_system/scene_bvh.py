@@ -0,0 +1,209 @@
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.math import bvh
+
+
+class SceneBVH:
+
+    """
+    Bounding volume hierarchy over the world AABBs of all meshes in the scene (Mesh.world_aabb_min/max, as updated
+    by the FrustumCuller), for ray, frustum and box queries on the CPU. The tree is built when meshes are added or
+    removed. Otherwise, only the nodes above meshes whose transform changed are refit, until refitting has
+    stretched the nodes so much that a rebuild pays off.
+
+    Queries return entity UIDs. Ray casts test the entity's Collider, if it has one, or else the triangles of its
+    mesh (see Mesh.get_triangle_bvh()). Meshes that aren't made of triangles are hit where their world AABB is.
+    """
+
+    __slots__ = [
+        "node_min",
+        "node_max",
+        "node_right",
+        "node_start",
+        "node_count",
+        "node_parent",
+        "node_dirty",
+        "primitives",
+        "primitive_leaf",
+        "entity_uids",
+        "mesh_arrays_version",
+        "build_cost",
+        "num_nodes_refit",
+        "num_builds",
+        "leaf_size",
+        "_hits",
+        "_distances"]
+
+    def __init__(self, leaf_size=constants.SCENE_BVH_LEAF_SIZE):
+
+        self.leaf_size = leaf_size
+        self.mesh_arrays_version = -1
+        self.entity_uids = np.empty((0,), dtype=np.int64)
+        self.build_cost = 0.0
+        self.num_nodes_refit = 0
+        self.num_builds = 0
+        self._hits = np.empty((0,), dtype=np.int32)
+        self._distances = np.empty((0,), dtype=np.float32)
+
+        empty_aabbs = np.empty((0, 3), dtype=np.float32)
+        self.build(aabb_min=empty_aabbs, aabb_max=empty_aabbs)
+
+    def build(self, aabb_min: np.ndarray, aabb_max: np.ndarray):
+        """
+        :param aabb_min: numpy array (N, 3) <float32>
+        :param aabb_max: numpy array (N, 3) <float32>
+        :return: None
+        """
+
+        (self.node_min, self.node_max, self.node_right, self.node_start, self.node_count, self.node_parent,
+         self.primitives, self.primitive_leaf) = bvh.build_bvh(aabb_min, aabb_max, self.leaf_size,
+                                                               constants.BVH_NUM_BINS)
+        self.node_dirty = np.zeros((self.node_right.size,), dtype=np.bool_)
+        self.build_cost = bvh.bvh_cost(self.node_min, self.node_max)
+        self.num_builds += 1
+
+        num_primitives = aabb_min.shape[0]
+        self._hits = np.empty((num_primitives,), dtype=np.int32)
+        self._distances = np.empty((num_primitives,), dtype=np.float32)
+
+    def update(self, scene: Scene, transform_rows: np.ndarray):
+        """
+        Keeps the tree up to date with the world AABBs of the meshes. Call it after they were updated
+
+        :param scene: Scene
+        :param transform_rows: numpy array (num_meshes,) <int>, row of each mesh's transform, or -1
+        :return: None
+        """
+
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        aabb_min = mesh_arrays.get("world_aabb_min")
+        aabb_max = mesh_arrays.get("world_aabb_max")
+        self.num_nodes_refit = 0
+
+        if self.mesh_arrays_version != mesh_arrays.version:
+            self.entity_uids = mesh_arrays.get_entity_uids().copy()
+            self.mesh_arrays_version = mesh_arrays.version
+            self.build(aabb_min=aabb_min, aabb_max=aabb_max)
+            return
+
+        # Transform rows are only TRUE while their world matrix was recomputed this frame
+        has_transform = transform_rows >= 0
+        dirty = np.zeros((transform_rows.size,), dtype=np.bool_)
+        dirty[has_transform] = transform_arrays.get("dirty")[transform_rows[has_transform]]
+        if not dirty.any():
+            return
+
+        self.num_nodes_refit = bvh.refit_bvh(self.node_min, self.node_max, self.node_right, self.node_start,
+                                             self.node_count, self.node_parent, self.primitives, self.primitive_leaf,
+                                             aabb_min, aabb_max, dirty, self.node_dirty)
+
+        if bvh.bvh_cost(self.node_min, self.node_max) > constants.SCENE_BVH_REBUILD_COST_RATIO * self.build_cost:
+            self.build(aabb_min=aabb_min, aabb_max=aabb_max)
+
+    def ray_cast(self, scene: Scene, ray_origin: np.ndarray, ray_direction: np.ndarray,
+                 max_distance=np.inf) -> tuple:
+        """
+        Nearest entity hit by the ray
+
+        :param scene: Scene
+        :param ray_origin: numpy array (3,)
+        :param ray_direction: numpy array (3,), normalised
+        :param max_distance: float
+        :return: tuple (entity_uid, distance) <int, float>, (-1, inf) if nothing was hit
+        """
+
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        num_hits = bvh.intersect_ray_bvh(np.asarray(ray_origin, dtype=np.float64),
+                                         np.asarray(ray_direction, dtype=np.float64), max_distance,
+                                         self.node_min, self.node_max, self.node_right, self.node_start,
+                                         self.node_count, self.primitives, mesh_arrays.get("world_aabb_min"),
+                                         mesh_arrays.get("world_aabb_max"), self._hits, self._distances)
+
+        collider_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_COLLIDER)
+        transform_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        mesh_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_MESH)
+
+        best_uid = -1
+        best_distance = max_distance
+        for hit in range(num_hits):
+
+            # Candidates are sorted by where the ray enters their AABB, which no exact hit can come before
+            aabb_distance = float(self._distances[hit])
+            if aabb_distance >= best_distance:
+                break
+
+            entity_uid = int(self.entity_uids[self._hits[hit]])
+            distance = self.ray_intersection(ray_origin=ray_origin, ray_direction=ray_direction,
+                                             max_distance=best_distance,
+                                             collider=collider_pool.get(entity_uid, None),
+                                             transform=transform_pool.get(entity_uid, None),
+                                             mesh=mesh_pool.get(entity_uid, None))
+            if distance is None:
+                best_uid, best_distance = entity_uid, aabb_distance
+            elif 0.0 <= distance < best_distance:
+                best_uid, best_distance = entity_uid, distance
+
+        return (best_uid, best_distance) if best_uid >= 0 else (-1, np.inf)
+
+    @staticmethod
+    def ray_intersection(ray_origin: np.ndarray, ray_direction: np.ndarray, max_distance: float, collider,
+                         transform, mesh):
+        """
+        Exact distance along the ray to one entity
+
+        :return: float, distance, or -1 if the ray misses the entity. None if the entity has nothing more exact
+                 than its world AABB to test
+        """
+
+        if transform is None:
+            return None
+
+        if collider is not None:
+            return collider.ray_intersection(ray_origin=ray_origin, ray_direction=ray_direction,
+                                             world_matrix=transform.world_matrix)
+
+        triangle_bvh = mesh.get_triangle_bvh() if mesh is not None else None
+        if triangle_bvh is None:
+            return None
+
+        # Affine transforms keep distances along the ray, as long as the local direction isn't normalised again.
+        # Transform.inverse_world_matrix ignores scale, so the full inverse is needed here
+        inverse_world_matrix = np.linalg.inv(transform.world_matrix.astype(np.float64))
+        local_origin = inverse_world_matrix[:3, :3] @ ray_origin + inverse_world_matrix[:3, 3]
+        local_direction = inverse_world_matrix[:3, :3] @ ray_direction
+        distances, _, _ = triangle_bvh.intersect(ray_origins=local_origin, ray_directions=local_direction,
+                                                 max_distance=max_distance)
+        return float(distances[0]) if distances[0] < np.inf else -1.0
+
+    def query_frustum(self, scene: Scene, planes: np.ndarray) -> np.ndarray:
+        """
+        :param scene: Scene
+        :param planes: numpy array (6, 4) <float32>, see frustum_planes()
+        :return: numpy array (N,) <int64>, entities whose world AABB is inside or crosses the frustum
+        """
+
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        num_primitives = bvh.query_frustum_bvh(planes, self.node_min, self.node_max, self.node_right,
+                                               self.node_start, self.node_count, self.primitives,
+                                               mesh_arrays.get("world_aabb_min"), mesh_arrays.get("world_aabb_max"),
+                                               self._hits)
+        return self.entity_uids[self._hits[:num_primitives]]
+
+    def query_box(self, scene: Scene, box_min: np.ndarray, box_max: np.ndarray) -> np.ndarray:
+        """
+        :param scene: Scene
+        :param box_min: numpy array (3,)
+        :param box_max: numpy array (3,)
+        :return: numpy array (N,) <int64>, entities whose world AABB overlaps the box
+        """
+
+        mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+        num_primitives = bvh.query_box_bvh(np.asarray(box_min, dtype=np.float32),
+                                           np.asarray(box_max, dtype=np.float32), self.node_min, self.node_max,
+                                           self.node_right, self.node_start, self.node_count, self.primitives,
+                                           mesh_arrays.get("world_aabb_min"), mesh_arrays.get("world_aabb_max"),
+                                           self._hits)
+        return self.entity_uids[self._hits[:num_primitives]]
@@ -0,0 +1,70 @@
+import numpy as np
+
+
+class SkeletonBatch:
+
+    """
+    Bones of all skeletons created from the same resource, stacked one instance after the other so that a single
+    SkeletonPose.evaluate() call updates all of them, in parallel. Each skeleton's bone arrays are replaced by views
+    into the batch: animations still write into their own skeleton, and the bone palette still reads each
+    skeleton's skinning matrices, without any copies in between.
+    """
+
+    __slots__ = [
+        "pose",
+        "entity_uids",
+        "translations",
+        "rotations",
+        "scales",
+        "root_matrices",
+        "world_matrices",
+        "skinning_matrices"]
+
+    def __init__(self, skeletons: dict):
+        """
+        :param skeletons: dict, {entity_uid: Skeleton}, all initialised from the same resource
+        """
+
+        # Skeletons of the same resource have the same bones, so any of their poses can evaluate all of them
+        self.pose = next(iter(skeletons.values())).pose
+        self.entity_uids = tuple(skeletons.keys())
+
+        num_skeletons = len(skeletons)
+        self.translations = np.stack([skeleton.translations for skeleton in skeletons.values()])
+        self.rotations = np.stack([skeleton.rotations for skeleton in skeletons.values()])
+        self.scales = np.stack([skeleton.scales for skeleton in skeletons.values()])
+        self.root_matrices = np.repeat(np.eye(4, dtype=np.float32)[np.newaxis], num_skeletons, axis=0)
+        self.world_matrices = np.empty((num_skeletons, self.pose.num_bones, 4, 4), dtype=np.float32)
+        self.skinning_matrices = None
+        if self.pose.inverse_bind_matrices is not None:
+            self.skinning_matrices = np.empty_like(self.world_matrices)
+
+        for index, skeleton in enumerate(skeletons.values()):
+            skeleton.translations = self.translations[index]
+            skeleton.rotations = self.rotations[index]
+            skeleton.scales = self.scales[index]
+            skeleton.world_matrices = self.world_matrices[index]
+            if self.skinning_matrices is not None:
+                skeleton.skinning_matrices = self.skinning_matrices[index]
+
+    def update(self, transform_world_matrices: np.ndarray, transform_rows: np.ndarray):
+        """
+        Re-calculates the world (and skinning) matrices of all skeletons in the batch, each one offset by the world
+        matrix of its entity's transform
+
+        :param transform_world_matrices: numpy array (num_transforms, 4, 4), world matrices of the transforms
+        :param transform_rows: numpy array (num_skeletons,) <int>, row of each skeleton's transform, in the order
+                               of entity_uids, or -1 if it has none
+        :return: None
+        """
+
+        has_transform = transform_rows >= 0
+        self.root_matrices[has_transform] = transform_world_matrices[transform_rows[has_transform]]
+        self.root_matrices[~has_transform] = np.eye(4, dtype=np.float32)
+
+        self.pose.evaluate(translations=self.translations,
+                           rotations=self.rotations,
+                           scales=self.scales,
+                           world_matrices_out=self.world_matrices,
+                           root_matrices=self.root_matrices,
+                           skinning_matrices_out=self.skinning_matrices)
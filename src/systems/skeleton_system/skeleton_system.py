@@ -1,13 +1,13 @@
-import numpy as np
 import moderngl
 import logging
+import numpy as np
 
 from src.core import constants
 from src.core.scene import Scene
 from src.systems.system import System
 from src.core.event_publisher import EventPublisher
 from src.core.action_publisher import ActionPublisher
-from src.math import mat4
+from src.systems.skeleton_system.skeleton_batch import SkeletonBatch
 
 # DEBUG
 
@@ -17,85 +17,68 @@ class SkeletonSystem(System):
     name = "skeleton_system"
 
     __slots__ = [
-        "update_tree",
-        "entity_uid_update_order"
+        "skeleton_batches",
+        "num_skeletons_updated",
+        "num_bones_updated"
     ]
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
 
+        # {resource_id: SkeletonBatch}
+        self.skeleton_batches = {}
+
+        # Counters of the last update
+        self.num_skeletons_updated = 0
+        self.num_bones_updated = 0
+
     def initialise(self) -> bool:
         return True
 
     def update(self, elapsed_time: float, context: moderngl.Context) -> bool:
 
-        """if self.update_tree:
-            self.update_transform_tree()
-            self.update_tree = False
+        # Bone matrices follow their entity's transform, so this system must run after the transform system
+        transform_arrays = self.scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        world_matrices = transform_arrays.get("world_matrix")
+
+        self.num_skeletons_updated = 0
+        self.num_bones_updated = 0
 
-        skeleton_pool = self.component_pool.get_pool(component_type=constants.COMPONENT_TYPE_SKELETON)
+        # Skeletons of the same resource are evaluated together, in a single call
+        skeleton_groups = {}
+        skeleton_pool = self.scene.get_pool(component_type=constants.COMPONENT_TYPE_SKELETON)
         for entity_uid, skeleton in skeleton_pool.items():
-            pass
 
-        transform_3d_pool = self.component_pool.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM_3D)
+            # Not initialised yet
+            if skeleton.pose is None:
+                continue
 
-        # TODO: [OPTIMIZE] Not all world matrices need to be recreated all the time! Take the dirty flags into account!
-        for entity_uid in self.entity_uid_update_order:
+            skeleton.update_animation(elapsed_time=elapsed_time)
 
-            entity = self.component_pool.entities[entity_uid]
-            transform = transform_3d_pool[entity_uid]
+            resource_id = skeleton.parameters[constants.COMPONENT_ARG_RESOURCE_ID]
+            skeleton_groups.setdefault(resource_id, {})[entity_uid] = skeleton
 
-            transform.update()
+        # Batches are only re-created when skeletons are added or removed
+        skeleton_batches = {}
+        for resource_id, skeletons in skeleton_groups.items():
+            skeleton_batch = self.skeleton_batches.get(resource_id, None)
+            if skeleton_batch is None or skeleton_batch.entity_uids != tuple(skeletons.keys()):
+                skeleton_batch = SkeletonBatch(skeletons=skeletons)
+            skeleton_batches[resource_id] = skeleton_batch
 
-            if entity.parent_uid is None:
-                transform.world_matrix = transform.local_matrix
-                continue
+            transform_rows = np.fromiter((transform_arrays.uid2row.get(entity_uid, -1) for entity_uid in skeletons),
+                                         dtype=np.int64,
+                                         count=len(skeletons))
+            skeleton_batch.update(transform_world_matrices=world_matrices, transform_rows=transform_rows)
 
-            # TODO: Think of a way to minimise necessary updates. Probably do it when we move to DOD
-            parent_transform = transform_3d_pool[entity.parent_uid]
-            transform.world_matrix = parent_transform.world_matrix @ transform.local_matrix
+            self.num_skeletons_updated += len(skeletons)
+            self.num_bones_updated += len(skeletons) * skeleton_batch.pose.num_bones
+        self.skeleton_batches = skeleton_batches
 
         # ================= Process actions =================
 
         self.select_next_action()
         if self.current_action is None:
-            return True"""
+            return True
 
         return True
-
-    def update_transform_tree(self):
-
-        temp_update_order = []
-
-        # Populate list out-of-order
-        uid2index = {}
-        for index, (entity_uid, entity) in enumerate(self.scene.entities.items()):
-            uid2index[entity_uid] = index
-            temp_update_order.append((entity_uid, entity.parent_uid if entity.parent_uid is not None else -1))
-
-        order_array = np.array(temp_update_order, dtype=np.int32)
-
-        # Sort list so that no child is updated before its parent
-        for index in range(order_array.shape[0]):
-
-            entity_uid = order_array[index, 0]
-            parent_uid = order_array[index, 1]
-
-            if parent_uid == -1:
-                continue
-
-            # Ir parent comes after the child, swap them
-            while uid2index[parent_uid] > index:
-
-                parent_index = uid2index[parent_uid]
-
-                temp = order_array[index, :].copy()
-                order_array[index, :] = order_array[parent_index, :].copy()
-                order_array[parent_index, :] = temp
-
-                uid2index[entity_uid] = parent_index
-                uid2index[parent_uid] = index
-                break
-
-        # Now we can get rid of the map
-        self.entity_uid_update_order = order_array[:, 0].tolist()
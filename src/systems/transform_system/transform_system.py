@@ -7,7 +7,9 @@ from src.core.scene import Scene
 from src.systems.system import System
 from src.core.event_publisher import EventPublisher
 from src.core.action_publisher import ActionPublisher
+from src.components.transform_3d import Transform3D
 from src.math import mat4
+from src.math.hierarchy import build_levels
 
 # DEBUG
 
@@ -18,7 +20,13 @@ class TransformSystem(System):
 
     __slots__ = [
         "update_tree",
-        "entity_uid_update_order"
+        "entity_uid_update_order",
+        "level_offsets",
+        "level_rows",
+        "level_parent_rows",
+        "transform_arrays_version",
+        "num_local_matrices_updated",
+        "num_world_matrices_updated"
     ]
 
     def __init__(self, **kwargs):
@@ -27,46 +35,63 @@ class TransformSystem(System):
         self.entity_uid_update_order = []  # Ordered as a DAG
         self.update_tree = True
 
+        # Rows of the scene's transform arrays sorted by depth in the hierarchy, the rows of their parents (or -1
+        # for roots), and where each depth level starts and ends: level_rows[level_offsets[i]:level_offsets[i + 1]]
+        self.level_offsets = np.zeros((1,), dtype=np.int64)
+        self.level_rows = np.empty((0,), dtype=np.int64)
+        self.level_parent_rows = np.empty((0,), dtype=np.int64)
+        self.transform_arrays_version = -1
+
+        # Counters of the last update
+        self.num_local_matrices_updated = 0
+        self.num_world_matrices_updated = 0
+
     def initialise(self) -> bool:
         return True
 
     def update(self, elapsed_time: float, context: moderngl.Context) -> bool:
 
-        if self.update_tree:
+        transform_arrays = self.scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+
+        # Rows move when transforms are added or removed, so the cached rows need rebuilding too
+        update_all = self.update_tree or self.transform_arrays_version != transform_arrays.version
+        if update_all:
             self.update_transform_tree()
             self.update_tree = False
 
-        transform_3d_pool = self.scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        local_matrix_updated = Transform3D.update_arrays(component_arrays=transform_arrays)
+        self.num_local_matrices_updated = int(np.count_nonzero(local_matrix_updated))
+
+        # Only the entities that moved, and everything below them, get their world matrices recomputed
+        world_matrices = transform_arrays.get("world_matrix")
+        dirty = transform_arrays.get("dirty")
+        self.num_world_matrices_updated = update_world_matrices(
+            level_offsets=self.level_offsets,
+            level_rows=self.level_rows,
+            level_parent_rows=self.level_parent_rows,
+            local_matrices=transform_arrays.get("local_matrix"),
+            local_matrix_updated=local_matrix_updated,
+            world_matrices=world_matrices,
+            inverse_world_matrices=transform_arrays.get("inverse_world_matrix"),
+            dirty=dirty,
+            update_all=update_all)
+
+        # Multi-transform update. If the entity moved, all its instances did, otherwise only those in the dirty range
         multi_transform_3d_pool = self.scene.get_pool(component_type=constants.COMPONENT_TYPE_MULTI_TRANSFORM_3D)
+        for entity_uid, multi_transform in multi_transform_3d_pool.items():
 
-        # TODO: [OPTIMIZE] Not all world matrices need to be recreated all the time! Take the dirty flags into account!
-        for entity_uid in self.entity_uid_update_order:
-
-            entity = self.scene.entities[entity_uid]
-            transform = transform_3d_pool.get(entity_uid, None)
-            if transform is None:
+            row = transform_arrays.uid2row.get(entity_uid, None)
+            if row is None or multi_transform.world_matrices is None:
                 continue
 
-            local_matrix_updated = transform.update()
-
-            if entity.parent_uid:
-                parent_transform = transform_3d_pool[entity.parent_uid]
-                transform.world_matrix = parent_transform.world_matrix @ transform.local_matrix
-            else:
-                transform.world_matrix = transform.local_matrix
-
-            mat4.even_faster_inverse(in_mat4=transform.world_matrix,
-                                     out_mat4=transform.inverse_world_matrix)
-
-            # Multi-transform update
-            multi_transform = multi_transform_3d_pool.get(entity_uid)
-            if multi_transform is None:
+            if dirty[row]:
+                multi_transform.mark_dirty()
+            if not multi_transform.is_dirty():
                 continue
 
-            if local_matrix_updated:
-                multi_transform.world_matrices = np.matmul(transform.world_matrix, multi_transform.local_matrices)
-                multi_transform.world_matrices = multi_transform.world_matrices.transpose((0, 2, 1))
-                multi_transform.dirty = True
+            instances = slice(multi_transform.dirty_start, multi_transform.dirty_stop)
+            mat4.mul_mat4s(world_matrices[row], multi_transform.local_matrices[instances],
+                           multi_transform.world_matrices[instances])
 
         # ================= Process actions =================
 
@@ -78,37 +103,63 @@ class TransformSystem(System):
 
     def update_transform_tree(self):
 
-        temp_update_order = []
-
-        # Populate list out-of-order
-        uid2index = {}
-        for index, (entity_uid, entity) in enumerate(self.scene.entities.items()):
-            uid2index[entity_uid] = index
-            temp_update_order.append((entity_uid, entity.parent_uid if entity.parent_uid is not None else -1))
-
-        order_array = np.array(temp_update_order, dtype=np.int32)
-
-        # Sort list so that no child is updated before its parent
-        for index in range(order_array.shape[0]):
-
-            entity_uid = order_array[index, 0]
-            parent_uid = order_array[index, 1]
-
-            if parent_uid == -1:
-                continue
-
-            # Ir parent comes after the child, swap them
-            while uid2index[parent_uid] > index:
-
-                parent_index = uid2index[parent_uid]
-
-                temp = order_array[index, :].copy()
-                order_array[index, :] = order_array[parent_index, :].copy()
-                order_array[parent_index, :] = temp
-
-                uid2index[entity_uid] = parent_index
-                uid2index[parent_uid] = index
-                break
-
-        # Now we can get rid of the map
-        self.entity_uid_update_order = order_array[:, 0].tolist()
+        # Entities whose parent has no transform are treated as roots
+        transform_arrays = self.scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+        entity_uids = transform_arrays.get_entity_uids()
+        parent_uids = [self.scene.entities[entity_uid].parent_uid for entity_uid in entity_uids.tolist()]
+        parent_rows = transform_arrays.get_rows(entity_uids=parent_uids)
+
+        self.level_offsets, self.level_rows, self.level_parent_rows = build_levels(parent_rows=parent_rows)
+
+        self.entity_uid_update_order = entity_uids[self.level_rows].tolist()
+        self.transform_arrays_version = transform_arrays.version
+
+
+def update_world_matrices(level_offsets: np.ndarray,
+                          level_rows: np.ndarray,
+                          level_parent_rows: np.ndarray,
+                          local_matrices: np.ndarray,
+                          local_matrix_updated: np.ndarray,
+                          world_matrices: np.ndarray,
+                          inverse_world_matrices: np.ndarray,
+                          dirty: np.ndarray,
+                          update_all: bool) -> int:
+    """
+    Computes world = parent_world @ local for every row whose local matrix was updated or whose parent's world
+    matrix was recomputed, one depth level at a time with a single batched matmul per level. All inverses are
+    then computed in one batched call. On return, "dirty" is TRUE only for the rows that were recomputed
+
+    :return: int, number of world matrices recomputed
+    """
+
+    dirty[:] = True if update_all else local_matrix_updated
+    if not dirty.any():
+        return 0
+
+    # Roots
+    roots = level_rows[level_offsets[0]:level_offsets[1]]
+    dirty_roots = roots[dirty[roots]]
+    world_matrices[dirty_roots] = local_matrices[dirty_roots]
+
+    for level in range(1, level_offsets.size - 1):
+        rows = level_rows[level_offsets[level]:level_offsets[level + 1]]
+        parent_rows = level_parent_rows[level_offsets[level]:level_offsets[level + 1]]
+
+        level_dirty = dirty[rows] | dirty[parent_rows]
+        dirty[rows] = level_dirty
+        dirty_rows = rows[level_dirty]
+        if dirty_rows.size == 0:
+            continue
+
+        world_matrices[dirty_rows] = np.matmul(world_matrices[parent_rows[level_dirty]], local_matrices[dirty_rows])
+
+    dirty_rows = np.flatnonzero(dirty)
+    if dirty_rows.size == dirty.size:
+        mat4.even_faster_inverses(in_mat4s=world_matrices, out_mat4s=inverse_world_matrices)
+        return dirty_rows.size
+
+    inverse_matrices = np.empty((dirty_rows.size, 4, 4), dtype=inverse_world_matrices.dtype)
+    mat4.even_faster_inverses(in_mat4s=world_matrices[dirty_rows], out_mat4s=inverse_matrices)
+    inverse_world_matrices[dirty_rows] = inverse_matrices
+
+    return dirty_rows.size
@@ -1,6 +1,10 @@
+import os
 import re
 import pandas as pd
 import numpy as np
+from numba import njit
+
+from src.utilities.utils_ascii import is_separator, parse_float
 
 PARAMS_NAME = "name"
 PARAMS_PARENT = 'parent'
@@ -45,6 +49,398 @@ JOINTS_DF_KEY_ROTATION_ORDER = 'rot_order'
 END_SITE_KEY = 'end_site'
 END_SITE_PLACEHOLDER_ROTATION_ORDER = 'none'
 
+# Streaming parser
+BVH_POSITION_CHANNELS = {b'Xposition': 0, b'Yposition': 1, b'Zposition': 2}
+BVH_ROTATION_CHANNELS = {b'Xrotation': 0, b'Yrotation': 1, b'Zrotation': 2}
+BVH_HEADER_KEY_BONE_NAMES = "bone_names"
+BVH_HEADER_KEY_PARENT_INDEX = "parent_index"
+BVH_HEADER_KEY_OFFSETS = "offsets"
+BVH_HEADER_KEY_LENGTHS = "lengths"
+BVH_HEADER_KEY_ROTATION_ORDERS = "rotation_orders"
+BVH_HEADER_KEY_POSITION_COLUMNS = "position_columns"
+BVH_HEADER_KEY_ROTATION_COLUMNS = "rotation_columns"
+BVH_HEADER_KEY_NUM_CHANNELS = "num_channels"
+BVH_HEADER_KEY_NUM_FRAMES = "num_frames"
+BVH_HEADER_KEY_FRAME_PERIOD = "frame_period"
+BVH_HEADER_KEY_MOTION_OFFSET = "motion_offset"
+BVH_FRAME_INDEX_FILE_EXTENSION = ".frame_index.npz"
+BVH_FRAME_INDEX_READ_SIZE = 1 << 24  # Bytes of motion data scanned at a time when building the frame index
+
+
+def read_bvh_header(file, scale=1.0) -> dict:
+    """
+    Parses the HIERARCHY block and the first lines of the MOTION block of a .bvh file opened in binary mode. Once
+    this returns, the file position is at the first frame line, and "motion_offset" holds that position in bytes.
+
+    Bones are returned in breadth-first order (same as BVHReader), so a parent always comes before its children.
+    "position_columns" and "rotation_columns" are (num_bones, 3) arrays with the index of the motion column of each
+    X, Y and Z channel, or -1 if the bone doesn't have that channel.
+
+    :param file: file object opened with "rb"
+    :param scale: float, value by which to multiply all joint offsets
+    :return: dict
+    """
+
+    # Joints in file (depth-first) order, including End Sites
+    joint_names = []
+    joint_parents = []
+    joint_offsets = []
+    joint_is_end_site = []
+    joint_position_columns = []
+    joint_rotation_columns = []
+    joint_rotation_orders = []
+
+    current_index = -1
+    num_channels = 0
+    num_frames = None
+    frame_period = 0.0
+
+    while True:
+        line = file.readline()
+        if not line:
+            raise ValueError("[ERROR] Unexpected end of file while reading BVH header")
+
+        tokens = line.split()
+        if len(tokens) == 0:
+            continue
+        key = tokens[0]
+
+        if key in (b'ROOT', b'JOINT') or key == b'End':
+            is_end_site = key == b'End'
+            joint_names.append(END_SITE_KEY if is_end_site else tokens[1].decode())
+            joint_parents.append(current_index)
+            joint_offsets.append((0.0, 0.0, 0.0))
+            joint_is_end_site.append(is_end_site)
+            joint_position_columns.append([-1, -1, -1])
+            joint_rotation_columns.append([-1, -1, -1])
+            joint_rotation_orders.append(END_SITE_PLACEHOLDER_ROTATION_ORDER if is_end_site else '')
+            current_index = len(joint_names) - 1
+            continue
+
+        if key == b'OFFSET':
+            joint_offsets[current_index] = tuple(float(value) * scale for value in tokens[1:4])
+            continue
+
+        if key == b'CHANNELS':
+            for channel_name in tokens[2:]:
+                if channel_name in BVH_POSITION_CHANNELS:
+                    joint_position_columns[current_index][BVH_POSITION_CHANNELS[channel_name]] = num_channels
+                elif channel_name in BVH_ROTATION_CHANNELS:
+                    joint_rotation_columns[current_index][BVH_ROTATION_CHANNELS[channel_name]] = num_channels
+                    joint_rotation_orders[current_index] += channel_name[:1].decode().lower()
+                num_channels += 1
+            continue
+
+        if key == b'}':
+            current_index = joint_parents[current_index]
+            continue
+
+        if key == b'Frames:':
+            num_frames = int(tokens[1])
+            continue
+
+        if key == b'Frame' and tokens[1] == b'Time:':
+            frame_period = float(tokens[2])
+            break
+
+    if num_frames is None:
+        raise ValueError("[ERROR] BVH file has no 'Frames:' line")
+
+    # Bone length is the distance to the mean position of its immediate children, End Sites included
+    num_joints = len(joint_names)
+    joint_offsets = np.array(joint_offsets, dtype=np.float32).reshape(-1, 3)
+    joint_parents = np.array(joint_parents, dtype=np.int32)
+    children_lists = [[] for _ in range(num_joints)]
+    for index, parent_index in enumerate(joint_parents):
+        if parent_index > -1:
+            children_lists[parent_index].append(index)
+
+    child_indices = np.flatnonzero(joint_parents > -1)
+    num_children = np.bincount(joint_parents[child_indices], minlength=num_joints)
+    sum_children_pos = np.zeros((num_joints, 3), dtype=np.float32)
+    np.add.at(sum_children_pos, joint_parents[child_indices], joint_offsets[child_indices])
+    mean_children_pos = sum_children_pos / np.maximum(num_children, 1)[:, np.newaxis]
+    joint_lengths = np.where(num_children > 0,
+                             np.linalg.norm(mean_children_pos - joint_offsets, axis=1),
+                             0.0).astype(np.float32)
+
+    # Breadth-first order, skipping End Sites
+    root_indices = [index for index in range(num_joints) if joint_parents[index] == -1]
+    if len(root_indices) != 1:
+        raise ValueError(f"[ERROR] BVH must have exactly one root bone, found {len(root_indices)}")
+
+    bone_order = []
+    joints_to_check = root_indices
+    while len(joints_to_check) > 0:
+        bone_order.extend(joints_to_check)
+        joints_to_check = [child for index in joints_to_check for child in children_lists[index]
+                           if not joint_is_end_site[child]]
+
+    joint_to_bone_index = np.full(num_joints + 1, -1, dtype=np.int32)  # Last entry maps the root's parent (-1)
+    joint_to_bone_index[bone_order] = np.arange(len(bone_order), dtype=np.int32)
+    bone_order = np.array(bone_order, dtype=np.int32)
+
+    return {
+        BVH_HEADER_KEY_BONE_NAMES: [joint_names[index] for index in bone_order],
+        BVH_HEADER_KEY_PARENT_INDEX: joint_to_bone_index[joint_parents[bone_order]],
+        BVH_HEADER_KEY_OFFSETS: joint_offsets[bone_order],
+        BVH_HEADER_KEY_LENGTHS: joint_lengths[bone_order],
+        BVH_HEADER_KEY_ROTATION_ORDERS: [joint_rotation_orders[index] for index in bone_order],
+        BVH_HEADER_KEY_POSITION_COLUMNS: np.array(joint_position_columns, dtype=np.int32)[bone_order],
+        BVH_HEADER_KEY_ROTATION_COLUMNS: np.array(joint_rotation_columns, dtype=np.int32)[bone_order],
+        BVH_HEADER_KEY_NUM_CHANNELS: num_channels,
+        BVH_HEADER_KEY_NUM_FRAMES: num_frames,
+        BVH_HEADER_KEY_FRAME_PERIOD: frame_period,
+        BVH_HEADER_KEY_MOTION_OFFSET: file.tell()}
+
+
+def parse_bvh_motion(motion_bytes: bytes, header: dict, num_frames=None) -> tuple:
+    """
+    Converts the raw text of consecutive frame lines into (num_frames, num_bones, 3) position and rotation arrays,
+    all in one go. Rotations are converted to radians. Bones without position channels get zero positions.
+
+    :param motion_bytes: bytes, one or more complete frame lines
+    :param header: dict, output of read_bvh_header()
+    :param num_frames: int, if provided, the number of frames expected in "motion_bytes"
+    :return: tuple (positions, rotations)
+    """
+
+    num_channels = header[BVH_HEADER_KEY_NUM_CHANNELS]
+    buffer = np.frombuffer(motion_bytes, dtype=np.uint8)
+    values = np.empty((buffer.size + 1) // 2, dtype=np.float32)  # Every value takes at least 2 bytes
+    num_values = parse_ascii_floats(buffer=buffer, output=values)
+    if num_values < 0:
+        raise ValueError(f"[ERROR] Invalid character in BVH motion data at byte {-num_values - 1}")
+    values = values[:num_values]
+
+    if values.size % num_channels != 0:
+        raise ValueError(f"[ERROR] BVH motion data has {values.size} values, which is not a multiple of "
+                         f"the {num_channels} channels per frame")
+
+    frames = values.reshape(-1, num_channels)
+    if num_frames is not None:
+        if frames.shape[0] < num_frames:
+            raise ValueError(f"[ERROR] Expected {num_frames} BVH frames, found {frames.shape[0]}")
+        frames = frames[:num_frames]
+
+    positions = _gather_bvh_channels(frames=frames, columns=header[BVH_HEADER_KEY_POSITION_COLUMNS])
+    rotations = _gather_bvh_channels(frames=frames, columns=header[BVH_HEADER_KEY_ROTATION_COLUMNS])
+    np.radians(rotations, out=rotations)
+
+    return positions, rotations
+
+
+def load_bvh(fpath: str, scale=1.0, start_frame=0, end_frame=None) -> tuple:
+    """
+    Loads skeleton and animation of a .bvh file without going through pandas. The hierarchy is parsed line by line
+    once, and the MOTION block is parsed in a single vectorized call. If only a range of frames is requested, only
+    those frame lines are read from the disk, using the file's frame index (see get_bvh_frame_index())
+
+    :param fpath: str, .bvh filepath
+    :param scale: float, value by which to multiply all joint offsets
+    :param start_frame: int, first frame to load
+    :param end_frame: int, frame after the last one to load. If None, loads until the end of the animation
+    :return: tuple (header, positions, rotations). See read_bvh_header() and parse_bvh_motion()
+    """
+
+    with open(fpath, "rb") as file:
+        header = read_bvh_header(file=file, scale=scale)
+        start_frame, end_frame = _clip_frame_range(header=header, start_frame=start_frame, end_frame=end_frame)
+
+        if start_frame == 0 and end_frame == header[BVH_HEADER_KEY_NUM_FRAMES]:
+            motion_bytes = file.read()
+        else:
+            frame_index = get_bvh_frame_index(fpath=fpath, file=file, header=header)
+            file.seek(frame_index[start_frame])
+            motion_bytes = file.read(frame_index[end_frame] - frame_index[start_frame])
+
+    positions, rotations = parse_bvh_motion(motion_bytes=motion_bytes,
+                                            header=header,
+                                            num_frames=end_frame - start_frame)
+
+    return header, positions, rotations
+
+
+def iter_bvh_frames(fpath: str, num_frames_per_chunk: int, scale=1.0, start_frame=0, end_frame=None):
+    """
+    Generator that reads the animation of a .bvh file in chunks of "num_frames_per_chunk" frames, so that very long
+    captures can be processed in bounded memory. The header is parsed only once.
+
+    :return: yields tuples (header, chunk_start_frame, positions, rotations)
+    """
+
+    with open(fpath, "rb") as file:
+        header = read_bvh_header(file=file, scale=scale)
+        start_frame, end_frame = _clip_frame_range(header=header, start_frame=start_frame, end_frame=end_frame)
+        frame_index = get_bvh_frame_index(fpath=fpath, file=file, header=header)
+
+        for chunk_start_frame in range(start_frame, end_frame, num_frames_per_chunk):
+            chunk_end_frame = min(chunk_start_frame + num_frames_per_chunk, end_frame)
+            file.seek(frame_index[chunk_start_frame])
+            motion_bytes = file.read(frame_index[chunk_end_frame] - frame_index[chunk_start_frame])
+            positions, rotations = parse_bvh_motion(motion_bytes=motion_bytes,
+                                                    header=header,
+                                                    num_frames=chunk_end_frame - chunk_start_frame)
+            yield header, chunk_start_frame, positions, rotations
+
+
+def get_bvh_frame_index(fpath: str, file, header: dict) -> np.ndarray:
+    """
+    Returns the byte offset of every frame line in the file, plus one extra entry marking the end of the last frame.
+    Frame "i" is therefore stored in bytes [index[i], index[i + 1]). The index is built once and saved next to the
+    .bvh file, and rebuilt whenever the .bvh file changes size or modification time.
+
+    :param fpath: str, .bvh filepath
+    :param file: file object of the same .bvh file, opened with "rb"
+    :param header: dict, output of read_bvh_header()
+    :return: np.ndarray (num_frames + 1,) int64
+    """
+
+    index_fpath = f"{fpath}{BVH_FRAME_INDEX_FILE_EXTENSION}"
+    file_stat = os.stat(fpath)
+    source_info = np.array([file_stat.st_size, file_stat.st_mtime_ns, header[BVH_HEADER_KEY_MOTION_OFFSET]],
+                           dtype=np.int64)
+
+    if os.path.isfile(index_fpath):
+        try:
+            with np.load(index_fpath) as index_file:
+                if np.array_equal(index_file["source_info"], source_info):
+                    return index_file["frame_offsets"]
+        except (OSError, ValueError, KeyError):
+            pass  # Corrupted or outdated index. Just rebuild it
+
+    frame_offsets = build_bvh_frame_index(file=file, header=header)
+
+    # Failing to save the index only means it will be built again next time
+    temp_fpath = f"{index_fpath}.{os.getpid()}.tmp"
+    try:
+        with open(temp_fpath, "wb") as index_file:
+            np.savez(index_file, source_info=source_info, frame_offsets=frame_offsets)
+        os.replace(temp_fpath, index_fpath)
+    except OSError:
+        if os.path.exists(temp_fpath):
+            os.remove(temp_fpath)
+
+    return frame_offsets
+
+
+def build_bvh_frame_index(file, header: dict) -> np.ndarray:
+    """
+    Scans the MOTION block in large reads and finds where each non-empty line starts and ends, without parsing any
+    values. See get_bvh_frame_index()
+    """
+
+    num_frames = header[BVH_HEADER_KEY_NUM_FRAMES]
+    frame_offsets = np.empty(num_frames + 1, dtype=np.int64)
+    num_indexed_frames = 0
+
+    file.seek(header[BVH_HEADER_KEY_MOTION_OFFSET])
+    block_offset = file.tell()
+
+    # Line that started in a previous block, but hasn't ended yet
+    pending_line_start = block_offset
+    pending_line_has_values = False
+
+    while num_indexed_frames < num_frames:
+        block = file.read(BVH_FRAME_INDEX_READ_SIZE)
+        if not block:
+            break
+
+        buffer = np.frombuffer(block, dtype=np.uint8)
+        newline_indices = np.flatnonzero(buffer == 10)
+        num_values_cumsum = np.zeros(buffer.size + 1, dtype=np.int64)
+        np.cumsum(buffer > 32, out=num_values_cumsum[1:])  # Anything above space is part of a value
+
+        # Complete lines inside this block. The first one is the continuation of the pending line
+        segment_starts = np.concatenate([[0], newline_indices[:-1] + 1])[:newline_indices.size]
+        line_has_values = num_values_cumsum[newline_indices] > num_values_cumsum[segment_starts]
+        line_starts = segment_starts + block_offset
+        if newline_indices.size > 0:
+            line_starts[0] = pending_line_start
+            line_has_values[0] |= pending_line_has_values
+
+        new_starts = line_starts[line_has_values]
+        new_ends = newline_indices[line_has_values] + 1 + block_offset
+        num_new_frames = min(new_starts.size, num_frames - num_indexed_frames)
+        if num_new_frames > 0:
+            frame_offsets[num_indexed_frames:num_indexed_frames + num_new_frames] = new_starts[:num_new_frames]
+            frame_offsets[num_indexed_frames + num_new_frames] = new_ends[num_new_frames - 1]
+            num_indexed_frames += num_new_frames
+
+        # Whatever comes after the last newline becomes the pending line
+        tail_start = newline_indices[-1] + 1 if newline_indices.size > 0 else 0
+        tail_has_values = num_values_cumsum[-1] > num_values_cumsum[tail_start]
+        if newline_indices.size > 0:
+            pending_line_start = tail_start + block_offset
+            pending_line_has_values = bool(tail_has_values)
+        else:
+            pending_line_has_values |= bool(tail_has_values)
+
+        block_offset += len(block)
+
+    # The last frame might not end with a newline
+    if num_indexed_frames < num_frames and pending_line_has_values:
+        frame_offsets[num_indexed_frames] = pending_line_start
+        frame_offsets[num_indexed_frames + 1] = block_offset
+        num_indexed_frames += 1
+
+    if num_indexed_frames < num_frames:
+        raise ValueError(f"[ERROR] Expected {num_frames} BVH frames, found {num_indexed_frames}")
+
+    return frame_offsets
+
+
+def _clip_frame_range(header: dict, start_frame: int, end_frame) -> tuple:
+
+    num_frames = header[BVH_HEADER_KEY_NUM_FRAMES]
+    end_frame = num_frames if end_frame is None else min(end_frame, num_frames)
+    if not 0 <= start_frame <= end_frame:
+        raise ValueError(f"[ERROR] Invalid frame range [{start_frame}, {end_frame}) for {num_frames} frames")
+    return start_frame, end_frame
+
+
+@njit(cache=True)
+def parse_ascii_floats(buffer: np.ndarray, output: np.ndarray) -> int:
+    """
+    Parses whitespace-separated decimal numbers (e.g. "-1.5e-05") from an array of ASCII bytes. Much faster than
+    np.fromstring() for the short numbers found in motion capture files.
+
+    :param buffer: np.ndarray (N,) uint8
+    :param output: np.ndarray float32, where the values are written to. Must be large enough
+    :return: int, number of values parsed, or -(index + 1) of the first invalid byte
+    """
+
+    num_bytes = buffer.size
+    num_values = 0
+    index = 0
+
+    while index < num_bytes:
+
+        if is_separator(buffer[index]):
+            index += 1
+            continue
+
+        value, index, valid = parse_float(buffer=buffer, index=index)
+
+        # Anything else than a separator right after a number is invalid
+        if not valid or (index < num_bytes and not is_separator(buffer[index])):
+            return -(index + 1)
+
+        output[num_values] = value
+        num_values += 1
+
+    return num_values
+
+
+def _gather_bvh_channels(frames: np.ndarray, columns: np.ndarray) -> np.ndarray:
+
+    # Missing channels point to an extra column of zeros
+    padded_columns = np.where(columns < 0, frames.shape[1], columns)
+    padded_frames = np.empty((frames.shape[0], frames.shape[1] + 1), dtype=np.float32)
+    padded_frames[:, :-1] = frames
+    padded_frames[:, -1] = 0.0
+    return padded_frames[:, padded_columns]
+
 
 class BVHReader:
 
@@ -264,68 +264,88 @@ class GLTFReader:
         return self.gltf_header["materials"][index]
 
     def get_animations(self) -> list:
+        """
+        Returns one dictionary per animation, with its name and its channels grouped by target path
+        ("translation", "rotation" or "scale"). CUBICSPLINE channels keep their values as stored in the file:
+        in-tangent, value and out-tangent for each keyframe
+        """
 
-        # TODO: It should return a list of dictionaries, each with their channels
+        animations = []
+        if self.gltf_header is None or "animations" not in self.gltf_header:
+            return animations
 
-        animation_channels = {"translation": [],
-                              "rotation": [],
-                              "scale": []}
+        for animation_index, animation_header in enumerate(self.gltf_header["animations"]):
 
-        if self.gltf_header is None or "animations" not in self.gltf_header:
-            return animation_channels
+            animation_channels = {"translation": [],
+                                  "rotation": [],
+                                  "scale": []}
 
-        for animation_header in self.gltf_header["animations"]:
             for channel in animation_header["channels"]:
+                target_path = channel["target"]["path"]
+
+                # Morph target weights are not supported
+                if target_path not in animation_channels or "node" not in channel["target"]:
+                    continue
+
                 sampler = animation_header["samplers"][channel["sampler"]]
                 input_accessor = self.gltf_header["accessors"][sampler["input"]]
                 output_accessor = self.gltf_header["accessors"][sampler["output"]]
 
-                animation_channels[channel["target"]["path"]].append(
+                animation_channels[target_path].append(
                     {"node_index": channel["target"]["node"],
+                     "interpolation": sampler.get("interpolation", "LINEAR"),
                      "timestamps": self.get_data(accessor=input_accessor),
                      "values": self.get_data(accessor=output_accessor)})
 
-        return animation_channels
+            animations.append({"name": animation_header.get("name", f"animation_{animation_index}"),
+                               "channels": animation_channels})
+
+        return animations
 
     def get_nodes(self) -> list:
 
         if self.gltf_header is None:
             return None
 
-        nodes = []
-        for gltf_node in self.gltf_header["nodes"]:
-
-            # TODO: Matrices and translation/rotation/scale need to be checked beforehand to make sure they match
+        gltf_nodes = self.gltf_header["nodes"]
+        num_nodes = len(gltf_nodes)
+
+        # TODO: Matrices and translation/rotation/scale need to be checked beforehand to make sure they match
+        translations = np.array([gltf_node.get('translation', [0, 0, 0]) for gltf_node in gltf_nodes],
+                                dtype=np.float32).reshape(num_nodes, 3)
+        rotations = np.array([gltf_node.get('rotation', [0, 0, 0, 1]) for gltf_node in gltf_nodes],
+                             dtype=np.float32).reshape(num_nodes, 4)
+        scales = np.array([gltf_node.get('scale', [1, 1, 1]) for gltf_node in gltf_nodes],
+                          dtype=np.float32).reshape(num_nodes, 3)
+        matrices = np.empty((num_nodes, 4, 4), dtype=np.float32)
+        mat4.matrix_compositions(translations, rotations, scales, matrices)
+
+        # If "matrix" is defined, update translation, rotation and scale to reflect that
+        matrix_node_indices = [index for index, gltf_node in enumerate(gltf_nodes) if "matrix" in gltf_node]
+        if len(matrix_node_indices) > 0:
+            gltf_matrices = np.array([gltf_nodes[index]["matrix"] for index in matrix_node_indices], dtype=np.float32)
+            gltf_matrices = np.ascontiguousarray(np.reshape(gltf_matrices, (-1, 4, 4)).transpose((0, 2, 1)))
+            matrix_translations = np.empty((len(matrix_node_indices), 3), dtype=np.float32)
+            matrix_rotations = np.empty((len(matrix_node_indices), 4), dtype=np.float32)
+            matrix_scales = np.empty((len(matrix_node_indices), 3), dtype=np.float32)
+            mat4.matrix_decompositions(gltf_matrices, matrix_translations, matrix_rotations, matrix_scales)
+
+            matrices[matrix_node_indices] = gltf_matrices
+            translations[matrix_node_indices] = matrix_translations
+            rotations[matrix_node_indices] = matrix_rotations
+            scales[matrix_node_indices] = matrix_scales
 
-            node_data = {
+        nodes = []
+        for index, gltf_node in enumerate(gltf_nodes):
+            nodes.append({
                 'name': gltf_node.get('name', ""),
-                'translation': np.array(gltf_node.get('translation', [0, 0, 0]), dtype=np.float32),
-                'rotation': np.array(gltf_node.get('rotation', [0, 0, 0, 1]), dtype=np.float32),
-                'scale': np.array(gltf_node.get('scale', [1, 1, 1]), dtype=np.float32),
-                'matrix': None,
+                'translation': translations[index],
+                'rotation': rotations[index],
+                'scale': scales[index],
+                'matrix': matrices[index],
                 'children_indices': gltf_node.get('children', []),
                 'mesh_index': gltf_node.get('mesh', -1),
-                'skin_index': gltf_node.get('skin', -1)}
-
-            if "matrix" in gltf_node:
-                # If "matrix" is defined, update translation, rotation and scale to reflect that
-                gltf_matrix = np.reshape(np.array(gltf_node['matrix'], dtype=np.float32), (4, 4)).T
-                mat4.matrix_decomposition(
-                    gltf_matrix,
-                    node_data["translation"],
-                    node_data["rotation"],
-                    node_data["scale"])
-                node_data["matrix"] = gltf_matrix
-            else:
-                matrix = np.eye(4, dtype=np.float32)
-                mat4.matrix_composition(
-                    node_data["translation"],
-                    node_data["rotation"],
-                    node_data["scale"],
-                    matrix)
-                node_data["matrix"] = matrix
-
-            nodes.append(node_data)
+                'skin_index': gltf_node.get('skin', -1)})
 
         # Find out the parent indices to help out with future node re-organisation
         for current_index, node in enumerate(nodes):
@@ -443,11 +463,15 @@ class GLTFReader:
         skins = []
         for skin_header in self.gltf_header.get("skins", []):
             joints = skin_header["joints"]
-            inverse_bind_matrices_accessor = self.gltf_header["accessors"][skin_header["inverseBindMatrices"]]
-            inverse_bind_matrices_data = self.get_data(accessor=inverse_bind_matrices_accessor)
 
-            # Convert to a suitable format, e.g., 4x4 matrices
-            inverse_bind_matrices = inverse_bind_matrices_data.reshape((-1, 4, 4))
+            # Inverse bind matrices are optional, and identity when missing. GLTF stores them column-major
+            if "inverseBindMatrices" in skin_header:
+                inverse_bind_matrices_accessor = self.gltf_header["accessors"][skin_header["inverseBindMatrices"]]
+                inverse_bind_matrices_data = self.get_data(accessor=inverse_bind_matrices_accessor)
+                inverse_bind_matrices = np.ascontiguousarray(
+                    inverse_bind_matrices_data.reshape((-1, 4, 4)).transpose((0, 2, 1)))
+            else:
+                inverse_bind_matrices = np.tile(np.eye(4, dtype=np.float32), (len(joints), 1, 1))
 
             skin_data = {
                 'joints': joints,
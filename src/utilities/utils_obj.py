@@ -1,43 +1,327 @@
 import numpy as np
+from numba import njit
 
+from src.utilities.utils_ascii import parse_float
 
-def load_obj(fpath: str):
-    raw_vertices = []
-    raw_normals = []
-    raw_uvs = []
-    faces = []
-
-    with open(fpath, 'r') as file:
-        for line in file:
-            parts = [valid_part for valid_part in line.strip().split(' ') if len(valid_part) > 0]
-            if parts[0] == 'v':
-                raw_vertices.append([float(parts[1]), float(parts[2]), float(parts[3])])
-            elif parts[0] == 'vn':
-                raw_normals.append([float(parts[1]), float(parts[2]), float(parts[3])])
-            elif parts[0] == 'vt':
-                raw_uvs.append([float(parts[1]), float(parts[2])])
-            elif parts[0] == 'f':
-                try:
-                    face_data = [tuple(map(int, p.split('//'))) for p in parts[1:] if len(p) > 0]
-                except Exception:
-                    g = 0
-                faces.append(face_data)
-
-    indexed_vertices = []
-    indexed_normals = []
-    indexed_uvs = []
-    indices = []
-
-    for face in faces:
-        for v_idx, vt_idx, vn_idx in face:
-            indexed_vertices.append(raw_vertices[v_idx - 1])
-            indexed_uvs.append(raw_uvs[vt_idx - 1] if vt_idx else [0, 0])
-            indexed_normals.append(raw_normals[vn_idx - 1] if vn_idx else [0, 0, 0])
-            indices.append(len(indexed_vertices) - 1)
-
-    vertices = np.array(indexed_vertices, dtype=np.float32)
-    normals = np.array(indexed_normals, dtype=np.float32)
-    uvs = np.array(indexed_uvs, dtype=np.float32)
-    indices = np.array(indices, dtype=np.int32).reshape(-1, 3)
-
-    return vertices, normals, uvs, indices
\ No newline at end of file
+OBJ_ERROR_NONE = 0
+OBJ_ERROR_INVALID_NUMBER = 1
+OBJ_ERROR_INVALID_INDEX = 2
+OBJ_ERROR_MESSAGES = {
+    OBJ_ERROR_INVALID_NUMBER: "Invalid number",
+    OBJ_ERROR_INVALID_INDEX: "Face index out of range"}
+
+OBJ_LINE_OTHER = 0
+OBJ_LINE_VERTEX = 1
+OBJ_LINE_UV = 2
+OBJ_LINE_NORMAL = 3
+OBJ_LINE_FACE = 4
+
+
+def load_obj(fpath: str) -> tuple:
+    """
+    Loads an .obj file as a single indexed triangle mesh. The whole file is parsed by two numba passes over its raw
+    bytes: the first one counts elements, and the second one parses them. Supported face formats are "v", "v/vt",
+    "v//vn" and "v/vt/vn", with positive or negative (relative) indices. Polygons are fan-triangulated.
+
+    Each face corner references a position, uv and normal separately, so corners are deduplicated on their
+    (v, vt, vn) triplet with a hash table. Every unique triplet becomes one output vertex.
+
+    :param fpath: str, .obj filepath
+    :return: tuple (vertices, normals, uvs, indices). "normals" and "uvs" are None if the file has none
+    """
+
+    with open(fpath, "rb") as file:
+        buffer = np.frombuffer(file.read(), dtype=np.uint8)
+
+    num_vertices, num_uvs, num_normals, num_triangles = _count_obj_elements(buffer=buffer)
+
+    raw_vertices = np.empty((num_vertices, 3), dtype=np.float32)
+    raw_uvs = np.empty((num_uvs, 2), dtype=np.float32)
+    raw_normals = np.empty((num_normals, 3), dtype=np.float32)
+    corners = np.empty((num_triangles * 3, 3), dtype=np.int64)
+    error_code, error_position = _parse_obj_elements(buffer=buffer,
+                                                     vertices=raw_vertices,
+                                                     uvs=raw_uvs,
+                                                     normals=raw_normals,
+                                                     corners=corners)
+
+    if error_code != OBJ_ERROR_NONE:
+        line_number = int(np.count_nonzero(buffer[:error_position] == 10)) + 1
+        raise ValueError(f"[ERROR] {OBJ_ERROR_MESSAGES[error_code]} in {fpath}, line {line_number}")
+
+    unique_corners, indices = deduplicate_corners(corners=corners)
+
+    vertices = raw_vertices[unique_corners[:, 0]]
+    uvs = _gather_optional(values=raw_uvs, indices=unique_corners[:, 1]) if num_uvs > 0 else None
+    normals = _gather_optional(values=raw_normals, indices=unique_corners[:, 2]) if num_normals > 0 else None
+
+    return vertices, normals, uvs, indices.reshape(-1, 3).astype(np.int32)
+
+
+def compute_vertex_normals(vertices: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    """
+    Area-weighted vertex normals, for meshes that don't come with their own normals
+    """
+
+    triangles = vertices[indices]
+    face_normals = np.cross(triangles[:, 1] - triangles[:, 0], triangles[:, 2] - triangles[:, 0])
+
+    normals = np.zeros(vertices.shape, dtype=np.float32)
+    for corner_index in range(3):
+        np.add.at(normals, indices[:, corner_index], face_normals)
+
+    lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+    return normals / np.where(lengths > 0.0, lengths, 1.0)
+
+
+@njit(cache=True)
+def deduplicate_corners(corners: np.ndarray) -> tuple:
+    """
+    Finds the unique rows of a (N, 3) integer array using an open addressing hash table. Unique rows keep the order
+    in which they first appear, so consecutive triangles still share nearby vertices.
+
+    :param corners: np.ndarray (N, 3) int64, (v, vt, vn) index of each face corner, -1 where missing
+    :return: tuple (unique_corners (M, 3), indices (N,)) where corners == unique_corners[indices]
+    """
+
+    num_corners = corners.shape[0]
+    table_size = 16
+    while table_size < 2 * num_corners:
+        table_size *= 2
+    table_mask = table_size - 1
+    table = np.full(table_size, -1, dtype=np.int64)  # Index into unique_corners
+
+    unique_corners = np.empty((num_corners, 3), dtype=np.int64)
+    indices = np.empty(num_corners, dtype=np.int64)
+    num_unique = 0
+
+    for corner_index in range(num_corners):
+        v = corners[corner_index, 0]
+        vt = corners[corner_index, 1]
+        vn = corners[corner_index, 2]
+
+        slot = ((v * 73856093) ^ (vt * 19349663) ^ (vn * 83492791)) & table_mask
+        while True:
+            unique_index = table[slot]
+            if unique_index == -1:
+                table[slot] = num_unique
+                unique_corners[num_unique, 0] = v
+                unique_corners[num_unique, 1] = vt
+                unique_corners[num_unique, 2] = vn
+                indices[corner_index] = num_unique
+                num_unique += 1
+                break
+
+            if unique_corners[unique_index, 0] == v and unique_corners[unique_index, 1] == vt and \
+                    unique_corners[unique_index, 2] == vn:
+                indices[corner_index] = unique_index
+                break
+
+            slot = (slot + 1) & table_mask
+
+    return unique_corners[:num_unique], indices
+
+
+def _gather_optional(values: np.ndarray, indices: np.ndarray) -> np.ndarray:
+    # Corners without that attribute (-1) get zeros
+    gathered = values[np.maximum(indices, 0)]
+    gathered[indices < 0] = 0.0
+    return gathered
+
+
+# =============================================================================
+#                               Parsing kernels
+# =============================================================================
+
+@njit(cache=True)
+def _is_space(char) -> bool:
+    return char == 32 or char == 9 or char == 13
+
+
+@njit(cache=True)
+def _skip_spaces(buffer: np.ndarray, index: int) -> int:
+    while index < buffer.size and _is_space(buffer[index]):
+        index += 1
+    return index
+
+
+@njit(cache=True)
+def _skip_line(buffer: np.ndarray, index: int) -> int:
+    while index < buffer.size and buffer[index] != 10:
+        index += 1
+    return index + 1
+
+
+@njit(cache=True)
+def _get_line_type(buffer: np.ndarray, index: int) -> tuple:
+    """
+    Returns the type of the line starting at "index" and where its content starts
+    """
+
+    index = _skip_spaces(buffer=buffer, index=index)
+    if index + 1 >= buffer.size:
+        return OBJ_LINE_OTHER, index
+
+    first_char = buffer[index]
+    second_char = buffer[index + 1]
+    if first_char == 118:  # 'v'
+        if _is_space(second_char):
+            return OBJ_LINE_VERTEX, index + 1
+        if index + 2 < buffer.size and _is_space(buffer[index + 2]):
+            if second_char == 116:  # 't'
+                return OBJ_LINE_UV, index + 2
+            if second_char == 110:  # 'n'
+                return OBJ_LINE_NORMAL, index + 2
+    elif first_char == 102 and _is_space(second_char):  # 'f'
+        return OBJ_LINE_FACE, index + 1
+
+    return OBJ_LINE_OTHER, index
+
+
+@njit(cache=True)
+def _parse_index(buffer: np.ndarray, index: int, num_elements: int) -> tuple:
+    """
+    Parses a 1-based (or negative, relative to the end) .obj index into a 0-based one
+
+    :return: tuple (element index, index after the number, valid)
+    """
+
+    sign = 1
+    if index < buffer.size and buffer[index] == 45:
+        sign = -1
+        index += 1
+
+    value = 0
+    has_digits = False
+    while index < buffer.size and 48 <= buffer[index] <= 57:
+        value = value * 10 + (buffer[index] - 48)
+        has_digits = True
+        index += 1
+
+    element_index = num_elements - value if sign < 0 else value - 1
+    valid = has_digits and 0 <= element_index < num_elements
+    return element_index, index, valid
+
+
+@njit(cache=True)
+def _count_obj_elements(buffer: np.ndarray) -> tuple:
+
+    num_vertices = 0
+    num_uvs = 0
+    num_normals = 0
+    num_triangles = 0
+
+    index = 0
+    while index < buffer.size:
+        line_type, index = _get_line_type(buffer=buffer, index=index)
+
+        if line_type == OBJ_LINE_VERTEX:
+            num_vertices += 1
+        elif line_type == OBJ_LINE_UV:
+            num_uvs += 1
+        elif line_type == OBJ_LINE_NORMAL:
+            num_normals += 1
+        elif line_type == OBJ_LINE_FACE:
+            # Count corners as groups of non-space characters
+            num_face_corners = 0
+            in_corner = False
+            while index < buffer.size and buffer[index] != 10:
+                if _is_space(buffer[index]):
+                    in_corner = False
+                elif not in_corner:
+                    in_corner = True
+                    num_face_corners += 1
+                index += 1
+            num_triangles += max(num_face_corners - 2, 0)
+
+        index = _skip_line(buffer=buffer, index=index)
+
+    return num_vertices, num_uvs, num_normals, num_triangles
+
+
+@njit(cache=True)
+def _parse_obj_elements(buffer: np.ndarray,
+                        vertices: np.ndarray,
+                        uvs: np.ndarray,
+                        normals: np.ndarray,
+                        corners: np.ndarray) -> tuple:
+    """
+    Fills the arrays allocated after _count_obj_elements(). Each face is fan-triangulated straight into "corners"
+
+    :return: tuple (error code, byte position of the error)
+    """
+
+    num_vertices = 0
+    num_uvs = 0
+    num_normals = 0
+    num_corners = 0
+    face_corner = np.empty(3, dtype=np.int64)
+    first_corner = np.empty(3, dtype=np.int64)
+    previous_corner = np.empty(3, dtype=np.int64)
+
+    index = 0
+    while index < buffer.size:
+        line_start = index
+        line_type, index = _get_line_type(buffer=buffer, index=index)
+
+        if line_type == OBJ_LINE_VERTEX or line_type == OBJ_LINE_NORMAL:
+            for axis in range(3):
+                value, index, valid = parse_float(buffer=buffer, index=_skip_spaces(buffer=buffer, index=index))
+                if not valid:
+                    return OBJ_ERROR_INVALID_NUMBER, line_start
+                if line_type == OBJ_LINE_VERTEX:
+                    vertices[num_vertices, axis] = value
+                else:
+                    normals[num_normals, axis] = value
+            if line_type == OBJ_LINE_VERTEX:
+                num_vertices += 1
+            else:
+                num_normals += 1
+
+        elif line_type == OBJ_LINE_UV:
+            for axis in range(2):
+                value, index, valid = parse_float(buffer=buffer, index=_skip_spaces(buffer=buffer, index=index))
+                if not valid:
+                    return OBJ_ERROR_INVALID_NUMBER, line_start
+                uvs[num_uvs, axis] = value
+            num_uvs += 1
+
+        elif line_type == OBJ_LINE_FACE:
+            num_face_corners = 0
+            while True:
+                index = _skip_spaces(buffer=buffer, index=index)
+                if index >= buffer.size or buffer[index] == 10:
+                    break
+
+                # v, v/vt, v//vn or v/vt/vn
+                face_corner[:] = -1
+                face_corner[0], index, valid = _parse_index(buffer=buffer, index=index, num_elements=num_vertices)
+                if not valid:
+                    return OBJ_ERROR_INVALID_INDEX, line_start
+                if index < buffer.size and buffer[index] == 47:  # '/'
+                    index += 1
+                    if index < buffer.size and buffer[index] != 47:
+                        face_corner[1], index, valid = _parse_index(buffer=buffer, index=index, num_elements=num_uvs)
+                        if not valid:
+                            return OBJ_ERROR_INVALID_INDEX, line_start
+                    if index < buffer.size and buffer[index] == 47:
+                        index += 1
+                        face_corner[2], index, valid = _parse_index(buffer=buffer, index=index,
+                                                                    num_elements=num_normals)
+                        if not valid:
+                            return OBJ_ERROR_INVALID_INDEX, line_start
+
+                # Fan triangulation: (0, 1, 2), (0, 2, 3), (0, 3, 4)...
+                if num_face_corners == 0:
+                    first_corner[:] = face_corner
+                elif num_face_corners >= 2:
+                    corners[num_corners] = first_corner
+                    corners[num_corners + 1] = previous_corner
+                    corners[num_corners + 2] = face_corner
+                    num_corners += 3
+                previous_corner[:] = face_corner
+                num_face_corners += 1
+
+        index = _skip_line(buffer=buffer, index=index)
+
+    return OBJ_ERROR_NONE, 0
@@ -1,44 +1,120 @@
-from numba import njit
+from numba import njit, prange
 import numpy as np
 
 from src.core import constants
 
-#
 
-@njit
-def encode_command(layer, is_transparent, distance, material, mesh, transform, render_mode):
-    command = (layer << constants.LAYER_SHIFT) | \
-              (is_transparent << constants.TRANSPARENCY_SHIFT) | \
-              (distance << constants.DISTANCE_SHIFT) | \
-              (material << constants.MATERIAL_SHIFT) | \
-              (mesh << constants.MESH_SHIFT) | \
-              (transform << constants.TRANSFORM_SHIFT) | \
-              (render_mode << constants.RENDER_MODE_SHIFT)
-    return command
+@njit(cache=True)
+def encode_command(layer, is_transparent, distance, program, material, mesh):
+    """
+    Packs a draw into a 64-bit sort key. See constants for the layout, which is different for opaque and
+    transparent commands so that sorting keys in increasing order draws opaque meshes grouped by state and front to
+    back, and transparent ones back to front
 
-@njit
+    :param layer: int, render layer, drawn in increasing order
+    :param is_transparent: bool
+    :param distance: int, quantized distance to the camera (see encode_distance)
+    :param program: int, shader variant (see RENDER_COMMAND_PROGRAM_* constants)
+    :param material: int, material index
+    :param mesh: int, index of the mesh in the list of meshes that were queued
+    :return: numpy uint64
+    """
+
+    command = (np.uint64(layer & constants.LAYER_MASK) << np.uint64(constants.LAYER_SHIFT)) | \
+              (np.uint64(mesh & constants.MESH_MASK) << np.uint64(constants.MESH_SHIFT))
+
+    distance = distance & constants.DISTANCE_MASK
+    program = program & constants.PROGRAM_MASK
+    material = material & constants.MATERIAL_MASK
+    if is_transparent:
+        return command | \
+            (np.uint64(1) << np.uint64(constants.TRANSPARENCY_SHIFT)) | \
+            (np.uint64(constants.DISTANCE_MASK - distance) << np.uint64(constants.TRANSPARENT_DISTANCE_SHIFT)) | \
+            (np.uint64(program) << np.uint64(constants.TRANSPARENT_PROGRAM_SHIFT)) | \
+            (np.uint64(material) << np.uint64(constants.TRANSPARENT_MATERIAL_SHIFT))
+
+    return command | \
+        (np.uint64(program) << np.uint64(constants.OPAQUE_PROGRAM_SHIFT)) | \
+        (np.uint64(material) << np.uint64(constants.OPAQUE_MATERIAL_SHIFT)) | \
+        (np.uint64(distance) << np.uint64(constants.OPAQUE_DISTANCE_SHIFT))
+
+
+@njit(cache=True)
 def decode_command(command):
-    layer = (command >> constants.LAYER_SHIFT) & constants.LAYER_MASK
-    is_transparent = (command >> constants.TRANSPARENCY_SHIFT) & constants.TRANSPARENCY_MASK
-    distance = (command >> constants.DISTANCE_SHIFT) & constants.DISTANCE_MASK
-    material = (command >> constants.MATERIAL_SHIFT) & constants.MATERIAL_MASK
-    mesh = (command >> constants.MESH_SHIFT) & constants.MESH_MASK
-    transform = (command >> constants.TRANSFORM_SHIFT) & constants.TRANSFORM_MASK
-    render_mode = (command >> constants.RENDER_MODE_SHIFT) & constants.RENDER_MODE_MASK
-    return layer, is_transparent, distance, material, mesh, transform, render_mode
-
-@njit
+    """
+    Inverse of encode_command
+
+    :param command: numpy uint64
+    :return: tuple (layer, is_transparent, distance, program, material, mesh)
+    """
+
+    command = np.uint64(command)
+    layer = int((command >> np.uint64(constants.LAYER_SHIFT)) & np.uint64(constants.LAYER_MASK))
+    is_transparent = ((command >> np.uint64(constants.TRANSPARENCY_SHIFT)) & np.uint64(1)) == np.uint64(1)
+    mesh = int((command >> np.uint64(constants.MESH_SHIFT)) & np.uint64(constants.MESH_MASK))
+
+    if is_transparent:
+        distance_shift, program_shift, material_shift = (constants.TRANSPARENT_DISTANCE_SHIFT,
+                                                         constants.TRANSPARENT_PROGRAM_SHIFT,
+                                                         constants.TRANSPARENT_MATERIAL_SHIFT)
+    else:
+        distance_shift, program_shift, material_shift = (constants.OPAQUE_DISTANCE_SHIFT,
+                                                         constants.OPAQUE_PROGRAM_SHIFT,
+                                                         constants.OPAQUE_MATERIAL_SHIFT)
+
+    distance = int((command >> np.uint64(distance_shift)) & np.uint64(constants.DISTANCE_MASK))
+    if is_transparent:
+        distance = constants.DISTANCE_MASK - distance
+    program = int((command >> np.uint64(program_shift)) & np.uint64(constants.PROGRAM_MASK))
+    material = int((command >> np.uint64(material_shift)) & np.uint64(constants.MATERIAL_MASK))
+    return layer, is_transparent, distance, program, material, mesh
+
+
+@njit(cache=True)
 def encode_distance(distance, max_distance):
     # Normalize distance based on the maximum distance
-    normalized_distance = np.clip(distance / max_distance, 0, 1)
-    # Encode into 10 bits
+    normalized_distance = min(max(distance / max_distance, 0.0), 1.0)
+    # Encode into DISTANCE_BITS bits
     encoded_distance = int(normalized_distance * (2 ** constants.DISTANCE_BITS - 1))
     return encoded_distance
 
-@njit
+
+@njit(cache=True)
 def decode_distance(encoded_distance, max_distance):
-    # Decode from 10 bits
+    # Decode from DISTANCE_BITS bits
     normalized_distance = encoded_distance / (2 ** constants.DISTANCE_BITS - 1)
     # Convert back to actual distance
     distance = normalized_distance * max_distance
     return distance
+
+
+@njit(parallel=True, cache=True)
+def build_commands(layers: np.ndarray,
+                   transparent: np.ndarray,
+                   distances: np.ndarray,
+                   programs: np.ndarray,
+                   materials: np.ndarray,
+                   max_distance: float,
+                   commands_out: np.ndarray):
+    """
+    Encodes one command per mesh, where mesh "i" gets "i" as its mesh field, so the draw order can be read back
+    from the sorted commands
+
+    :param layers: numpy array (N,) <int>
+    :param transparent: numpy array (N,) <bool>
+    :param distances: numpy array (N,) <float>, distances to the camera
+    :param programs: numpy array (N,) <int>
+    :param materials: numpy array (N,) <int>
+    :param max_distance: float, distances are clipped to [0, max_distance] before quantization
+    :param commands_out: numpy array (N,) <uint64>
+    :return: None
+    """
+
+    for i in prange(layers.shape[0]):
+        commands_out[i] = encode_command(layers[i],
+                                         transparent[i],
+                                         encode_distance(distances[i], max_distance),
+                                         programs[i],
+                                         materials[i],
+                                         i)
+
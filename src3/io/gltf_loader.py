@@ -3,10 +3,11 @@ import numpy as np
 from src.core import constants
 from src.core.data_block import DataBlock
 from src.core.data_group import DataGroup
-from src.utilities import utils_gltf_reader
+from src.core.file_loaders.file_loader import FileLoader
+from src3.io.gltf_reader import GLTFReader, gather_children, pad_children_lists
 
 
-class GLTFLoader:
+class GLTFLoader(FileLoader):
 
     """
     The GLTF loader will load the following resources
@@ -24,7 +25,7 @@ class GLTFLoader:
         self.gltf_reader = None
 
     def load(self, resource_uid: str, fpath: str) -> bool:
-        self.gltf_reader = utils_gltf_reader.GLTFReader()
+        self.gltf_reader = GLTFReader()
         self.gltf_reader.load(gltf_fpath=fpath)
 
         self.__load_nodes_and_skeleton_resources(resource_uid=resource_uid)
@@ -40,117 +41,86 @@ class GLTFLoader:
         #                                   Nodes
         # ================================================================================
 
-        nodes = self.gltf_reader.get_nodes()
-
-        num_nodes = len(nodes)
-        max_num_children = max(set(len(node["children_indices"]) for node in nodes))
+        node_arrays = self.gltf_reader.get_node_arrays()
+        num_nodes = node_arrays["parent_index"].size
 
         # Get (or generate) node names if necessary
-        node_names = []
-        for node_index, node in enumerate(nodes):
-            gltf_node_name = node.get("name", "")
-            if len(gltf_node_name) > 0:
-                node_names.append(gltf_node_name)
-                continue
-            node_names.append(f"node_{node_index}")
+        node_names = [name if len(name) > 0 else f"node_{node_index}"
+                      for node_index, name in enumerate(node_arrays["names"])]
 
         nodes_resource = DataGroup(archetype=constants.RESOURCE_TYPE_NODES_GLTF,
                                    metadata={"node_names": node_names})
 
-        nodes_resource.data_blocks["parent_index"] = DataBlock(
-            data=np.ones((num_nodes,), dtype=np.int16) * -1)
-
-        nodes_resource.data_blocks["num_children"] = DataBlock(
-            data=np.zeros((num_nodes,), dtype=np.int16))
-
-        nodes_resource.data_blocks["children_indices"] = DataBlock(
-            data=np.ones((num_nodes, max_num_children), dtype=np.int16) * -1)
+        # Children lists are stored flat, since a single node may have thousands of children (e.g. crowds)
+        for key in ["parent_index", "num_children", "children_offsets", "children_flat", "mesh_index", "skin_index",
+                    "tree_depth"]:
+            nodes_resource.data_blocks[key] = DataBlock(data=node_arrays[key])
 
         nodes_resource.data_blocks["translation"] = DataBlock(
-            data=np.zeros((num_nodes, 3), dtype=np.float32),
+            data=node_arrays["translation"],
             metadata={"order": ["x", "y", "z"]})
 
         nodes_resource.data_blocks["rotation"] = DataBlock(
-            data=np.zeros((num_nodes, 4), dtype=np.float32),
+            data=node_arrays["rotation"],
             metadata={"order": ["x", "y", "z", "w"], "type": "quaternion"})
-        nodes_resource.data_blocks["rotation"].data[:, 3] = 1
 
         nodes_resource.data_blocks["scale"] = DataBlock(
-            data=np.ones((num_nodes, 3), dtype=np.float32),
+            data=node_arrays["scale"],
             metadata={"order": ["x", "y", "z"]})
 
-        nodes_resource.data_blocks["skin_index"] = DataBlock(
-            data=np.ones((num_nodes, ), dtype=np.int16) * -1)
-
-        nodes_resource.data_blocks["mesh_index"] = DataBlock(
-            data=np.ones((num_nodes,), dtype=np.int16) * -1)
-
-        for node_index, node in enumerate(nodes):
-            num_children = len(node["children_indices"])
-            nodes_resource.data_blocks["translation"].data[node_index, :] = node["translation"]
-            nodes_resource.data_blocks["rotation"].data[node_index, :] = node["rotation"]
-            nodes_resource.data_blocks["scale"].data[node_index, :] = node["scale"]
-            nodes_resource.data_blocks["num_children"].data[node_index] = num_children
-            nodes_resource.data_blocks["children_indices"].data[node_index, :num_children] = node["children_indices"]
-            nodes_resource.data_blocks["parent_index"].data[node_index] = node["parent_index"]
-            nodes_resource.data_blocks["mesh_index"].data[node_index] = node["mesh_index"]
-            nodes_resource.data_blocks["skin_index"].data[node_index] = node["skin_index"]
-
         self.external_data_groups[f"{resource_uid}/nodes"] = nodes_resource
 
         # ================================================================================
         #                           Skeleton (If any)
         # ================================================================================
 
-        """
-        parent_index -> node indices
-        
-        """
+        for skin_index, skin in enumerate(self.gltf_reader.get_skins()):
 
-        #skeletons = self.gltf_reader.get_skeletons()
-
-        num_nodes = len(nodes)
-        skins = self.gltf_reader.get_skins()
-        for skin_index, skin in enumerate(skins):
-
-            # Build inverse reference maps to convert node indices to skeleton indices
-            selected_node_indices = np.array(skin["joints"])
-            node2skeleton_lookup = np.zeros((num_nodes,), dtype=np.int32)
-            for skeleton_index, node_index in enumerate(selected_node_indices):
-                node2skeleton_lookup[node_index] = skeleton_index
+            # Inverse reference map to convert node indices to skeleton indices. The extra last entry is -1, so
+            # that -1 (no parent/child) is mapped to itself when used as an index
+            selected_node_indices = np.array(skin["joints"], dtype=np.int32)
+            node2skeleton_lookup = np.full((num_nodes + 1,), -1, dtype=np.int32)
+            node2skeleton_lookup[selected_node_indices] = np.arange(selected_node_indices.size, dtype=np.int32)
 
             skeleton_resource = DataGroup(archetype=constants.RESOURCE_TYPE_SKELETON,
-                                          metadata={"node_indices": selected_node_indices})
+                                          metadata={"node_indices": selected_node_indices.tolist()})
 
-            skeleton_resource.data_blocks["nodes2skeleton_lookup"] = DataBlock(data=node2skeleton_lookup)
+            skeleton_resource.data_blocks["nodes2skeleton_lookup"] = DataBlock(data=node2skeleton_lookup[:-1])
 
+            # Parent and children indices are converted from their original node indices to skeleton indices
             skeleton_resource.data_blocks["parent_index"] = DataBlock(
-                data=nodes_resource.data_blocks["parent_index"].data[selected_node_indices])
-
-            # Convert parent indices from their original node indices to skeleton indices
-            skeleton_resource.data_blocks["parent_index"].data = node2skeleton_lookup[skeleton_resource.data_blocks["parent_index"].data]
-
-            skeleton_resource.data_blocks["num_children"] = DataBlock(
-                data=nodes_resource.data_blocks["num_children"].data[selected_node_indices])
-
-            skeleton_resource.data_blocks["children_indices"] = DataBlock(
-                data=nodes_resource.data_blocks["children_indices"].data[selected_node_indices, :])
-
-            # Convert children indices from their original node indices to skeleton indices
-            skeleton_resource.data_blocks["children_indices"].data = node2skeleton_lookup[skeleton_resource.data_blocks["children_indices"].data]
+                data=node2skeleton_lookup[node_arrays["parent_index"][selected_node_indices]])
+
+            # Children that are not joints are removed
+            rows, children = gather_children(node_indices=selected_node_indices,
+                                             num_children=node_arrays["num_children"],
+                                             children_offsets=node_arrays["children_offsets"],
+                                             children_flat=node_arrays["children_flat"])
+            children = node2skeleton_lookup[children]
+            num_children, children_indices = pad_children_lists(rows=rows[children > -1],
+                                                                children=children[children > -1],
+                                                                num_rows=selected_node_indices.size)
+            skeleton_resource.data_blocks["num_children"] = DataBlock(data=num_children)
+            skeleton_resource.data_blocks["children_indices"] = DataBlock(data=children_indices)
+
+            skeleton_resource.data_blocks["tree_depth"] = DataBlock(
+                data=node_arrays["tree_depth"][selected_node_indices])
 
             skeleton_resource.data_blocks["translation"] = DataBlock(
-                data=nodes_resource.data_blocks["translation"].data[selected_node_indices, :],
+                data=node_arrays["translation"][selected_node_indices, :],
                 metadata={"order": ["x", "y", "z"]})
 
             skeleton_resource.data_blocks["rotation"] = DataBlock(
-                data=nodes_resource.data_blocks["rotation"].data[selected_node_indices, :],
+                data=node_arrays["rotation"][selected_node_indices, :],
                 metadata={"order": ["x", "y", "z", "w"], "type": "quaternion"})
 
             skeleton_resource.data_blocks["scale"] = DataBlock(
-                data=nodes_resource.data_blocks["scale"].data[selected_node_indices, :],
+                data=node_arrays["scale"][selected_node_indices, :],
                 metadata={"order": ["x", "y", "z"]})
 
+            skeleton_resource.data_blocks["inverse_bind_matrices"] = DataBlock(
+                data=np.asarray(skin["inverse_bind_matrices"], dtype=np.float32))
+
             self.external_data_groups[f"{resource_uid}/skeleton_{skin_index}"] = skeleton_resource
 
     def __load_mesh_resources(self, resource_uid: str):
@@ -185,7 +155,7 @@ class GLTFLoader:
 
     def __load_animation_resources(self, resource_uid: str):
 
-        new_resource = DataGroup(archetype=constants.RESOURCE_TYPE_MESH)
+        new_resource = DataGroup(archetype=constants.RESOURCE_TYPE_ANIMATION)
 
         animations = self.gltf_reader.get_animations()
         for animation_index, (channel_name, nodes) in enumerate(animations.items()):
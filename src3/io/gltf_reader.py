@@ -1,8 +1,10 @@
 import os
 import json
+import mmap
 import struct
+import itertools
+from collections import OrderedDict
 import numpy as np
-import copy
 
 # DEBUG
 from src.math import mat4
@@ -77,6 +79,101 @@ PRIMITIVE_RENDERING_MODES = {
 
 DEFAULT_RENDER_MODE = 4  # Triangles
 
+DEFAULT_ACCESSOR_CACHE_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_VALIDATION_NUM_SAMPLES = 1024  # Accessors with more elements than this are only validated on a sample
+
+
+def compose_trs_matrices(translation: np.ndarray, rotation: np.ndarray, scale: np.ndarray) -> np.ndarray:
+    """
+    Allocates the output and runs mat4.matrix_compositions()
+
+    :param translation: np.ndarray (N, 3)
+    :param rotation: np.ndarray (N, 4), quaternions as x, y, z, w
+    :param scale: np.ndarray (N, 3)
+    :return: np.ndarray (N, 4, 4) float32
+    """
+
+    matrices = np.empty((translation.shape[0], 4, 4), dtype=np.float32)
+    mat4.matrix_compositions(translation, rotation, scale, matrices)
+    return matrices
+
+
+def build_parent_indices(num_children: np.ndarray, children_flat: np.ndarray) -> np.ndarray:
+    """
+    Builds the parent index of every node with a single scatter from the children lists.
+
+    :param num_children: np.ndarray (N,) int, number of children of each node
+    :param children_flat: np.ndarray (sum(num_children),) int, all children lists concatenated in node order
+    :return: np.ndarray (N,) int32, -1 for root nodes
+    """
+
+    num_nodes = num_children.size
+    if np.any(np.bincount(children_flat, minlength=num_nodes) > 1):
+        raise Exception("[ERROR] There should only be one parent per node!")
+
+    parent_index = np.full(num_nodes, -1, dtype=np.int32)
+    parent_index[children_flat] = np.repeat(np.arange(num_nodes, dtype=np.int32), num_children)
+    return parent_index
+
+
+def gather_children(node_indices: np.ndarray, num_children: np.ndarray, children_offsets: np.ndarray,
+                    children_flat: np.ndarray) -> tuple:
+    """
+    Gathers the children lists of several nodes at once.
+
+    :param node_indices: np.ndarray (M,), nodes whose children are requested
+    :param num_children: np.ndarray (N,), number of children of each node
+    :param children_offsets: np.ndarray (N,), where each node's children list starts in "children_flat"
+    :param children_flat: np.ndarray, all children lists concatenated in node order
+    :return: tuple (rows, children), where "rows" is the position within "node_indices" of each child's parent
+    """
+
+    selected_num_children = num_children[node_indices]
+    selected_offsets = np.cumsum(selected_num_children) - selected_num_children
+    rows = np.repeat(np.arange(node_indices.size, dtype=np.int32), selected_num_children)
+    entries = np.arange(rows.size) + (children_offsets[node_indices] - selected_offsets)[rows]
+    return rows, children_flat[entries]
+
+
+def compute_node_depths(parent_index: np.ndarray, num_children: np.ndarray, children_offsets: np.ndarray,
+                        children_flat: np.ndarray) -> np.ndarray:
+    """
+    Computes the depth of every node in the hierarchy one level at a time, starting from the root nodes, so
+    the number of iterations is the depth of the tree rather than the number of nodes.
+    :return: np.ndarray (N,) int32
+    """
+
+    depths = np.full(parent_index.size, -1, dtype=np.int32)
+
+    current_level = np.flatnonzero(parent_index == -1)
+    current_depth = 0
+    while current_level.size > 0:
+        depths[current_level] = current_depth
+        _, current_level = gather_children(node_indices=current_level,
+                                           num_children=num_children,
+                                           children_offsets=children_offsets,
+                                           children_flat=children_flat)
+        current_depth += 1
+
+    if np.any(depths == -1):
+        raise Exception("[ERROR] There seems to be a loop in the node hierarchy")
+
+    return depths
+
+
+def pad_children_lists(rows: np.ndarray, children: np.ndarray, num_rows: int) -> tuple:
+    """
+    Converts children lists in the format returned by gather_children() (rows in ascending order) into a
+    (num_rows, max_num_children) array padded with -1
+    :return: tuple (num_children (num_rows,), children_indices (num_rows, max_num_children))
+    """
+
+    num_children = np.bincount(rows, minlength=num_rows).astype(np.int32)
+    columns = np.arange(rows.size) - (np.cumsum(num_children) - num_children)[rows]
+    children_indices = np.full((num_rows, max(int(num_children.max(initial=0)), 1)), -1, dtype=np.int32)
+    children_indices[rows, columns] = children
+    return num_children, children_indices
+
 
 class GLTFReader:
 
@@ -84,15 +181,29 @@ class GLTFReader:
         "gltf_header",
         "gltf_buffer_view_data",
         "gltf_dependencies",
+        "gltf_memory_map",
+        "accessor_cache",
+        "accessor_cache_num_bytes",
+        "accessor_cache_max_bytes",
+        "validation_num_samples",
         "scenes"
     ]
 
-    def __init__(self):
+    def __init__(self,
+                 accessor_cache_max_bytes=DEFAULT_ACCESSOR_CACHE_MAX_BYTES,
+                 validation_num_samples=DEFAULT_VALIDATION_NUM_SAMPLES):
         self.gltf_header = None
         self.gltf_buffer_view_data = []
         self.gltf_dependencies = None
+        self.gltf_memory_map = None
         self.scenes = []
 
+        # Decoded accessors are kept in a least-recently-used cache, keyed by accessor index
+        self.accessor_cache = OrderedDict()
+        self.accessor_cache_num_bytes = 0
+        self.accessor_cache_max_bytes = accessor_cache_max_bytes
+        self.validation_num_samples = validation_num_samples
+
     @property
     def num_animations(self) -> int:
         if self.gltf_header is None:
@@ -100,12 +211,14 @@ class GLTFReader:
 
         return len(self.gltf_header[GLTF_ANIMATIONS]) if GLTF_ANIMATIONS in self.gltf_header else 0
 
-    def load(self, gltf_fpath: str):
+    def load(self, gltf_fpath: str, use_mmap=False):
 
         """
         Loads the header and binary information form the GLTF file. Currently, it assumes there is only
         ONE scene. If there are more the one scene it will throw an error
         :param gltf_fpath: str, absolute path to the input GLTF file
+        :param use_mmap: bool, if True, the binary data is memory-mapped instead of read into RAM. All buffer views
+                         and accessors then become read-only numpy views straight into the mapped file
         :return:
         """
 
@@ -114,19 +227,31 @@ class GLTFReader:
         _, extension = os.path.splitext(filename)
 
         if extension == ".gltf":
-            self.__load_gltf(fpath=gltf_fpath)
+            self.__load_gltf(fpath=gltf_fpath, use_mmap=use_mmap)
 
         if extension == ".glb":
-            self.__load_glb(fpath=gltf_fpath)
+            self.__load_glb(fpath=gltf_fpath, use_mmap=use_mmap)
 
         # Load dependencies
         # TODO: Load any textures that are listed in the gltf_header
 
-    def __load_gltf(self, fpath) -> None:
+    def close(self) -> None:
+        """
+        Releases the reader's references to the binary data. The memory map (if any) is only unmapped once all
+        arrays returned by get_data() that still point into it are garbage collected too.
+        """
+        self.gltf_buffer_view_data = []
+        self.gltf_memory_map = None
+        self.clear_accessor_cache()
+
+    def clear_accessor_cache(self) -> None:
+        self.accessor_cache.clear()
+        self.accessor_cache_num_bytes = 0
+
+    def __load_gltf(self, fpath, use_mmap=False) -> None:
 
         # Load Header
         with open(fpath, "r", encoding='utf-8') as file:
-            print(fpath, file.encoding)
             self.gltf_header = json.load(file)
 
             # Make sure we only have one scene
@@ -144,9 +269,10 @@ class GLTFReader:
 
         # read and process binary data
         with open(bin_fpath, "rb") as file:
-            self.__process_binary_data(binary_data=file.read())
+            binary_data = self.__read_binary_data(file=file, byte_length=binary_size, use_mmap=use_mmap)
+            self.__process_binary_data(binary_data=binary_data)
 
-    def __load_glb(self, fpath):
+    def __load_glb(self, fpath, use_mmap=False):
 
         with open(fpath, 'rb') as file:
 
@@ -169,9 +295,25 @@ class GLTFReader:
                 raise ValueError('Expected a BIN chunk')
 
             # Read and process the binary data
-            self.__process_binary_data(binary_data=file.read(chunk_length))
+            binary_data = self.__read_binary_data(file=file, byte_length=chunk_length, use_mmap=use_mmap)
+            self.__process_binary_data(binary_data=binary_data)
 
-    def __process_binary_data(self, binary_data: bytes) -> None:
+    def __read_binary_data(self, file, byte_length: int, use_mmap: bool) -> np.ndarray:
+        """
+        Reads "byte_length" bytes starting at the file's current position and returns them as a uint8 array.
+        When memory-mapped, the array is a view into the mapped file and nothing is copied into RAM here.
+        """
+
+        byte_offset = file.tell()
+
+        if not use_mmap:
+            return np.frombuffer(file.read(byte_length), dtype=np.uint8)
+
+        # The map duplicates the file handle, so it remains valid after the file itself is closed
+        self.gltf_memory_map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return np.frombuffer(self.gltf_memory_map, dtype=np.uint8, count=byte_length, offset=byte_offset)
+
+    def __process_binary_data(self, binary_data: np.ndarray) -> None:
         self.gltf_buffer_view_data = [self.select_data_using_buffer_view(buffer_view=buffer_view,
                                                                          gltf_data=binary_data)
                                       for buffer_view in self.gltf_header[GLTF_BUFFER_VIEWS]]
@@ -183,43 +325,96 @@ class GLTFReader:
 
         return self.gltf_header["accessors"][index]
 
-    def get_data(self, accessor: dict, validate_data=True):
+    def get_data(self, accessor_index: int, validate_data=True, contiguous=True):
         """
-        This function reads the parts of the binary array in memory (loaded from the .bin file) and re-interprets
-        the raw bytes into numpy arrays according to the accessor's specified data parameters.
-        :param accessor: dict, loaded directly from the GLTF file
+        Returns the decoded data of an accessor. Accessors are only decoded the first time they are requested, after
+        which they are served from a size-bounded LRU cache. Cached arrays are read-only, so copy them if you need to
+        modify them.
+
+        Accessors inside strided (interleaved) buffer views are decoded as a strided view over the raw bytes,
+        starting at the accessor's byteOffset. Such views are only copied when "contiguous" is True.
+        :param accessor_index: int, index of the accessor in the GLTF header
+        :param validate_data: bool, compares the data's min/max with the ones stored in the accessor (if any) when it
+                              is first decoded. Large accessors are only validated on a sample of their elements
+        :param contiguous: bool, if True, strided data is copied into a tightly packed array (required for uploading
+                           it to the GPU). Non-contiguous views are not cached
         :return:
         """
 
         if self.gltf_header is None:
             return None
 
+        data = self.accessor_cache.get(accessor_index, None)
+        if data is not None:
+            self.accessor_cache.move_to_end(accessor_index)
+            return data
+
+        accessor = self.get_accessor(index=accessor_index)
+        data = self.decode_accessor(accessor=accessor, contiguous=contiguous)
+
+        if validate_data:
+            self.validate_accessor_data(accessor=accessor, data=data)
+
+        if not contiguous and not data.flags["C_CONTIGUOUS"]:
+            return data
+
+        # Protect the cached copy from being modified by whoever requested it
+        data.flags.writeable = False
+        self.__add_to_accessor_cache(accessor_index=accessor_index, data=data)
+
+        return data
+
+    def __add_to_accessor_cache(self, accessor_index: int, data: np.ndarray) -> None:
+
+        if data.nbytes > self.accessor_cache_max_bytes:
+            return
+
+        self.accessor_cache[accessor_index] = data
+        self.accessor_cache_num_bytes += data.nbytes
+
+        # Evict the least recently used accessors until we are back within budget
+        while self.accessor_cache_num_bytes > self.accessor_cache_max_bytes:
+            _, evicted_data = self.accessor_cache.popitem(last=False)
+            self.accessor_cache_num_bytes -= evicted_data.nbytes
+
+    def decode_accessor(self, accessor: dict, contiguous=True) -> np.ndarray:
+        """
+        This function reads the parts of the binary array in memory (loaded from the .bin file) and re-interprets
+        the raw bytes into numpy arrays according to the accessor's specified data parameters. Tightly packed data is
+        returned as a view of the buffer view's data, so nothing is copied.
+        :param accessor: dict, loaded directly from the GLTF file
+        :param contiguous: bool, if True, strided data is copied into a tightly packed array
+        :return:
+        """
+
+        buffer_view = self.gltf_header[GLTF_BUFFER_VIEWS][accessor["bufferView"]]
         buffer_view_data = self.gltf_buffer_view_data[accessor["bufferView"]]
         accessor_offset = accessor.get("byteOffset", 0)
         data_shape = GLTF_DATA_SHAPE_MAP[accessor["type"]]
-        data_type = GLTF_COMPONENT_TYPE_MAP[accessor["componentType"]]
+        data_type = np.dtype(GLTF_COMPONENT_TYPE_MAP[accessor["componentType"]])
         data_format_size = GLTF_DATA_NUM_ELEMENTS_MAP[accessor["type"]]
         num_elements = accessor["count"]
 
-        data = np.frombuffer(buffer=buffer_view_data,
-                             offset=accessor_offset,
-                             count=num_elements * data_format_size,
-                             dtype=data_type)
+        byte_stride = buffer_view.get("byteStride", 0)
+        element_size = data_type.itemsize * data_format_size
 
-        data = data.reshape((-1, *data_shape)) if accessor["type"] != "SCALAR" else data
-
-        if validate_data and "min" in accessor and "max" in accessor:
-            target_data_min = np.array(accessor["min"], dtype=data_type)
-            target_data_max = np.array(accessor["max"], dtype=data_type)
-
-            data_min = np.min(data, axis=0).flatten()
-            data_max = np.max(data, axis=0).flatten()
-
-            if not np.isclose(target_data_min, data_min).all():
-                print(f"[WARNING] Minimum values differ from loaded ones for accessor {accessor}")
-
-            if not np.isclose(target_data_max, data_max).all():
-                print(f"[WARNING] Maximum values differ from loaded ones for accessor {accessor}")
+        if byte_stride == 0 or byte_stride == element_size:
+            # Tightly packed data
+            data = np.frombuffer(buffer=buffer_view_data,
+                                 offset=accessor_offset,
+                                 count=num_elements * data_format_size,
+                                 dtype=data_type)
+            data = data.reshape((-1, *data_shape)) if accessor["type"] != "SCALAR" else data
+        else:
+            # Interleaved data: each element starts "byte_stride" bytes after the previous one
+            data = np.ndarray(shape=(num_elements, data_format_size),
+                              dtype=data_type,
+                              buffer=buffer_view_data,
+                              offset=accessor_offset,
+                              strides=(byte_stride, data_type.itemsize))
+            data = data.reshape((-1, *data_shape)) if accessor["type"] != "SCALAR" else data[:, 0]
+            if contiguous:
+                data = np.ascontiguousarray(data)
 
         if accessor["type"] in ["MAT2", "MAT3", "MAT4"]:
             # Transposing is required for the matrix as they are laid ou COLUMN-MAJOR in bytes, but stored
@@ -228,33 +423,63 @@ class GLTFReader:
 
         return data
 
-    def select_data_using_buffer_view(self, buffer_view: dict, gltf_data: bytes) -> bytes:
+    def validate_accessor_data(self, accessor: dict, data: np.ndarray) -> bool:
+        """
+        Checks the data against the accessor's "min" and "max" values (if any). Small accessors must match them
+        exactly, while large accessors are only checked on an evenly spaced sample of "validation_num_samples"
+        elements, which must fall within the [min, max] range.
+        :param accessor: dict, loaded directly from the GLTF file
+        :param data: np.ndarray, decoded data of the accessor
+        :return: bool, True if the data is valid
+        """
+
+        if "min" not in accessor or "max" not in accessor:
+            return True
+
+        target_data_min = np.array(accessor["min"], dtype=data.dtype)
+        target_data_max = np.array(accessor["max"], dtype=data.dtype)
+
+        num_elements = data.shape[0]
+        if num_elements == 0:
+            return True
+
+        if num_elements <= self.validation_num_samples:
+            data_min = np.min(data, axis=0).flatten()
+            data_max = np.max(data, axis=0).flatten()
+            min_valid = np.isclose(target_data_min, data_min).all()
+            max_valid = np.isclose(target_data_max, data_max).all()
+        else:
+            step = num_elements // self.validation_num_samples
+            sample = data[::step]
+            data_min = np.min(sample, axis=0).flatten()
+            data_max = np.max(sample, axis=0).flatten()
+            min_valid = (np.isclose(target_data_min, data_min) | (data_min >= target_data_min)).all()
+            max_valid = (np.isclose(target_data_max, data_max) | (data_max <= target_data_max)).all()
+
+        if not min_valid:
+            print(f"[WARNING] Minimum values differ from loaded ones for accessor {accessor}")
+
+        if not max_valid:
+            print(f"[WARNING] Maximum values differ from loaded ones for accessor {accessor}")
+
+        return min_valid and max_valid
+
+    def select_data_using_buffer_view(self, buffer_view: dict, gltf_data: np.ndarray) -> np.ndarray:
 
         """
-        Returns a CONTIGUOUS data array that you can then use your np.frombuffer to extrac the data you need
-        :param buffer_view:
-        :param data:
+        Returns the raw bytes of the buffer view as a view of "gltf_data", so no bytes are copied. If the buffer view
+        has a "byteStride", any padding or interleaved attributes between elements are kept, and get_data() takes
+        care of the stride when decoding each accessor.
+        :param buffer_view: dict, loaded directly from the GLTF file
+        :param gltf_data: np.ndarray, uint8 array with the whole binary buffer
         :return:
         """
 
         # Extract buffer view properties
         byte_offset = buffer_view.get("byteOffset", 0)
         byte_length = buffer_view["byteLength"]
-        byte_stride = buffer_view.get("byteStride", 0)  # Optional
 
-        # Calculate the starting and ending byte positions in the binary data
-        last_byte = byte_offset + byte_length
-
-        if byte_stride == 0:
-            # If byteStride is not specified, read all the data in one go
-            loaded_data = gltf_data[byte_offset:last_byte]
-        else:
-            # If byteStride is specified, read data element by element
-            num_elements = byte_length // byte_stride
-            loaded_data = b''.join(gltf_data[byte_offset + i * byte_stride:byte_offset + (i + 1) * byte_stride]
-                                   for i in range(num_elements))
-
-        return loaded_data
+        return gltf_data[byte_offset:byte_offset + byte_length]
 
     def get_material(self, index: int):
 
@@ -263,7 +488,11 @@ class GLTFReader:
 
         return self.gltf_header["materials"][index]
 
-    def get_animations(self) -> list:
+    def get_animations(self) -> dict:
+        """
+        Returns the channels of all animations together, grouped by target path. Every animation's accessors are
+        decoded, so use get_animation() when only some of them are needed
+        """
 
         # TODO: It should return a list of dictionaries, each with their channels
 
@@ -274,161 +503,268 @@ class GLTFReader:
         if self.gltf_header is None or "animations" not in self.gltf_header:
             return animation_channels
 
-        for animation_header in self.gltf_header["animations"]:
-            for channel in animation_header["channels"]:
-                sampler = animation_header["samplers"][channel["sampler"]]
-                input_accessor = self.gltf_header["accessors"][sampler["input"]]
-                output_accessor = self.gltf_header["accessors"][sampler["output"]]
+        for animation_index in range(self.num_animations):
+            for target_path, channels in self.get_animation(index=animation_index).items():
+                animation_channels[target_path].extend(channels)
+
+        return animation_channels
+
+    def get_animation(self, index: int) -> dict:
+        """
+        Returns the channels of a single animation, grouped by target path. Only the accessors of this animation's
+        samplers are decoded, through the accessor cache, so samplers that share their timestamps decode them once
+        :param index: int, index of the animation in the GLTF header
+        :return: dict, {"translation": [...], "rotation": [...], "scale": [...]}
+        """
+
+        animation_channels = {"translation": [],
+                              "rotation": [],
+                              "scale": []}
+
+        if self.gltf_header is None:
+            return animation_channels
 
-                animation_channels[channel["target"]["path"]].append(
-                    {"node_index": channel["target"]["node"],
-                     "timestamps": self.get_data(accessor=input_accessor),
-                     "values": self.get_data(accessor=output_accessor)})
+        animation_header = self.gltf_header[GLTF_ANIMATIONS][index]
+        for channel in animation_header["channels"]:
+            sampler = animation_header["samplers"][channel["sampler"]]
+
+            animation_channels[channel["target"]["path"]].append(
+                {"node_index": channel["target"]["node"],
+                 "timestamps": self.get_data(accessor_index=sampler["input"]),
+                 "values": self.get_data(accessor_index=sampler["output"])})
 
         return animation_channels
 
     def get_nodes(self) -> list:
+        """
+        Returns one dictionary per node. See get_node_arrays() for the same data as flat arrays, which is much
+        cheaper for large scenes
+        """
 
-        if self.gltf_header is None:
+        node_arrays = self.get_node_arrays()
+        if node_arrays is None:
             return None
 
+        num_children = node_arrays["num_children"]
+        children_offsets = node_arrays["children_offsets"]
         nodes = []
-        for gltf_node in self.gltf_header["nodes"]:
-
-            # TODO: Matrices and translation/rotation/scale need to be checked beforehand to make sure they match
-
-            node_data = {
+        for index, gltf_node in enumerate(self.gltf_header.get(GLTF_NODES, [])):
+            nodes.append({
                 'name': gltf_node.get('name', ""),
-                'translation': np.array(gltf_node.get('translation', [0, 0, 0]), dtype=np.float32),
-                'rotation': np.array(gltf_node.get('rotation', [0, 0, 0, 1]), dtype=np.float32),
-                'scale': np.array(gltf_node.get('scale', [1, 1, 1]), dtype=np.float32),
-                'matrix': None,
-                'children_indices': gltf_node.get('children', []),
-                'mesh_index': gltf_node.get('mesh', -1),
-                'skin_index': gltf_node.get('skin', -1)}
-
-            if "matrix" in gltf_node:
-                # If "matrix" is defined, update translation, rotation and scale to reflect that
-                gltf_matrix = np.reshape(np.array(gltf_node['matrix'], dtype=np.float32), (4, 4)).T
-                mat4.matrix_decomposition(
-                    gltf_matrix,
-                    node_data["translation"],
-                    node_data["rotation"],
-                    node_data["scale"])
-                node_data["matrix"] = gltf_matrix
-            else:
-                matrix = np.eye(4, dtype=np.float32)
-                mat4.matrix_composition(
-                    node_data["translation"],
-                    node_data["rotation"],
-                    node_data["scale"],
-                    matrix)
-                node_data["matrix"] = matrix
-
-            nodes.append(node_data)
-
-        # Find out the parent indices to help out with future node re-organisation
-        for current_index, node in enumerate(nodes):
-            parent_indices = [parent_index for parent_index, sample_node in enumerate(nodes)
-                              if current_index in sample_node["children_indices"]]
-            if len(parent_indices) > 1:
-                raise Exception("[ERROR] There should only be one parent per node!")
-
-            node["parent_index"] = parent_indices[0] if len(parent_indices) == 1 else -1
-
-        # Assign tree_depth for each node
-        for index, node in enumerate(nodes):
-            if node["parent_index"] == -1:  # Root nodes
-                self._assign_tree_depth(nodes, index, 0)
+                'translation': node_arrays["translation"][index],
+                'rotation': node_arrays["rotation"][index],
+                'scale': node_arrays["scale"][index],
+                'matrix': node_arrays["matrix"][index],
+                'children_indices': node_arrays["children_flat"][children_offsets[index]:
+                                                                 children_offsets[index] + num_children[index]].tolist(),
+                'mesh_index': int(node_arrays["mesh_index"][index]),
+                'skin_index': int(node_arrays["skin_index"][index]),
+                'parent_index': int(node_arrays["parent_index"][index]),
+                'tree_depth': int(node_arrays["tree_depth"][index])})
 
         return nodes
 
-    def _assign_tree_depth(self, nodes, node_index, current_depth):
-        nodes[node_index]['tree_depth'] = current_depth
-        for child_index in nodes[node_index]['children_indices']:
-            self._assign_tree_depth(nodes, child_index, current_depth + 1)
+    def get_node_arrays(self) -> dict:
+        """
+        Extracts the whole node hierarchy as flat (struct-of-arrays) numpy arrays, indexed by node index:
+            - names: list of str, empty if the node has no name
+            - translation (N, 3), rotation (N, 4) as x, y, z, w, scale (N, 3) and matrix (N, 4, 4), all float32
+            - parent_index (N,), -1 for root nodes
+            - num_children (N,), children_offsets (N,) and children_flat: children lists of all nodes concatenated,
+              so the children of node "i" are children_flat[children_offsets[i]:children_offsets[i] + num_children[i]]
+            - mesh_index (N,) and skin_index (N,), -1 if none
+            - tree_depth (N,), 0 for root nodes
+        :return: dict
+        """
 
-    def get_meshes(self) -> list:
         if self.gltf_header is None:
             return None
 
-        meshes = []
-        for mesh in self.gltf_header["meshes"]:
-
-            # Resolve render mode (triangles, lines, points, etc...)
-            unique_primitive_render_modes = set([primitive.get("mode", DEFAULT_RENDER_MODE)
-                                                 for primitive in mesh["primitives"]])
-            if len(unique_primitive_render_modes) > 1:
-                raise Exception(f"[ERROR] There are a mix of render modes between primitives. "
-                                f"There should be only one: {[PRIMITIVE_RENDERING_MODES[value] for value in unique_primitive_render_modes]}")
-            render_mode = PRIMITIVE_RENDERING_MODES[list(unique_primitive_render_modes)[0]]
-
-            new_mesh = {
-                "indices": [],
-                "render_mode": render_mode,
-                "attributes": {}}
-
-            sum_num_vertices = 0
-
-            # Combine all primitives into one single mesh
-            for primitive in mesh["primitives"]:
-
-                # Get data in right formate from primitive
-                primitive_indices = self.get_data(accessor=self.get_accessor(primitive["indices"]))
-
-                # Create new keys in current buffer with
-                for attr_key in primitive["attributes"].keys():
-                    # TODO: Consider what would happen if one primitive has a new attribute.
-                    #       I think this would screw up the indices
-                    new_mesh["attributes"][attr_key] = new_mesh["attributes"].get(attr_key, [])
+        gltf_nodes = self.gltf_header.get(GLTF_NODES, [])
+        num_nodes = len(gltf_nodes)
+
+        # Single pass over the JSON nodes. Everything else is done with whole arrays
+        names = []
+        mesh_index = np.full(num_nodes, -1, dtype=np.int32)
+        skin_index = np.full(num_nodes, -1, dtype=np.int32)
+        num_children = np.zeros(num_nodes, dtype=np.int32)
+        children_lists = []
+        trs_node_indices = ([], [], [])
+        trs_values = ([], [], [])
+        matrix_node_indices = []
+        for node_index, gltf_node in enumerate(gltf_nodes):
+            names.append(gltf_node.get("name", ""))
+            for key_index, key in enumerate((GLTF_TRANSLATION, GLTF_ROTATION, GLTF_SCALE)):
+                if key in gltf_node:
+                    trs_node_indices[key_index].append(node_index)
+                    trs_values[key_index].append(gltf_node[key])
+            if GLTF_MATRIX in gltf_node:
+                matrix_node_indices.append(node_index)
+            if "mesh" in gltf_node:
+                mesh_index[node_index] = gltf_node["mesh"]
+            if GLTF_SKIN in gltf_node:
+                skin_index[node_index] = gltf_node[GLTF_SKIN]
+            if GLTF_CHILDREN in gltf_node:
+                children_lists.append(gltf_node[GLTF_CHILDREN])
+                num_children[node_index] = len(gltf_node[GLTF_CHILDREN])
+
+        translation = np.zeros((num_nodes, 3), dtype=np.float32)
+        rotation = np.zeros((num_nodes, 4), dtype=np.float32)
+        rotation[:, 3] = 1.0
+        scale = np.ones((num_nodes, 3), dtype=np.float32)
+        for key_index, values in enumerate((translation, rotation, scale)):
+            if len(trs_node_indices[key_index]) > 0:
+                values[trs_node_indices[key_index]] = trs_values[key_index]
+
+        matrix = compose_trs_matrices(translation=translation, rotation=rotation, scale=scale)
+
+        # If "matrix" is defined, update translation, rotation and scale to reflect that
+        # TODO: Matrices and translation/rotation/scale need to be checked beforehand to make sure they match
+        if len(matrix_node_indices) > 0:
+            num_matrices = len(matrix_node_indices)
+            gltf_matrices = np.array([gltf_nodes[index][GLTF_MATRIX] for index in matrix_node_indices],
+                                     dtype=np.float32)
+            gltf_matrices = np.ascontiguousarray(np.reshape(gltf_matrices, (num_matrices, 4, 4)).transpose((0, 2, 1)))
+            matrix_translation = np.empty((num_matrices, 3), dtype=np.float32)
+            matrix_rotation = np.empty((num_matrices, 4), dtype=np.float32)
+            matrix_scale = np.empty((num_matrices, 3), dtype=np.float32)
+            mat4.matrix_decompositions(gltf_matrices, matrix_translation, matrix_rotation, matrix_scale)
+
+            matrix[matrix_node_indices] = gltf_matrices
+            translation[matrix_node_indices] = matrix_translation
+            rotation[matrix_node_indices] = matrix_rotation
+            scale[matrix_node_indices] = matrix_scale
+
+        children_flat = np.fromiter(itertools.chain.from_iterable(children_lists),
+                                    dtype=np.int32,
+                                    count=int(num_children.sum()))
+        children_offsets = (np.cumsum(num_children) - num_children).astype(np.int32)
+        parent_index = build_parent_indices(num_children=num_children, children_flat=children_flat)
+
+        return {
+            "names": names,
+            "translation": translation,
+            "rotation": rotation,
+            "scale": scale,
+            "matrix": matrix,
+            "parent_index": parent_index,
+            "num_children": num_children,
+            "children_offsets": children_offsets,
+            "children_flat": children_flat,
+            "mesh_index": mesh_index,
+            "skin_index": skin_index,
+            "tree_depth": compute_node_depths(parent_index=parent_index,
+                                              num_children=num_children,
+                                              children_offsets=children_offsets,
+                                              children_flat=children_flat)}
 
-                # Append new vertices, normals etc to current list, but indices must be shifted because we'll
-                # concatenate primitives at the end
-                new_mesh["indices"].append(primitive_indices + sum_num_vertices)
-                for attr_key, accessor_index in primitive["attributes"].items():
-                    data = self.get_data(accessor=self.get_accessor(accessor_index))
-                    new_mesh["attributes"][attr_key].append(data)
-                    if attr_key == "POSITION":
-                        sum_num_vertices += data.shape[0]  # Update the primitive index offset of this attribute is vertices
+    def get_meshes(self) -> list:
+        if self.gltf_header is None:
+            return None
 
-            # Concatenate all the meshes internal arrays into one per attribute
-            new_mesh["indices"] = np.concatenate(new_mesh["indices"])
-            for attr_key, attr_value in new_mesh["attributes"].items():
-                new_mesh["attributes"][attr_key] = np.concatenate(attr_value, axis=0)
+        return [self.get_mesh(index=mesh_index) for mesh_index in range(len(self.gltf_header["meshes"]))]
 
-            meshes.append(new_mesh)
+    def get_mesh(self, index: int) -> dict:
+        """
+        Decodes a single mesh, combining all its primitives into one. Only the accessors used by this mesh are read
+        :param index: int, index of the mesh in the GLTF header
+        :return: dict, with "indices", "render_mode" and "attributes"
+        """
+        if self.gltf_header is None:
+            return None
 
-        return meshes
+        mesh = self.gltf_header["meshes"][index]
+
+        # Resolve render mode (triangles, lines, points, etc...)
+        unique_primitive_render_modes = set([primitive.get("mode", DEFAULT_RENDER_MODE)
+                                             for primitive in mesh["primitives"]])
+        if len(unique_primitive_render_modes) > 1:
+            raise Exception(f"[ERROR] There are a mix of render modes between primitives. "
+                            f"There should be only one: {[PRIMITIVE_RENDERING_MODES[value] for value in unique_primitive_render_modes]}")
+        render_mode = PRIMITIVE_RENDERING_MODES[list(unique_primitive_render_modes)[0]]
+
+        new_mesh = {
+            "indices": [],
+            "render_mode": render_mode,
+            "attributes": {}}
+
+        sum_num_vertices = 0
+
+        # Combine all primitives into one single mesh
+        for primitive in mesh["primitives"]:
+
+            # Get data in right formate from primitive
+            primitive_indices = self.get_data(accessor_index=primitive["indices"])
+
+            # Create new keys in current buffer with
+            for attr_key in primitive["attributes"].keys():
+                # TODO: Consider what would happen if one primitive has a new attribute.
+                #       I think this would screw up the indices
+                new_mesh["attributes"][attr_key] = new_mesh["attributes"].get(attr_key, [])
+
+            # Append new vertices, normals etc to current list, but indices must be shifted because we'll
+            # concatenate primitives at the end
+            new_mesh["indices"].append(primitive_indices + sum_num_vertices)
+            for attr_key, accessor_index in primitive["attributes"].items():
+                data = self.get_data(accessor_index=accessor_index)
+                new_mesh["attributes"][attr_key].append(data)
+                if attr_key == "POSITION":
+                    sum_num_vertices += data.shape[0]  # Update the primitive index offset of this attribute is vertices
+
+        # Concatenate all the meshes internal arrays into one per attribute. Single-primitive meshes keep the
+        # (read-only) views as they are to avoid copying the data
+        new_mesh["indices"] = np.concatenate(new_mesh["indices"]) if len(new_mesh["indices"]) > 1 \
+            else new_mesh["indices"][0]
+        for attr_key, attr_value in new_mesh["attributes"].items():
+            new_mesh["attributes"][attr_key] = np.concatenate(attr_value, axis=0) if len(attr_value) > 1 \
+                else attr_value[0]
+
+        return new_mesh
 
     def get_skeletons(self):
-        nodes = self.get_nodes()
+        """
+        Returns, for each skin, the list of nodes used by it: its joints and all their ancestors. Parent and
+        children indices of these nodes are converted to indices within that list (-1 if outside of it)
+        """
+
+        node_arrays = self.get_node_arrays()
         skins = self.get_skins()
+        parent_indices = node_arrays["parent_index"]
         skeletons = []
 
         for skin in skins:
-            joints = skin['joints']
-            skeleton_nodes = {}
-            original_to_skeleton_index = {}
 
-            # Step 1: Copy relevant nodes and create an index mapping
-            for joint in joints:
+            # Step 1: Select joints and their ancestors
+            skeleton_node_indices = []
+            original_to_skeleton_index = {}
+            for joint in skin['joints']:
                 current_node = joint
-                while current_node != -1 and current_node not in skeleton_nodes:
-                    skeleton_node = copy.deepcopy(nodes[current_node])
-                    skeleton_nodes[current_node] = skeleton_node
-                    original_to_skeleton_index[current_node] = len(original_to_skeleton_index)
-                    current_node = nodes[current_node]['parent_index']
-
-            # Step 2: Update parent and child indices in the skeleton nodes
-            for original_index, skeleton_node in skeleton_nodes.items():
-                if skeleton_node['parent_index'] in original_to_skeleton_index:
-                    skeleton_node['parent_index'] = original_to_skeleton_index[skeleton_node['parent_index']]
-                else:
-                    skeleton_node['parent_index'] = -1
-
-                skeleton_node['children_indices'] = [original_to_skeleton_index[child_index] for child_index in skeleton_node['children_indices'] if child_index in original_to_skeleton_index]
-
-            skeletons.append(list(skeleton_nodes.values()))
+                while current_node != -1 and current_node not in original_to_skeleton_index:
+                    original_to_skeleton_index[current_node] = len(skeleton_node_indices)
+                    skeleton_node_indices.append(current_node)
+                    current_node = int(parent_indices[current_node])
+
+            # Step 2: Create skeleton nodes with parent and children indices converted to skeleton indices
+            skeleton = []
+            for node_index in skeleton_node_indices:
+                num_children = node_arrays["num_children"][node_index]
+                children_offset = node_arrays["children_offsets"][node_index]
+                skeleton.append({
+                    'name': node_arrays["names"][node_index],
+                    'translation': node_arrays["translation"][node_index].copy(),
+                    'rotation': node_arrays["rotation"][node_index].copy(),
+                    'scale': node_arrays["scale"][node_index].copy(),
+                    'matrix': node_arrays["matrix"][node_index].copy(),
+                    'mesh_index': int(node_arrays["mesh_index"][node_index]),
+                    'skin_index': int(node_arrays["skin_index"][node_index]),
+                    'tree_depth': int(node_arrays["tree_depth"][node_index]),
+                    'parent_index': original_to_skeleton_index.get(int(parent_indices[node_index]), -1),
+                    'children_indices': [original_to_skeleton_index[child_index] for child_index in
+                                         node_arrays["children_flat"][children_offset:
+                                                                      children_offset + num_children].tolist()
+                                         if child_index in original_to_skeleton_index]})
+
+            skeletons.append(skeleton)
 
         return skeletons
 
@@ -443,8 +779,7 @@ class GLTFReader:
         skins = []
         for skin_header in self.gltf_header.get("skins", []):
             joints = skin_header["joints"]
-            inverse_bind_matrices_accessor = self.gltf_header["accessors"][skin_header["inverseBindMatrices"]]
-            inverse_bind_matrices_data = self.get_data(accessor=inverse_bind_matrices_accessor)
+            inverse_bind_matrices_data = self.get_data(accessor_index=skin_header["inverseBindMatrices"])
 
             # Convert to a suitable format, e.g., 4x4 matrices
             inverse_bind_matrices = inverse_bind_matrices_data.reshape((-1, 4, 4))
@@ -0,0 +1,50 @@
+import json
+import struct
+
+import numpy as np
+
+
+def write_interleaved_glb(fpath: str, positions: np.ndarray, normals: np.ndarray, uvs: np.ndarray):
+    """
+    Writes a minimal GLB with a single interleaved buffer view (POSITION, NORMAL, TEXCOORD_0) and a
+    separate index buffer view. Used to test and benchmark how GLTFReader decodes strided accessors
+
+    :param fpath: str, output .glb file
+    :param positions: numpy array (N, 3)
+    :param normals: numpy array (N, 3)
+    :param uvs: numpy array (N, 2)
+    :return: None
+    """
+
+    num_vertices = positions.shape[0]
+    interleaved = np.concatenate([positions, normals, uvs], axis=1).astype(np.float32)
+    vertex_bytes = interleaved.tobytes()
+    indices = np.arange(num_vertices, dtype=np.uint32)
+    index_bytes = indices.tobytes()
+
+    header = {
+        "asset": {"version": "2.0"},
+        "scenes": [{"nodes": [0]}],
+        "nodes": [{"mesh": 0}],
+        "meshes": [{"primitives": [{"attributes": {"POSITION": 0, "NORMAL": 1, "TEXCOORD_0": 2}, "indices": 3}]}],
+        "buffers": [{"byteLength": len(vertex_bytes) + len(index_bytes)}],
+        "bufferViews": [
+            {"buffer": 0, "byteOffset": 0, "byteLength": len(vertex_bytes), "byteStride": 32},
+            {"buffer": 0, "byteOffset": len(vertex_bytes), "byteLength": len(index_bytes)}],
+        "accessors": [
+            {"bufferView": 0, "byteOffset": 0, "componentType": 5126, "count": num_vertices, "type": "VEC3",
+             "min": positions.min(axis=0).tolist(), "max": positions.max(axis=0).tolist()},
+            {"bufferView": 0, "byteOffset": 12, "componentType": 5126, "count": num_vertices, "type": "VEC3"},
+            {"bufferView": 0, "byteOffset": 24, "componentType": 5126, "count": num_vertices, "type": "VEC2"},
+            {"bufferView": 1, "componentType": 5125, "count": num_vertices, "type": "SCALAR"}]}
+
+    json_bytes = json.dumps(header).encode("utf-8")
+    json_bytes += b" " * (-len(json_bytes) % 4)
+    bin_bytes = vertex_bytes + index_bytes
+
+    with open(fpath, "wb") as file:
+        file.write(struct.pack("<4sII", b"glTF", 2, 12 + 8 + len(json_bytes) + 8 + len(bin_bytes)))
+        file.write(struct.pack("<II", len(json_bytes), 0x4E4F534A))
+        file.write(json_bytes)
+        file.write(struct.pack("<II", len(bin_bytes), 0x004E4942))
+        file.write(bin_bytes)
@@ -0,0 +1,134 @@
+import os
+
+import numpy as np
+from scipy.spatial.transform import Rotation
+
+from src.core import constants
+from src.math.animation_baking import (bake_bvh_frames, compress_clip, decode_smallest_three, encode_smallest_three,
+                                       resample_frames)
+from src.math.quaternion import euler_to_quats
+from src.math.skeleton_pose import SkeletonPose
+from src.utilities import utils_bvh_reader
+
+WALK_FPATH = os.path.join(constants.RESOURCES_DIR, "bvh", "walk.bvh")
+
+
+def quat_angles(quats_a: np.ndarray, quats_b: np.ndarray) -> np.ndarray:
+
+    # Chord-based angle, accurate for small angles, where arccos(dot) is not
+    quats_a = quats_a.astype(np.float64)
+    quats_b = quats_b.astype(np.float64)
+    signs = np.where(np.sum(quats_a * quats_b, axis=-1, keepdims=True) < 0.0, -1.0, 1.0)
+    chords = np.linalg.norm(quats_a - signs * quats_b, axis=-1)
+    return 4.0 * np.arcsin(np.clip(0.5 * chords, 0.0, 1.0))
+
+
+def test_euler_to_quats_matches_scipy():
+
+    rng = np.random.default_rng(0)
+    rotation_orders = ["zxy", "xyz", "yxz", "zyx", "none"]
+    euler_angles = rng.uniform(-np.pi, np.pi, size=(10, len(rotation_orders), 3))
+    quats = euler_to_quats(euler_angles=euler_angles, rotation_orders=rotation_orders)
+
+    for bone, rotation_order in enumerate(rotation_orders):
+        rotation_order = rotation_order if rotation_order != "none" else "xyz"
+        angles = euler_angles[:, bone, ["xyz".index(axis) for axis in rotation_order]]
+        target = Rotation.from_euler(rotation_order.upper(), angles).as_quat()
+        np.testing.assert_allclose(quat_angles(quats[:, bone], target), 0.0, atol=1e-5)
+
+
+def test_smallest_three_round_trip():
+
+    rng = np.random.default_rng(1)
+    quats = rng.normal(size=(10_000, 4))
+    quats /= np.linalg.norm(quats, axis=-1, keepdims=True)
+    encoded = encode_smallest_three(quats=quats)
+
+    assert encoded.dtype == np.uint16 and encoded.shape == (quats.shape[0], 3)
+    assert quat_angles(decode_smallest_three(encoded), quats).max() < 2e-4
+
+
+def test_resample_frames():
+
+    frames = np.arange(12, dtype=np.float32).reshape((4, 1, 3))
+    np.testing.assert_array_equal(resample_frames(frames=frames, frame_period=0.1, frame_rate=10.0), frames)
+
+    doubled = resample_frames(frames=frames, frame_period=0.1, frame_rate=20.0)
+    assert doubled.shape == (7, 1, 3)
+    np.testing.assert_allclose(doubled[1::2], 0.5 * (frames[:-1] + frames[1:]))
+
+
+def test_compressed_clip_tolerances():
+
+    # Straight lines and constant tracks only need their two end keys, noisy tracks keep more
+    num_frames = 50
+    rng = np.random.default_rng(2)
+    times = np.linspace(0.0, 1.0, num_frames, dtype=np.float32)[:, np.newaxis]
+    translations = np.stack([times * [1.0, 2.0, 3.0],
+                             np.broadcast_to([0.5, 0.5, 0.5], (num_frames, 3)),
+                             np.cumsum(rng.normal(scale=0.1, size=(num_frames, 3)), axis=0)], axis=1)
+    rotation_vectors = np.stack([times * [0.0, 0.0, 1.0],
+                                 np.broadcast_to([0.1, 0.2, 0.3], (num_frames, 3)),
+                                 np.cumsum(rng.normal(scale=0.05, size=(num_frames, 3)), axis=0)], axis=1)
+    rotations = Rotation.from_rotvec(rotation_vectors.reshape((-1, 3))).as_quat().reshape((num_frames, 3, 4))
+    rotations[::7] *= -1.0  # Same rotations, in the other hemisphere
+    scales = np.ones_like(translations)
+
+    clip = compress_clip(translations=translations, rotations=rotations, scales=scales, frame_rate=30.0,
+                         translation_tolerance=1e-3, rotation_tolerance=1e-3)
+    key_offsets = clip.arrays["translation/key_offsets"]
+    np.testing.assert_array_equal(np.diff(key_offsets)[:2], [2, 2])
+    assert clip.num_keys("scale") == 6
+    num_rotation_keys = np.diff(clip.arrays["rotation/key_offsets"])
+    assert num_rotation_keys[0] < num_frames // 4 and num_rotation_keys[1] == 2
+
+    decoded_translations = np.empty((num_frames, 3, 3), dtype=np.float32)
+    decoded_rotations = np.empty((num_frames, 3, 4), dtype=np.float32)
+    decoded_scales = np.empty((num_frames, 3, 3), dtype=np.float32)
+    clip.decode(times=np.arange(num_frames) / 30.0, translations_out=decoded_translations,
+                rotations_out=decoded_rotations, scales_out=decoded_scales)
+
+    quantization_errors = np.ptp(translations, axis=0) / 65535.0
+    translation_errors = np.abs(decoded_translations - translations)
+    assert np.all(translation_errors <= 1e-3 + quantization_errors + 1e-6)
+    assert quat_angles(decoded_rotations, rotations).max() < 1e-3 + 2e-4
+    np.testing.assert_array_equal(decoded_scales, 1.0)
+
+    # A single time decodes into a single pose, clamped to the clip
+    single_pose = np.empty((3, 4), dtype=np.float32)
+    clip.decode(times=100.0, rotations_out=single_pose)
+    np.testing.assert_array_equal(single_pose, decoded_rotations[-1])
+
+
+def test_walk_bvh_round_trip():
+
+    header, positions, rotations = utils_bvh_reader.load_bvh(fpath=WALK_FPATH)
+    frame_period = header[utils_bvh_reader.BVH_HEADER_KEY_FRAME_PERIOD]
+    baked = bake_bvh_frames(positions=positions,
+                            euler_rotations=rotations,
+                            offsets=header[utils_bvh_reader.BVH_HEADER_KEY_OFFSETS],
+                            position_columns=header[utils_bvh_reader.BVH_HEADER_KEY_POSITION_COLUMNS],
+                            rotation_orders=header[utils_bvh_reader.BVH_HEADER_KEY_ROTATION_ORDERS],
+                            frame_period=frame_period,
+                            frame_rate=1.0 / frame_period)
+    num_frames, num_bones = baked["rotation"].shape[:2]
+    assert num_frames == positions.shape[0]
+
+    clip = compress_clip(translations=baked["translation"], rotations=baked["rotation"], scales=baked["scale"],
+                         frame_rate=1.0 / frame_period)
+    assert clip.nbytes < sum(array.nbytes for array in baked.values()) / 4
+
+    decoded = {path: np.empty_like(array) for path, array in baked.items()}
+    clip.decode(times=np.arange(num_frames) * frame_period, translations_out=decoded["translation"],
+                rotations_out=decoded["rotation"], scales_out=decoded["scale"])
+
+    # Joint positions of the decoded clip stay close to those of the original one
+    pose = SkeletonPose(parent_indices=header[utils_bvh_reader.BVH_HEADER_KEY_PARENT_INDEX])
+    world_matrices = np.empty((2, num_frames, num_bones, 4, 4), dtype=np.float32)
+    for index, frames in enumerate([baked, decoded]):
+        pose.evaluate(translations=frames["translation"], rotations=frames["rotation"], scales=frames["scale"],
+                      world_matrices_out=world_matrices[index])
+
+    # The skeleton is about 170 units tall, and rotation errors add up along its chains
+    joint_errors = np.linalg.norm(world_matrices[0, ..., :3, 3] - world_matrices[1, ..., :3, 3], axis=-1)
+    assert joint_errors.max() < 0.2
@@ -0,0 +1,129 @@
+import os
+
+import numpy as np
+from scipy.spatial.transform import Rotation, Slerp
+
+from src.core.file_loaders.file_loader_gltf import FileLoaderGLTF
+from src.math.animation_sampler import AnimationSampler, pack_channels
+
+MESHES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "meshes")
+
+
+def create_channels(rng: np.random.Generator, num_dims: int, interpolation: str) -> list:
+
+    # Channels with different numbers of keyframes and time ranges, including a single-keyframe one
+    channels = []
+    for channel_index, num_keys in enumerate([1, 2, 7, 30]):
+        timestamps = np.sort(rng.uniform(0.0, 3.0, num_keys)).astype(np.float32)
+        values = rng.normal(size=(num_keys, num_dims)).astype(np.float32)
+        if num_dims == 4:
+            values /= np.linalg.norm(values, axis=-1, keepdims=True)
+        channels.append({"target_index": channel_index * 2,
+                         "interpolation": interpolation,
+                         "timestamps": timestamps,
+                         "values": values})
+    return channels
+
+
+def create_sampler(channels: list, is_rotation=False) -> AnimationSampler:
+    return AnimationSampler(**pack_channels(channels=channels), is_rotation=is_rotation)
+
+
+def test_linear_and_step_vectors():
+
+    rng = np.random.default_rng(0)
+    times = np.linspace(-1.0, 4.0, 101)
+
+    channels = create_channels(rng=rng, num_dims=3, interpolation="LINEAR")
+    sampled = create_sampler(channels=channels).sample(times=times)
+    assert sampled.shape == (times.size, len(channels), 3)
+    for channel_index, channel in enumerate(channels):
+        for dim in range(3):
+            target = np.interp(times, channel["timestamps"], channel["values"][:, dim])
+            np.testing.assert_allclose(sampled[:, channel_index, dim], target, atol=1e-5)
+
+    channels = create_channels(rng=rng, num_dims=3, interpolation="STEP")
+    sampled = create_sampler(channels=channels).sample(times=times)
+    for channel_index, channel in enumerate(channels):
+        keys = np.clip(np.searchsorted(channel["timestamps"], times, side="right") - 1, 0, None)
+        np.testing.assert_array_equal(sampled[:, channel_index], channel["values"][keys])
+
+    # Sampling one time at a time gives the same results as sampling many at once
+    sampler = create_sampler(channels=channels)
+    np.testing.assert_array_equal(sampler.sample(times=times[37]), sampler.sample(times=times)[37])
+
+
+def test_linear_rotations_match_scipy_slerp():
+
+    rng = np.random.default_rng(1)
+    channels = create_channels(rng=rng, num_dims=4, interpolation="LINEAR")
+    times = np.linspace(0.0, 3.0, 200)
+    sampled = create_sampler(channels=channels, is_rotation=True).sample(times=times)
+
+    for channel_index, channel in enumerate(channels[1:], start=1):
+        channel_times = np.clip(times, channel["timestamps"][0], channel["timestamps"][-1])
+        target = Slerp(channel["timestamps"], Rotation.from_quat(channel["values"]))(channel_times)
+        angles = (Rotation.from_quat(sampled[:, channel_index]) * target.inv()).magnitude()
+        np.testing.assert_allclose(angles, 0.0, atol=1e-3)
+
+    np.testing.assert_allclose(sampled[:, 0], np.broadcast_to(channels[0]["values"][0], (times.size, 4)))
+
+
+def test_cubic_spline():
+
+    # Cubic splines pass through their keyframes, and reproduce a straight line when tangents match its slope
+    timestamps = np.array([0.0, 1.0, 3.0], dtype=np.float32)
+    values = np.array([[0.0, 1.0, 2.0], [1.0, 3.0, 2.0], [3.0, 7.0, 2.0]], dtype=np.float32)
+    tangents = np.array([[1.0, 2.0, 0.0]] * 3, dtype=np.float32)
+    cubic_values = np.stack([tangents, values, tangents], axis=1).reshape((-1, 3))
+    sampler = create_sampler(channels=[{"target_index": 0,
+                                        "interpolation": "CUBICSPLINE",
+                                        "timestamps": timestamps,
+                                        "values": cubic_values}])
+
+    np.testing.assert_allclose(sampler.sample(times=timestamps)[:, 0], values, atol=1e-6)
+    times = np.linspace(0.0, 3.0, 31)
+    np.testing.assert_allclose(sampler.sample(times=times)[:, 0, 0], times, atol=1e-5)
+    np.testing.assert_allclose(sampler.sample(times=times)[:, 0, 1], 1.0 + 2.0 * times, atol=1e-5)
+
+
+def test_sample_into_targets():
+
+    rng = np.random.default_rng(2)
+    channels = create_channels(rng=rng, num_dims=3, interpolation="LINEAR")
+    packed = pack_channels(channels=channels)
+    target_lookup = np.array([5, -1, 4, -1, 3, -1, 2, -1], dtype=np.int32)
+    packed["target_indices"] = target_lookup[packed["target_indices"]]
+    sampler = AnimationSampler(**packed)
+
+    output = np.full((6, 3), 9.0, dtype=np.float32)
+    sampler.sample_into(times=1.5, output=output)
+    sampled = sampler.sample(times=1.5)
+    np.testing.assert_array_equal(output[[5, 4, 3, 2]], sampled)
+    np.testing.assert_array_equal(output[:2], 9.0)
+
+    # Baking many frames at once
+    baked = np.zeros((10, 6, 3), dtype=np.float32)
+    sampler.sample_into(times=np.linspace(0, 3, 10), output=baked)
+    np.testing.assert_array_equal(baked[4, [5, 4, 3, 2]], sampler.sample(times=np.linspace(0, 3, 10)[4]))
+
+
+def test_gltf_animation_keyframes():
+
+    all_resources = {}
+    FileLoaderGLTF(all_resources=all_resources).load(resource_uid="brain_stem",
+                                                     fpath=os.path.join(MESHES_DIR, "BrainStem.glb"))
+    animation_blocks = all_resources["brain_stem/animation_0"].data_blocks
+    node2bone_lookup = all_resources["brain_stem/skeleton_0"].data_blocks["nodes2skeleton_lookup"].data
+
+    sampler = AnimationSampler.from_data_blocks(data_blocks=animation_blocks,
+                                                path="rotation",
+                                                target_lookup=node2bone_lookup)
+    assert sampler.is_rotation
+
+    # At a keyframe's time, every channel returns that keyframe (or its equivalent negated quaternion)
+    key_offsets = animation_blocks["rotation/key_offsets"].data
+    key_index = key_offsets[0] + 100
+    sampled = sampler.sample(times=animation_blocks["rotation/timestamps"].data[key_index])
+    keyframe_values = animation_blocks["rotation/values"].data[key_offsets[:-1] + 100]
+    np.testing.assert_allclose(np.abs(np.sum(sampled * keyframe_values, axis=-1)), 1.0, atol=1e-5)
@@ -0,0 +1,82 @@
+import logging
+
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.core.component_arrays import ComponentArrays
+from src.components.transform_3d import Transform3D
+
+
+def test_add_and_swap_remove():
+
+    component_arrays = ComponentArrays(fields={"value": (np.float32, (2,), 1.0),
+                                               "flag": (np.bool_, (), False)},
+                                       initial_capacity=2)
+
+    rows = component_arrays.add_rows(entity_uids=np.array([10, 11, 12, 13], dtype=np.int64))
+    np.testing.assert_array_equal(rows, [0, 1, 2, 3])
+    assert component_arrays.capacity >= 4
+    np.testing.assert_array_equal(component_arrays.get("value"), np.ones((4, 2), dtype=np.float32))
+
+    component_arrays.get("value")[:, 0] = [0, 1, 2, 3]
+    component_arrays.remove(entity_uid=11)
+
+    # Last row moves into the empty one
+    assert len(component_arrays) == 3
+    assert 11 not in component_arrays
+    np.testing.assert_array_equal(component_arrays.get_entity_uids(), [10, 13, 12])
+    np.testing.assert_array_equal(component_arrays.get("value")[:, 0], [0, 3, 2])
+    np.testing.assert_array_equal(component_arrays.get_rows(entity_uids=[13, 11, 12]), [1, -1, 2])
+
+
+def test_scene_binds_components_to_rows():
+
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    entity_uids = [scene._create_entity() for _ in range(3)]
+
+    transforms = [scene.add_component(entity_uid=entity_uid,
+                                      component_type=constants.COMPONENT_TYPE_TRANSFORM,
+                                      parameters={"position": f"{index} 0 0"})
+                  for index, entity_uid in enumerate(entity_uids)]
+
+    transform_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    assert len(transform_arrays) == 3
+    np.testing.assert_array_equal(transform_arrays.get("position")[:, 0], [0.0, 1.0, 2.0])
+
+    # Writing through the component or the arrays must be visible from the other side
+    transforms[1].position = (5.0, 6.0, 7.0)
+    np.testing.assert_array_equal(transform_arrays.get("position")[1], [5.0, 6.0, 7.0])
+    transform_arrays.get("world_matrix")[2, 0, 3] = 9.0
+    assert transforms[2].world_matrix[0, 3] == 9.0
+
+    # Removed components keep their data, and the moved one is re-bound to its new row
+    scene.remove_component(entity_uid=entity_uids[0], component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    assert len(transform_arrays) == 2
+    assert transforms[0].position == (0.0, 0.0, 0.0)
+    assert transforms[2].component_row == 0
+    assert transforms[2].world_matrix[0, 3] == 9.0
+
+
+def test_transform_update_arrays():
+
+    component_arrays = ComponentArrays(fields=Transform3D._array_fields)
+    reference_transforms = []
+    rng = np.random.default_rng(0)
+    for entity_uid in range(20):
+        parameters = {"position": " ".join(str(value) for value in rng.uniform(-5, 5, 3)),
+                      "rotation": " ".join(str(value) for value in rng.uniform(-3, 3, 3)),
+                      "scale": " ".join(str(value) for value in rng.uniform(0.5, 2, 3))}
+        transform = Transform3D(parameters=parameters)
+        reference = Transform3D(parameters=parameters)
+        component_arrays.add(entity_uid=entity_uid, component=transform)
+        reference_transforms.append(reference)
+
+    updated = Transform3D.update_arrays(component_arrays=component_arrays)
+    assert updated.all()
+    for row, reference in enumerate(reference_transforms):
+        assert reference.update()
+        np.testing.assert_allclose(component_arrays.get("local_matrix")[row], reference.local_matrix, atol=1e-6)
+
+    # Nothing changed, so nothing gets updated
+    assert not Transform3D.update_arrays(component_arrays=component_arrays).any()
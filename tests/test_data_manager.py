@@ -0,0 +1,163 @@
+import os
+import shutil
+import logging
+import multiprocessing
+
+import numpy as np
+import pytest
+
+from src.core import constants
+from src.core.data_manager import DataManager, FILE_LOADER_CLASSES, get_file_hash, _load_file_worker
+from src.core.file_loaders.file_loader import FileLoader
+from src.core.file_loaders.file_loader_bvh import FileLoaderBVH
+
+
+def test_load_files_matches_load_file():
+
+    logger = logging.getLogger('test_logger')
+    resources = {
+        "duck": os.path.join(constants.RESOURCES_DIR, "meshes", "Duckpaa6lgsfsngq0i1w.glb"),
+        "walk": os.path.join(constants.RESOURCES_DIR, "bvh", "walk.bvh"),
+        "missing": os.path.join(constants.RESOURCES_DIR, "meshes", "does_not_exist.glb")}
+
+    sequential_manager = DataManager(logger=logger, cache_dir=None)
+    sequential_manager.load_file(data_group_id="duck", fpath=resources["duck"])
+    sequential_manager.load_file(data_group_id="walk", fpath=resources["walk"])
+
+    parallel_manager = DataManager(logger=logger, cache_dir=None)
+    results = parallel_manager.load_files(resources=resources, max_workers=2)
+
+    assert results == {"duck": True, "walk": True, "missing": False}
+    assert sequential_manager.data_groups.keys() == parallel_manager.data_groups.keys()
+
+    for data_group_id, target_data_group in sequential_manager.data_groups.items():
+        data_group = parallel_manager.data_groups[data_group_id]
+        assert data_group.archetype == target_data_group.archetype
+        assert data_group.data_blocks.keys() == target_data_group.data_blocks.keys()
+        for block_key, target_data_block in target_data_group.data_blocks.items():
+            np.testing.assert_array_equal(data_group.data_blocks[block_key].data, target_data_block.data)
+            assert data_group.data_blocks[block_key].metadata == target_data_block.metadata
+
+
+def test_load_files_without_forkserver(monkeypatch):
+
+    # As on Windows, where workers have to be spawned
+    monkeypatch.setattr(multiprocessing, "get_all_start_methods", lambda: ["spawn"])
+
+    resources = {
+        "duck": os.path.join(constants.RESOURCES_DIR, "meshes", "Duckpaa6lgsfsngq0i1w.glb"),
+        "walk": os.path.join(constants.RESOURCES_DIR, "bvh", "walk.bvh")}
+    data_manager = DataManager(logger=logging.getLogger('test_logger'), cache_dir=None)
+    assert data_manager.load_files(resources=resources, max_workers=2) == {"duck": True, "walk": True}
+    assert any(key.startswith("duck/") for key in data_manager.data_groups)
+    assert any(key.startswith("walk/") for key in data_manager.data_groups)
+
+
+class FileLoaderFailing(FileLoader):
+
+    def load(self, resource_uid: str, fpath: str) -> bool:
+        self.external_data_groups[f"{resource_uid}/partial"] = None
+        return False
+
+
+def test_load_file_worker_reports_failed_loads(monkeypatch):
+
+    # Workers must not ship back whatever a failed loader left behind
+    monkeypatch.setitem(FILE_LOADER_CLASSES, ".obj", FileLoaderFailing)
+    with pytest.raises(RuntimeError):
+        _load_file_worker("broken", os.path.join(constants.RESOURCES_DIR, "meshes", "dragon.obj"))
+
+
+def assert_data_groups_equal(data_groups: dict, target_data_groups: dict):
+    assert data_groups.keys() == target_data_groups.keys()
+    for data_group_id, target_data_group in target_data_groups.items():
+        data_group = data_groups[data_group_id]
+        assert data_group.archetype == target_data_group.archetype
+        for block_key, target_data_block in target_data_group.data_blocks.items():
+            np.testing.assert_array_equal(data_group.data_blocks[block_key].data, target_data_block.data)
+
+
+def test_resource_cache(tmp_path, monkeypatch):
+
+    logger = logging.getLogger('test_logger')
+    cache_dir = str(tmp_path / "cache")
+    bvh_fpath = str(tmp_path / "walk.bvh")
+    shutil.copyfile(os.path.join(constants.RESOURCES_DIR, "bvh", "walk.bvh"), bvh_fpath)
+
+    # Cold start: the file is parsed and the cache is created
+    cold_manager = DataManager(logger=logger, cache_dir=cache_dir)
+    assert cold_manager.load_file(data_group_id="walk", fpath=bvh_fpath)
+    cache_fpath = cold_manager.get_cache_fpath(fpath=bvh_fpath)
+    assert os.path.isfile(cache_fpath)
+
+    # Warm start: everything comes from the memory-mapped cache, even under another resource uid
+    warm_manager = DataManager(logger=logger, cache_dir=cache_dir)
+    assert warm_manager.load_file(data_group_id="walk_again", fpath=bvh_fpath)
+    renamed_data_groups = {key.replace("walk_again/", "walk/"): value
+                           for key, value in warm_manager.data_groups.items()}
+    assert_data_groups_equal(renamed_data_groups, cold_manager.data_groups)
+    animation_data = warm_manager.data_groups["walk_again/animation_0"].data_blocks["animation_position"].data
+    assert animation_data.base is not None
+
+    # A truncated cache file is ignored and the source file is parsed again
+    with open(cache_fpath, "r+b") as file:
+        file.truncate(os.path.getsize(cache_fpath) // 2)
+    manager = DataManager(logger=logger, cache_dir=cache_dir)
+    assert manager.read_cache(fpath=bvh_fpath, source_hash=get_file_hash(fpath=bvh_fpath)) is None
+    assert manager.load_file(data_group_id="walk", fpath=bvh_fpath)
+    assert_data_groups_equal(manager.data_groups, cold_manager.data_groups)
+
+    # Changing the source file invalidates the cache
+    with open(bvh_fpath, "a") as file:
+        file.write("\n")
+    manager = DataManager(logger=logger, cache_dir=cache_dir)
+    assert manager.read_cache(fpath=bvh_fpath, source_hash="outdated") is None
+    assert manager.load_file(data_group_id="walk", fpath=bvh_fpath)
+
+    # So does changing the loader version
+    monkeypatch.setattr(FileLoaderBVH, "VERSION", FileLoaderBVH.VERSION + 1)
+    manager = DataManager(logger=logger, cache_dir=cache_dir)
+    assert manager.read_cache(fpath=bvh_fpath, source_hash=get_file_hash(fpath=bvh_fpath)) is None
+
+
+def test_hdf5_round_trip(tmp_path):
+
+    logger = logging.getLogger('test_logger')
+    data_manager = DataManager(logger=logger, cache_dir=None)
+    data_manager.load_file(data_group_id="walk", fpath=os.path.join(constants.RESOURCES_DIR, "bvh", "walk.bvh"))
+    data_manager.load_file(data_group_id="duck",
+                           fpath=os.path.join(constants.RESOURCES_DIR, "meshes", "Duckpaa6lgsfsngq0i1w.glb"))
+
+    for compression, compression_opts in [(None, None), ("lzf", None), ("gzip", 4)]:
+        hdf5_fpath = str(tmp_path / f"data_groups_{compression}.hdf5")
+        data_manager.save_hdf5(fpath=hdf5_fpath,
+                               compression=compression,
+                               compression_opts=compression_opts,
+                               chunk_size_bytes=4096)
+
+        loaded_manager = DataManager(logger=logger, cache_dir=None)
+        loaded_ids = loaded_manager.load_hdf5(fpath=hdf5_fpath)
+
+        assert sorted(loaded_ids) == sorted(data_manager.data_groups.keys())
+        assert_data_groups_equal(data_groups=loaded_manager.data_groups, target_data_groups=data_manager.data_groups)
+        for data_group_id, data_group in data_manager.data_groups.items():
+            assert loaded_manager.data_groups[data_group_id].metadata.keys() == data_group.metadata.keys()
+
+    # Partial reads only return the requested frames
+    walk_group_id = next(key for key in data_manager.data_groups if key.startswith("walk"))
+    walk_group = data_manager.data_groups[walk_group_id]
+    block_key, data_block = max(walk_group.data_blocks.items(), key=lambda item: item[1].data.shape[0])
+
+    partial_block = DataManager.read_hdf5_data_block(fpath=hdf5_fpath,
+                                                     data_group_id=walk_group_id,
+                                                     data_block_key=block_key,
+                                                     start=10,
+                                                     stop=20)
+    np.testing.assert_array_equal(partial_block.data, data_block.data[10:20])
+
+    slabs = list(DataManager.stream_hdf5_data_block(fpath=hdf5_fpath,
+                                                    data_group_id=walk_group_id,
+                                                    data_block_key=block_key,
+                                                    num_rows=7))
+    assert all(slab.data.shape[0] <= 7 for slab in slabs)
+    np.testing.assert_array_equal(np.concatenate([slab.data for slab in slabs]), data_block.data)
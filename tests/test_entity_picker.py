@@ -0,0 +1,48 @@
+import pytest
+import numpy as np
+
+
+def test_entity_picker_delivers_picks_after_latency():
+
+    moderngl = pytest.importorskip("moderngl")
+    try:
+        ctx = moderngl.create_standalone_context(backend="egl", require=430)
+    except Exception:
+        pytest.skip("No headless OpenGL 4.3 context available")
+
+    from src.systems.render_system.entity_picker import EntityPicker
+
+    # Entity info as the forward pass writes it: entity 5 on the left half, entity 9 in the top right quarter
+    size = (64, 32)
+    entity_info = np.zeros((size[1], size[0], 4), dtype=np.float32)
+    entity_info[:, :32, 0] = 5
+    entity_info[16:, 32:, 0] = 9
+    texture_entity_info = ctx.texture(size=size, components=4, dtype="f4", data=entity_info.tobytes())
+    framebuffer = ctx.framebuffer(color_attachments=[ctx.texture(size=size, components=4), texture_entity_info])
+
+    entity_picker = EntityPicker(ctx=ctx, ring_size=2, latency_frames=2)
+    entity_picker.request(x=10, y=10)
+    entity_picker.request(x=48, y=8)
+    entity_picker.request(x=20, y=4, width=100, height=100)  # Clipped to the framebuffer
+    with pytest.raises(ValueError):
+        entity_picker.request(x=0, y=0, width=0, height=1)
+
+    # Only two picks fit in the ring, the third waits until a buffer is free
+    assert entity_picker.update(framebuffer=framebuffer, attachment=1) == []
+    assert entity_picker.num_pending == 3
+    assert entity_picker.update(framebuffer=framebuffer, attachment=1) == []
+
+    picks = entity_picker.update(framebuffer=framebuffer, attachment=1)
+    assert [pick[:4] for pick in picks] == [(10, 10, 1, 1), (48, 8, 1, 1)]
+    np.testing.assert_array_equal(picks[0][4], [5])
+    assert picks[1][4].size == 0  # Background
+
+    assert entity_picker.update(framebuffer=framebuffer, attachment=1) == []
+    picks = entity_picker.update(framebuffer=framebuffer, attachment=1)
+    assert picks[0][:4] == (20, 4, 44, 28)
+    np.testing.assert_array_equal(picks[0][4], [5, 9])
+    assert entity_picker.num_pending == 0
+    assert entity_picker.num_bytes_read == 2 * 4 + 44 * 28 * 4
+
+    entity_picker.release()
+    ctx.release()
@@ -0,0 +1,99 @@
+import logging
+
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.math.frustum import aabb, cull_aabbs, frustum_planes, shadow_caster_planes, transform_aabbs
+from src.systems.transform_system.transform_system import TransformSystem
+from src.systems.render_system.frustum_culler import FrustumCuller
+from src.utilities import utils_camera
+
+
+def box_corners(aabb_min: np.ndarray, aabb_max: np.ndarray) -> np.ndarray:
+    selection = np.array(np.meshgrid([0, 1], [0, 1], [0, 1], indexing="ij")).reshape((3, -1)).T
+    return np.where(selection[np.newaxis], aabb_max[:, np.newaxis], aabb_min[:, np.newaxis])
+
+
+def test_transform_and_cull_aabbs_match_reference():
+
+    rng = np.random.default_rng(0)
+    num_objects = 5_000
+    aabb_min = rng.uniform(-2.0, 0.0, (num_objects, 3)).astype(np.float32)
+    aabb_max = (aabb_min + rng.uniform(0.1, 2.0, (num_objects, 3))).astype(np.float32)
+
+    # Random rotations, scales and translations, and a few objects without a world matrix
+    world_matrices = np.tile(np.eye(4, dtype=np.float32), (num_objects, 1, 1))
+    rotations, _ = np.linalg.qr(rng.normal(size=(num_objects, 3, 3)))
+    world_matrices[:, :3, :3] = rotations * rng.uniform(0.5, 2.0, (num_objects, 1, 3))
+    world_matrices[:, :3, 3] = rng.uniform(-80.0, 80.0, (num_objects, 3))
+    rows = np.arange(num_objects)[::-1].copy()
+    rows[:10] = -1
+
+    world_aabb_min = np.empty_like(aabb_min)
+    world_aabb_max = np.empty_like(aabb_max)
+    transform_aabbs(world_matrices, rows, aabb_min, aabb_max, world_aabb_min, world_aabb_max)
+
+    corners = box_corners(aabb_min=aabb_min, aabb_max=aabb_max)
+    matrices = world_matrices[rows]
+    matrices[rows < 0] = np.eye(4)
+    world_corners = np.einsum("nij,nkj->nki", matrices[:, :3, :3], corners) + matrices[:, np.newaxis, :3, 3]
+    np.testing.assert_allclose(world_aabb_min, world_corners.min(axis=1), atol=1e-4)
+    np.testing.assert_allclose(world_aabb_max, world_corners.max(axis=1), atol=1e-4)
+
+    # Reference: a box is culled if all its corners are outside the same plane
+    projection_matrix = utils_camera.perspective_projection(fov_rad=np.pi / 3, aspect_ratio=1.5, z_near=0.1,
+                                                            z_far=100.0)
+    planes = frustum_planes(view_projection_matrix=projection_matrix)
+    visible = np.empty((num_objects,), dtype=np.bool_)
+    num_visible = cull_aabbs(planes, world_aabb_min, world_aabb_max, visible)
+
+    world_box_corners = box_corners(aabb_min=world_aabb_min, aabb_max=world_aabb_max)
+    distances = world_box_corners @ planes[:, :3].T + planes[:, 3]
+    target = ~np.any(np.all(distances < 0.0, axis=1), axis=-1)
+    assert 0 < num_visible < num_objects
+    assert num_visible == np.count_nonzero(visible)
+    np.testing.assert_array_equal(visible, target)
+
+
+def test_frustum_culler_and_shadow_casters():
+
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    positions = {"inside": "0 0 -10", "left": "-30 0 -10", "right": "30 0 -10", "behind": "0 0 10"}
+    entity_uids = {}
+    for name, position in positions.items():
+        entity_uids[name] = scene.add_entity(entity_blueprint={"name": name, "components": [
+            {"name": "transform_3d", "parameters": {"position": position}},
+            {"name": "mesh", "parameters": {"shape": "box"}}]})
+
+    for mesh in scene.get_pool(component_type=constants.COMPONENT_TYPE_MESH).values():
+        mesh.create_mesh(data_manager=None)
+        mesh.update_bounds()
+        np.testing.assert_array_equal(mesh.aabb_min, aabb(vertices=mesh.vertices)[0])
+
+    TransformSystem(logger=logging.getLogger("test_logger"), scene=scene, event_publisher=None,
+                    action_publisher=None, data_manager=None, parameters={}).update(elapsed_time=0.0, context=None)
+    frustum_culler = FrustumCuller()
+    frustum_culler.update(scene=scene)
+
+    mesh_arrays = scene.get_component_arrays(component_type=constants.COMPONENT_TYPE_MESH)
+    mesh_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_MESH)
+    np.testing.assert_allclose(mesh_pool[entity_uids["left"]].world_aabb_min, [-30.5, -0.5, -10.5])
+
+    # Camera at the origin looking down -Z
+    projection_matrix = utils_camera.perspective_projection(fov_rad=np.pi / 3, aspect_ratio=1.0, z_near=0.1,
+                                                            z_far=100.0)
+    planes = frustum_planes(view_projection_matrix=projection_matrix)
+    rows = [mesh_arrays.uid2row[entity_uids[name]] for name in positions]
+    np.testing.assert_array_equal(frustum_culler.cull(scene=scene, planes=planes)[rows], [True, False, False, False])
+
+    # Light travelling to the right: the box on the left shadows the view, the one on the right can't
+    casters = frustum_culler.cull_shadow_casters(scene=scene, planes=planes, light_direction=np.array([1.0, 0, 0]))
+    np.testing.assert_array_equal(casters[rows], [True, True, False, False])
+
+    # Light travelling forward: only the far plane is kept, since the frustum widens along the light, so even the
+    # boxes behind the camera or to its sides can shadow what is in front of it
+    caster_planes = shadow_caster_planes(planes=planes, light_direction=np.array([0.0, 0.0, -1.0]))
+    assert np.count_nonzero(np.isinf(caster_planes[:, 3])) == 5
+    casters = frustum_culler.cull_shadow_casters(scene=scene, planes=planes, light_direction=np.array([0, 0, -1.0]))
+    np.testing.assert_array_equal(casters[rows], [True, True, True, True])
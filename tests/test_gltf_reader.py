@@ -0,0 +1,229 @@
+import os
+import gc
+
+import numpy as np
+import pytest
+
+from src.core import constants
+from src.math import mat4
+from src3.io.gltf_reader import GLTFReader
+from src3.io.gltf_writer import write_interleaved_glb
+
+
+def test_interleaved_buffer_view(tmp_path):
+
+    rng = np.random.default_rng(0)
+    positions = rng.standard_normal((100, 3)).astype(np.float32)
+    normals = rng.standard_normal((100, 3)).astype(np.float32)
+    uvs = rng.random((100, 2)).astype(np.float32)
+
+    fpath = str(tmp_path / "interleaved.glb")
+    write_interleaved_glb(fpath=fpath, positions=positions, normals=normals, uvs=uvs)
+
+    for use_mmap in [False, True]:
+        reader = GLTFReader()
+        reader.load(gltf_fpath=fpath, use_mmap=use_mmap)
+        mesh = reader.get_mesh(index=0)
+
+        np.testing.assert_array_equal(mesh["attributes"]["POSITION"], positions)
+        np.testing.assert_array_equal(mesh["attributes"]["NORMAL"], normals)
+        np.testing.assert_array_equal(mesh["attributes"]["TEXCOORD_0"], uvs)
+        np.testing.assert_array_equal(mesh["indices"], np.arange(100, dtype=np.uint32))
+        assert mesh["attributes"]["NORMAL"].flags["C_CONTIGUOUS"]
+        reader.close()
+
+
+def open_file_descriptors(fpath: str) -> list:
+    fd_dir = "/proc/self/fd"
+    real_fpath = os.path.realpath(fpath)
+    file_descriptors = []
+    for fd in os.listdir(fd_dir):
+        try:
+            if os.readlink(os.path.join(fd_dir, fd)) == real_fpath:
+                file_descriptors.append(fd)
+        except OSError:
+            continue
+    return file_descriptors
+
+
+def test_memory_mapped_glb(tmp_path):
+
+    if not os.path.isdir("/proc/self/fd"):
+        pytest.skip("Open file descriptors can only be listed through /proc")
+
+    rng = np.random.default_rng(2)
+    positions = rng.standard_normal((64, 3)).astype(np.float32)
+    fpath = str(tmp_path / "mapped.glb")
+    write_interleaved_glb(fpath=fpath, positions=positions, normals=-positions, uvs=positions[:, :2])
+
+    eager_reader = GLTFReader()
+    eager_reader.load(gltf_fpath=fpath)
+    assert eager_reader.gltf_memory_map is None
+    assert len(open_file_descriptors(fpath=fpath)) == 0
+
+    # Only the map keeps the file open, and every accessor is a read-only view into it
+    mapped_reader = GLTFReader()
+    mapped_reader.load(gltf_fpath=fpath, use_mmap=True)
+    assert mapped_reader.gltf_memory_map is not None
+    assert len(open_file_descriptors(fpath=fpath)) == 1
+
+    for accessor_index in range(len(mapped_reader.gltf_header["accessors"])):
+        data = mapped_reader.get_data(accessor_index=accessor_index, contiguous=False)
+        np.testing.assert_array_equal(data, eager_reader.get_data(accessor_index=accessor_index))
+        assert not data.flags.writeable
+    del data
+
+    mapped_reader.close()
+    gc.collect()
+    assert mapped_reader.gltf_memory_map is None
+    assert len(open_file_descriptors(fpath=fpath)) == 0
+    eager_reader.close()
+
+
+def test_interleaved_buffer_view_non_contiguous(tmp_path):
+
+    positions = np.arange(30, dtype=np.float32).reshape(10, 3)
+    normals = -positions
+    uvs = np.zeros((10, 2), dtype=np.float32)
+
+    fpath = str(tmp_path / "interleaved.glb")
+    write_interleaved_glb(fpath=fpath, positions=positions, normals=normals, uvs=uvs)
+
+    reader = GLTFReader()
+    reader.load(gltf_fpath=fpath)
+    normals_view = reader.get_data(accessor_index=1, contiguous=False)
+
+    assert normals_view.strides == (32, 4)
+    np.testing.assert_array_equal(normals_view, normals)
+
+
+def test_accessor_cache(tmp_path):
+
+    positions = np.arange(30, dtype=np.float32).reshape(10, 3)
+    fpath = str(tmp_path / "interleaved.glb")
+    write_interleaved_glb(fpath=fpath, positions=positions, normals=positions, uvs=positions[:, :2])
+
+    # Budget only fits two of the three 120-byte VEC3/VEC2 accessors
+    reader = GLTFReader(accessor_cache_max_bytes=250)
+    reader.load(gltf_fpath=fpath)
+
+    positions_data = reader.get_data(accessor_index=0)
+    assert reader.get_data(accessor_index=0) is positions_data
+    assert not positions_data.flags.writeable
+
+    reader.get_data(accessor_index=1)
+    reader.get_data(accessor_index=0)  # Accessor 0 becomes the most recently used
+    reader.get_data(accessor_index=2)  # Evicts accessor 1
+
+    assert list(reader.accessor_cache.keys()) == [0, 2]
+    assert reader.accessor_cache_num_bytes <= 250
+
+    reader.close()
+    assert len(reader.accessor_cache) == 0
+
+
+def test_animation_accessors_decoded_on_demand():
+
+    reader = GLTFReader()
+    reader.load(gltf_fpath=os.path.join(constants.RESOURCES_DIR, "meshes", "BrainStem.glb"))
+    assert reader.num_animations == 1
+    assert len(reader.accessor_cache) == 0
+
+    # Only the animation's sampler accessors are decoded, and each shared one only once
+    animation = reader.get_animation(index=0)
+    samplers = reader.gltf_header["animations"][0]["samplers"]
+    sampler_accessors = {sampler["input"] for sampler in samplers} | {sampler["output"] for sampler in samplers}
+    assert set(reader.accessor_cache.keys()) == sampler_accessors
+
+    animations = reader.get_animations()
+    for target_path, channels in animation.items():
+        assert len(channels) == len(animations[target_path])
+        for channel, target_channel in zip(channels, animations[target_path]):
+            assert channel["node_index"] == target_channel["node_index"]
+            assert channel["values"] is target_channel["values"]
+    reader.close()
+
+
+def test_sampled_validation(tmp_path):
+
+    positions = np.random.default_rng(1).standard_normal((5000, 3)).astype(np.float32)
+    fpath = str(tmp_path / "interleaved.glb")
+    write_interleaved_glb(fpath=fpath, positions=positions, normals=positions, uvs=positions[:, :2])
+
+    reader = GLTFReader(validation_num_samples=64)
+    reader.load(gltf_fpath=fpath)
+    accessor = reader.get_accessor(0)
+    data = reader.decode_accessor(accessor=accessor)
+
+    assert reader.validate_accessor_data(accessor=accessor, data=data)
+    assert not reader.validate_accessor_data(accessor=dict(accessor, max=[0.0, 0.0, 0.0]), data=data)
+
+
+def test_node_arrays():
+
+    #   0        5 (matrix)
+    #  / \
+    # 1   2
+    #    / \
+    #   3   4
+    gltf_matrix = np.eye(4, dtype=np.float32)
+    gltf_matrix[:3, 3] = [1, 2, 3]
+    reader = GLTFReader()
+    reader.gltf_header = {"nodes": [
+        {"name": "root", "children": [1, 2], "translation": [0, 1, 0]},
+        {"mesh": 0},
+        {"children": [3, 4], "rotation": [0, 0.7071068, 0, 0.7071068], "scale": [2, 2, 2]},
+        {"skin": 0},
+        {},
+        {"matrix": gltf_matrix.T.flatten().tolist()}]}
+
+    node_arrays = reader.get_node_arrays()
+
+    np.testing.assert_array_equal(node_arrays["parent_index"], [-1, 0, 0, 2, 2, -1])
+    np.testing.assert_array_equal(node_arrays["tree_depth"], [0, 1, 1, 2, 2, 0])
+    np.testing.assert_array_equal(node_arrays["num_children"], [2, 0, 2, 0, 0, 0])
+    np.testing.assert_array_equal(node_arrays["children_flat"], [1, 2, 3, 4])
+    np.testing.assert_array_equal(node_arrays["children_offsets"], [0, 2, 2, 4, 4, 4])
+    np.testing.assert_array_equal(node_arrays["mesh_index"], [-1, 0, -1, -1, -1, -1])
+    np.testing.assert_array_equal(node_arrays["skin_index"], [-1, -1, -1, 0, -1, -1])
+    np.testing.assert_allclose(node_arrays["translation"][5], [1, 2, 3])
+
+    # Batched matrix composition matches the per-node version
+    for index in range(6):
+        target_matrix = np.eye(4, dtype=np.float32)
+        mat4.matrix_composition(node_arrays["translation"][index],
+                                node_arrays["rotation"][index],
+                                node_arrays["scale"][index],
+                                target_matrix)
+        np.testing.assert_allclose(node_arrays["matrix"][index], target_matrix, atol=1e-6)
+
+    nodes = reader.get_nodes()
+    assert nodes[2]["children_indices"] == [3, 4]
+    assert nodes[4]["tree_depth"] == 2
+
+
+def test_node_arrays_deep_and_wide_hierarchies():
+
+    num_nodes = 20000
+    reader = GLTFReader()
+
+    # One long chain
+    reader.gltf_header = {"nodes": [{"children": [index + 1]} for index in range(num_nodes - 1)] + [{}]}
+    node_arrays = reader.get_node_arrays()
+    np.testing.assert_array_equal(node_arrays["tree_depth"], np.arange(num_nodes))
+    np.testing.assert_array_equal(node_arrays["parent_index"], np.arange(num_nodes) - 1)
+
+    # One root with all other nodes as children
+    reader.gltf_header = {"nodes": [{"children": list(range(1, num_nodes))}] + [{}] * (num_nodes - 1)}
+    node_arrays = reader.get_node_arrays()
+    assert node_arrays["tree_depth"].max() == 1
+    assert node_arrays["children_flat"].size == num_nodes - 1
+
+    # Nodes with two parents and loops are invalid
+    reader.gltf_header = {"nodes": [{"children": [2]}, {"children": [2]}, {}]}
+    with pytest.raises(Exception):
+        reader.get_node_arrays()
+
+    reader.gltf_header = {"nodes": [{"children": [1]}, {"children": [0]}, {}]}
+    with pytest.raises(Exception):
+        reader.get_node_arrays()
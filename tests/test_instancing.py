@@ -0,0 +1,154 @@
+import logging
+
+import pytest
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.components.multi_transform_3d import MultiTransform3D
+from src.math.frustum import bounding_sphere, cull_instances, frustum_planes
+from src.systems.transform_system.transform_system import TransformSystem
+from src.utilities import utils_camera
+
+
+def translation_matrices(translations: np.ndarray, scales=None) -> np.ndarray:
+    matrices = np.tile(np.eye(4, dtype=np.float32), (len(translations), 1, 1))
+    if scales is not None:
+        matrices[:, [0, 1, 2], [0, 1, 2]] = np.asarray(scales, dtype=np.float32)[:, np.newaxis]
+    matrices[:, :3, 3] = translations
+    return matrices
+
+
+def test_cull_instances_matches_reference():
+
+    rng = np.random.default_rng(0)
+    projection_matrix = utils_camera.perspective_projection(fov_rad=np.pi / 3, aspect_ratio=1.5, z_near=0.1,
+                                                            z_far=100.0)
+    view_matrix = np.eye(4, dtype=np.float32)
+    view_matrix[:3, 3] = [1.0, -2.0, -5.0]
+    planes = frustum_planes(view_projection_matrix=projection_matrix @ view_matrix)
+
+    vertices = rng.uniform(-1.0, 1.0, (100, 3)) + [0.5, 0.0, 0.0]
+    center, radius = bounding_sphere(vertices=vertices)
+    assert np.all(np.linalg.norm(vertices - center, axis=-1) <= radius + 1e-6)
+
+    num_instances = 20_000
+    world_matrices = translation_matrices(translations=rng.uniform(-120.0, 120.0, (num_instances, 3)),
+                                          scales=rng.uniform(0.5, 3.0, num_instances))
+    visible_indices = np.empty((num_instances,), dtype=np.int32)
+    num_visible = cull_instances(planes, world_matrices, center, radius, visible_indices)
+
+    # Reference: world-space spheres against the same planes
+    world_centers = world_matrices[:, :3, :3] @ center + world_matrices[:, :3, 3]
+    world_radii = radius * world_matrices[:, 0, 0]
+    distances = world_centers @ planes[:, :3].T + planes[:, 3]
+    target = np.flatnonzero(np.all(distances >= -world_radii[:, np.newaxis], axis=-1))
+    assert 0 < target.size < num_instances
+    np.testing.assert_array_equal(visible_indices[:num_visible], target)
+
+    # Instances whose sphere contains the camera are never culled
+    inside = translation_matrices(translations=[[-1.0, 2.0, 5.0]])
+    assert cull_instances(planes, inside, center, radius, visible_indices[:1]) == 1
+
+
+def test_multi_transform_dirty_ranges():
+
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    blueprint = {"name": "crowd",
+                 "components": [{"name": "transform_3d", "parameters": {"position": "10 0 0"}},
+                                {"name": "multi_transform_3d", "parameters": {"num_instances": "8"}}]}
+    entity_uid = scene.add_entity(entity_blueprint=blueprint)
+    multi_transform = scene.get_pool(component_type=constants.COMPONENT_TYPE_MULTI_TRANSFORM_3D)[entity_uid]
+    multi_transform.initialise()
+    assert (multi_transform.dirty_start, multi_transform.dirty_stop) == (0, 8)
+
+    transform_system = TransformSystem(logger=logging.getLogger("test_logger"), scene=scene, event_publisher=None,
+                                       action_publisher=None, data_manager=None, parameters={})
+    transform_system.update(elapsed_time=0.0, context=None)
+    np.testing.assert_allclose(multi_transform.world_matrices[:, :3, 3], np.tile([10.0, 0.0, 0.0], (8, 1)))
+
+    # Ranges merge, and only the instances inside them are recomputed
+    multi_transform.clear_dirty()
+    multi_transform.world_matrices[:] = 0.0
+    multi_transform.set_local_matrices(local_matrices=translation_matrices(translations=[[0.0, 1.0, 0.0]]), start=2)
+    multi_transform.set_local_matrices(local_matrices=translation_matrices(translations=[[0.0, 2.0, 0.0]]), start=4)
+    assert (multi_transform.dirty_start, multi_transform.dirty_stop) == (2, 5)
+
+    transform_system.update(elapsed_time=0.0, context=None)
+    np.testing.assert_allclose(multi_transform.world_matrices[[2, 4], :3, 3], [[10.0, 1.0, 0.0], [10.0, 2.0, 0.0]])
+    np.testing.assert_allclose(multi_transform.world_matrices[3, :3, 3], [10.0, 0.0, 0.0])
+    np.testing.assert_array_equal(multi_transform.world_matrices[[0, 1, 5, 6, 7]], 0.0)
+
+    with pytest.raises(ValueError):
+        multi_transform.set_local_matrices(local_matrices=translation_matrices(translations=np.zeros((2, 3))), start=7)
+
+
+def test_instance_buffer_upload_and_draw():
+
+    moderngl = pytest.importorskip("moderngl")
+    try:
+        ctx = moderngl.create_standalone_context(backend="egl", require=430)
+    except Exception:
+        pytest.skip("No headless OpenGL 4.3 context available")
+
+    from src.systems.render_system.instance_buffer import InstanceBuffer
+    from src.systems.render_system.shader_program_library import ShaderProgramLibrary
+
+    # Two multi-transforms, so the second one starts at an offset. The first instance of the second one is culled
+    multi_transforms = {3: MultiTransform3D(parameters={}), 7: MultiTransform3D(parameters={})}
+    multi_transforms[3].allocate(num_instances=2)
+    multi_transforms[7].allocate(num_instances=3)
+    multi_transforms[7].world_matrices[:] = translation_matrices(translations=[[5.0, 0.0, 0.0],
+                                                                               [-0.5, 0.0, 0.0],
+                                                                               [0.5, 0.0, 0.0]])
+
+    instance_buffer = InstanceBuffer(ctx=ctx, initial_num_instances=1)
+    assert instance_buffer.update(multi_transform_pool=multi_transforms) == 5 * 64
+    assert [multi_transform.instance_offset for multi_transform in multi_transforms.values()] == [0, 2]
+    assert instance_buffer.update(multi_transform_pool=multi_transforms) == 0
+
+    # Only the dirty range is uploaded again
+    multi_transforms[3].world_matrices[1, 0, 3] = 42.0
+    multi_transforms[3].mark_dirty(start=1, stop=2)
+    assert instance_buffer.update(multi_transform_pool=multi_transforms) == 64
+    uploaded = np.frombuffer(instance_buffer.transforms_buffer.read(size=5 * 64), dtype=np.float32)
+    np.testing.assert_array_equal(uploaded.reshape((5, 4, 4))[1:], np.concatenate([
+        multi_transforms[3].world_matrices[1:], multi_transforms[7].world_matrices]))
+
+    # Draw a small triangle per visible instance with identity camera matrices, so only the one at x = 5 is culled
+    vertices = np.array([[-0.1, -0.1, 0.0], [0.1, -0.1, 0.0], [0.0, 0.1, 0.0]], dtype=np.float32)
+    center, radius = bounding_sphere(vertices=vertices)
+    planes = frustum_planes(view_projection_matrix=np.eye(4, dtype=np.float32))
+    num_visible = instance_buffer.cull(multi_transform=multi_transforms[7], planes=planes, center=center,
+                                       radius=radius)
+    assert num_visible == 2
+
+    program = ShaderProgramLibrary(context=ctx, logger=logging.getLogger("test_logger"))[
+        constants.SHADER_PROGRAM_FORWARD_PASS]
+    materials_ubo = ctx.buffer(reserve=constants.SCENE_MATERIAL_STRUCT_SIZE_BYTES * constants.SCENE_MAX_NUM_MATERIALS)
+    materials_ubo.bind_to_uniform_block(binding=constants.UBO_BINDING_MATERIALS)
+    vbo_vertices = ctx.buffer(vertices.tobytes())
+    vbo_normals = ctx.buffer(np.tile([0.0, 0.0, 1.0], (3, 1)).astype(np.float32).tobytes())
+    vao = ctx.vertex_array(program, [(vbo_vertices, "3f", constants.SHADER_INPUT_VERTEX),
+                                     (vbo_normals, "3f", constants.SHADER_INPUT_NORMAL)])
+    texture_entity_info = ctx.texture(size=(64, 64), components=4, dtype="f4")
+    framebuffer = ctx.framebuffer(color_attachments=[ctx.texture(size=(64, 64), components=4),
+                                                     ctx.texture(size=(64, 64), components=4, dtype="f4"),
+                                                     ctx.texture(size=(64, 64), components=4, dtype="f4"),
+                                                     texture_entity_info])
+    framebuffer.use()
+    framebuffer.clear(color=(-1.0, -1.0, -1.0, 0.0))
+    for uniform_name in ["projection_matrix", "view_matrix", "model_matrix"]:
+        program[uniform_name].write(np.eye(4, dtype=np.float32).tobytes())
+    program["entity_id"] = 7
+    program["instanced"] = True
+    program["instance_offset"] = multi_transforms[7].instance_offset
+    vao.render(mode=moderngl.TRIANGLES, instances=num_visible)
+
+    # Each fragment knows its instance among all of the entity's instances, not just among the visible ones
+    entity_info = np.frombuffer(texture_entity_info.read(), dtype=np.float32).reshape((64, 64, 4))
+    np.testing.assert_array_equal(entity_info[32, 16, :2], [7, 1])
+    np.testing.assert_array_equal(entity_info[32, 48, :2], [7, 2])
+
+    instance_buffer.release()
+    ctx.release()
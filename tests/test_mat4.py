@@ -123,3 +123,37 @@ def test_fast_inverse():
     mat4.fast_inverse(in_mat4=test_matrix, out_mat4=result)
 
     np.testing.assert_almost_equal(target, result)
+
+
+def test_batched_compositions_match_single():
+
+    num_matrices = 50
+    rng = np.random.default_rng(0)
+    translations = rng.uniform(-10, 10, (num_matrices, 3)).astype(np.float32)
+    rotations = rng.normal(size=(num_matrices, 4)).astype(np.float32)
+    rotations /= np.linalg.norm(rotations, axis=1, keepdims=True)
+    rotations[rotations[:, 3] < 0] *= -1  # The decomposition always returns w >= 0
+    scales = rng.uniform(0.5, 2, (num_matrices, 3)).astype(np.float32)
+    euler_angles = rng.uniform(-np.pi, np.pi, (num_matrices, 3)).astype(np.float32)
+
+    matrices = np.empty((num_matrices, 4, 4), dtype=np.float32)
+    mat4.matrix_compositions(translations, rotations, scales, matrices)
+    euler_matrices = np.empty((num_matrices, 4, 4), dtype=np.float32)
+    mat4.create_transforms_euler_xyz(translations, euler_angles, scales, euler_matrices)
+
+    result_translations = np.empty_like(translations)
+    result_rotations = np.empty_like(rotations)
+    result_scales = np.empty_like(scales)
+    mat4.matrix_decompositions(matrices, result_translations, result_rotations, result_scales)
+
+    for index in range(num_matrices):
+        target_matrix = np.empty((4, 4), dtype=np.float32)
+        mat4.matrix_composition(translations[index], rotations[index], scales[index], target_matrix)
+        np.testing.assert_allclose(matrices[index], target_matrix, atol=1e-5)
+
+        target_euler_matrix = mat4.create_transform_euler_xyz(translations[index], euler_angles[index], scales[index])
+        np.testing.assert_allclose(euler_matrices[index], target_euler_matrix, atol=1e-5)
+
+    np.testing.assert_allclose(result_translations, translations, atol=1e-5)
+    np.testing.assert_allclose(result_rotations, rotations, atol=1e-4)
+    np.testing.assert_allclose(result_scales, scales, atol=1e-5)
@@ -0,0 +1,169 @@
+import logging
+
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.math import bvh
+from src.math.frustum import cull_aabbs, frustum_planes
+from src.systems.transform_system.transform_system import TransformSystem
+from src.systems.render_system.frustum_culler import FrustumCuller
+from src.systems.render_system.scene_bvh import SceneBVH
+from src.utilities import utils_camera
+
+
+def random_aabbs(rng, num_boxes: int) -> tuple:
+    aabb_min = rng.uniform(-50.0, 50.0, (num_boxes, 3)).astype(np.float32)
+    aabb_max = (aabb_min + rng.uniform(0.1, 4.0, (num_boxes, 3))).astype(np.float32)
+    return aabb_min, aabb_max
+
+
+def ray_aabb_reference(ray_origin, ray_direction, aabb_min, aabb_max) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_0 = (aabb_min - ray_origin) / ray_direction
+        t_1 = (aabb_max - ray_origin) / ray_direction
+    t_near = np.maximum(np.minimum(t_0, t_1).max(axis=1), 0.0)
+    t_far = np.maximum(t_0, t_1).min(axis=1)
+    return np.where(t_near <= t_far, t_near, np.inf)
+
+
+def check_nodes_contain_primitives(tree: tuple, aabb_min: np.ndarray, aabb_max: np.ndarray):
+    node_min, node_max, node_right, node_start, node_count, _, primitives, primitive_leaf = tree
+    for node in range(node_right.size):
+        node_primitives = primitives[node_start[node]:node_start[node] + node_count[node]]
+        np.testing.assert_array_equal(node_min[node], aabb_min[node_primitives].min(axis=0))
+        np.testing.assert_array_equal(node_max[node], aabb_max[node_primitives].max(axis=0))
+        if node_right[node] < 0:
+            assert np.all(primitive_leaf[node_primitives] == node)
+    assert np.array_equal(np.sort(primitives), np.arange(aabb_min.shape[0]))
+
+
+def test_bvh_queries_match_brute_force():
+
+    rng = np.random.default_rng(0)
+    num_boxes = 2_000
+    aabb_min, aabb_max = random_aabbs(rng=rng, num_boxes=num_boxes)
+    tree = bvh.build_bvh(aabb_min, aabb_max, 4, constants.BVH_NUM_BINS)
+    node_min, node_max, node_right, node_start, node_count, node_parent, primitives, primitive_leaf = tree
+    check_nodes_contain_primitives(tree=tree, aabb_min=aabb_min, aabb_max=aabb_max)
+    assert np.all(node_count[node_right < 0] <= 4)
+    assert np.all(node_parent[1:] < np.arange(1, node_right.size))
+
+    hits = np.empty((num_boxes,), dtype=np.int32)
+    distances = np.empty((num_boxes,), dtype=np.float32)
+    for _ in range(50):
+        ray_origin = rng.uniform(-60.0, 60.0, 3)
+        ray_direction = rng.normal(size=3)
+        ray_direction /= np.linalg.norm(ray_direction)
+        num_hits = bvh.intersect_ray_bvh(ray_origin, ray_direction, np.inf, node_min, node_max, node_right,
+                                         node_start, node_count, primitives, aabb_min, aabb_max, hits, distances)
+
+        reference = ray_aabb_reference(ray_origin, ray_direction, aabb_min, aabb_max)
+        np.testing.assert_array_equal(np.sort(hits[:num_hits]), np.flatnonzero(reference < np.inf))
+        np.testing.assert_allclose(distances[:num_hits], reference[hits[:num_hits]], rtol=1e-4, atol=1e-4)
+        assert np.all(np.diff(distances[:num_hits]) >= 0.0)
+
+    projection_matrix = utils_camera.perspective_projection(fov_rad=np.pi / 3, aspect_ratio=1.5, z_near=0.1,
+                                                            z_far=40.0)
+    planes = frustum_planes(view_projection_matrix=projection_matrix)
+    visible = np.empty((num_boxes,), dtype=np.bool_)
+    cull_aabbs(planes, aabb_min, aabb_max, visible)
+    num_visible = bvh.query_frustum_bvh(planes, node_min, node_max, node_right, node_start, node_count, primitives,
+                                        aabb_min, aabb_max, hits)
+    assert 0 < num_visible < num_boxes
+    np.testing.assert_array_equal(np.sort(hits[:num_visible]), np.flatnonzero(visible))
+
+    box_min = np.array([-20.0, -10.0, -30.0], dtype=np.float32)
+    box_max = np.array([15.0, 25.0, 5.0], dtype=np.float32)
+    num_overlaps = bvh.query_box_bvh(box_min, box_max, node_min, node_max, node_right, node_start, node_count,
+                                     primitives, aabb_min, aabb_max, hits)
+    reference = np.all((aabb_max >= box_min) & (aabb_min <= box_max), axis=1)
+    np.testing.assert_array_equal(np.sort(hits[:num_overlaps]), np.flatnonzero(reference))
+
+    # Moving a few boxes only refits their leaves and ancestors
+    dirty = np.zeros((num_boxes,), dtype=np.bool_)
+    dirty[rng.choice(num_boxes, 20, replace=False)] = True
+    aabb_min[dirty] += 30.0
+    aabb_max[dirty] += 30.0
+    node_dirty = np.zeros((node_right.size,), dtype=np.bool_)
+    num_refit = bvh.refit_bvh(node_min, node_max, node_right, node_start, node_count, node_parent, primitives,
+                              primitive_leaf, aabb_min, aabb_max, dirty, node_dirty)
+    assert 0 < num_refit < node_right.size // 4
+    check_nodes_contain_primitives(tree=tree, aabb_min=aabb_min, aabb_max=aabb_max)
+
+    # Empty trees
+    empty = np.empty((0, 3), dtype=np.float32)
+    empty_tree = bvh.build_bvh(empty, empty, 4, constants.BVH_NUM_BINS)
+    assert bvh.intersect_ray_bvh(np.zeros(3), np.array([0.0, 0.0, -1.0]), np.inf, *empty_tree[:5],
+                                 empty_tree[6], empty, empty, hits, distances) == 0
+
+
+def test_scene_bvh_ray_cast_with_colliders():
+
+    # Three boxes in a row along -Z. The nearest one has a small sphere collider inside its box, offset so the ray
+    # goes through the box but misses the sphere
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    entity_uids = []
+    for position, collider in [("0 0 -5", {"shape": "sphere", "radius": "0.25"}), ("0 0 -10", None),
+                               ("0 0 -15", None)]:
+        components = [{"name": "transform_3d", "parameters": {"position": position}},
+                      {"name": "mesh", "parameters": {"shape": "box"}}]
+        if collider is not None:
+            components.append({"name": "collider", "parameters": collider})
+        entity_uids.append(scene.add_entity(entity_blueprint={"name": "box", "components": components}))
+
+    for mesh in scene.get_pool(component_type=constants.COMPONENT_TYPE_MESH).values():
+        mesh.create_mesh(data_manager=None)
+        mesh.update_bounds()
+
+    transform_system = TransformSystem(logger=logging.getLogger("test_logger"), scene=scene, event_publisher=None,
+                                       action_publisher=None, data_manager=None, parameters={})
+    frustum_culler = FrustumCuller()
+    scene_bvh = SceneBVH(leaf_size=1)
+
+    def update():
+        transform_system.update(elapsed_time=0.0, context=None)
+        frustum_culler.update(scene=scene)
+        scene_bvh.update(scene=scene, transform_rows=frustum_culler.transform_rows)
+
+    update()
+    assert scene_bvh.num_builds == 2  # Empty tree in the constructor, then the scene's meshes
+
+    ray_origin = np.array([0.0, 0.0, 0.0])
+    ray_direction = np.array([0.0, 0.0, -1.0])
+    entity_uid, distance = scene_bvh.ray_cast(scene=scene, ray_origin=ray_origin, ray_direction=ray_direction)
+    assert entity_uid == entity_uids[0]
+    assert np.isclose(distance, 4.75, atol=1e-5)
+
+    # Through the first box's corner, which misses its collider, so the second box is the nearest hit
+    ray_origin = np.array([0.4, 0.4, 0.0])
+    entity_uid, distance = scene_bvh.ray_cast(scene=scene, ray_origin=ray_origin, ray_direction=ray_direction)
+    assert entity_uid == entity_uids[1]
+    assert np.isclose(distance, 9.5, atol=1e-5)
+    assert scene_bvh.ray_cast(scene=scene, ray_origin=ray_origin, ray_direction=ray_direction,
+                              max_distance=9.0) == (-1, np.inf)
+
+    # Moving the second box out of the ray only refits the tree
+    transform_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    transform_pool[entity_uids[1]].position = (1.5, 0.0, -10.0)
+    transform_pool[entity_uids[1]].input_values_updated = True
+    update()
+    assert scene_bvh.num_builds == 2
+    assert scene_bvh.num_nodes_refit > 0
+    entity_uid, distance = scene_bvh.ray_cast(scene=scene, ray_origin=ray_origin, ray_direction=ray_direction)
+    assert entity_uid == entity_uids[2]
+
+    # Nothing moved, nothing refit
+    update()
+    assert scene_bvh.num_nodes_refit == 0
+
+    box_uids = scene_bvh.query_box(scene=scene, box_min=np.array([-1.0, -1.0, -16.0]),
+                                   box_max=np.array([0.9, 1.0, -9.0]))
+    np.testing.assert_array_equal(box_uids, [entity_uids[2]])
+
+    # A narrow frustum down the -Z axis misses the box that moved
+    projection_matrix = utils_camera.perspective_projection(fov_rad=np.deg2rad(5.0), aspect_ratio=1.0,
+                                                            z_near=0.1, z_far=100.0)
+    planes = frustum_planes(view_projection_matrix=projection_matrix)
+    frustum_uids = scene_bvh.query_frustum(scene=scene, planes=planes)
+    np.testing.assert_array_equal(np.sort(frustum_uids), [entity_uids[0], entity_uids[2]])
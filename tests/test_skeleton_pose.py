@@ -0,0 +1,98 @@
+import os
+
+import numpy as np
+
+from src.core.file_loaders.file_loader_gltf import FileLoaderGLTF
+from src.math import mat4
+from src.math.skeleton_pose import SkeletonPose
+
+MESHES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "meshes")
+
+
+def create_random_pose(rng: np.random.Generator, num_instances: int, num_bones: int) -> tuple:
+    translations = rng.uniform(-1, 1, (num_instances, num_bones, 3)).astype(np.float32)
+    rotations = rng.normal(size=(num_instances, num_bones, 4)).astype(np.float32)
+    rotations /= np.linalg.norm(rotations, axis=-1, keepdims=True)
+    scales = rng.uniform(0.8, 1.2, (num_instances, num_bones, 3)).astype(np.float32)
+    return translations, rotations, scales
+
+
+def test_pose_matches_reference_hierarchy():
+
+    # Two roots, and bones listed in shuffled order so that children often come before their parents
+    num_bones = 60
+    num_instances = 5
+    rng = np.random.default_rng(7)
+    order = rng.permutation(num_bones)
+    parent_indices = np.full((num_bones,), -1, dtype=np.int32)
+    for index in range(2, num_bones):
+        parent_indices[order[index]] = order[rng.integers(0, index)]
+
+    translations, rotations, scales = create_random_pose(rng=rng, num_instances=num_instances, num_bones=num_bones)
+    root_matrices = np.empty((num_instances, 4, 4), dtype=np.float32)
+    mat4.matrix_compositions(*[array[0] for array in create_random_pose(rng=rng, num_instances=1,
+                                                                        num_bones=num_instances)],
+                             root_matrices)
+    bind_matrices = np.empty((num_bones, 4, 4), dtype=np.float32)
+    mat4.matrix_compositions(*[array[0] for array in create_random_pose(rng=rng, num_instances=1,
+                                                                        num_bones=num_bones)],
+                             bind_matrices)
+    inverse_bind_matrices = np.linalg.inv(bind_matrices).astype(np.float32)
+
+    pose = SkeletonPose(parent_indices=parent_indices, inverse_bind_matrices=inverse_bind_matrices)
+    world_matrices = np.empty((num_instances, num_bones, 4, 4), dtype=np.float32)
+    skinning_matrices = np.empty_like(world_matrices)
+    pose.evaluate(translations=translations,
+                  rotations=rotations,
+                  scales=scales,
+                  world_matrices_out=world_matrices,
+                  root_matrices=root_matrices,
+                  skinning_matrices_out=skinning_matrices)
+
+    for instance in range(num_instances):
+        local_matrices = np.empty((num_bones, 4, 4), dtype=np.float32)
+        mat4.matrix_compositions(translations[instance], rotations[instance], scales[instance], local_matrices)
+
+        target_world_matrices = {}
+        for bone in order:
+            parent_index = parent_indices[bone]
+            parent_matrix = root_matrices[instance] if parent_index < 0 else target_world_matrices[parent_index]
+            target_world_matrices[bone] = parent_matrix.astype(np.float64) @ local_matrices[bone]
+
+        for bone in range(num_bones):
+            np.testing.assert_allclose(world_matrices[instance, bone], target_world_matrices[bone], atol=1e-4)
+            np.testing.assert_allclose(skinning_matrices[instance, bone],
+                                       target_world_matrices[bone] @ inverse_bind_matrices[bone], atol=1e-4)
+
+    # A single instance gives the same result as the batched evaluation
+    single_world_matrices = np.empty((num_bones, 4, 4), dtype=np.float32)
+    pose.evaluate(translations=translations[2],
+                  rotations=rotations[2],
+                  scales=scales[2],
+                  world_matrices_out=single_world_matrices,
+                  root_matrices=root_matrices[2])
+    np.testing.assert_array_equal(single_world_matrices, world_matrices[2])
+
+
+def test_gltf_skeleton_bind_pose():
+
+    all_resources = {}
+    FileLoaderGLTF(all_resources=all_resources).load(resource_uid="brain_stem",
+                                                     fpath=os.path.join(MESHES_DIR, "BrainStem.glb"))
+    data_blocks = all_resources["brain_stem/skeleton_0"].data_blocks
+    assert np.count_nonzero(data_blocks["parent_index"].data == -1) == 1
+
+    pose = SkeletonPose(parent_indices=data_blocks["parent_index"].data,
+                        inverse_bind_matrices=data_blocks["inverse_bind_matrices"].data)
+    world_matrices = np.empty((pose.num_bones, 4, 4), dtype=np.float32)
+    skinning_matrices = np.empty_like(world_matrices)
+    pose.evaluate(translations=data_blocks["translation"].data,
+                  rotations=data_blocks["rotation"].data,
+                  scales=data_blocks["scale"].data,
+                  world_matrices_out=world_matrices,
+                  skinning_matrices_out=skinning_matrices)
+
+    # In its rest pose, every bone is in its bind pose, so all skinning matrices are the same transform (the part
+    # of the hierarchy above the skeleton's root, which the skeleton does not include)
+    np.testing.assert_allclose(skinning_matrices, np.broadcast_to(skinning_matrices[0], skinning_matrices.shape),
+                               atol=1e-4)
@@ -0,0 +1,75 @@
+import os
+import logging
+
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.core.data_manager import DataManager
+from src.math.skeleton_pose import SkeletonPose
+from src.systems.skeleton_system.skeleton_system import SkeletonSystem
+from src.systems.transform_system.transform_system import TransformSystem
+
+
+def add_character(scene: Scene, data_manager: DataManager, position=None) -> int:
+
+    components = [{"name": "skeleton", "parameters": {"resource_id": "brain_stem/skeleton_0"}}]
+    if position is not None:
+        components.append({"name": "transform_3d", "parameters": {"position": position}})
+    entity_uid = scene.add_entity(entity_blueprint={"name": "character", "components": components})
+    scene.get_component(entity_uid=entity_uid,
+                        component_type=constants.COMPONENT_TYPE_SKELETON).initialise(data_manager=data_manager)
+    return entity_uid
+
+
+def test_skeletons_of_the_same_resource_are_batched():
+
+    logger = logging.getLogger("test_logger")
+    data_manager = DataManager(logger=logger, cache_dir=None)
+    data_manager.load_file(data_group_id="brain_stem",
+                           fpath=os.path.join(constants.RESOURCES_DIR, "meshes", "BrainStem.glb"))
+
+    scene = Scene(logger=logger)
+    systems = {"logger": logger, "scene": scene, "event_publisher": None, "action_publisher": None,
+               "data_manager": data_manager, "parameters": {}}
+    transform_system = TransformSystem(**systems)
+    skeleton_system = SkeletonSystem(**systems)
+
+    entity_uids = [add_character(scene=scene, data_manager=data_manager, position="1 0 0"),
+                   add_character(scene=scene, data_manager=data_manager),
+                   add_character(scene=scene, data_manager=data_manager, position="0 0 -3")]
+
+    # Bones are moved through the skeleton's own arrays, which are views into the batch
+    skeleton_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_SKELETON)
+    transform_system.update(elapsed_time=0.0, context=None)
+    skeleton_system.update(elapsed_time=0.0, context=None)
+    skeleton_batch = skeleton_system.skeleton_batches["brain_stem/skeleton_0"]
+    skeleton_pool[entity_uids[1]].translations[0] += 2.0
+
+    transform_system.update(elapsed_time=0.0, context=None)
+    skeleton_system.update(elapsed_time=0.0, context=None)
+    assert skeleton_system.skeleton_batches["brain_stem/skeleton_0"] is skeleton_batch
+    assert skeleton_system.num_skeletons_updated == 3
+
+    transform_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    for entity_uid in entity_uids:
+        skeleton = skeleton_pool[entity_uid]
+        transform = transform_pool.get(entity_uid, None)
+        pose = SkeletonPose(parent_indices=skeleton.parent_indices,
+                            inverse_bind_matrices=skeleton.pose.inverse_bind_matrices)
+        target_world_matrices = np.empty_like(skeleton.world_matrices)
+        target_skinning_matrices = np.empty_like(skeleton.skinning_matrices)
+        pose.evaluate(translations=skeleton.translations.copy(),
+                      rotations=skeleton.rotations.copy(),
+                      scales=skeleton.scales.copy(),
+                      world_matrices_out=target_world_matrices,
+                      root_matrices=None if transform is None else np.array(transform.world_matrix),
+                      skinning_matrices_out=target_skinning_matrices)
+        np.testing.assert_allclose(skeleton.world_matrices, target_world_matrices, atol=1e-5)
+        np.testing.assert_allclose(skeleton.skinning_matrices, target_skinning_matrices, atol=1e-5)
+
+    # Adding a skeleton re-creates the batch
+    add_character(scene=scene, data_manager=data_manager)
+    skeleton_system.update(elapsed_time=0.0, context=None)
+    assert skeleton_system.skeleton_batches["brain_stem/skeleton_0"] is not skeleton_batch
+    assert skeleton_system.num_skeletons_updated == 4
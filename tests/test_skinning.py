@@ -0,0 +1,113 @@
+import os
+
+import pytest
+import numpy as np
+
+from src.core.file_loaders.file_loader_gltf import FileLoaderGLTF
+from src.components.skeleton import Skeleton
+from src.math import mat4
+from src.math.skeleton_pose import SkeletonPose
+from src.math.skinning import skin_mesh
+
+MESHES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resources", "meshes")
+
+
+def test_skin_mesh_matches_reference():
+
+    num_vertices = 10_001
+    num_bones = 30
+    rng = np.random.default_rng(3)
+    vertices = rng.uniform(-1, 1, (num_vertices, 3)).astype(np.float32)
+    normals = rng.normal(size=(num_vertices, 3)).astype(np.float32)
+    normals /= np.linalg.norm(normals, axis=-1, keepdims=True)
+    joints = rng.integers(0, num_bones, (num_vertices, 4)).astype(np.uint16)
+    weights = rng.random((num_vertices, 4)).astype(np.float32)
+    weights[:, 3] = 0.0
+    weights /= weights.sum(axis=-1, keepdims=True)
+
+    rotations = rng.normal(size=(num_bones, 4)).astype(np.float32)
+    rotations /= np.linalg.norm(rotations, axis=-1, keepdims=True)
+    skinning_matrices = np.empty((num_bones, 4, 4), dtype=np.float32)
+    mat4.matrix_compositions(rng.uniform(-1, 1, (num_bones, 3)).astype(np.float32),
+                             rotations,
+                             np.full((num_bones, 3), 1.5, dtype=np.float32),
+                             skinning_matrices)
+
+    skinned_vertices, skinned_normals = skin_mesh(vertices=vertices,
+                                                  joints=joints,
+                                                  weights=weights,
+                                                  skinning_matrices=skinning_matrices,
+                                                  normals=normals,
+                                                  chunk_size=1000)
+
+    blended_matrices = np.einsum("nk,nkij->nij", weights, skinning_matrices[joints])
+    target_vertices = np.einsum("nij,nj->ni", blended_matrices[:, :3, :3], vertices) + blended_matrices[:, :3, 3]
+    target_normals = np.einsum("nij,nj->ni", blended_matrices[:, :3, :3], normals)
+    target_normals /= np.linalg.norm(target_normals, axis=-1, keepdims=True)
+    np.testing.assert_allclose(skinned_vertices, target_vertices, atol=1e-4)
+    np.testing.assert_allclose(skinned_normals, target_normals, atol=1e-4)
+
+    # Vertices only, into existing memory
+    vertices_out = np.empty_like(vertices)
+    assert skin_mesh(vertices=vertices, joints=joints, weights=weights, skinning_matrices=skinning_matrices,
+                     vertices_out=vertices_out)[1] is None
+    np.testing.assert_array_equal(vertices_out, skinned_vertices)
+
+
+def test_gltf_mesh_in_bind_pose():
+
+    all_resources = {}
+    FileLoaderGLTF(all_resources=all_resources).load(resource_uid="brain_stem",
+                                                     fpath=os.path.join(MESHES_DIR, "BrainStem.glb"))
+    skeleton_blocks = all_resources["brain_stem/skeleton_0"].data_blocks
+    mesh_blocks = all_resources["brain_stem/mesh_0"].data_blocks
+
+    pose = SkeletonPose(parent_indices=skeleton_blocks["parent_index"].data,
+                        inverse_bind_matrices=skeleton_blocks["inverse_bind_matrices"].data)
+    world_matrices = np.empty((pose.num_bones, 4, 4), dtype=np.float32)
+    skinning_matrices = np.empty_like(world_matrices)
+    pose.evaluate(translations=skeleton_blocks["translation"].data,
+                  rotations=skeleton_blocks["rotation"].data,
+                  scales=skeleton_blocks["scale"].data,
+                  world_matrices_out=world_matrices,
+                  skinning_matrices_out=skinning_matrices)
+
+    # In the bind pose, all skinning matrices are the same, so the mesh is only moved by it
+    vertices = mesh_blocks["vertices"].data
+    skinned_vertices, _ = skin_mesh(vertices=vertices,
+                                    joints=mesh_blocks["joints"].data,
+                                    weights=mesh_blocks["weights"].data,
+                                    skinning_matrices=skinning_matrices)
+    target_vertices = vertices @ skinning_matrices[0, :3, :3].T + skinning_matrices[0, :3, 3]
+    np.testing.assert_allclose(skinned_vertices, target_vertices, atol=1e-3)
+
+
+def test_bone_palette_upload():
+
+    moderngl = pytest.importorskip("moderngl")
+    try:
+        ctx = moderngl.create_standalone_context(backend="egl", require=430)
+    except Exception:
+        pytest.skip("No headless OpenGL 4.3 context available")
+
+    from src.systems.render_system.bone_palette import BonePalette
+
+    skeletons = {}
+    for entity_uid, num_bones in [(3, 2), (4, 0), (7, 3)]:
+        skeleton = Skeleton(parameters={})
+        if num_bones > 0:
+            skeleton.skinning_matrices = np.arange(num_bones * 16, dtype=np.float32).reshape((num_bones, 4, 4))
+            skeleton.skinning_matrices += entity_uid * 1000
+        skeletons[entity_uid] = skeleton
+
+    # Starts too small, so it has to grow
+    bone_palette = BonePalette(ctx=ctx, initial_num_bones=1)
+    assert bone_palette.update(skeleton_pool=skeletons) == 5
+    assert [skeleton.palette_offset for skeleton in skeletons.values()] == [0, -1, 2]
+
+    uploaded = np.frombuffer(bone_palette.buffer.read(size=5 * 64), dtype=np.float32).reshape((5, 4, 4))
+    np.testing.assert_array_equal(uploaded[:2], skeletons[3].skinning_matrices)
+    np.testing.assert_array_equal(uploaded[2:], skeletons[7].skinning_matrices)
+
+    bone_palette.release()
+    ctx.release()
@@ -0,0 +1,79 @@
+import numpy as np
+from scipy.spatial.transform import Rotation, RotationSpline, Slerp
+
+from src.math import so3
+from src.math.so3_interpolation import interpolate_slerp, interpolate_spline, interpolate_squad
+
+
+def create_tracks(rng: np.random.Generator, num_frames: int, num_tracks: int) -> tuple:
+
+    # Non-uniform timestamps and a mix of slow and fast rotations, including quaternions in both hemispheres
+    ts_in = np.cumsum(rng.uniform(0.01, 0.05, num_frames))
+    rotvecs = np.cumsum(rng.normal(scale=0.3, size=(num_frames, num_tracks, 3)), axis=0)
+    rotvecs[:, 0] *= 0.001
+    quats = Rotation.from_rotvec(rotvecs.reshape((-1, 3))).as_quat().reshape((num_frames, num_tracks, 4))
+    quats[::3] *= -1.0
+    return ts_in, quats
+
+
+def quat_angles(quats_a: np.ndarray, quats_b: np.ndarray) -> np.ndarray:
+    rotations_a = Rotation.from_quat(quats_a.reshape((-1, 4)))
+    rotations_b = Rotation.from_quat(quats_b.reshape((-1, 4)))
+    return (rotations_a.inv() * rotations_b).magnitude()
+
+
+def test_spline_matches_scipy_rotation_spline():
+
+    rng = np.random.default_rng(0)
+    for num_frames in [2, 3, 50]:
+        ts_in, quats = create_tracks(rng=rng, num_frames=num_frames, num_tracks=6)
+        ts_out = np.linspace(ts_in[0] - 0.01, ts_in[-1] + 0.01, 301)
+        interpolated = interpolate_spline(quats=quats, ts_in=ts_in, ts_out=ts_out, dtype=np.float64)
+        assert interpolated.shape == (ts_out.size, quats.shape[1], 4)
+
+        for track in range(quats.shape[1]):
+            target = RotationSpline(ts_in, Rotation.from_quat(quats[:, track]))(ts_out).as_quat()
+            np.testing.assert_allclose(quat_angles(interpolated[:, track], target), 0.0, atol=1e-6)
+
+
+def test_interpolate_rotations_matches_per_joint_splines():
+
+    rng = np.random.default_rng(1)
+    ts_in, quats = create_tracks(rng=rng, num_frames=40, num_tracks=4)
+    rotvecs = Rotation.from_quat(quats.reshape((-1, 4))).as_rotvec().reshape(quats.shape[:2] + (3,))
+    ts_out = np.linspace(ts_in[0], ts_in[-1], 97)
+
+    interpolated = so3.interpolate_rotations(rotations=rotvecs, ts_in=ts_in, ts_out=ts_out)
+    assert interpolated.shape == (ts_out.size, rotvecs.shape[1], 3)
+    for joint in range(rotvecs.shape[1]):
+        target = RotationSpline(ts_in, Rotation.from_rotvec(rotvecs[:, joint]))(ts_out).as_rotvec()
+        np.testing.assert_allclose(interpolated[:, joint], target, atol=1e-6)
+
+
+def test_slerp_matches_scipy_slerp():
+
+    rng = np.random.default_rng(2)
+    ts_in, quats = create_tracks(rng=rng, num_frames=20, num_tracks=5)
+    ts_out = np.linspace(ts_in[0], ts_in[-1], 200)
+    interpolated = interpolate_slerp(quats=quats, ts_in=ts_in, ts_out=ts_out)
+
+    for track in range(quats.shape[1]):
+        target = Slerp(ts_in, Rotation.from_quat(quats[:, track]))(ts_out).as_quat()
+        np.testing.assert_allclose(quat_angles(interpolated[:, track], target), 0.0, atol=1e-5)
+
+
+def test_squad():
+
+    # Constant angular velocity is reproduced exactly, and keyframes are always hit
+    ts_in = np.linspace(0.0, 1.0, 11)
+    rotvecs = ts_in[:, np.newaxis, np.newaxis] * np.array([[[0.0, 0.0, 2.0]]])
+    quats = Rotation.from_rotvec(rotvecs.reshape((-1, 3))).as_quat().reshape((ts_in.size, 1, 4))
+    ts_out = np.linspace(0.0, 1.0, 101)
+    target = Rotation.from_rotvec(ts_out[:, np.newaxis] * [0.0, 0.0, 2.0]).as_quat()
+    np.testing.assert_allclose(quat_angles(interpolate_squad(quats=quats, ts_in=ts_in, ts_out=ts_out), target),
+                               0.0, atol=1e-5)
+
+    rng = np.random.default_rng(3)
+    ts_in, quats = create_tracks(rng=rng, num_frames=30, num_tracks=3)
+    keyframes = interpolate_squad(quats=quats, ts_in=ts_in, ts_out=ts_in)
+    np.testing.assert_allclose(quat_angles(keyframes, quats), 0.0, atol=1e-5)
@@ -0,0 +1,145 @@
+import logging
+
+import pytest
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.systems.transform_system.transform_system import TransformSystem
+
+
+def create_transform_system(scene: Scene) -> TransformSystem:
+    return TransformSystem(logger=logging.getLogger("test_logger"),
+                           scene=scene,
+                           event_publisher=None,
+                           action_publisher=None,
+                           data_manager=None,
+                           parameters={})
+
+
+def test_parent_child_world_matrices():
+
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    blueprint = {
+        "name": "parent",
+        "components": [{"name": "transform_3d", "parameters": {"position": "1 0 0", "rotation": "0 0 90",
+                                                               "degrees": "true"}}],
+        "entity": [{"name": "child",
+                    "components": [{"name": "transform_3d", "parameters": {"position": "0 2 0"}}]}]
+    }
+    parent_uid = scene.add_entity(entity_blueprint=blueprint)
+    child_uid = scene.get_children_uids(entity_uid=parent_uid)[0]
+
+    transform_system = create_transform_system(scene=scene)
+    transform_system.update(elapsed_time=0.0, context=None)
+
+    pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    parent_transform = pool[parent_uid]
+    child_transform = pool[child_uid]
+
+    np.testing.assert_allclose(child_transform.world_matrix,
+                               parent_transform.world_matrix @ child_transform.local_matrix, atol=1e-6)
+    np.testing.assert_allclose(child_transform.world_matrix[:3, 3], [-1.0, 0.0, 0.0], atol=1e-6)
+    np.testing.assert_allclose(child_transform.inverse_world_matrix @ child_transform.world_matrix,
+                               np.eye(4), atol=1e-6)
+
+    # Moving the parent must also move the child on the next update
+    parent_transform.position = (3.0, 0.0, 0.0)
+    parent_transform.input_values_updated = True
+    transform_system.update(elapsed_time=0.0, context=None)
+    np.testing.assert_allclose(child_transform.world_matrix[:3, 3], [1.0, 0.0, 0.0], atol=1e-6)
+
+
+def test_only_dirty_subtrees_are_updated():
+
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    leaf_blueprint = {"name": "leaf", "components": [{"name": "transform_3d", "parameters": {}}]}
+    blueprint = {"name": "root",
+                 "components": [{"name": "transform_3d", "parameters": {}}],
+                 "entity": [{"name": "branch",
+                             "components": [{"name": "transform_3d", "parameters": {}}],
+                             "entity": [leaf_blueprint, leaf_blueprint]},
+                            leaf_blueprint]}
+    root_uid = scene.add_entity(entity_blueprint=blueprint)
+    branch_uid, leaf_uid = scene.get_children_uids(entity_uid=root_uid)
+    branch_leaf_uid = scene.get_children_uids(entity_uid=branch_uid)[0]
+    pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+
+    transform_system = create_transform_system(scene=scene)
+    transform_system.update(elapsed_time=0.0, context=None)
+    assert transform_system.num_world_matrices_updated == 5
+
+    transform_system.update(elapsed_time=0.0, context=None)
+    assert transform_system.num_local_matrices_updated == 0
+    assert transform_system.num_world_matrices_updated == 0
+    assert not any(transform.dirty for transform in pool.values())
+
+    # Moving the branch updates itself and its two leaves only
+    pool[branch_uid].position = (0.0, 1.0, 0.0)
+    pool[branch_uid].input_values_updated = True
+    transform_system.update(elapsed_time=0.0, context=None)
+    assert transform_system.num_local_matrices_updated == 1
+    assert transform_system.num_world_matrices_updated == 3
+    assert pool[branch_leaf_uid].dirty
+    assert not pool[leaf_uid].dirty
+    np.testing.assert_allclose(pool[branch_leaf_uid].world_matrix[:3, 3], [0.0, 1.0, 0.0])
+
+    # Moving the root updates everything
+    pool[root_uid].position = (2.0, 0.0, 0.0)
+    pool[root_uid].input_values_updated = True
+    transform_system.update(elapsed_time=0.0, context=None)
+    assert transform_system.num_world_matrices_updated == 5
+    np.testing.assert_allclose(pool[branch_leaf_uid].world_matrix[:3, 3], [2.0, 1.0, 0.0])
+    np.testing.assert_allclose(pool[branch_leaf_uid].inverse_world_matrix[:3, 3], [-2.0, -1.0, 0.0])
+
+
+@pytest.mark.parametrize("tree_type", ["deep", "wide"])
+def test_world_matrices_of_deep_and_wide_trees(tree_type: str):
+
+    # Entities get their parents, and their transforms, in shuffled order so that children often come first
+    num_entities = 2000
+    rng = np.random.default_rng(42)
+    order = rng.permutation(num_entities)
+    parent_indices = np.full((num_entities,), -1, dtype=np.int64)
+    for index in range(1, num_entities):
+        if tree_type == "deep":
+            parent_index = order[max(0, index - rng.integers(1, 3))] if rng.random() < 0.1 else order[index - 1]
+        else:
+            parent_index = order[rng.integers(0, min(index, 3))]
+        parent_indices[order[index]] = parent_index
+
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    entity_uids = [scene._create_entity() for _ in range(num_entities)]
+    for entity_uid, parent_index in zip(entity_uids, parent_indices):
+        if parent_index >= 0:
+            scene.entities[entity_uid].parent_uid = entity_uids[parent_index]
+
+    for index in rng.permutation(num_entities):
+        parameters = {"position": " ".join(str(value) for value in rng.uniform(-1, 1, 3)),
+                      "rotation": " ".join(str(value) for value in rng.uniform(-np.pi, np.pi, 3))}
+        scene.add_component(entity_uid=entity_uids[index],
+                            component_type=constants.COMPONENT_TYPE_TRANSFORM,
+                            parameters=parameters)
+
+    transform_system = create_transform_system(scene=scene)
+    transform_system.update(elapsed_time=0.0, context=None)
+    if tree_type == "deep":
+        assert transform_system.level_offsets.size > 1000
+    else:
+        assert transform_system.level_offsets.size < 20
+
+    # Reference: world matrices in double precision, following "order" where parents always come first
+    pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_TRANSFORM)
+    target_world_matrices = {}
+    for index in order:
+        local_matrix = pool[entity_uids[index]].local_matrix.astype(np.float64)
+        parent_index = parent_indices[index]
+        if parent_index < 0:
+            target_world_matrices[index] = local_matrix
+        else:
+            target_world_matrices[index] = target_world_matrices[parent_index] @ local_matrix
+
+    for index, entity_uid in enumerate(entity_uids):
+        transform = pool[entity_uid]
+        np.testing.assert_allclose(transform.world_matrix, target_world_matrices[index], atol=1e-3)
+        np.testing.assert_allclose(transform.inverse_world_matrix @ transform.world_matrix, np.eye(4), atol=1e-3)
@@ -0,0 +1,194 @@
+import os
+import logging
+
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.core.data_block import DataBlock
+from src.core.data_group import DataGroup
+from src.core.data_manager import DataManager
+from src.components.mesh import Mesh
+from src.geometry_3d.mesh_factory_3d import MeshFactory3D
+from src.geometry_3d.triangle_bvh import TriangleBVH
+from src.math.ray_intersection import intersect_ray_triangle
+from src.systems.transform_system.transform_system import TransformSystem
+from src.systems.render_system.frustum_culler import FrustumCuller
+from src.systems.render_system.scene_bvh import SceneBVH
+from src.utilities import utils_obj
+
+
+def brute_force_intersect(vertices: np.ndarray, triangles: np.ndarray, ray_origins: np.ndarray,
+                          ray_directions: np.ndarray) -> tuple:
+
+    # Moller-Trumbore against every triangle at once, one ray at a time
+    vertex_0 = vertices[triangles[:, 0]].astype(np.float64)
+    edge_1 = vertices[triangles[:, 1]] - vertex_0
+    edge_2 = vertices[triangles[:, 2]] - vertex_0
+    distances = np.full((ray_origins.shape[0],), np.inf)
+    triangle_ids = np.full((ray_origins.shape[0],), -1)
+    for ray, (ray_origin, ray_direction) in enumerate(zip(ray_origins, ray_directions)):
+        p = np.cross(ray_direction, edge_2)
+        determinant = np.einsum("ij,ij->i", edge_1, p)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            s = ray_origin - vertex_0
+            u = np.einsum("ij,ij->i", s, p) / determinant
+            q = np.cross(s, edge_1)
+            v = (q @ ray_direction) / determinant
+            t = np.einsum("ij,ij->i", edge_2, q) / determinant
+            hit = (np.abs(determinant) > 1e-12) & (u >= 0) & (v >= 0) & (u + v <= 1) & (t >= 0)
+        if hit.any():
+            triangle_ids[ray] = np.flatnonzero(hit)[np.argmin(t[hit])]
+            distances[ray] = t[triangle_ids[ray]]
+    return distances, triangle_ids
+
+
+def test_intersect_ray_triangle():
+
+    vertex_0 = np.array([0.0, 0.0, 0.0])
+    vertex_1 = np.array([1.0, 0.0, 0.0])
+    vertex_2 = np.array([0.0, 1.0, 0.0])
+
+    distance, u, v = intersect_ray_triangle(np.array([0.25, 0.5, 2.0]), np.array([0.0, 0.0, -1.0]),
+                                            vertex_0, vertex_1, vertex_2)
+    assert np.isclose(distance, 2.0)
+    assert np.isclose(u, 0.25) and np.isclose(v, 0.5)
+
+    # Both sides are hit, but not behind the ray's origin or outside the triangle
+    assert np.isclose(intersect_ray_triangle(np.array([0.25, 0.25, -1.0]), np.array([0.0, 0.0, 1.0]),
+                                             vertex_0, vertex_1, vertex_2)[0], 1.0)
+    assert intersect_ray_triangle(np.array([0.25, 0.25, -1.0]), np.array([0.0, 0.0, -1.0]),
+                                  vertex_0, vertex_1, vertex_2)[0] == -1.0
+    assert intersect_ray_triangle(np.array([0.75, 0.75, 1.0]), np.array([0.0, 0.0, -1.0]),
+                                  vertex_0, vertex_1, vertex_2)[0] == -1.0
+
+
+def test_triangle_bvh_matches_brute_force():
+
+    vertices, _, _, triangles = utils_obj.load_obj(fpath=os.path.join(constants.RESOURCES_DIR, "meshes",
+                                                                     "dragon.obj"))
+    triangle_bvh = TriangleBVH(vertices=vertices, indices=triangles)
+
+    # Rays from a sphere around the mesh towards random points inside its bounds, plus a few that miss it
+    rng = np.random.default_rng(0)
+    num_rays = 200
+    center = (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    extent = vertices.max(axis=0) - vertices.min(axis=0)
+    directions = rng.normal(size=(num_rays, 3))
+    ray_origins = center + 2.0 * np.linalg.norm(extent) * directions / np.linalg.norm(directions, axis=1)[:, None]
+    targets = center + rng.uniform(-0.4, 0.4, (num_rays, 3)) * extent
+    targets[:10] = ray_origins[:10] * 2.0 - center
+    ray_directions = targets - ray_origins
+    ray_directions /= np.linalg.norm(ray_directions, axis=1)[:, None]
+
+    distances, triangle_ids, barycentrics = triangle_bvh.intersect(ray_origins=ray_origins,
+                                                                   ray_directions=ray_directions)
+    assert triangle_bvh.built
+    assert np.all(triangle_bvh.node_count[triangle_bvh.node_right < 0] <= constants.TRIANGLE_BVH_LEAF_SIZE)
+    np.testing.assert_array_equal(np.sort(triangle_bvh.primitives), np.arange(triangles.shape[0]))
+
+    reference_distances, reference_ids = brute_force_intersect(vertices=vertices, triangles=triangles,
+                                                               ray_origins=ray_origins,
+                                                               ray_directions=ray_directions)
+    assert np.all(triangle_ids[:10] == -1) and np.all(np.isinf(distances[:10]))
+    assert np.count_nonzero(triangle_ids >= 0) > num_rays // 2
+    np.testing.assert_allclose(distances, reference_distances, rtol=1e-4)
+
+    np.testing.assert_array_equal(triangle_ids, reference_ids)
+    hits = triangle_ids >= 0
+
+    # Barycentrics give back the hit point
+    corners = vertices[triangles[triangle_ids[hits]]]
+    u, v = barycentrics[hits, 0:1], barycentrics[hits, 1:2]
+    points = (1.0 - u - v) * corners[:, 0] + u * corners[:, 1] + v * corners[:, 2]
+    np.testing.assert_allclose(points, ray_origins[hits] + distances[hits, None] * ray_directions[hits],
+                               atol=1e-3 * np.linalg.norm(extent))
+
+    # Limited distance
+    limited_distances, limited_ids, _ = triangle_bvh.intersect(ray_origins=ray_origins,
+                                                               ray_directions=ray_directions,
+                                                               max_distance=float(np.median(distances[hits])))
+    assert 0 < np.count_nonzero(limited_ids >= 0) < np.count_nonzero(hits)
+    np.testing.assert_array_equal(limited_distances[limited_ids >= 0], distances[limited_ids >= 0])
+
+
+def test_triangle_bvh_shared_per_resource_and_scene_ray_cast():
+
+    # Same icosphere loaded as a resource for two meshes
+    vertices, normals, _, _ = MeshFactory3D().create_icosphere(radius=0.5, subdivisions=3)
+    data_manager = DataManager(logger=logging.getLogger("test_logger"), cache_dir=None)
+    data_group = DataGroup()
+    data_group.data_blocks["vertices"] = DataBlock(data=vertices)
+    data_group.data_blocks["normals"] = DataBlock(data=normals)
+    data_manager.add_data_group(data_group_id="sphere", data_group=data_group)
+
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    entity_uids = [scene.add_entity(entity_blueprint={"name": "sphere", "components": [
+        {"name": "transform_3d", "parameters": {"position": position, "scale": "2 2 2"}},
+        {"name": "mesh", "parameters": {"resource_id": "sphere"}}]}) for position in ["0 0 -5", "0 0 -10"]]
+
+    mesh_pool = scene.get_pool(component_type=constants.COMPONENT_TYPE_MESH)
+    for mesh in mesh_pool.values():
+        mesh.create_mesh(data_manager=data_manager)
+        mesh.update_bounds()
+        mesh.create_triangle_bvh(data_manager=data_manager)
+
+    # Built when the meshes were created, not by the first ray cast
+    assert all(mesh.triangle_bvh.built for mesh in mesh_pool.values())
+    assert mesh_pool[entity_uids[0]].get_triangle_bvh() is mesh_pool[entity_uids[1]].get_triangle_bvh()
+    assert mesh_pool[entity_uids[0]].get_triangle_bvh() is data_manager.get_triangle_bvh(data_group_id="sphere")
+
+    TransformSystem(logger=logging.getLogger("test_logger"), scene=scene, event_publisher=None,
+                    action_publisher=None, data_manager=None, parameters={}).update(elapsed_time=0.0, context=None)
+    frustum_culler = FrustumCuller()
+    frustum_culler.update(scene=scene)
+    scene_bvh = SceneBVH()
+    scene_bvh.update(scene=scene, transform_rows=frustum_culler.transform_rows)
+
+    # Through the centre, the first sphere's surface is hit (scaled radius of 1)
+    ray_direction = np.array([0.0, 0.0, -1.0])
+    entity_uid, distance = scene_bvh.ray_cast(scene=scene, ray_origin=np.zeros(3), ray_direction=ray_direction)
+    assert entity_uid == entity_uids[0]
+    assert 3.95 < distance <= 4.0
+
+    # Near the corner of their bounds, the ray misses both spheres even though it goes through both AABBs
+    assert scene_bvh.ray_cast(scene=scene, ray_origin=np.array([0.9, 0.9, 0.0]),
+                              ray_direction=ray_direction) == (-1, np.inf)
+
+
+def test_shape_mesh_triangle_bvh_follows_vertices():
+
+    mesh = Mesh(parameters={"shape": constants.MESH_SHAPE_ICOSPHERE, "subdivisions": "1"})
+    mesh.create_mesh(data_manager=None)
+    mesh.update_bounds()
+    mesh.create_triangle_bvh(data_manager=None)
+    triangle_bvh = mesh.triangle_bvh
+    assert triangle_bvh.built
+    assert mesh.get_triangle_bvh() is triangle_bvh
+
+    # New vertices invalidate the tree, which is built again from them
+    mesh.vertices = MeshFactory3D().create_icosphere(radius=0.5, subdivisions=2)[0]
+    mesh.indices = None
+    mesh.update_bounds()
+    assert mesh.triangle_bvh is None
+    assert mesh.get_triangle_bvh() is not triangle_bvh
+    assert mesh.get_triangle_bvh().num_triangles == mesh.vertices.shape[0] // 3
+
+
+def test_triangle_bvh_dropped_when_resource_is_reloaded(tmp_path):
+
+    triangle_fpath = str(tmp_path / "triangle.obj")
+    with open(triangle_fpath, "w") as file:
+        file.write("v 0 0 0\nv 1 0 0\nv 0 1 0\nf 1 2 3\n")
+    dragon_fpath = os.path.join(constants.RESOURCES_DIR, "meshes", "dragon.obj")
+
+    data_manager = DataManager(logger=logging.getLogger("test_logger"), cache_dir=None)
+    data_manager.load_file(data_group_id="model", fpath=dragon_fpath)
+    assert data_manager.get_triangle_bvh(data_group_id="model/mesh_0").num_triangles > 1
+
+    # Reloading the same ID, one file at a time or on worker processes, replaces the tree too
+    data_manager.load_file(data_group_id="model", fpath=triangle_fpath)
+    assert data_manager.get_triangle_bvh(data_group_id="model/mesh_0").num_triangles == 1
+
+    data_manager.load_files(resources={"model": dragon_fpath, "other": triangle_fpath}, max_workers=2)
+    assert data_manager.get_triangle_bvh(data_group_id="model/mesh_0").num_triangles > 1
@@ -0,0 +1,101 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.core import constants
+from src.utilities import utils_bvh_reader
+
+BVH_FPATHS = [os.path.join(constants.RESOURCES_DIR, "bvh", "walk.bvh"),
+              os.path.join(constants.RESOURCES_DIR, "bvh", "dataset-1_guide_feminine_001.bvh")]
+
+
+def test_parse_ascii_floats():
+
+    output = np.empty(16, dtype=np.float32)
+    text = b" -1.5e-05\t+3.25E2\r\n.5 7. -0 12345678901234567890 "
+    num_values = utils_bvh_reader.parse_ascii_floats(buffer=np.frombuffer(text, dtype=np.uint8), output=output)
+
+    np.testing.assert_allclose(output[:num_values], np.fromstring(text, dtype=np.float32, sep=" "))
+
+    for invalid_text in [b"1 - 2", b"1 2x", b"nan"]:
+        assert utils_bvh_reader.parse_ascii_floats(buffer=np.frombuffer(invalid_text, dtype=np.uint8),
+                                                   output=output) < 0
+
+
+@pytest.mark.parametrize("fpath", BVH_FPATHS)
+def test_load_bvh_matches_bvh_reader(fpath):
+
+    header, positions, rotations = utils_bvh_reader.load_bvh(fpath=fpath)
+    skeleton_df, animation_df, frame_period = utils_bvh_reader.BVHReader().load(fpath=fpath)
+
+    bone_names = header[utils_bvh_reader.BVH_HEADER_KEY_BONE_NAMES]
+    assert bone_names == skeleton_df["name"].tolist()
+    assert header[utils_bvh_reader.BVH_HEADER_KEY_FRAME_PERIOD] == pytest.approx(frame_period)
+    np.testing.assert_array_equal(header[utils_bvh_reader.BVH_HEADER_KEY_PARENT_INDEX], skeleton_df["parent"].values)
+    np.testing.assert_allclose(header[utils_bvh_reader.BVH_HEADER_KEY_OFFSETS],
+                               skeleton_df[["position_x", "position_y", "position_z"]].values)
+    np.testing.assert_allclose(header[utils_bvh_reader.BVH_HEADER_KEY_LENGTHS], skeleton_df["length"].values,
+                               rtol=1e-5)
+
+    assert positions.shape == rotations.shape == (animation_df.index.size, len(bone_names), 3)
+    for bone_index, bone_name in enumerate(bone_names):
+        for axis_index, axis in enumerate("xyz"):
+            column_name = f"{bone_name}_rot_{axis}"
+            if column_name in animation_df:
+                np.testing.assert_allclose(rotations[:, bone_index, axis_index], animation_df[column_name].values,
+                                           atol=1e-6)
+
+    # BVHReader only treats the first 3 channels as positions
+    root_columns = [f"{bone_names[0]}_pos_{axis}" for axis in "xyz"]
+    np.testing.assert_allclose(positions[:, 0, :], animation_df[root_columns].values, atol=1e-5)
+
+
+@pytest.mark.parametrize("read_size", [utils_bvh_reader.BVH_FRAME_INDEX_READ_SIZE, 37])
+def test_load_bvh_frame_range(tmp_path, monkeypatch, read_size):
+
+    monkeypatch.setattr(utils_bvh_reader, "BVH_FRAME_INDEX_READ_SIZE", read_size)
+
+    # Blank lines, Windows line endings and no newline at the end must not affect the frame index
+    with open(BVH_FPATHS[0], "rb") as file:
+        content = file.read()
+    header_bytes, motion_bytes = content.split(b"Frame Time: 0.0333333\n")
+    motion_bytes = motion_bytes.replace(b"\n", b"\r\n\r\n").rstrip()
+    fpath = str(tmp_path / "walk.bvh")
+    with open(fpath, "wb") as file:
+        file.write(header_bytes + b"Frame Time: 0.0333333\n\n" + motion_bytes)
+
+    _, all_positions, all_rotations = utils_bvh_reader.load_bvh(fpath=fpath)
+    index_fpath = fpath + utils_bvh_reader.BVH_FRAME_INDEX_FILE_EXTENSION
+    assert not os.path.isfile(index_fpath)  # Full loads don't need an index
+
+    for start_frame, end_frame in [(0, 5), (10, 20), (25, None), (30, 31), (12, 12)]:
+        _, positions, rotations = utils_bvh_reader.load_bvh(fpath=fpath, start_frame=start_frame, end_frame=end_frame)
+        np.testing.assert_array_equal(positions, all_positions[start_frame:end_frame])
+        np.testing.assert_array_equal(rotations, all_rotations[start_frame:end_frame])
+    assert os.path.isfile(index_fpath)
+
+    chunks = list(utils_bvh_reader.iter_bvh_frames(fpath=fpath, num_frames_per_chunk=8, start_frame=3))
+    assert [chunk_start_frame for _, chunk_start_frame, _, _ in chunks] == [3, 11, 19, 27]
+    np.testing.assert_array_equal(np.concatenate([chunk[3] for chunk in chunks]), all_rotations[3:])
+
+    with pytest.raises(ValueError):
+        utils_bvh_reader.load_bvh(fpath=fpath, start_frame=20, end_frame=10)
+
+
+def test_bvh_frame_index_is_rebuilt(tmp_path):
+
+    fpath = str(tmp_path / "walk.bvh")
+    with open(BVH_FPATHS[0], "rb") as file:
+        content = file.read()
+    with open(fpath, "wb") as file:
+        file.write(content)
+
+    _, positions, _ = utils_bvh_reader.load_bvh(fpath=fpath, start_frame=30)
+
+    # Prepend a space to every frame line. The old index would now point to the wrong bytes
+    with open(fpath, "wb") as file:
+        file.write(content.replace(b"\n0.", b"\n 0.").replace(b"\n-", b"\n -"))
+
+    _, new_positions, _ = utils_bvh_reader.load_bvh(fpath=fpath, start_frame=30)
+    np.testing.assert_array_equal(new_positions, positions)
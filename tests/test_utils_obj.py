@@ -0,0 +1,103 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.core import constants
+from src.utilities import utils_obj
+
+OBJ_ALL_FACE_FORMATS = """# Two quads and one triangle, using every face format
+o test
+v 0.0 0.0 0.0
+v 1.0 0.0 0.0
+v 1.0 1.0 0.0
+v 0.0 1.0 0.0
+v 2.0 0.0 0.0
+vt 0.0 0.0
+vt 1.0 0.0
+vt 1.0 1.0 0.0
+vn 0.0 0.0 1.0
+vn 0.0 0.0 -1.0
+s off
+f 1/1/1 2/2/1 3/3/1 4/1/1
+f 2//2 5//2 3//2
+f -5/1 -4/2 -3/3
+  f 1 2 3 4\r
+"""
+
+
+def test_load_obj_face_formats(tmp_path):
+
+    fpath = str(tmp_path / "test.obj")
+    with open(fpath, "w", newline="") as file:
+        file.write(OBJ_ALL_FACE_FORMATS)
+
+    vertices, normals, uvs, indices = utils_obj.load_obj(fpath=fpath)
+
+    # 2 + 1 + 1 + 2 triangles
+    assert indices.shape == (6, 3)
+    assert indices.dtype == np.int32
+
+    # Quads are fan triangulated
+    positions = np.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [2, 0, 0]], dtype=np.float32)
+    expected_triangles = positions[[[0, 1, 2], [0, 2, 3], [1, 4, 2], [0, 1, 2], [0, 1, 2], [0, 2, 3]]]
+    np.testing.assert_array_equal(vertices[indices], expected_triangles)
+
+    # Missing attributes are zero
+    np.testing.assert_array_equal(normals[indices[2]], [[0, 0, -1]] * 3)
+    np.testing.assert_array_equal(normals[indices[4]], np.zeros((3, 3)))
+    np.testing.assert_array_equal(uvs[indices[3]], [[0, 0], [1, 0], [1, 1]])
+
+    # Each unique (v, vt, vn) becomes a single vertex: 4 + 3 + 3 + 4 corners, all different
+    assert vertices.shape[0] == 14
+
+
+def test_load_obj_deduplicates_shared_corners(tmp_path):
+
+    fpath = str(tmp_path / "test.obj")
+    with open(fpath, "w") as file:
+        file.write("v 0 0 0\nv 1 0 0\nv 1 1 0\nv 0 1 0\nf 1 2 3\nf 1 3 4\nf 3 2 1\n")
+
+    vertices, normals, uvs, indices = utils_obj.load_obj(fpath=fpath)
+
+    assert normals is None and uvs is None
+    assert vertices.shape == (4, 3)
+    np.testing.assert_array_equal(indices, [[0, 1, 2], [0, 2, 3], [2, 1, 0]])
+
+
+@pytest.mark.parametrize("content", ["v 0 0 0\nf 1 2 3\n", "v 0 0 0\nv 1 0 0\nv 1 1 0\nf 1/1 2/1 3/1\n",
+                                     "v 0 0 zero\n"])
+def test_load_obj_invalid(tmp_path, content):
+
+    fpath = str(tmp_path / "test.obj")
+    with open(fpath, "w") as file:
+        file.write(content)
+
+    with pytest.raises(ValueError):
+        utils_obj.load_obj(fpath=fpath)
+
+
+def test_load_obj_dragon():
+
+    fpath = os.path.join(constants.RESOURCES_DIR, "meshes", "dragon.obj")
+    vertices, normals, uvs, indices = utils_obj.load_obj(fpath=fpath)
+
+    # Compare every triangle against a naive per-line parse of the same file
+    raw_vertices, raw_normals, faces = [], [], []
+    with open(fpath, "r") as file:
+        for line in file:
+            parts = line.split()
+            if len(parts) == 0:
+                continue
+            if parts[0] == "v":
+                raw_vertices.append([float(value) for value in parts[1:4]])
+            elif parts[0] == "vn":
+                raw_normals.append([float(value) for value in parts[1:4]])
+            elif parts[0] == "f":
+                faces.append([[int(index) - 1 for index in corner.split("//")] for corner in parts[1:]])
+
+    faces = np.array(faces)
+    np.testing.assert_allclose(vertices[indices], np.array(raw_vertices, dtype=np.float32)[faces[:, :, 0]])
+    np.testing.assert_allclose(normals[indices], np.array(raw_normals, dtype=np.float32)[faces[:, :, 1]])
+    assert uvs is None
+    assert vertices.shape[0] < indices.size
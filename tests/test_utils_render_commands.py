@@ -0,0 +1,134 @@
+import logging
+
+import pytest
+import numpy as np
+
+from src.core import constants
+from src.core.scene import Scene
+from src.utilities import utils_render_commands
+from src.systems.render_system.render_queue import RenderQueue
+
+
+def test_encode_decode_command():
+
+    for is_transparent in [False, True]:
+        command = utils_render_commands.encode_command(3, is_transparent, 1234, 2, 17, 98765)
+        assert utils_render_commands.decode_command(command) == (3, is_transparent, 1234, 2, 17, 98765)
+
+    # Layer first, then opaque before transparent
+    opaque = utils_render_commands.encode_command(0, False, constants.DISTANCE_MASK, constants.PROGRAM_MASK,
+                                                  constants.MATERIAL_MASK, constants.MESH_MASK)
+    transparent = utils_render_commands.encode_command(0, True, 0, 0, 0, 0)
+    next_layer = utils_render_commands.encode_command(1, False, 0, 0, 0, 0)
+    assert opaque < transparent < next_layer
+
+
+def test_render_queue_order():
+
+    # mesh:                  0      1      2      3     4      5      6
+    layers = np.array([0, 0, 0, 0, 0, 0, 1], dtype=np.int32)
+    transparent = np.array([True, False, False, True, False, False, False])
+    distances = np.array([5.0, 9.0, 3.0, 8.0, 1.0, 2.0, 0.0])
+    programs = np.array([0, 1, 0, 0, 0, 0, 0], dtype=np.int32)
+    materials = np.array([0, 0, 4, 1, 4, 2, 0], dtype=np.int32)
+
+    render_queue = RenderQueue(initial_capacity=1)
+    draw_order = render_queue.build(layers=layers, transparent=transparent, distances=distances, programs=programs,
+                                    materials=materials, max_distance=10.0)
+
+    # Opaque by program, material and front to back, then transparent back to front, then the next layer
+    np.testing.assert_array_equal(draw_order, [5, 4, 2, 1, 3, 0, 6])
+    assert render_queue.num_commands == 7
+    assert np.all(np.diff(render_queue.get_commands().astype(np.float64)) > 0)
+
+    # Distances beyond the maximum are clipped, but the mesh index still breaks ties deterministically
+    draw_order = render_queue.build(layers=layers[:3], transparent=np.zeros(3, dtype=np.bool_),
+                                    distances=np.array([50.0, 20.0, 30.0]), programs=np.zeros(3, dtype=np.int32),
+                                    materials=np.zeros(3, dtype=np.int32), max_distance=10.0)
+    np.testing.assert_array_equal(draw_order, [0, 1, 2])
+
+    empty = np.empty((0,), dtype=np.int32)
+    assert render_queue.build(layers=empty, transparent=empty.astype(np.bool_), distances=empty.astype(np.float64),
+                              programs=empty, materials=empty, max_distance=10.0).size == 0
+
+
+def test_forward_pass_render_queue():
+
+    moderngl = pytest.importorskip("moderngl")
+    try:
+        ctx = moderngl.create_standalone_context(backend="egl", require=430)
+    except Exception:
+        pytest.skip("No headless OpenGL 4.3 context available")
+
+    from src.systems.render_system.instance_buffer import InstanceBuffer
+    from src.systems.render_system.frustum_culler import FrustumCuller
+    from src.systems.render_system.shader_program_library import ShaderProgramLibrary
+    from src.systems.render_system.render_passes.render_pass_forward import RenderPassForward
+    from src.systems.transform_system.transform_system import TransformSystem
+
+    # A half-transparent red box in front of an opaque blue one, a second opaque box hidden behind it and a fourth
+    # one behind the camera
+    scene = Scene(logger=logging.getLogger("test_logger"))
+    camera_uid = scene.add_entity(entity_blueprint={"name": "camera", "components": [
+        {"name": "transform_3d", "parameters": {"position": "0 0 5"}},
+        {"name": "camera", "parameters": {}}]})
+    boxes = [("0 0 1", "1 0 0", "0.5"), ("0 0 0", "0 0 1", "1.0"), ("0 0 -2", "0 1 0", "1.0"),
+             ("0 0 10", "1 1 1", "1.0")]
+    for position, diffuse, alpha in boxes:
+        scene.add_entity(entity_blueprint={"name": "box", "components": [
+            {"name": "transform_3d", "parameters": {"position": position}},
+            {"name": "mesh", "parameters": {"shape": "box", "width": "2", "height": "2", "depth": "0.1"}},
+            {"name": "material", "parameters": {"diffuse": diffuse, "alpha": alpha, "lighting_mode": "solid"}}]})
+
+    # Only the forward pass' VAOs are needed
+    shader_program_library = ShaderProgramLibrary(context=ctx, logger=logging.getLogger("test_logger"))
+    program = shader_program_library[constants.SHADER_PROGRAM_FORWARD_PASS]
+    for mesh in scene.get_pool(component_type=constants.COMPONENT_TYPE_MESH).values():
+        mesh.create_mesh(data_manager=None)
+        mesh.update_bounds()
+        mesh.vaos[constants.SHADER_PROGRAM_FORWARD_PASS] = ctx.vertex_array(
+            program,
+            [(ctx.buffer(mesh.vertices.astype("f4").tobytes()), "3f", constants.SHADER_INPUT_VERTEX),
+             (ctx.buffer(mesh.normals.astype("f4").tobytes()), "3f", constants.SHADER_INPUT_NORMAL)])
+    camera = scene.get_pool(component_type=constants.COMPONENT_TYPE_CAMERA)[camera_uid]
+    camera.update_viewport(window_size=(64, 64))
+    TransformSystem(logger=logging.getLogger("test_logger"), scene=scene, event_publisher=None,
+                    action_publisher=None, data_manager=None, parameters={}).update(elapsed_time=0.0, context=None)
+
+    materials_ubo = ctx.buffer(reserve=constants.SCENE_MATERIAL_STRUCT_SIZE_BYTES * constants.SCENE_MAX_NUM_MATERIALS)
+    materials_ubo.bind_to_uniform_block(binding=constants.UBO_BINDING_MATERIALS)
+    point_lights_ubo = ctx.buffer(reserve=constants.SCENE_POINT_LIGHT_STRUCT_SIZE_BYTES *
+                                  constants.SCENE_MAX_NUM_POINT_LIGHTS)
+    point_lights_ubo.bind_to_uniform_block(binding=constants.UBO_BINDING_POINT_LIGHTS)
+    instance_buffer = InstanceBuffer(ctx=ctx, initial_num_instances=1)
+    frustum_culler = FrustumCuller()
+    frustum_culler.update(scene=scene)
+
+    forward_pass = RenderPassForward(ctx=ctx, shader_program_library=shader_program_library)
+    forward_pass.create_framebuffers(window_size=(64, 64))
+    forward_pass.gamma_correction_enabled = False
+    forward_pass.render(scene=scene, materials_ubo=materials_ubo, point_lights_ubo=point_lights_ubo,
+                        instance_buffer=instance_buffer, frustum_culler=frustum_culler, selected_entity_uid=-1)
+
+    assert forward_pass.num_meshes_culled == 1
+    assert forward_pass.num_draw_calls == 3
+    assert forward_pass.num_program_changes == 1
+    assert forward_pass.num_material_changes == 3
+    assert forward_pass.num_vao_changes == 3
+
+    # The transparent box was drawn last, over the blue one, and did not hide it from the depth test
+    color = np.frombuffer(forward_pass.texture_color.read(), dtype=np.uint8).reshape((64, 64, 4))
+    np.testing.assert_allclose(color[32, 32, :3], [128, 0, 128], atol=2)
+
+    # Without frustum culling, the pass doesn't need a culler that was updated this frame
+    forward_pass.frustum_culling_enabled = False
+    forward_pass.render(scene=scene, materials_ubo=materials_ubo, point_lights_ubo=point_lights_ubo,
+                        instance_buffer=instance_buffer, frustum_culler=FrustumCuller(), selected_entity_uid=-1)
+    assert forward_pass.num_meshes_culled == 0
+    assert forward_pass.num_draw_calls == 4
+    color = np.frombuffer(forward_pass.texture_color.read(), dtype=np.uint8).reshape((64, 64, 4))
+    np.testing.assert_allclose(color[32, 32, :3], [128, 0, 128], atol=2)
+
+    forward_pass.release()
+    instance_buffer.release()
+    ctx.release()